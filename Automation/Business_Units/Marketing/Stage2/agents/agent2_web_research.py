@@ -2,30 +2,57 @@
 Performs external research to validate and enhance use case enrichment
 """
 import pandas as pd
-import time
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Callable, Optional
 import sys, os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import ANTHROPIC_API_URL, WORKSPACE_ID, MODEL, WEB_SEARCH_MAX_USES
+from config import (
+    ANTHROPIC_API_URL,
+    WORKSPACE_ID,
+    MODEL,
+    WEB_SEARCH_MAX_USES,
+    TOKENS_PER_MINUTE,
+    RESPONSE_CACHE_PATH,
+    RESPONSE_CACHE_TTL_SECONDS,
+    RESPONSE_CACHE_MAX_MB,
+    RESPONSE_CACHE_BYPASS,
+    RESPONSE_CACHE_REFRESH,
+    MAX_CONCURRENT_REQUESTS,
+    MAX_RETRIES
+)
 from utils.api_client import get_api_client
+from utils.response_cache import get_response_cache
+from utils.scheduler import ConcurrentScheduler
+from utils.batch_client import BatchRunner
+from utils.checkpoint import CheckpointStore
+
+RESEARCH_MAX_TOKENS = 3000
+
+# Research sub-queries per use case, in output order
+RESEARCH_TYPES = ["competitor_intelligence", "vendor_solutions", "industry_benchmarks"]
 
 
 class WebResearchAgent:
     """Agent responsible for web research and competitive intelligence"""
 
-    def __init__(self):
-        self.api_client = get_api_client(WORKSPACE_ID, ANTHROPIC_API_URL)
-
-    def research_competitor_intelligence(
+    def __init__(self, max_concurrency: int = MAX_CONCURRENT_REQUESTS):
+        response_cache = get_response_cache(
+            RESPONSE_CACHE_PATH,
+            RESPONSE_CACHE_TTL_SECONDS,
+            RESPONSE_CACHE_MAX_MB,
+            bypass=RESPONSE_CACHE_BYPASS,
+            refresh=RESPONSE_CACHE_REFRESH
+        )
+        self.api_client = get_api_client(WORKSPACE_ID, ANTHROPIC_API_URL, TOKENS_PER_MINUTE, response_cache)
+        self.max_concurrency = max_concurrency
+
+    def _competitor_prompt(
         self,
         use_case_name: str,
         use_case_description: str,
         bu_context: str
-    ) -> Dict[str, Any]:
-        """Research competitive landscape for a use case"""
-        print(f"  Researching competitive intelligence for: {use_case_name}")
-
-        prompt = f"""You are a competitive intelligence researcher. Research and provide:
+    ) -> str:
+        """Build the competitive intelligence research prompt"""
+        return f"""You are a competitive intelligence researcher. Research and provide:
 
 USE CASE: {use_case_name}
 DESCRIPTION: {use_case_description}
@@ -40,47 +67,14 @@ Research and provide:
 
 Format your response as structured JSON with keys: competitors, examples, positioning, sources"""
 
-        try:
-            message = self.api_client.create_message(
-                model=MODEL,
-                max_tokens=3000,
-                messages=[{"role": "user", "content": prompt}],
-                tools=[{
-                    "type": "web_search_20250305",
-                    "name": "web_search",
-                    "max_uses": WEB_SEARCH_MAX_USES
-                }]
-            )
-
-            response_text = ""
-            for block in message.content:
-                if hasattr(block, 'text'):
-                    response_text += block.text
-
-            return {
-                "success": True,
-                "data": response_text,
-                "confidence": "High",  # Could be enhanced with actual confidence scoring
-                "sources": self._extract_sources(message)
-            }
-        except Exception as e:
-            print(f"    ✗ Error in competitive research: {e}")
-            return {
-                "success": False,
-                "error": str(e),
-                "confidence": "Low"
-            }
-
-    def research_vendor_solutions(
+    def _vendor_prompt(
         self,
         use_case_name: str,
         ai_tools: str,
         bu_context: str
-    ) -> Dict[str, Any]:
-        """Research vendor solutions and technologies"""
-        print(f"  Researching vendor solutions for: {use_case_name}")
-
-        prompt = f"""You are a technology vendor analyst. Research and provide:
+    ) -> str:
+        """Build the vendor solutions research prompt"""
+        return f"""You are a technology vendor analyst. Research and provide:
 
 USE CASE: {use_case_name}
 CURRENT AI TOOLS: {ai_tools}
@@ -96,46 +90,13 @@ Research and provide:
 
 Format as structured JSON with keys: vendors, comparisons, case_studies, market_leaders, sources"""
 
-        try:
-            message = self.api_client.create_message(
-                model=MODEL,
-                max_tokens=3000,
-                messages=[{"role": "user", "content": prompt}],
-                tools=[{
-                    "type": "web_search_20250305",
-                    "name": "web_search",
-                    "max_uses": WEB_SEARCH_MAX_USES
-                }]
-            )
-
-            response_text = ""
-            for block in message.content:
-                if hasattr(block, 'text'):
-                    response_text += block.text
-
-            return {
-                "success": True,
-                "data": response_text,
-                "confidence": "High",
-                "sources": self._extract_sources(message)
-            }
-        except Exception as e:
-            print(f"    ✗ Error in vendor research: {e}")
-            return {
-                "success": False,
-                "error": str(e),
-                "confidence": "Low"
-            }
-
-    def research_industry_benchmarks(
+    def _benchmark_prompt(
         self,
         use_case_name: str,
         use_case_description: str
-    ) -> Dict[str, Any]:
-        """Research industry benchmarks and metrics"""
-        print(f"  Researching industry benchmarks for: {use_case_name}")
-
-        prompt = f"""You are an industry analyst. Research and provide quantified benchmarks:
+    ) -> str:
+        """Build the industry benchmarks research prompt"""
+        return f"""You are an industry analyst. Research and provide quantified benchmarks:
 
 USE CASE: {use_case_name}
 DESCRIPTION: {use_case_description}
@@ -150,36 +111,91 @@ IMPORTANT: Include specific numbers, percentages, dollar amounts with sources.
 
 Format as structured JSON with keys: metrics, reports, best_practices, trends, sources"""
 
+    @staticmethod
+    def _research_params(prompt: str) -> Dict[str, Any]:
+        """Messages API parameters for one web-search research call"""
+        return {
+            "model": MODEL,
+            "max_tokens": RESEARCH_MAX_TOKENS,
+            "messages": [{"role": "user", "content": prompt}],
+            "tools": [{
+                "type": "web_search_20250305",
+                "name": "web_search",
+                "max_uses": WEB_SEARCH_MAX_USES
+            }]
+        }
+
+    def _call_research(self, prompt: str) -> Dict[str, Any]:
+        """
+        Run one web-search research call (admitted by the client's shared token budget)
+
+        Raises on API errors so the scheduler can retry.
+        """
+        message = self.api_client.create_message(**self._research_params(prompt))
+        return self._research_result(message)
+
+    def _research_result(self, message) -> Dict[str, Any]:
+        """Build the research result from a response message"""
+        response_text = ""
+        for block in message.content:
+            if hasattr(block, 'text'):
+                response_text += block.text
+
+        return {
+            "success": True,
+            "data": response_text,
+            "confidence": "High",  # Could be enhanced with actual confidence scoring
+            "sources": self._extract_sources(message)
+        }
+
+    @staticmethod
+    def _research_failure(error: Exception, index: Optional[int] = None) -> Dict[str, Any]:
+        """Result recorded for a research call that failed after all retries (index: scheduler task index)"""
+        task = f" task {index + 1}" if index is not None else ""
+        print(f"    ✗ Error in research{task}: {error}")
+        return {
+            "success": False,
+            "error": str(error),
+            "confidence": "Low"
+        }
+
+    def research_competitor_intelligence(
+        self,
+        use_case_name: str,
+        use_case_description: str,
+        bu_context: str
+    ) -> Dict[str, Any]:
+        """Research competitive landscape for a use case"""
+        print(f"  Researching competitive intelligence for: {use_case_name}")
+        try:
+            return self._call_research(self._competitor_prompt(use_case_name, use_case_description, bu_context))
+        except Exception as e:
+            return self._research_failure(e)
+
+    def research_vendor_solutions(
+        self,
+        use_case_name: str,
+        ai_tools: str,
+        bu_context: str
+    ) -> Dict[str, Any]:
+        """Research vendor solutions and technologies"""
+        print(f"  Researching vendor solutions for: {use_case_name}")
+        try:
+            return self._call_research(self._vendor_prompt(use_case_name, ai_tools, bu_context))
+        except Exception as e:
+            return self._research_failure(e)
+
+    def research_industry_benchmarks(
+        self,
+        use_case_name: str,
+        use_case_description: str
+    ) -> Dict[str, Any]:
+        """Research industry benchmarks and metrics"""
+        print(f"  Researching industry benchmarks for: {use_case_name}")
         try:
-            message = self.api_client.create_message(
-                model=MODEL,
-                max_tokens=3000,
-                messages=[{"role": "user", "content": prompt}],
-                tools=[{
-                    "type": "web_search_20250305",
-                    "name": "web_search",
-                    "max_uses": WEB_SEARCH_MAX_USES
-                }]
-            )
-
-            response_text = ""
-            for block in message.content:
-                if hasattr(block, 'text'):
-                    response_text += block.text
-
-            return {
-                "success": True,
-                "data": response_text,
-                "confidence": "High",
-                "sources": self._extract_sources(message)
-            }
+            return self._call_research(self._benchmark_prompt(use_case_name, use_case_description))
         except Exception as e:
-            print(f"    ✗ Error in benchmark research: {e}")
-            return {
-                "success": False,
-                "error": str(e),
-                "confidence": "Low"
-            }
+            return self._research_failure(e)
 
     def _extract_sources(self, message) -> List[str]:
         """Extract source URLs from web search results"""
@@ -188,6 +204,138 @@ Format as structured JSON with keys: metrics, reports, best_practices, trends, s
         # This is a placeholder - actual implementation would parse tool use results
         return sources
 
+    def _research_prompts(
+        self,
+        use_case: Dict[str, Any],
+        bu_intelligence: str
+    ) -> List[str]:
+        """Build the research prompts for one use case (RESEARCH_TYPES order)"""
+        name = use_case["original_name"]
+        return [
+            self._competitor_prompt(name, use_case["original_description"], bu_intelligence),
+            self._vendor_prompt(name, use_case["ai_tools"], bu_intelligence),
+            self._benchmark_prompt(name, use_case["original_description"])
+        ]
+
+    @staticmethod
+    def _group_research(
+        use_cases: List[Dict[str, Any]],
+        results: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Regroup flat results (RESEARCH_TYPES order per use case) per use case"""
+        all_research = []
+        for i, use_case in enumerate(use_cases):
+            research = {"use_case_name": use_case["original_name"]}
+            for j, research_type in enumerate(RESEARCH_TYPES):
+                research[research_type] = results[i * len(RESEARCH_TYPES) + j]
+            all_research.append(research)
+        return all_research
+
+    def _research_all(
+        self,
+        use_cases: List[Dict[str, Any]],
+        bu_intelligence: str,
+        batch_runner: Optional[BatchRunner] = None,
+        checkpoint: Optional[CheckpointStore] = None,
+        progress_callback: Optional[Callable[[int, int, Dict[str, Any]], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Research all use cases (concurrently, or as one batch)
+
+        With a checkpoint, sub-queries completed in an earlier run are
+        restored instead of re-run, and each new success is recorded as soon
+        as it finishes.
+        """
+        prompts = []
+        for use_case in use_cases:
+            prompts.extend(self._research_prompts(use_case, bu_intelligence))
+        keys = [CheckpointStore.content_hash(self._research_params(prompt)) for prompt in prompts]
+
+        results: List[Optional[Dict[str, Any]]] = [
+            checkpoint.get(key) if checkpoint is not None else None for key in keys
+        ]
+        pending = [i for i, result in enumerate(results) if result is None]
+        if len(pending) < len(prompts):
+            print(f"  [RESUME] {len(prompts) - len(pending)}/{len(prompts)} research queries restored from checkpoint")
+
+        completed = len(prompts) - len(pending)
+
+        def record(index: int, result: Dict[str, Any]):
+            nonlocal completed
+            results[index] = result
+            if checkpoint is not None:
+                checkpoint.append(keys[index], result)
+
+            completed += 1
+            if progress_callback:
+                progress_callback(completed, len(prompts), {
+                    "use_case": use_cases[index // len(RESEARCH_TYPES)]["original_name"],
+                    "research_type": RESEARCH_TYPES[index % len(RESEARCH_TYPES)],
+                    "success": bool(result.get("success"))
+                })
+
+        if batch_runner is not None:
+            self._research_batch(prompts, pending, batch_runner, record)
+        else:
+            self._research_concurrent(use_cases, prompts, pending, record)
+
+        return self._group_research(use_cases, results)
+
+    def _research_concurrent(
+        self,
+        use_cases: List[Dict[str, Any]],
+        prompts: List[str],
+        pending: List[int],
+        record: Callable[[int, Dict[str, Any]], None]
+    ):
+        """
+        Run the pending research queries concurrently
+
+        All sub-queries for all use cases share one scheduler, so throughput
+        is bounded by the token budget rather than the number of use cases.
+        """
+        tasks = [lambda prompt=prompts[i]: self._call_research(prompt) for i in pending]
+
+        def on_progress(completed: int, total: int, index: int, result: Dict[str, Any]):
+            query_index = pending[index]
+            record(query_index, result)
+            use_case = use_cases[query_index // len(RESEARCH_TYPES)]
+            research_type = RESEARCH_TYPES[query_index % len(RESEARCH_TYPES)]
+            status = "[OK]" if result.get("success") else "[ERROR]"
+            print(f"  {status} ({completed}/{total}) {research_type} for: {use_case['original_name']}")
+
+        scheduler = ConcurrentScheduler(
+            max_workers=self.max_concurrency,
+            max_retries=MAX_RETRIES,
+            on_progress=on_progress
+        )
+        scheduler.run(tasks, on_error=self._research_failure)
+
+    def _research_batch(
+        self,
+        prompts: List[str],
+        pending: List[int],
+        batch_runner: BatchRunner,
+        record: Callable[[int, Dict[str, Any]], None]
+    ):
+        """
+        Run the pending research queries as one Message Batches job
+
+        Custom IDs are research-{query index}.
+        """
+        requests = [
+            {"custom_id": f"research-{i}", "params": self._research_params(prompts[i])}
+            for i in pending
+        ]
+        batch_results = batch_runner.run(requests)
+
+        for i in pending:
+            outcome = batch_results[f"research-{i}"]
+            if outcome["success"]:
+                record(i, self._research_result(outcome["message"]))
+            else:
+                record(i, self._research_failure(Exception(outcome["error"])))
+
     def research_use_case(
         self,
         use_case: Dict[str, Any],
@@ -195,29 +343,27 @@ Format as structured JSON with keys: metrics, reports, best_practices, trends, s
     ) -> Dict[str, Any]:
         """Perform comprehensive research for a single use case"""
         print(f"\nResearching: {use_case['original_name']}")
+        return self._research_all([use_case], bu_intelligence)[0]
 
-        research_results = {
-            "use_case_name": use_case["original_name"],
-            "competitor_intelligence": self.research_competitor_intelligence(
-                use_case["original_name"],
-                use_case["original_description"],
-                bu_intelligence
-            ),
-            "vendor_solutions": self.research_vendor_solutions(
-                use_case["original_name"],
-                use_case["ai_tools"],
-                bu_intelligence
-            ),
-            "industry_benchmarks": self.research_industry_benchmarks(
-                use_case["original_name"],
-                use_case["original_description"]
-            )
-        }
-
-        return research_results
-
-    def run(self, ingestion_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute web research for all use cases"""
+    def run(
+        self,
+        ingestion_data: Dict[str, Any],
+        batch_runner: Optional[BatchRunner] = None,
+        checkpoint: Optional[CheckpointStore] = None,
+        progress_callback: Optional[Callable[[int, int, Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Execute web research for all use cases
+
+        Args:
+            ingestion_data: Output from Agent 1
+            batch_runner: If given, submit all research calls as one
+                Message Batches job instead of running them concurrently
+            checkpoint: Optional per-query checkpoint (skips completed queries)
+            progress_callback: Optional callback(completed, total, info) called
+                as each research query finishes; info has use_case,
+                research_type and success
+        """
         print("=" * 80)
         print("AGENT 2: WEB RESEARCH & COMPETITIVE INTELLIGENCE")
         print("=" * 80)
@@ -225,15 +371,11 @@ Format as structured JSON with keys: metrics, reports, best_practices, trends, s
         use_cases = ingestion_data["use_cases"]
         bu_intelligence = ingestion_data["bu_intelligence"]
 
-        all_research = []
-        for i, use_case in enumerate(use_cases):
-            research = self.research_use_case(use_case, bu_intelligence)
-            all_research.append(research)
-
-            # Add delay between use cases to avoid rate limiting
-            if i < len(use_cases) - 1:  # Don't wait after the last one
-                print(f"  [THROTTLE] Waiting 10s before next research to avoid rate limits...")
-                time.sleep(10)
+        if batch_runner is not None:
+            print(f"Researching {len(use_cases)} use cases ({len(use_cases) * len(RESEARCH_TYPES)} queries as one batch)")
+        else:
+            print(f"Researching {len(use_cases)} use cases ({len(use_cases) * len(RESEARCH_TYPES)} queries, up to {self.max_concurrency} in parallel)")
+        all_research = self._research_all(use_cases, bu_intelligence, batch_runner, checkpoint, progress_callback)
 
         print("\n[OK] WEB RESEARCH COMPLETE")
         print("=" * 80)
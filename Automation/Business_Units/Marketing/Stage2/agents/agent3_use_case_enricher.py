@@ -2,8 +2,7 @@
 Enriches each use case with all required sections using BU Intelligence context and research data
 """
 import json
-import time
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Callable, Optional
 import sys, os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import (
@@ -11,16 +10,42 @@ from config import (
     WORKSPACE_ID,
     MODEL,
     SUB_HEADINGS,
-    MAX_TOKENS
+    MAX_TOKENS,
+    TOKENS_PER_MINUTE,
+    RESPONSE_CACHE_PATH,
+    RESPONSE_CACHE_TTL_SECONDS,
+    RESPONSE_CACHE_MAX_MB,
+    RESPONSE_CACHE_BYPASS,
+    RESPONSE_CACHE_REFRESH,
+    MAX_CONCURRENT_REQUESTS,
+    MAX_RETRIES,
+    REQUEST_TIMEOUT_SECONDS
 )
 from utils.api_client import get_api_client
+from utils.response_cache import get_response_cache
+from utils.scheduler import ConcurrentScheduler
+from utils.batch_client import BatchRunner
+from utils.checkpoint import CheckpointStore
 
 
 class UseCaseEnricherAgent:
     """Agent responsible for enriching use cases with consulting-grade content"""
 
-    def __init__(self):
-        self.api_client = get_api_client(WORKSPACE_ID, ANTHROPIC_API_URL)
+    def __init__(
+        self,
+        max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+        request_timeout: float = REQUEST_TIMEOUT_SECONDS
+    ):
+        response_cache = get_response_cache(
+            RESPONSE_CACHE_PATH,
+            RESPONSE_CACHE_TTL_SECONDS,
+            RESPONSE_CACHE_MAX_MB,
+            bypass=RESPONSE_CACHE_BYPASS,
+            refresh=RESPONSE_CACHE_REFRESH
+        )
+        self.api_client = get_api_client(WORKSPACE_ID, ANTHROPIC_API_URL, TOKENS_PER_MINUTE, response_cache)
+        self.max_concurrency = max_concurrency
+        self.request_timeout = request_timeout
 
     def _create_enrichment_prompt(
         self,
@@ -105,6 +130,97 @@ Begin JSON response:"""
 
         return response_text
 
+    @staticmethod
+    def _enrichment_params(prompt: str) -> Dict[str, Any]:
+        """Messages API parameters for one enrichment call"""
+        # Use reduced max_tokens to stay under rate limit
+        return {
+            "model": MODEL,
+            "max_tokens": 4000,  # Reduced from MAX_TOKENS to avoid rate limits
+            "messages": [{"role": "user", "content": prompt}]
+        }
+
+    @staticmethod
+    def _message_text(message) -> str:
+        """Concatenate the text blocks of a response message"""
+        response_text = ""
+        for block in message.content:
+            if hasattr(block, 'text'):
+                response_text += block.text
+        return response_text
+
+    def _request_enrichment(self, prompt: str) -> str:
+        """
+        Call the API for one enrichment and return the response text
+
+        Raises on API errors and timeouts so the scheduler can retry.
+        """
+        message = self.api_client.create_message(
+            **self._enrichment_params(prompt),
+            timeout=self.request_timeout
+        )
+        return self._message_text(message)
+
+    def _parse_enrichment(self, use_case: Dict[str, Any], response_text: str) -> Dict[str, Any]:
+        """Parse an enrichment response into the enriched_data structure"""
+        # Clean and extract JSON
+        cleaned_json = self._clean_json_response(response_text)
+
+        # Try to parse as JSON
+        parse_error = None
+        try:
+            enriched_data = json.loads(cleaned_json)
+            print(f"    [OK] Successfully parsed JSON response")
+        except json.JSONDecodeError as e:
+            parse_error = str(e)
+            print(f"    ! Warning: Could not parse JSON: {e}")
+            print(f"    ! Response preview: {response_text[:300]}...")
+
+            # Create default structure with error info
+            enriched_data = {
+                "enriched_name": use_case['original_name'],
+                "detailed_description": f"ERROR: Failed to parse LLM response.\n\nRaw response:\n{response_text[:800]}",
+                "business_outcomes": "ERROR: JSON parsing failed",
+                "industry_alignment": "ERROR: JSON parsing failed",
+                "implementation": "ERROR: JSON parsing failed",
+                "kpis": "ERROR: JSON parsing failed",
+                "annotation": f"Source: Parse Error\nConfidence Level: Low\nRationale: Could not extract JSON from LLM response\nInformation Gaps: Full re-enrichment needed"
+            }
+
+        # Validate required fields
+        required_fields = ['enriched_name', 'detailed_description', 'business_outcomes',
+                          'industry_alignment', 'implementation', 'kpis', 'annotation']
+        for field in required_fields:
+            if field not in enriched_data:
+                enriched_data[field] = f"ERROR: Missing field {field}"
+
+        result = {
+            "success": True,
+            "original_use_case": use_case,
+            "enriched_data": enriched_data
+        }
+        if parse_error:
+            result["parse_error"] = parse_error
+        return result
+
+    def _enrich(self, use_case: Dict[str, Any], prompt: str) -> Dict[str, Any]:
+        """Request and parse one enrichment (an unparsable response is dropped from the response cache)"""
+        result = self._parse_enrichment(use_case, self._request_enrichment(prompt))
+        if "parse_error" in result:
+            # Not checkpointed either, so a retry or resume asks the API again
+            self.api_client.invalidate_cached(**self._enrichment_params(prompt))
+        return result
+
+    @staticmethod
+    def _enrichment_failure(use_case: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+        """Result recorded for an enrichment that failed after all retries"""
+        print(f"    [ERROR] Error enriching use case: {error}")
+        return {
+            "success": False,
+            "original_use_case": use_case,
+            "error": str(error)
+        }
+
     def enrich_use_case(
         self,
         use_case: Dict[str, Any],
@@ -117,67 +233,97 @@ Begin JSON response:"""
         prompt = self._create_enrichment_prompt(use_case, bu_intelligence, research_data)
 
         try:
-            # Use reduced max_tokens to stay under rate limit
-            message = self.api_client.create_message(
-                model=MODEL,
-                max_tokens=4000,  # Reduced from MAX_TOKENS to avoid rate limits
-                messages=[{"role": "user", "content": prompt}]
-            )
-
-            response_text = ""
-            for block in message.content:
-                if hasattr(block, 'text'):
-                    response_text += block.text
-
-            # Clean and extract JSON
-            cleaned_json = self._clean_json_response(response_text)
-
-            # Try to parse as JSON
-            try:
-                enriched_data = json.loads(cleaned_json)
-                print(f"    [OK] Successfully parsed JSON response")
-            except json.JSONDecodeError as e:
-                print(f"    ! Warning: Could not parse JSON: {e}")
-                print(f"    ! Response preview: {response_text[:300]}...")
-
-                # Create default structure with error info
-                enriched_data = {
-                    "enriched_name": use_case['original_name'],
-                    "detailed_description": f"ERROR: Failed to parse LLM response.\n\nRaw response:\n{response_text[:800]}",
-                    "business_outcomes": "ERROR: JSON parsing failed",
-                    "industry_alignment": "ERROR: JSON parsing failed",
-                    "implementation": "ERROR: JSON parsing failed",
-                    "kpis": "ERROR: JSON parsing failed",
-                    "annotation": f"Source: Parse Error\nConfidence Level: Low\nRationale: Could not extract JSON from LLM response\nInformation Gaps: Full re-enrichment needed"
-                }
-
-            # Validate required fields
-            required_fields = ['enriched_name', 'detailed_description', 'business_outcomes',
-                              'industry_alignment', 'implementation', 'kpis', 'annotation']
-            for field in required_fields:
-                if field not in enriched_data:
-                    enriched_data[field] = f"ERROR: Missing field {field}"
-
-            return {
-                "success": True,
-                "original_use_case": use_case,
-                "enriched_data": enriched_data
-            }
-
+            return self._enrich(use_case, prompt)
         except Exception as e:
-            print(f"    [ERROR] Error enriching use case: {e}")
-            return {
-                "success": False,
-                "original_use_case": use_case,
-                "error": str(e)
-            }
+            return self._enrichment_failure(use_case, e)
+
+    def _enrich_batch(
+        self,
+        use_cases: List[Dict[str, Any]],
+        prompts: List[str],
+        pending: List[int],
+        batch_runner: BatchRunner,
+        record: Callable[[int, Dict[str, Any]], None]
+    ):
+        """
+        Enrich the pending use cases as one Message Batches job
+
+        Custom IDs are enrich-{use case index}.
+        """
+        requests = [
+            {"custom_id": f"enrich-{i}", "params": self._enrichment_params(prompts[i])}
+            for i in pending
+        ]
+        batch_results = batch_runner.run(requests)
+
+        for i in pending:
+            outcome = batch_results[f"enrich-{i}"]
+            if outcome["success"]:
+                record(i, self._parse_enrichment(use_cases[i], self._message_text(outcome["message"])))
+            else:
+                record(i, self._enrichment_failure(use_cases[i], Exception(outcome["error"])))
+
+    def _enrich_concurrent(
+        self,
+        use_cases: List[Dict[str, Any]],
+        prompts: List[str],
+        pending: List[int],
+        record: Callable[[int, Dict[str, Any]], None]
+    ):
+        """
+        Enrich the pending use cases concurrently
+
+        Admission is gated by the API client's token budget.
+        """
+        def make_task(use_case: Dict[str, Any], prompt: str) -> Callable[[], Dict[str, Any]]:
+            def task():
+                print(f"  Enriching: {use_case['original_name']}")
+                return self._enrich(use_case, prompt)
+            return task
+
+        tasks = [make_task(use_cases[i], prompts[i]) for i in pending]
+
+        def on_progress(completed: int, total: int, index: int, result: Dict[str, Any]):
+            record(pending[index], result)
+
+        scheduler = ConcurrentScheduler(
+            max_workers=self.max_concurrency,
+            max_retries=MAX_RETRIES,
+            on_progress=on_progress
+        )
+        scheduler.run(
+            tasks,
+            on_error=lambda error, index: self._enrichment_failure(use_cases[pending[index]], error)
+        )
+
+        # Rate limiting is handled by the API client's shared token bucket
+        metrics = self.api_client.get_rate_limit_metrics()
+        print(f"\n  [THROTTLE] {metrics['throttled_calls']}/{metrics['calls']} calls waited for token budget (total {metrics['total_wait_seconds']:.1f}s)")
 
     def run(
         self,
         ingestion_data: Dict[str, Any],
-        research_data: Dict[str, Any]
+        research_data: Dict[str, Any],
+        progress_callback: Optional[Callable[[int, int, Dict[str, Any]], None]] = None,
+        batch_runner: Optional[BatchRunner] = None,
+        checkpoint: Optional[CheckpointStore] = None
     ) -> Dict[str, Any]:
-        """Execute enrichment for all use cases"""
+        """
+        Execute enrichment for all use cases
+
+        Use cases are enriched concurrently (admission is gated by the API
+        client's token budget); results keep the input order.
+
+        Args:
+            ingestion_data: Agent 1 output
+            research_data: Agent 2 output
+            progress_callback: Optional callback(completed, total, result)
+                called as each use case finishes (e.g. to forward to WebSocket clients)
+            batch_runner: If given, submit all enrichments as one Message
+                Batches job instead of running them concurrently
+            checkpoint: Optional per-use-case checkpoint; use cases whose
+                inputs match a completed record are restored, not re-enriched
+        """
         print("=" * 80)
         print("AGENT 3: USE CASE ENRICHER")
         print("=" * 80)
@@ -186,21 +332,42 @@ Begin JSON response:"""
         bu_intelligence = ingestion_data["bu_intelligence"]
         research_results = research_data.get("research_results", [])
 
-        enriched_use_cases = []
+        prompts = []
         for i, use_case in enumerate(use_cases):
             # Match research data to use case
             research_for_case = research_results[i] if i < len(research_results) else {}
-
-            enriched = self.enrich_use_case(use_case, bu_intelligence, research_for_case)
-            enriched_use_cases.append(enriched)
-
-            # Add delay between use cases to avoid rate limiting
-            # With 4000 tokens output + ~2000 input = ~6000 tokens per call
-            # At 100k tokens/min limit, wait ~4 seconds between calls to be safe
-            # Use 30 seconds to be extra conservative and avoid rate limits
-            if i < len(use_cases) - 1:  # Don't wait after the last one
-                print(f"  [THROTTLE] Waiting 30s before next enrichment to avoid rate limits...")
-                time.sleep(30)
+            prompts.append(self._create_enrichment_prompt(use_case, bu_intelligence, research_for_case))
+        keys = [CheckpointStore.content_hash(self._enrichment_params(prompt)) for prompt in prompts]
+
+        enriched_use_cases: List[Optional[Dict[str, Any]]] = [
+            checkpoint.get(key) if checkpoint is not None else None for key in keys
+        ]
+        pending = [i for i, result in enumerate(enriched_use_cases) if result is None]
+        restored = len(use_cases) - len(pending)
+        if restored:
+            print(f"  [RESUME] {restored}/{len(use_cases)} use cases restored from checkpoint")
+
+        completed = restored
+
+        def record(index: int, result: Dict[str, Any]):
+            nonlocal completed
+            enriched_use_cases[index] = result
+            # Parse failures are not checkpointed so a resume retries them
+            if checkpoint is not None and "parse_error" not in result:
+                checkpoint.append(keys[index], result)
+
+            completed += 1
+            status = "[OK]" if result.get("success") else "[ERROR]"
+            print(f"  {status} ({completed}/{len(use_cases)}) {use_cases[index]['original_name']}")
+            if progress_callback:
+                progress_callback(completed, len(use_cases), result)
+
+        if batch_runner is not None:
+            print(f"Enriching {len(pending)} use cases as one batch")
+            self._enrich_batch(use_cases, prompts, pending, batch_runner, record)
+        else:
+            print(f"Enriching {len(pending)} use cases (up to {self.max_concurrency} in parallel)")
+            self._enrich_concurrent(use_cases, prompts, pending, record)
 
         print("\n[OK] USE CASE ENRICHMENT COMPLETE")
         print("=" * 80)
@@ -210,6 +377,5 @@ Begin JSON response:"""
             "total_enriched": len(enriched_use_cases)
         }
 
-
 if __name__ == "__main__":
     print("Use Case Enricher Agent - requires ingestion and research data to run")
@@ -7,6 +7,22 @@ from datetime import datetime
 import sys, os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import OUTPUT_PATH, OUTPUT_COLUMNS
+from utils.excel_export import export_rows
+
+# Column widths for the enriched output sheet
+COLUMN_WIDTHS = {
+    "Function": 15,
+    "Original Use Case Name": 30,
+    "Enriched Use Case Name": 30,
+    "Original Use Case Description": 40,
+    "Detailed Enriched Use Case Description": 60,
+    "Original Outcomes/Deliverable": 40,
+    "Enriched Business Outcomes/Deliverables": 60,
+    "Industry Alignment": 60,
+    "Implementation Considerations": 60,
+    "Suggested Success Metrics (KPIs)": 60,
+    "Information Gaps & Annotation": 60
+}
 
 
 class OutputFormatterAgent:
@@ -114,49 +130,18 @@ class OutputFormatterAgent:
         print(f"Saving to: {OUTPUT_PATH}")
 
         try:
-            # Create Excel writer with openpyxl engine for formatting
-            with pd.ExcelWriter(OUTPUT_PATH, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Enriched Use Cases', index=False)
-
-                # Get workbook and worksheet
-                workbook = writer.book
-                worksheet = writer.sheets['Enriched Use Cases']
-
-                # Set column widths
-                column_widths = {
-                    'A': 15,  # Function
-                    'B': 30,  # Original Use Case Name
-                    'C': 30,  # Enriched Use Case Name
-                    'D': 40,  # Original Use Case Description
-                    'E': 60,  # Detailed Enriched Use Case Description
-                    'F': 40,  # Original Outcomes/Deliverable
-                    'G': 60,  # Enriched Business Outcomes/Deliverables
-                    'H': 60,  # Industry Alignment
-                    'I': 60,  # Implementation Considerations
-                    'J': 60,  # Suggested Success Metrics (KPIs)
-                    'K': 60   # Information Gaps & Annotation
-                }
-
-                for col, width in column_widths.items():
-                    worksheet.column_dimensions[col].width = width
-
-                # Set row height and text wrapping
-                for row in worksheet.iter_rows(min_row=2, max_row=worksheet.max_row):
-                    for cell in row:
-                        cell.alignment = cell.alignment.copy(wrap_text=True, vertical='top')
-
-                # Freeze header row
-                worksheet.freeze_panes = 'A2'
-
-                # Style header row
-                from openpyxl.styles import Font, PatternFill
-                header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
-                header_font = Font(bold=True, color='FFFFFF')
-
-                for cell in worksheet[1]:
-                    cell.fill = header_fill
-                    cell.font = header_font
+            # Stream rows (constant memory); formats are applied per column, not per cell
+            rows_written = export_rows(
+                OUTPUT_PATH,
+                df.itertuples(index=False, name=None),
+                list(df.columns),
+                sheet_name='Enriched Use Cases',
+                header_format={'bold': True, 'font_color': '#FFFFFF', 'bg_color': '#366092'},
+                column_format={'text_wrap': True, 'valign': 'top'},
+                widths=COLUMN_WIDTHS
+            )
 
+            print(f"✓ Wrote {rows_written} rows")
             print(f"✓ Excel file saved successfully")
             return OUTPUT_PATH
 
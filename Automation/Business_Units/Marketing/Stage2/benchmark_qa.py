@@ -0,0 +1,160 @@
+"""Benchmark for the Agent 4 QA validation engine
+Validates synthetic enriched use cases with the previous per-check regex
+implementation and with the compiled engine (in-process and multi-process),
+checks that both produce the same results, and prints per-rule timings.
+
+Usage:
+    python benchmark_qa.py [--count 1000] [--workers 4] [--chunk-size 250] [--seed 7]
+"""
+import re
+import sys
+import time
+import random
+import argparse
+from typing import Any, Dict, List
+
+from utils.qa_engine import SECTION_RULES, QAEngine, format_timings
+
+VENDORS = ["Salesforce", "Adobe", "HubSpot", "Google Cloud", "Microsoft", "Oracle", "Marketo", "Thomson Reuters"]
+FILLER = [
+    "the team reduced manual effort across campaigns",
+    "analysts now review fewer drafts each cycle",
+    "content velocity improved for regional launches",
+    "adoption grew steadily after the pilot phase",
+    "governance reviews were folded into the workflow",
+]
+
+
+def synthetic_section(rng: random.Random, sub_headings, sentences: int = 6) -> str:
+    """Build a section with (usually) all sub-headings and a mix of metrics and names"""
+    parts = []
+    for heading in sub_headings:
+        if rng.random() < 0.1:
+            continue  # Occasionally drop a sub-heading so some use cases fail
+        body = []
+        for _ in range(sentences):
+            sentence = rng.choice(FILLER)
+            roll = rng.random()
+            if roll < 0.25:
+                sentence += f" by {rng.randint(5, 60)}%"
+            elif roll < 0.4:
+                sentence += f", saving ${rng.randint(10, 900)}K per year"
+            elif roll < 0.55:
+                sentence += f" within {rng.randint(2, 12)} weeks"
+            elif roll < 0.7:
+                sentence = f"{rng.choice(VENDORS)} and {rng.choice(VENDORS)} report that {sentence}"
+            body.append(sentence[0].upper() + sentence[1:] + ".")
+        parts.append(f"{heading}:\n" + " ".join(body))
+    return "\n\n".join(parts)
+
+
+def synthetic_use_cases(count: int, seed: int) -> List[Dict[str, Any]]:
+    """Generate enriched use cases shaped like Agent 3 output"""
+    rng = random.Random(seed)
+    use_cases = []
+    for i in range(count):
+        enriched_data = {
+            field: synthetic_section(rng, headings)
+            for field, _, _, headings, _ in SECTION_RULES if headings
+        }
+        annotation = "Information Gaps: pricing data unavailable."
+        if rng.random() < 0.8:
+            annotation += "\nSource: https://example.com/report-" + str(i) + "\nConfidence Level: Medium"
+        enriched_data["annotation"] = annotation
+
+        use_cases.append({
+            "original_use_case": {"original_name": f"Synthetic Use Case {i + 1}"},
+            "enriched_data": enriched_data,
+            "success": rng.random() > 0.02
+        })
+    return use_cases
+
+
+def legacy_validate(enriched: Dict[str, Any]) -> Dict[str, Any]:
+    """Previous implementation: one uncompiled regex per check, one section at a time"""
+    use_case_name = enriched['original_use_case']['original_name']
+    if not enriched.get('success', False):
+        return {"use_case_name": use_case_name, "passed": False, "error": enriched.get('error', 'Unknown error')}
+
+    enriched_data = enriched.get('enriched_data', {})
+    validations = {"use_case_name": use_case_name, "passed": True, "issues": [], "warnings": []}
+
+    for field, label, missing_message, sub_headings, checks in SECTION_RULES:
+        text = enriched_data.get(field, '')
+        if not text:
+            validations["issues"].append(missing_message)
+            validations["passed"] = False
+            continue
+
+        missing = [h for h in sub_headings if h not in text and f"{h}:" not in text]
+        if missing:
+            validations["issues"].append(f"Missing sub-headings in {label}: {missing}")
+            validations["passed"] = False
+
+        if "quantification" in checks:
+            quantified = (bool(re.search(r'\d+', text)) or bool(re.search(r'\d+%', text))
+                          or bool(re.search(r'\$\d+', text))
+                          or bool(re.search(r'\d+\s*(hour|day|week|month|year|minute|second)', text, re.IGNORECASE)))
+            if not quantified:
+                validations["warnings"].append(f"{label} lacks quantified metrics")
+        if "competitors" in checks:
+            names = set(re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b', text))
+            names -= {'The', 'This', 'These', 'Those', 'When', 'Where', 'What', 'Which'}
+            if len(names) < 2:
+                validations["warnings"].append(f"Only {len(names)} competitors/vendors identified (need 2-3)")
+        if "citations" in checks:
+            has_source = "Source:" in text or "source:" in text
+            has_confidence = "Confidence Level:" in text or "confidence" in text.lower()
+            if not (has_source and has_confidence):
+                validations["warnings"].append("Annotation missing proper source citations or confidence level")
+
+    return validations
+
+
+def timed(label: str, fn):
+    """Run fn once and print its wall time"""
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {elapsed * 1000:9.1f} ms")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the QA validation engine")
+    parser.add_argument("--count", type=int, default=1000, help="Synthetic use cases")
+    parser.add_argument("--workers", type=int, default=4, help="Processes for the parallel run")
+    parser.add_argument("--chunk-size", type=int, default=250, help="Use cases per worker task")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed")
+    args = parser.parse_args()
+
+    use_cases = synthetic_use_cases(args.count, args.seed)
+    engine = QAEngine()
+
+    print("=" * 80)
+    print(f"QA BENCHMARK: {args.count} synthetic enriched use cases")
+    print("=" * 80)
+
+    legacy, legacy_time = timed("legacy (per-check regex)", lambda: [legacy_validate(uc) for uc in use_cases])
+    (single, timings), single_time = timed("engine (1 process)", lambda: engine.validate_all(use_cases, 1))
+    (parallel, _), parallel_time = timed(f"engine ({args.workers} processes)",
+                                         lambda: engine.validate_all(use_cases, args.workers, args.chunk_size))
+
+    mismatches = sum(1 for a, b in zip(legacy, single) if a != b) + sum(1 for a, b in zip(single, parallel) if a != b)
+    passed = sum(1 for v in single if v["passed"])
+
+    print(f"\n  Speedup vs legacy: {legacy_time / single_time:.1f}x (1 process), "
+          f"{legacy_time / parallel_time:.1f}x ({args.workers} processes)")
+    print(f"  Passed: {passed}/{len(single)}  Result mismatches: {mismatches}")
+
+    print("\n[TIMING] Per-rule (1 process):")
+    for line in format_timings(timings):
+        print(f"    {line}")
+
+    if mismatches:
+        print("\n[ERROR] Engine results differ from the legacy implementation")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -22,7 +22,7 @@ OPTIONAL_FILES = {
 OUTPUT_PATH = os.path.join(DATA_DIR, "Stage 2", "2b-MKTG-Existing Use Cases Enriched.xlsx")
 
 # Anthropic API configuration
-ANTHROPIC_API_URL = "https://aiplatform.gcs.int.thomsonreuters.com/v1/anthropic/token"
+ANTHROPIC_API_URL = os.getenv("TR_ANTHROPIC_TOKEN_URL", "https://aiplatform.gcs.int.thomsonreuters.com/v1/anthropic/token")
 WORKSPACE_ID = "ExternalResei8Dz"
 MODEL = "claude-sonnet-4-20250514"
 
@@ -31,6 +31,25 @@ BATCH_SIZE = 5  # Process 5 use cases at a time if token limits apply
 MAX_TOKENS = 4000  # Max tokens per API call (reduced to avoid rate limits)
 WEB_SEARCH_MAX_USES = 5  # Max web searches per enrichment (reduced to avoid rate limits)
 
+# Concurrency and rate limiting
+TOKENS_PER_MINUTE = 100000  # Workspace rate limit (input + output tokens)
+MAX_CONCURRENT_REQUESTS = 4  # Parallel API calls; the token budget decides actual throughput
+MAX_RETRIES = 3  # Attempts per task before it is reported as failed
+REQUEST_TIMEOUT_SECONDS = 300  # Per-call timeout (one enrichment = one call)
+
+# Quality assurance
+QA_MAX_WORKERS = 1  # Processes for QA on large result sets (>1 only pays off for tens of thousands of use cases)
+
+# Message Batches mode (opt-in: cheaper, asynchronous, results within 24h)
+BATCH_POLL_INTERVAL_SECONDS = 30  # Seconds between batch status polls
+
+# Response cache (identical API requests are served from disk across runs)
+RESPONSE_CACHE_PATH = os.path.join(AUTOMATION_DIR, ".cache", "llm_responses.sqlite")
+RESPONSE_CACHE_TTL_SECONDS = 7 * 24 * 3600  # Entries expire after a week
+RESPONSE_CACHE_MAX_MB = 200  # Least recently used entries are evicted above this size
+RESPONSE_CACHE_BYPASS = os.getenv("LLM_CACHE_BYPASS", "0") == "1"  # Skip the cache entirely
+RESPONSE_CACHE_REFRESH = os.getenv("LLM_CACHE_REFRESH", "0") == "1"  # Re-call the API and overwrite entries
+
 # Output column definitions
 OUTPUT_COLUMNS = [
     "Function",
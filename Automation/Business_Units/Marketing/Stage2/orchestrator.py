@@ -6,7 +6,7 @@ import os
 import json
 import traceback
 from datetime import datetime
-from typing import Dict, Any
+from typing import Any, Callable, Dict, Optional
 
 # Add agents directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'agents'))
@@ -18,6 +18,30 @@ from agents import (
     QualityAssuranceAgent,
     OutputFormatterAgent
 )
+from config import (
+    ANTHROPIC_API_URL,
+    WORKSPACE_ID,
+    TOKENS_PER_MINUTE,
+    BATCH_POLL_INTERVAL_SECONDS,
+    RESPONSE_CACHE_PATH,
+    RESPONSE_CACHE_TTL_SECONDS,
+    RESPONSE_CACHE_MAX_MB,
+    RESPONSE_CACHE_BYPASS,
+    RESPONSE_CACHE_REFRESH
+)
+from utils.api_client import get_api_client
+from utils.batch_client import BatchRunner, LocalBatchStub
+from utils.checkpoint import CheckpointStore
+from utils.response_cache import get_response_cache
+
+
+AGENT_NAMES = {
+    1: "Data Ingestion",
+    2: "Web Research",
+    3: "Use Case Enrichment",
+    4: "Quality Assurance",
+    5: "Output Formatting",
+}
 
 
 class Stage2Orchestrator:
@@ -32,6 +56,7 @@ class Stage2Orchestrator:
             output_dir = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data', 'Business Units', 'Marketing', 'Stage 2', 'agent_outputs')
         self.output_dir = output_dir
         os.makedirs(self.output_dir, exist_ok=True)
+        self.checkpoint_dir = os.path.join(self.output_dir, 'checkpoints')
 
     def print_banner(self, text: str):
         """Print a formatted banner"""
@@ -72,22 +97,92 @@ class Stage2Orchestrator:
             except (TypeError, ValueError):
                 return str(obj)
 
-    def run(self, skip_web_research: bool = False) -> Dict[str, Any]:
+    def _create_batch_runner(self, batch_stub: bool = False) -> BatchRunner:
+        """Create the Message Batches runner (or a local stub for testing)"""
+        api_client = get_api_client(WORKSPACE_ID, ANTHROPIC_API_URL, TOKENS_PER_MINUTE)
+        return BatchRunner(
+            api_client,
+            poll_interval=BATCH_POLL_INTERVAL_SECONDS,
+            batches_api=LocalBatchStub() if batch_stub else None
+        )
+
+    @staticmethod
+    def _notify(progress_callback: Optional[Callable[[Dict[str, Any]], None]], event: str, agent: int, **detail):
+        """Send a progress event (progress reporting never fails the run)"""
+        if progress_callback is None:
+            return
+        try:
+            progress_callback({"event": event, "agent": agent, "name": AGENT_NAMES[agent], **detail})
+        except Exception as e:
+            print(f"    [WARN] Progress callback failed: {e}")
+
+    def _item_callback(self, progress_callback, agent: int):
+        """Adapt an agent's per-item callback(completed, total, result) to progress events"""
+        if progress_callback is None:
+            return None
+
+        def on_item(completed: int, total: int, result: Dict[str, Any]):
+            if "original_use_case" in result:
+                detail = {"use_case": result["original_use_case"].get("original_name"), "success": bool(result.get("success"))}
+            else:
+                detail = result
+            self._notify(progress_callback, "item_completed", agent, completed=completed, total=total, **detail)
+        return on_item
+
+    def _checkpoint(self, agent_name: str, resume: bool) -> CheckpointStore:
+        """Open the per-item checkpoint for an agent (truncated unless resuming)"""
+        return CheckpointStore(os.path.join(self.checkpoint_dir, f"{agent_name}.jsonl"), resume=resume)
+
+    def run(
+        self,
+        skip_web_research: bool = False,
+        batch_mode: bool = False,
+        batch_stub: bool = False,
+        resume: bool = False,
+        use_cache: bool = not RESPONSE_CACHE_BYPASS,
+        refresh_cache: bool = RESPONSE_CACHE_REFRESH,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
         """Execute the complete Stage 2 enrichment process
 
         Args:
             skip_web_research: If True, skip web research agent (faster, but less comprehensive)
+            batch_mode: If True, submit web research and enrichment prompts as
+                Message Batches jobs (cheaper, but results can take hours)
+            batch_stub: If True (with batch_mode), answer batches locally
+                instead of calling the API (for testing the pipeline)
+            resume: If True, restore research queries and enrichments completed
+                by a previous run (matched by input hash) and redo only failed
+                or missing items
+            use_cache: If False, bypass the response cache (always call the API)
+            refresh_cache: If True, re-call the API and overwrite cached responses
+            progress_callback: Optional callback(event) for agent_started,
+                item_completed (per research query / use case), agent_skipped
+                and agent_completed events (e.g. to publish job progress)
 
         Returns:
             Dictionary with results from all agents
         """
+        if batch_stub and not batch_mode:
+            raise ValueError("batch_stub requires batch_mode")
+
         self.start_time = datetime.now()
         self.print_banner("STAGE 2 AUTOMATION - STARTING")
         print(f"Start Time: {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}\n")
 
+        # Shared by all agents' API calls
+        response_cache = get_response_cache(RESPONSE_CACHE_PATH, RESPONSE_CACHE_TTL_SECONDS, RESPONSE_CACHE_MAX_MB)
+        response_cache.bypass = not use_cache
+        response_cache.refresh = refresh_cache
+
+        batch_runner = self._create_batch_runner(batch_stub) if batch_mode else None
+        if batch_runner is not None:
+            print(f"[BATCH] Batch mode enabled{' (local stub)' if batch_stub else ''}\n")
+
         try:
             # AGENT 1: Data Ingestion
             print("\n[*] Running Agent 1: Data Ingestion...")
+            self._notify(progress_callback, "agent_started", 1)
             agent1 = DataIngestionAgent()
             ingestion_data = agent1.run()
             self.results['agent1_data_ingestion'] = ingestion_data
@@ -98,44 +193,65 @@ class Stage2Orchestrator:
                 "bu_intelligence_length": len(ingestion_data["bu_intelligence"])
             })
             print("[OK] Agent 1 Complete\n")
+            self._notify(progress_callback, "agent_completed", 1, use_cases=len(ingestion_data["use_cases"]))
 
             # AGENT 2: Web Research (Optional - can be skipped for faster processing)
             if not skip_web_research:
                 print("\n[*] Running Agent 2: Web Research...")
+                self._notify(progress_callback, "agent_started", 2)
                 agent2 = WebResearchAgent()
-                research_data = agent2.run(ingestion_data)
+                research_data = agent2.run(
+                    ingestion_data,
+                    batch_runner=batch_runner,
+                    checkpoint=self._checkpoint("agent2_web_research", resume),
+                    progress_callback=self._item_callback(progress_callback, 2)
+                )
                 self.results['agent2_web_research'] = research_data
                 self.save_agent_output("agent2_web_research", research_data)
                 print("[OK] Agent 2 Complete\n")
+                self._notify(progress_callback, "agent_completed", 2)
             else:
                 print("\n[SKIP] Skipping Agent 2: Web Research (as requested)")
                 research_data = {"research_results": []}
                 self.results['agent2_web_research'] = {"skipped": True}
                 self.save_agent_output("agent2_web_research", {"skipped": True})
+                self._notify(progress_callback, "agent_skipped", 2)
 
             # AGENT 3: Use Case Enrichment
             print("\n[*] Running Agent 3: Use Case Enricher...")
+            self._notify(progress_callback, "agent_started", 3)
             agent3 = UseCaseEnricherAgent()
-            enrichment_data = agent3.run(ingestion_data, research_data)
+            enrichment_data = agent3.run(
+                ingestion_data,
+                research_data,
+                progress_callback=self._item_callback(progress_callback, 3),
+                batch_runner=batch_runner,
+                checkpoint=self._checkpoint("agent3_enrichment", resume)
+            )
             self.results['agent3_enrichment'] = enrichment_data
             self.save_agent_output("agent3_enrichment", enrichment_data)
             print("[OK] Agent 3 Complete\n")
+            self._notify(progress_callback, "agent_completed", 3)
 
             # AGENT 4: Quality Assurance
             print("\n[*] Running Agent 4: Quality Assurance...")
+            self._notify(progress_callback, "agent_started", 4)
             agent4 = QualityAssuranceAgent()
             qa_data = agent4.run(enrichment_data)
             self.results['agent4_qa'] = qa_data
             self.save_agent_output("agent4_quality_assurance", qa_data)
             print("[OK] Agent 4 Complete\n")
+            self._notify(progress_callback, "agent_completed", 4)
 
             # AGENT 5: Output Formatting
             print("\n[*] Running Agent 5: Output Formatter...")
+            self._notify(progress_callback, "agent_started", 5)
             agent5 = OutputFormatterAgent()
             output_data = agent5.run(enrichment_data)
             self.results['agent5_output'] = output_data
             self.save_agent_output("agent5_output_formatter", output_data)
             print("[OK] Agent 5 Complete\n")
+            self._notify(progress_callback, "agent_completed", 5)
 
             # Final Summary
             self.end_time = datetime.now()
@@ -149,6 +265,9 @@ class Stage2Orchestrator:
             print(f"   - QA Passed: {qa_data['passed_count']}/{qa_data['passed_count'] + qa_data['failed_count']}")
             print(f"   - Output File: {output_data['output_file']}")
             print(f"   - Agent Outputs Dir: {self.output_dir}")
+            if use_cache:
+                cache_metrics = response_cache.get_metrics()
+                print(f"   - Response Cache: {cache_metrics['hits']} hit(s), {cache_metrics['misses']} miss(es), {cache_metrics['entries']} entries ({cache_metrics['size_mb']} MB)")
             print(f"   - Duration: {duration:.2f} seconds")
             print(f"   - End Time: {self.end_time.strftime('%Y-%m-%d %H:%M:%S')}")
 
@@ -201,6 +320,31 @@ def main():
         action='store_true',
         help='Skip web research for faster processing (less comprehensive)'
     )
+    parser.add_argument(
+        '--batch',
+        action='store_true',
+        help='Submit research and enrichment prompts via the Message Batches API'
+    )
+    parser.add_argument(
+        '--batch-stub',
+        action='store_true',
+        help='With --batch, answer batches with a local stub (no API calls or credentials)'
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Resume from checkpoints, redoing only failed or missing use cases'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Bypass the response cache and call the API for every request'
+    )
+    parser.add_argument(
+        '--refresh-cache',
+        action='store_true',
+        help='Re-call the API and overwrite cached responses'
+    )
     parser.add_argument(
         '--debug',
         action='store_true',
@@ -208,10 +352,19 @@ def main():
     )
 
     args = parser.parse_args()
+    if args.batch_stub and not args.batch:
+        parser.error("--batch-stub requires --batch")
 
     # Run orchestrator
     orchestrator = Stage2Orchestrator()
-    result = orchestrator.run(skip_web_research=args.skip_web_research)
+    result = orchestrator.run(
+        skip_web_research=args.skip_web_research,
+        batch_mode=args.batch,
+        batch_stub=args.batch_stub,
+        resume=args.resume,
+        use_cache=not (args.no_cache or RESPONSE_CACHE_BYPASS),
+        refresh_cache=args.refresh_cache or RESPONSE_CACHE_REFRESH
+    )
 
     # Exit with appropriate code
     sys.exit(0 if result['success'] else 1)
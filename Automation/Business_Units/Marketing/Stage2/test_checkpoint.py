@@ -0,0 +1,104 @@
+"""Test script for per-item checkpointing
+Checks that a resumed run restores completed items and redoes the rest
+
+Run directly (python test_checkpoint.py) or under pytest.
+"""
+import os
+import sys
+import tempfile
+
+# Stage 2 modules are imported from this directory (same as orchestrator.py)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.checkpoint import CheckpointStore
+
+
+def checkpoint_path() -> str:
+    return os.path.join(tempfile.mkdtemp(), "checkpoints", "agent3.jsonl")
+
+
+def test_resume_restores_successful_items():
+    """Successful results survive a restart; failed ones are not recorded"""
+    path = checkpoint_path()
+    store = CheckpointStore(path)
+    done, failed = CheckpointStore.content_hash({"use_case": "A"}), CheckpointStore.content_hash({"use_case": "B"})
+    store.append(done, {"success": True, "value": 1})
+    store.append(failed, {"success": False, "error": "timeout"})
+
+    resumed = CheckpointStore(path, resume=True)
+    assert len(resumed) == 1, len(resumed)
+    assert resumed.get(done) == {"success": True, "value": 1}
+    assert resumed.get(failed) is None
+
+
+def test_fresh_run_truncates():
+    """Without resume the previous run's records are discarded"""
+    path = checkpoint_path()
+    CheckpointStore(path).append("key", {"success": True})
+
+    assert len(CheckpointStore(path)) == 0
+    assert len(CheckpointStore(path, resume=True)) == 0
+
+
+def test_changed_input_is_new_work():
+    """Keys hash the inputs, so an edited item is not restored from a stale record"""
+    original = CheckpointStore.content_hash({"use_case": "A", "description": "v1"})
+    edited = CheckpointStore.content_hash({"use_case": "A", "description": "v2"})
+    reordered = CheckpointStore.content_hash({"description": "v1", "use_case": "A"})
+
+    assert original != edited
+    assert original == reordered
+
+
+def test_torn_last_line_is_skipped():
+    """A record cut off by a crash mid-write is ignored, earlier records load"""
+    path = checkpoint_path()
+    CheckpointStore(path).append("a", {"success": True})
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"key": "b", "result": {"succ')
+
+    resumed = CheckpointStore(path, resume=True)
+    assert len(resumed) == 1, len(resumed)
+    assert resumed.get("a") is not None
+
+
+def test_later_record_wins():
+    """A redone item appended on resume replaces the earlier record"""
+    path = checkpoint_path()
+    CheckpointStore(path).append("a", {"success": True, "value": 1})
+    CheckpointStore(path, resume=True).append("a", {"success": True, "value": 2})
+
+    assert CheckpointStore(path, resume=True).get("a")["value"] == 2
+
+
+TESTS = [
+    test_resume_restores_successful_items,
+    test_fresh_run_truncates,
+    test_changed_input_is_new_work,
+    test_torn_last_line_is_skipped,
+    test_later_record_wins,
+]
+
+
+def main():
+    print("=" * 80)
+    print("TESTING CHECKPOINT RESUME")
+    print("=" * 80)
+
+    failures = 0
+    for test in TESTS:
+        try:
+            test()
+            print(f"  ✓ {test.__name__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"  ✗ {test.__name__}: {e}")
+
+    if failures:
+        print(f"\n✗ {failures}/{len(TESTS)} test(s) failed")
+        sys.exit(1)
+    print(f"\n✓ All {len(TESTS)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
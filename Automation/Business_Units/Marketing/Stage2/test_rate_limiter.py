@@ -0,0 +1,108 @@
+"""Test script for the shared token bucket rate limiter
+Checks capped reservations, reconciliation, refill waits, pauses and header sync
+
+Run directly (python test_rate_limiter.py) or under pytest.
+"""
+import os
+import sys
+import time
+
+# Stage 2 modules are imported from this directory (same as orchestrator.py)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.rate_limiter import TokenBucketLimiter
+
+
+def test_acquire_caps_at_capacity():
+    """An estimate above the bucket size debits only the capacity, without waiting"""
+    limiter = TokenBucketLimiter(1000)
+    waited, reserved = limiter.acquire(5000)
+
+    assert reserved == 1000, reserved
+    assert waited < 0.1, waited
+    assert limiter.available < 50, limiter.available
+
+
+def test_reconcile_refunds_debited_amount():
+    """Reconciling with the debited amount refunds the unused part, never more"""
+    limiter = TokenBucketLimiter(1000)
+    _, reserved = limiter.acquire(5000)
+    limiter.reconcile(reserved, 200)
+
+    assert 790 <= limiter.available <= 1000, limiter.available
+    assert limiter.get_metrics()["tokens_used"] == 200
+
+
+def test_reconcile_charges_underestimate():
+    """Using more than reserved drives the bucket negative"""
+    limiter = TokenBucketLimiter(60000)
+    _, reserved = limiter.acquire(60000)
+    limiter.reconcile(reserved, 61000)
+
+    assert limiter.available < 0, limiter.available
+
+
+def test_acquire_waits_for_refill():
+    """An empty bucket admits the next call once enough tokens have refilled"""
+    limiter = TokenBucketLimiter(60000)  # 1000 tokens per second
+    limiter.acquire(60000)
+    waited, _ = limiter.acquire(200)
+
+    assert 0.1 <= waited < 1.0, waited
+    assert limiter.get_metrics()["throttled_calls"] == 1
+
+
+def test_pause_blocks_admissions():
+    """After a 429 pause no call is admitted until the pause ends"""
+    limiter = TokenBucketLimiter(60000)
+    limiter.pause(0.3)
+    waited, _ = limiter.acquire(1)
+
+    assert waited >= 0.25, waited
+    assert limiter.get_metrics()["rate_limit_errors"] == 1
+
+
+def test_sync_trusts_lower_remaining():
+    """Server headers lower the budget and resize the bucket, but never raise the budget"""
+    limiter = TokenBucketLimiter(1000)
+    limiter.sync(limit=2000, remaining=300)
+    assert limiter.capacity == 2000
+    assert limiter.available <= 301, limiter.available
+
+    limiter.sync(remaining=5000)
+    assert limiter.available <= 302, limiter.available
+
+
+TESTS = [
+    test_acquire_caps_at_capacity,
+    test_reconcile_refunds_debited_amount,
+    test_reconcile_charges_underestimate,
+    test_acquire_waits_for_refill,
+    test_pause_blocks_admissions,
+    test_sync_trusts_lower_remaining,
+]
+
+
+def main():
+    print("=" * 80)
+    print("TESTING TOKEN BUCKET RATE LIMITER")
+    print("=" * 80)
+
+    failures = 0
+    for test in TESTS:
+        start = time.perf_counter()
+        try:
+            test()
+            print(f"  ✓ {test.__name__} ({time.perf_counter() - start:.2f}s)")
+        except AssertionError as e:
+            failures += 1
+            print(f"  ✗ {test.__name__}: {e}")
+
+    if failures:
+        print(f"\n✗ {failures}/{len(TESTS)} test(s) failed")
+        sys.exit(1)
+    print(f"\n✓ All {len(TESTS)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""Test script for the persistent LLM response cache
+Checks hits, TTL expiry, LRU eviction, bypass/refresh, incomplete responses,
+invalidation and streamed responses
+
+Run directly (python test_response_cache.py) or under pytest.
+"""
+import os
+import sys
+import time
+import tempfile
+
+# Stage 2 modules are imported from this directory (same as orchestrator.py)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import anthropic
+
+from utils.response_cache import ResponseCache, refreshing
+
+
+def make_message(text: str, stop_reason: str = "end_turn") -> anthropic.types.Message:
+    """Build an SDK Message as returned by messages.create()"""
+    return anthropic.types.Message.model_validate({
+        "id": f"msg_{abs(hash(text))}",
+        "type": "message",
+        "role": "assistant",
+        "model": "claude-sonnet-4-5-20250929",
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": stop_reason,
+        "stop_sequence": None,
+        "usage": {"input_tokens": 10, "output_tokens": 5}
+    })
+
+
+def make_cache(**kwargs) -> ResponseCache:
+    return ResponseCache(os.path.join(tempfile.mkdtemp(), "responses.sqlite"), **kwargs)
+
+
+class FakeAPI:
+    """Counts calls; each response echoes the request's prompt"""
+
+    def __init__(self, stop_reason: str = "end_turn"):
+        self.calls = 0
+        self.stop_reason = stop_reason
+
+    def create(self, **kwargs):
+        self.calls += 1
+        return make_message(kwargs["messages"][0]["content"], self.stop_reason)
+
+    def stream(self, **kwargs):
+        self.calls += 1
+        return FakeStream(make_message(kwargs["messages"][0]["content"], self.stop_reason))
+
+
+class FakeStream:
+    """Minimal MessageStream: text in two chunks, then the final message"""
+
+    def __init__(self, message):
+        self.message = message
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @property
+    def text_stream(self):
+        text = self.message.content[0].text
+        yield text[:2]
+        yield text[2:]
+
+    def get_final_message(self):
+        return self.message
+
+
+def request(prompt: str) -> dict:
+    return {"model": "claude-sonnet-4-5-20250929", "max_tokens": 100, "messages": [{"role": "user", "content": prompt}]}
+
+
+def test_identical_requests_hit():
+    """The second identical request is served from disk"""
+    cache, api = make_cache(), FakeAPI()
+    first = cache.create(api.create, **request("hello"))
+    second = cache.create(api.create, **request("hello"))
+
+    assert api.calls == 1, api.calls
+    assert second.content[0].text == first.content[0].text == "hello"
+    assert cache.get_metrics()["hits"] == 1
+
+
+def test_transport_args_do_not_change_key():
+    """Timeouts and extra headers are not part of the cache key"""
+    assert ResponseCache.make_key(**request("a")) == ResponseCache.make_key(timeout=30, **request("a"))
+    assert ResponseCache.make_key(**request("a")) != ResponseCache.make_key(**request("b"))
+
+
+def test_ttl_expiry():
+    """Entries older than ttl_seconds are misses and are re-fetched"""
+    cache, api = make_cache(ttl_seconds=0.2), FakeAPI()
+    cache.create(api.create, **request("hello"))
+    time.sleep(0.3)
+    cache.create(api.create, **request("hello"))
+
+    assert api.calls == 2, api.calls
+    assert cache.get_metrics()["hits"] == 0
+
+
+def test_lru_eviction():
+    """Over the size budget the least recently used entry is evicted first"""
+    size = len(make_message("a").model_dump_json())
+    cache, api = make_cache(max_size_mb=(2.5 * size) / (1024 * 1024)), FakeAPI()
+
+    cache.create(api.create, **request("a"))
+    time.sleep(0.01)
+    cache.create(api.create, **request("b"))
+    time.sleep(0.01)
+    cache.create(api.create, **request("a"))  # Hit: "a" is now more recent than "b"
+    time.sleep(0.01)
+    cache.create(api.create, **request("c"))  # Over budget: evicts "b"
+
+    assert cache.get_metrics()["evictions"] == 1
+    assert cache.get(ResponseCache.make_key(**request("a"))) is not None
+    assert cache.get(ResponseCache.make_key(**request("b"))) is None
+    assert cache.get(ResponseCache.make_key(**request("c"))) is not None
+
+
+def test_bypass_and_refresh():
+    """bypass skips the cache; refresh re-calls the API and overwrites the entry"""
+    cache, api = make_cache(bypass=True), FakeAPI()
+    cache.create(api.create, **request("hello"))
+    assert cache.get_metrics()["entries"] == 0
+
+    cache.bypass, cache.refresh = False, True
+    cache.create(api.create, **request("hello"))
+    cache.create(api.create, **request("hello"))
+    assert api.calls == 3, api.calls
+    assert cache.get_metrics()["entries"] == 1
+
+
+def test_incomplete_responses_not_stored():
+    """max_tokens truncations are returned but not cached, streamed or not"""
+    cache, api = make_cache(), FakeAPI(stop_reason="max_tokens")
+    cache.create(api.create, **request("long"))
+    with cache.stream(api.stream, **request("long stream")) as stream:
+        "".join(stream.text_stream)
+
+    assert cache.get_metrics()["entries"] == 0
+    cache.create(api.create, **request("long"))
+    assert api.calls == 3, api.calls
+
+
+def test_invalidate():
+    """An invalidated response is fetched again on the next call"""
+    cache, api = make_cache(), FakeAPI()
+    cache.create(api.create, **request("unparsable"))
+    assert cache.invalidate(ResponseCache.make_key(**request("unparsable")))
+    assert not cache.invalidate(ResponseCache.make_key(**request("unparsable")))
+
+    cache.create(api.create, **request("unparsable"))
+    assert api.calls == 2, api.calls
+
+
+def test_refreshing_scope():
+    """Inside refreshing() the cache is not read, but the new answer replaces the old one"""
+    cache, api = make_cache(), FakeAPI()
+    cache.create(api.create, **request("retry"))
+    with refreshing():
+        second = cache.create(api.create, **request("retry"))
+    third = cache.create(api.create, **request("retry"))
+
+    assert api.calls == 2, api.calls
+    assert third.id == second.id
+    assert not cache.refresh
+
+
+def test_stream_cached_after_completion():
+    """A completed stream is stored and replayed; create() shares the entry"""
+    cache, api = make_cache(), FakeAPI()
+    for _ in range(2):
+        with cache.stream(api.stream, **request("streamed")) as stream:
+            text = "".join(stream.text_stream)
+            final = stream.get_final_message()
+        assert text == "streamed" and final.stop_reason == "end_turn"
+
+    assert api.calls == 1, api.calls
+    cache.create(api.create, **request("streamed"))
+    assert api.calls == 1, api.calls
+
+
+def test_interrupted_stream_not_cached():
+    """A stream that raises before completing leaves no entry"""
+    cache, api = make_cache(), FakeAPI()
+    try:
+        with cache.stream(api.stream, **request("partial")):
+            raise ConnectionError("dropped")
+    except ConnectionError:
+        pass
+
+    assert cache.get_metrics()["entries"] == 0
+
+
+TESTS = [
+    test_identical_requests_hit,
+    test_transport_args_do_not_change_key,
+    test_ttl_expiry,
+    test_lru_eviction,
+    test_bypass_and_refresh,
+    test_incomplete_responses_not_stored,
+    test_invalidate,
+    test_refreshing_scope,
+    test_stream_cached_after_completion,
+    test_interrupted_stream_not_cached,
+]
+
+
+def main():
+    print("=" * 80)
+    print("TESTING RESPONSE CACHE")
+    print("=" * 80)
+
+    failures = 0
+    for test in TESTS:
+        try:
+            test()
+            print(f"  ✓ {test.__name__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"  ✗ {test.__name__}: {e}")
+
+    if failures:
+        print(f"\n✗ {failures}/{len(TESTS)} test(s) failed")
+        sys.exit(1)
+    print(f"\n✓ All {len(TESTS)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,11 @@
 """Utilities for Stage 2 Marketing Automation"""
 from .api_client import get_api_client, AnthropicAPIClient
+from .rate_limiter import get_rate_limiter, TokenBucketLimiter
+from .scheduler import ConcurrentScheduler
+from .batch_client import BatchRunner, LocalBatchStub
+from .checkpoint import CheckpointStore
+from .response_cache import get_response_cache, ResponseCache, CachingClient
+from .excel_export import ExcelStreamWriter, export_rows
+from .qa_engine import get_qa_engine, QAEngine
 
-__all__ = ['get_api_client', 'AnthropicAPIClient']
+__all__ = ['get_api_client', 'AnthropicAPIClient', 'get_rate_limiter', 'TokenBucketLimiter', 'ConcurrentScheduler', 'BatchRunner', 'LocalBatchStub', 'CheckpointStore', 'get_response_cache', 'ResponseCache', 'CachingClient', 'ExcelStreamWriter', 'export_rows', 'get_qa_engine', 'QAEngine']
@@ -1,13 +1,24 @@
 """Centralized API Client for Thomson Reuters Anthropic Token Management
 This utility manages API tokens with automatic refresh to avoid rate limits
 """
+import os
+import sys
 import anthropic
-import requests
-import json
-import time
-from typing import Optional
+from typing import Any, Dict, Optional
 from threading import Lock
 
+# Repository root (Stage2/utils -> BU-External-Research) for the shared credential cache
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), *[os.pardir] * 5))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from rag_pipeline.auth import get_credential_provider
+
+from .rate_limiter import get_rate_limiter, estimate_request_tokens
+from .response_cache import ResponseCache
+
+DEFAULT_TOKENS_PER_MINUTE = 100000  # Workspace rate limit
+
 
 class AnthropicAPIClient:
     """
@@ -15,62 +26,70 @@ class AnthropicAPIClient:
     to get fresh API keys with higher rate limits
     """
 
-    def __init__(self, workspace_id: str, token_url: str):
+    def __init__(
+        self,
+        workspace_id: str,
+        token_url: str,
+        tokens_per_minute: int = DEFAULT_TOKENS_PER_MINUTE,
+        response_cache: Optional[ResponseCache] = None
+    ):
         """
         Initialize the API client
 
         Args:
             workspace_id: Thomson Reuters workspace ID
             token_url: TR token endpoint URL
+            tokens_per_minute: Workspace token limit for the shared rate limiter
+            response_cache: Optional cache for identical requests
         """
         self.workspace_id = workspace_id
         self.token_url = token_url
         self.client: Optional[anthropic.Anthropic] = None
         self.api_key: Optional[str] = None
-        self.last_refresh_time: float = 0
         self.refresh_interval: int = 300  # Refresh every 5 minutes
         self.lock = Lock()
-
-        # Initialize on creation
-        self._refresh_token()
-
-    def _refresh_token(self) -> bool:
+        self.rate_limiter = get_rate_limiter(tokens_per_minute)
+        self.response_cache = response_cache
+
+        # Shared with the RAG pipeline clients: one fetch per refresh, cached on disk
+        self.credential_provider = get_credential_provider(
+            token_url,
+            {"workspace_id": workspace_id},
+            required_keys=("anthropic_api_key",),
+            ttl_s=self.refresh_interval
+        )
+        # Credentials are fetched on first use, so runs that never call the
+        # API (e.g. --batch-stub) need none
+
+    def _refresh_token(self, force: bool = False) -> bool:
         """
-        Fetch a new API token from TR endpoint
+        Get the current API key from the shared credential provider
+
+        Args:
+            force: Fetch a new key from the TR endpoint instead of the cache
 
         Returns:
             bool: True if successful, False otherwise
         """
         try:
-            payload = {"workspace_id": self.workspace_id}
-            resp = requests.post(self.token_url, headers=None, json=payload)
-            credentials = json.loads(resp.content)
-
-            if 'anthropic_api_key' in credentials:
-                self.api_key = credentials["anthropic_api_key"]
-                self.client = anthropic.Anthropic(api_key=self.api_key)
-                self.last_refresh_time = time.time()
-                return True
-            else:
-                print(f"Failed to get API key from TR endpoint: {credentials}")
-                return False
-
+            credentials = self.credential_provider.get(force_refresh=force)
         except Exception as e:
             print(f"Error refreshing token: {e}")
             return False
 
+        # Rebuild the client only when the key actually changed
+        if credentials["anthropic_api_key"] != self.api_key:
+            self.api_key = credentials["anthropic_api_key"]
+            self.client = anthropic.Anthropic(api_key=self.api_key)
+        return True
+
     def _ensure_fresh_token(self):
         """
-        Ensure we have a fresh token, refresh if needed
+        Ensure we have a fresh token (served from cache; the provider refreshes
+        it in the background before it expires)
         """
         with self.lock:
-            current_time = time.time()
-            time_since_refresh = current_time - self.last_refresh_time
-
-            # Refresh if it's been more than refresh_interval
-            if time_since_refresh >= self.refresh_interval:
-                print(f"Token refresh triggered (last refresh: {int(time_since_refresh)}s ago)")
-                self._refresh_token()
+            self._refresh_token()
 
     def get_client(self) -> anthropic.Anthropic:
         """
@@ -82,13 +101,36 @@ class AnthropicAPIClient:
         self._ensure_fresh_token()
         return self.client
 
+    @staticmethod
+    def _header_int(headers, name: str) -> Optional[int]:
+        """Read an integer response header (None if missing or malformed)"""
+        try:
+            value = headers.get(name)
+            return int(float(value)) if value is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _usage_tokens(message) -> Optional[int]:
+        """Total tokens counted against the rate limit for a response"""
+        usage = getattr(message, "usage", None)
+        if usage is None:
+            return None
+        return sum(
+            getattr(usage, field, 0) or 0
+            for field in ("input_tokens", "output_tokens", "cache_creation_input_tokens")
+        )
+
     def create_message(self, **kwargs):
         """
-        Create a message with automatic token refresh and retry logic
+        Create a message with automatic token refresh and rate limiting
 
         This wraps the Anthropic messages.create() call with:
+        - Cached responses for identical requests (if a response cache is set)
         - Automatic token refresh
-        - Retry logic for rate limit errors with long waits
+        - Admission through the shared token bucket (estimated input + max_tokens)
+        - Reconciliation with actual usage and rate-limit response headers
+        - Retry after the server-provided retry-after on rate limit errors
 
         Args:
             **kwargs: Arguments to pass to client.messages.create()
@@ -96,48 +138,106 @@ class AnthropicAPIClient:
         Returns:
             Message response from Anthropic API
         """
+        if self.response_cache is not None:
+            return self.response_cache.create(self._create_message, **kwargs)
+        return self._create_message(**kwargs)
+
+    def _create_message(self, **kwargs):
+        """Call the API (rate limited, with retry on rate limit errors)"""
         max_retries = 3
-        retry_delay = 60  # Start with 60 seconds to wait for rate limit window to pass
+        estimate = estimate_request_tokens(**kwargs)
 
         for attempt in range(max_retries):
+            # Reconcile against what was debited (estimates are capped at capacity)
+            waited, reserved = self.rate_limiter.acquire(estimate)
+            if waited >= 1:
+                print(f"[THROTTLE] Waited {waited:.1f}s for token budget")
+
             try:
-                self._ensure_fresh_token()
-                client = self.get_client()
-                return client.messages.create(**kwargs)
+                client = self.get_client()  # Ensures a fresh token
+                raw = client.messages.with_raw_response.create(**kwargs)
+                message = raw.parse()
+
+                # Align the bucket with what the server actually counted
+                actual = self._usage_tokens(message)
+                self.rate_limiter.reconcile(reserved, actual if actual is not None else reserved)
+                self.rate_limiter.sync(
+                    limit=self._header_int(raw.headers, "anthropic-ratelimit-tokens-limit"),
+                    remaining=self._header_int(raw.headers, "anthropic-ratelimit-tokens-remaining")
+                )
+                return message
 
             except anthropic.RateLimitError as e:
+                # Nothing was consumed by the rejected call
+                self.rate_limiter.reconcile(reserved, 0)
                 if attempt < max_retries - 1:
-                    print(f"[RATE LIMIT] Hit workspace limit of 100k tokens/min")
-                    print(f"[RATE LIMIT] Waiting {retry_delay}s for rate limit window to reset... (attempt {attempt + 1}/{max_retries})")
+                    headers = getattr(getattr(e, "response", None), "headers", {}) or {}
+                    retry_after = self._header_int(headers, "retry-after") or 60
+                    print(f"[RATE LIMIT] Hit workspace token limit; pausing {retry_after}s (attempt {attempt + 1}/{max_retries})")
+                    self.rate_limiter.pause(retry_after)
                     # Force token refresh
                     with self.lock:
-                        self._refresh_token()
-                    time.sleep(retry_delay)
-                    retry_delay = 60  # Keep at 60s since we need to wait for the 1-minute window
+                        self._refresh_token(force=True)
                 else:
                     print(f"[ERROR] Rate limit error after {max_retries} attempts")
-                    print(f"[ERROR] The workspace rate limit is 100,000 tokens per minute")
-                    print(f"[ERROR] Consider reducing max_tokens or adding delays between requests")
+                    print(f"[ERROR] The workspace rate limit is {self.rate_limiter.get_metrics()['tokens_per_minute']:,} tokens per minute")
                     raise
 
             except Exception as e:
+                self.rate_limiter.reconcile(reserved, 0)
                 print(f"[ERROR] API error: {e}")
                 raise
 
         raise Exception("Failed to create message after all retries")
 
+    def invalidate_cached(self, **kwargs):
+        """
+        Drop the cached response for a request (e.g. one that could not be parsed)
+
+        Args:
+            **kwargs: Arguments that were passed to create_message()
+        """
+        if self.response_cache is not None:
+            self.response_cache.invalidate(ResponseCache.make_key(**kwargs))
+
+    def get_rate_limit_metrics(self) -> Dict[str, Any]:
+        """
+        Get rate limiter wait-time and throughput metrics
+
+        Returns:
+            Dict of limiter metrics
+        """
+        return self.rate_limiter.get_metrics()
+
+    def get_cache_metrics(self) -> Dict[str, Any]:
+        """
+        Get response cache hit/miss metrics
+
+        Returns:
+            Dict of cache metrics (empty if no cache is configured)
+        """
+        return self.response_cache.get_metrics() if self.response_cache is not None else {}
+
 
 # Global client instance (singleton pattern)
 _global_client: Optional[AnthropicAPIClient] = None
 
 
-def get_api_client(workspace_id: str, token_url: str) -> AnthropicAPIClient:
+def get_api_client(
+    workspace_id: str,
+    token_url: str,
+    tokens_per_minute: int = DEFAULT_TOKENS_PER_MINUTE,
+    response_cache: Optional[ResponseCache] = None
+) -> AnthropicAPIClient:
     """
     Get or create the global API client instance
 
     Args:
         workspace_id: Thomson Reuters workspace ID
         token_url: TR token endpoint URL
+        tokens_per_minute: Workspace token limit for the shared rate limiter
+        response_cache: Optional cache for identical requests (attached to
+            the shared client if it has none yet)
 
     Returns:
         AnthropicAPIClient: Configured API client
@@ -145,7 +245,9 @@ def get_api_client(workspace_id: str, token_url: str) -> AnthropicAPIClient:
     global _global_client
 
     if _global_client is None:
-        _global_client = AnthropicAPIClient(workspace_id, token_url)
+        _global_client = AnthropicAPIClient(workspace_id, token_url, tokens_per_minute, response_cache)
         print("[OK] Anthropic API client initialized with TR token endpoint")
+    elif response_cache is not None and _global_client.response_cache is None:
+        _global_client.response_cache = response_cache
 
     return _global_client
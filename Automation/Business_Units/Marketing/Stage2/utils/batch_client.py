@@ -0,0 +1,151 @@
+"""Message Batches API support for Stage 2 bulk workloads
+Submits many independent prompts as batch jobs, polls, and maps results back by custom ID
+"""
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+# Message Batches API limit per batch
+BATCH_MAX_REQUESTS = 10000
+
+
+class BatchRunner:
+    """
+    Runs a list of Messages API requests through the Message Batches API
+
+    Requests are dicts of the form {"custom_id": str, "params": {...}} where
+    params are the usual messages.create() arguments. Results are returned
+    keyed by custom_id as {"success": True, "message": Message} or
+    {"success": False, "error": str}.
+    """
+
+    def __init__(
+        self,
+        api_client,
+        poll_interval: float = 30.0,
+        batches_api=None
+    ):
+        """
+        Initialize the batch runner
+
+        Args:
+            api_client: AnthropicAPIClient (provides fresh credentials)
+            poll_interval: Seconds between status polls
+            batches_api: Optional object with create/retrieve/results
+                (e.g. LocalBatchStub); defaults to client.messages.batches
+        """
+        self.api_client = api_client
+        self.poll_interval = poll_interval
+        self.batches_api = batches_api
+
+    def _batches(self):
+        """Get the batches API (re-fetched so long polls use a fresh token)"""
+        if self.batches_api is not None:
+            return self.batches_api
+        return self.api_client.get_client().messages.batches
+
+    def run(self, requests: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Submit requests, wait for all batches to end and collect results
+
+        Args:
+            requests: List of {"custom_id", "params"} dicts
+
+        Returns:
+            Dict mapping custom_id to a result dict
+        """
+        if not requests:
+            return {}
+
+        # Submit in chunks of the API batch limit
+        batch_ids = []
+        for i in range(0, len(requests), BATCH_MAX_REQUESTS):
+            chunk = requests[i:i + BATCH_MAX_REQUESTS]
+            batch = self._batches().create(requests=chunk)
+            batch_ids.append(batch.id)
+            print(f"[BATCH] Submitted {len(chunk)} requests as batch {batch.id}")
+
+        # Poll until every batch has ended
+        for batch_id in batch_ids:
+            batch = self._batches().retrieve(batch_id)
+            while batch.processing_status != "ended":
+                counts = batch.request_counts
+                print(f"[BATCH] {batch_id}: {counts.processing} processing, {counts.succeeded} succeeded, {counts.errored} errored")
+                time.sleep(self.poll_interval)
+                batch = self._batches().retrieve(batch_id)
+            print(f"[BATCH] {batch_id} ended")
+
+        # Map results back by custom ID
+        results: Dict[str, Dict[str, Any]] = {}
+        for batch_id in batch_ids:
+            for entry in self._batches().results(batch_id):
+                result = entry.result
+                if result.type == "succeeded":
+                    results[entry.custom_id] = {"success": True, "message": result.message}
+                else:
+                    error = getattr(result, "error", None)
+                    results[entry.custom_id] = {
+                        "success": False,
+                        "error": f"{result.type}: {error}" if error else result.type
+                    }
+
+        for request in requests:
+            results.setdefault(request["custom_id"], {"success": False, "error": "missing from batch results"})
+
+        succeeded = sum(1 for r in results.values() if r["success"])
+        print(f"[BATCH] {succeeded}/{len(requests)} requests succeeded")
+
+        return results
+
+
+class LocalBatchStub:
+    """
+    In-process stand-in for client.messages.batches (for tests and dry runs)
+
+    Each request is answered immediately by a responder function that maps
+    request params to response text.
+    """
+
+    def __init__(self, responder: Optional[Callable[[Dict[str, Any]], str]] = None):
+        """
+        Initialize the stub
+
+        Args:
+            responder: Function(params) -> response text; raising marks the
+                request as errored. Defaults to an empty JSON object.
+        """
+        self.responder = responder or (lambda params: "{}")
+        self._batches: Dict[str, List[Dict[str, Any]]] = {}
+
+    def _batch(self, batch_id: str) -> SimpleNamespace:
+        """Build a batch status object"""
+        count = len(self._batches[batch_id])
+        return SimpleNamespace(
+            id=batch_id,
+            processing_status="ended",
+            request_counts=SimpleNamespace(processing=0, succeeded=count, errored=0, canceled=0, expired=0)
+        )
+
+    def create(self, requests: List[Dict[str, Any]]) -> SimpleNamespace:
+        """Record a batch"""
+        batch_id = f"msgbatch_stub_{len(self._batches) + 1}"
+        self._batches[batch_id] = list(requests)
+        return self._batch(batch_id)
+
+    def retrieve(self, batch_id: str) -> SimpleNamespace:
+        """Get batch status (stub batches end immediately)"""
+        return self._batch(batch_id)
+
+    def results(self, batch_id: str):
+        """Yield one result per request"""
+        for request in self._batches[batch_id]:
+            try:
+                text = self.responder(request["params"])
+                message = SimpleNamespace(
+                    content=[SimpleNamespace(type="text", text=text)],
+                    usage=SimpleNamespace(input_tokens=0, output_tokens=0)
+                )
+                result = SimpleNamespace(type="succeeded", message=message)
+            except Exception as e:
+                result = SimpleNamespace(type="errored", error=str(e))
+            yield SimpleNamespace(custom_id=request["custom_id"], result=result)
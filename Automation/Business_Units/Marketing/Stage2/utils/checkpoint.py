@@ -0,0 +1,101 @@
+"""Per-item checkpointing for Stage 2 agents
+Append-only JSONL records keyed by a content hash of each item's inputs
+"""
+import os
+import json
+import hashlib
+from threading import Lock
+from typing import Any, Dict, Optional
+
+
+class CheckpointStore:
+    """
+    Append-only JSONL checkpoint of completed work items
+
+    Each line is {"key": <content hash>, "result": {...}}. Only successful
+    results are recorded, so on resume failed and missing items are redone.
+    Because keys hash the item's inputs, a changed input is treated as new
+    work rather than restored from a stale record.
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        """
+        Initialize the checkpoint store
+
+        Args:
+            path: JSONL file path
+            resume: If True, load existing records; otherwise start fresh
+        """
+        self.path = path
+        self.lock = Lock()
+        self.records: Dict[str, Dict[str, Any]] = {}
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if resume:
+            self._load()
+        else:
+            open(self.path, 'w', encoding='utf-8').close()
+
+    @staticmethod
+    def content_hash(data: Any) -> str:
+        """
+        Hash item inputs into a stable checkpoint key
+
+        Args:
+            data: JSON-serializable inputs (e.g. the request parameters)
+
+        Returns:
+            str: SHA-256 hex digest
+        """
+        payload = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _load(self):
+        """Load records from disk (later records win; a torn last line is skipped)"""
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self.records[record["key"]] = record["result"]
+
+        print(f"    [RESUME] Loaded {len(self.records)} checkpoint record(s) from {self.path}")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a completed result
+
+        Args:
+            key: Content hash of the item's inputs
+
+        Returns:
+            The recorded result, or None if the item has not completed
+        """
+        with self.lock:
+            return self.records.get(key)
+
+    def append(self, key: str, result: Dict[str, Any]):
+        """
+        Record a completed item (ignored unless the result succeeded)
+
+        Args:
+            key: Content hash of the item's inputs
+            result: Item result dict with a "success" flag
+        """
+        if not result.get("success"):
+            return
+
+        line = json.dumps({"key": key, "result": result}, ensure_ascii=False, default=str)
+        with self.lock:
+            self.records[key] = result
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def __len__(self) -> int:
+        return len(self.records)
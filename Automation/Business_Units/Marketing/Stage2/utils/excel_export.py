@@ -0,0 +1,190 @@
+"""Streaming Excel export
+Writes rows with xlsxwriter constant_memory mode, tracking column widths while
+writing and applying one format per column (shared with the root pipeline's
+utils/excel_export.py)
+"""
+import math
+import numbers
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+import xlsxwriter
+
+# Excel's per-cell character limit
+EXCEL_MAX_CELL_CHARS = 32767
+
+Row = Union[Dict[str, Any], Sequence[Any]]
+
+# Written as native Excel values; anything else (lists, dicts, ...) as its str()
+NATIVE_TYPES = (numbers.Number, date, datetime, time, timedelta)
+
+
+class ExcelStreamWriter:
+    """
+    Row-streaming writer for a single worksheet
+
+    Rows are flushed to disk as they are written (constant_memory), so memory
+    stays bounded regardless of row count. Column widths are either fixed or
+    auto-sized from the longest value seen while writing; formats are shared
+    format objects per column, not built per cell.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        columns: Sequence[str],
+        sheet_name: str = "Sheet1",
+        header_format: Optional[Dict[str, Any]] = None,
+        column_format: Optional[Dict[str, Any]] = None,
+        column_formats: Optional[Dict[str, Dict[str, Any]]] = None,
+        widths: Optional[Dict[str, float]] = None,
+        max_width: float = 60,
+        padding: int = 2,
+        freeze_header: bool = True
+    ):
+        """
+        Initialize the writer and write the header row
+
+        Args:
+            path: Output .xlsx path
+            columns: Column names, in output order
+            sheet_name: Worksheet name
+            header_format: xlsxwriter format properties for the header row
+            column_format: Format properties for every body column
+            column_formats: Per-column overrides of column_format
+            widths: Fixed widths by column name (others are auto-sized)
+            max_width: Upper bound for auto-sized widths
+            padding: Characters added to auto-sized widths
+            freeze_header: Freeze the header row
+        """
+        self.path = path
+        self.columns = list(columns)
+        self.max_width = max_width
+        self.padding = padding
+        self.widths = dict(widths or {})
+        self.rows_written = 0
+
+        self.workbook = xlsxwriter.Workbook(path, {
+            "constant_memory": True,
+            "strings_to_urls": False,
+            "strings_to_numbers": False,
+        })
+        self.worksheet = self.workbook.add_worksheet(sheet_name)
+
+        # One format object per distinct column style
+        column_formats = column_formats or {}
+        base = column_format or {}
+        self._formats: List[Any] = [
+            self.workbook.add_format({**base, **column_formats[col]}) if col in column_formats
+            else None
+            for col in self.columns
+        ]
+        if base:
+            shared = self.workbook.add_format(base)
+            self._formats = [fmt if fmt is not None else shared for fmt in self._formats]
+
+        # Longest value per column, seeded with the header
+        self._max_len = [len(str(col)) for col in self.columns]
+
+        header = self.workbook.add_format(header_format) if header_format else None
+        self.worksheet.write_row(0, 0, self.columns, header)
+        if freeze_header:
+            self.worksheet.freeze_panes(1, 0)
+
+    def write_row(self, row: Row):
+        """
+        Append one row
+
+        Args:
+            row: Dict keyed by column name (missing keys are blank) or a
+                sequence of values in column order
+        """
+        if isinstance(row, dict):
+            values = [row.get(col, "") for col in self.columns]
+        else:
+            values = row
+
+        r = self.rows_written + 1
+        write_string = self.worksheet.write_string
+        write = self.worksheet.write
+        max_len = self._max_len
+        formats = self._formats
+
+        for c, value in enumerate(values):
+            if value is None or (isinstance(value, float) and math.isnan(value)):
+                value = ""
+            elif not isinstance(value, (str,) + NATIVE_TYPES):
+                value = str(value)  # As the pandas export did for list/dict fields
+            if isinstance(value, str):
+                if len(value) > max_len[c]:
+                    max_len[c] = len(value)
+                write_string(r, c, value[:EXCEL_MAX_CELL_CHARS], formats[c])
+            else:
+                text_len = len(str(value))
+                if text_len > max_len[c]:
+                    max_len[c] = text_len
+                write(r, c, value, formats[c])
+
+        self.rows_written += 1
+
+    def write_rows(self, rows: Iterable[Row]) -> int:
+        """
+        Append rows from any iterable (consumed lazily)
+
+        Args:
+            rows: Iterable of rows (see write_row)
+
+        Returns:
+            int: Number of rows written by this call
+        """
+        start = self.rows_written
+        for row in rows:
+            self.write_row(row)
+        return self.rows_written - start
+
+    def close(self) -> str:
+        """
+        Set column widths and finish the file
+
+        Returns:
+            str: Output path
+        """
+        for c, col in enumerate(self.columns):
+            width = self.widths.get(col)
+            if width is None:
+                width = min(self._max_len[c] + self.padding, self.max_width)
+            self.worksheet.set_column(c, c, width)
+
+        self.workbook.close()
+        return self.path
+
+    def __enter__(self) -> "ExcelStreamWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.workbook.close()
+
+
+def export_rows(
+    path: str,
+    rows: Iterable[Row],
+    columns: Sequence[str],
+    **kwargs
+) -> int:
+    """
+    Stream rows into a new single-sheet workbook
+
+    Args:
+        path: Output .xlsx path
+        rows: Iterable of dicts or value sequences
+        columns: Column names, in output order
+        **kwargs: ExcelStreamWriter options (sheet_name, formats, widths, ...)
+
+    Returns:
+        int: Number of rows written
+    """
+    with ExcelStreamWriter(path, columns, **kwargs) as writer:
+        return writer.write_rows(rows)
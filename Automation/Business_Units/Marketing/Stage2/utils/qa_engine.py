@@ -0,0 +1,288 @@
+"""QA validation engine for enriched use cases
+Compiles every rule once, evaluates each section with short-circuiting checks and
+can validate large result sets across processes with per-rule timings
+"""
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Capitalized words that are never counted as competitor/vendor names
+NAME_STOPWORDS = frozenset({'The', 'This', 'These', 'Those', 'When', 'Where', 'What', 'Which'})
+
+# Minimum distinct competitor/vendor names in Industry Alignment
+MIN_COMPETITORS = 2
+
+# (field, label, message when missing, required sub-headings, checks)
+SECTION_RULES: List[Tuple[str, str, str, Tuple[str, ...], Tuple[str, ...]]] = [
+    ("detailed_description", "Detailed Description", "Missing Detailed Description", (
+        "Business Context & Problem",
+        "Solution & Technology",
+        "Integration & Process",
+        "Current Status & Outcomes",
+    ), ("quantification",)),
+    ("business_outcomes", "Business Outcomes", "Missing Business Outcomes", (
+        "Productivity & Efficiency",
+        "Quality & Consistency",
+        "Cost & Financial Impact",
+        "Strategic Benefits",
+    ), ()),
+    ("industry_alignment", "Industry Alignment", "Missing Industry Alignment", (
+        "Competitive Landscape",
+        "Technology & Vendors",
+        "Industry Benchmarks",
+        "Strategic Positioning",
+    ), ("competitors",)),
+    ("implementation", "Implementation", "Missing Implementation Considerations", (
+        "Technical & Integration",
+        "Change Management",
+        "Risk & Compliance",
+        "Operational & Scaling",
+    ), ()),
+    ("kpis", "KPIs", "Missing KPIs", (
+        "Operational Metrics",
+        "Financial Metrics",
+        "Quality Metrics",
+        "Strategic Metrics",
+    ), ()),
+    ("annotation", "Information Gaps & Annotation", "Missing Information Gaps & Annotation", (), ("citations",)),
+]
+
+# Compiled once per process
+DIGIT_RE = re.compile(r"\d")
+NAME_RE = re.compile(r"\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b")
+
+
+def count_competitors(text: str, minimum: Optional[int] = None) -> int:
+    """
+    Count distinct capitalized names (competitor/vendor heuristic)
+
+    Args:
+        text: Section text
+        minimum: Stop as soon as this many names are found
+
+    Returns:
+        int: Distinct names found (capped at minimum when given)
+    """
+    names = set()
+    for m in NAME_RE.finditer(text):
+        name = m.group()
+        if name not in NAME_STOPWORDS:
+            names.add(name)
+            if minimum is not None and len(names) >= minimum:
+                break
+    return len(names)
+
+
+def is_quantified(text: str) -> bool:
+    """A text is quantified if it has any number (every metric pattern contains a digit)"""
+    return DIGIT_RE.search(text) is not None
+
+
+def is_properly_cited(text: str) -> bool:
+    """Annotation names a source and a confidence level"""
+    return ("Source:" in text or "source:" in text) and "confidence" in text.lower()
+
+
+class QAEngine:
+    """
+    Validator for enriched use cases
+
+    Sections are checked against precompiled rules. Each check returns as
+    soon as its verdict is known (first digit, second distinct vendor name),
+    so no rule keeps scanning a section after it has decided.
+    """
+
+    def __init__(self, sections: Sequence[Tuple[str, str, str, Tuple[str, ...], Tuple[str, ...]]] = SECTION_RULES):
+        """
+        Initialize the engine
+
+        Args:
+            sections: Section rules (field, label, missing message, sub-headings, checks)
+        """
+        self.sections = list(sections)
+
+    def validate(self, enriched: Dict[str, Any], timings: Optional[Dict[str, Dict[str, float]]] = None) -> Dict[str, Any]:
+        """
+        Validate one enriched use case
+
+        Args:
+            enriched: Enrichment result ({"success", "original_use_case", "enriched_data", ...})
+            timings: Optional dict to accumulate per-rule timings into
+
+        Returns:
+            Dict with use_case_name, passed, issues and warnings (or error)
+        """
+        use_case_name = enriched['original_use_case']['original_name']
+
+        if not enriched.get('success', False):
+            return {
+                "use_case_name": use_case_name,
+                "passed": False,
+                "error": enriched.get('error', 'Unknown error')
+            }
+
+        enriched_data = enriched.get('enriched_data', {})
+        validations = {
+            "use_case_name": use_case_name,
+            "passed": True,
+            "issues": [],
+            "warnings": []
+        }
+        issues = validations["issues"]
+        warnings = validations["warnings"]
+        clock = time.perf_counter
+
+        for field, label, missing_message, sub_headings, checks in self.sections:
+            # Restart per section, so a missing section's time is not charged to the next rule
+            t0 = clock()
+            text = enriched_data.get(field, '')
+            if not text:
+                issues.append(missing_message)
+                validations["passed"] = False
+                continue
+
+            if sub_headings:
+                missing = [h for h in sub_headings if h not in text]
+                if missing:
+                    issues.append(f"Missing sub-headings in {label}: {missing}")
+                    validations["passed"] = False
+                if timings is not None:
+                    t1 = clock()
+                    _add_timing(timings, "sub_headings", t1 - t0)
+                    t0 = t1
+
+            for check in checks:
+                if check == "quantification":
+                    if not is_quantified(text):
+                        warnings.append(f"{label} lacks quantified metrics")
+                elif check == "competitors":
+                    count = count_competitors(text, MIN_COMPETITORS)
+                    if count < MIN_COMPETITORS:
+                        warnings.append(f"Only {count} competitors/vendors identified (need 2-3)")
+                elif check == "citations":
+                    if not is_properly_cited(text):
+                        warnings.append("Annotation missing proper source citations or confidence level")
+                if timings is not None:
+                    t1 = clock()
+                    _add_timing(timings, check, t1 - t0)
+                    t0 = t1
+
+        return validations
+
+    def validate_all(
+        self,
+        enriched_use_cases: Sequence[Dict[str, Any]],
+        max_workers: int = 1,
+        chunk_size: int = 500
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, float]]]:
+        """
+        Validate many use cases, across processes for large sets
+
+        Args:
+            enriched_use_cases: Enrichment results
+            max_workers: Worker processes (1 = in-process)
+            chunk_size: Use cases per worker task; sets no larger than one
+                chunk are always validated in-process
+
+        Returns:
+            (validation results in input order, per-rule timings)
+        """
+        if max_workers <= 1 or len(enriched_use_cases) <= chunk_size:
+            return _validate_chunk(self, list(enriched_use_cases))
+
+        chunks = [
+            list(enriched_use_cases[i:i + chunk_size])
+            for i in range(0, len(enriched_use_cases), chunk_size)
+        ]
+        results: List[Dict[str, Any]] = []
+        timings: Dict[str, Dict[str, float]] = {}
+        # Workers rebuild this engine's rules, not the default ones
+        with ProcessPoolExecutor(
+            max_workers=min(max_workers, len(chunks)),
+            initializer=_init_worker,
+            initargs=(self.sections,)
+        ) as executor:
+            for chunk_results, chunk_timings in executor.map(_validate_chunk_worker, chunks):
+                results.extend(chunk_results)
+                merge_timings(timings, chunk_timings)
+        return results, timings
+
+
+def _add_timing(timings: Dict[str, Dict[str, float]], rule: str, seconds: float):
+    """Accumulate one rule evaluation"""
+    entry = timings.get(rule)
+    if entry is None:
+        timings[rule] = {"calls": 1, "total_ms": seconds * 1000}
+    else:
+        entry["calls"] += 1
+        entry["total_ms"] += seconds * 1000
+
+
+def merge_timings(into: Dict[str, Dict[str, float]], other: Dict[str, Dict[str, float]]):
+    """
+    Add one timings dict into another
+
+    Args:
+        into: Accumulated timings (modified in place)
+        other: Timings to add
+    """
+    for rule, entry in other.items():
+        target = into.setdefault(rule, {"calls": 0, "total_ms": 0.0})
+        target["calls"] += entry["calls"]
+        target["total_ms"] += entry["total_ms"]
+
+
+def format_timings(timings: Dict[str, Dict[str, float]]) -> List[str]:
+    """
+    Render per-rule timings as report lines, slowest first
+
+    Args:
+        timings: Timings from validate()/validate_all()
+
+    Returns:
+        List of lines
+    """
+    lines = []
+    for rule, entry in sorted(timings.items(), key=lambda item: item[1]["total_ms"], reverse=True):
+        per_call_us = entry["total_ms"] * 1000 / entry["calls"] if entry["calls"] else 0.0
+        lines.append(f"{rule:<16} calls={entry['calls']:<7} total={entry['total_ms']:.1f}ms avg={per_call_us:.1f}us")
+    return lines
+
+
+def _validate_chunk(engine: QAEngine, chunk: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, float]]]:
+    """Validate a list of use cases with one engine"""
+    timings: Dict[str, Dict[str, float]] = {}
+    return [engine.validate(enriched, timings) for enriched in chunk], timings
+
+
+# Engine of a validate_all() worker process (set by _init_worker)
+_worker_engine: Optional[QAEngine] = None
+
+
+def _init_worker(sections: Sequence[Tuple[str, str, str, Tuple[str, ...], Tuple[str, ...]]]):
+    """Process pool initializer: build the calling engine's configuration in the worker"""
+    global _worker_engine
+    _worker_engine = QAEngine(sections)
+
+
+def _validate_chunk_worker(chunk: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, float]]]:
+    """Process pool entry point (uses the engine built by _init_worker)"""
+    return _validate_chunk(_worker_engine, chunk)
+
+
+# Global engine instance (singleton pattern; one per process)
+_qa_engine: Optional[QAEngine] = None
+
+
+def get_qa_engine() -> QAEngine:
+    """
+    Get or create the shared QA engine
+
+    Returns:
+        QAEngine: Shared engine
+    """
+    global _qa_engine
+    if _qa_engine is None:
+        _qa_engine = QAEngine()
+    return _qa_engine
@@ -0,0 +1,225 @@
+"""Shared token-rate budget for Anthropic API calls
+All agents draw from one bucket so concurrent calls stay under the workspace limit
+"""
+import time
+from typing import Any, Dict, Optional, Tuple
+from threading import Lock, Condition
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket sized to the workspace tokens-per-minute limit
+
+    The bucket starts full and refills continuously at tokens_per_minute / 60
+    tokens per second. A call reserves its estimated token cost up front and
+    blocks only until enough budget has refilled. After the call the
+    reservation is reconciled with the actual usage, and the bucket is synced
+    down to the server-reported remaining budget from rate-limit headers.
+    """
+
+    def __init__(self, tokens_per_minute: int):
+        """
+        Initialize the limiter
+
+        Args:
+            tokens_per_minute: Workspace token limit per minute
+        """
+        self.capacity = float(tokens_per_minute)
+        self.refill_rate = tokens_per_minute / 60.0  # tokens per second
+        self.available = float(tokens_per_minute)
+        self.last_refill = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = Lock()
+        self.condition = Condition(self.lock)
+
+        # Metrics
+        self.calls = 0
+        self.throttled_calls = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.tokens_reserved = 0
+        self.tokens_used = 0
+        self.rate_limit_errors = 0
+
+    def _refill(self):
+        """Add tokens accrued since the last refill (caller holds the lock)"""
+        now = time.monotonic()
+        if now <= self.last_refill:
+            return  # Still inside a pause window
+        elapsed = now - self.last_refill
+        self.available = min(self.capacity, self.available + elapsed * self.refill_rate)
+        self.last_refill = now
+
+    def acquire(self, tokens: int) -> Tuple[float, float]:
+        """
+        Reserve tokens, blocking until the budget allows
+
+        Args:
+            tokens: Estimated tokens for the call (capped at bucket capacity)
+
+        Returns:
+            Tuple of (seconds spent waiting, tokens actually debited); pass the
+            debited amount to reconcile()
+        """
+        tokens = min(float(tokens), self.capacity)
+        start = time.monotonic()
+
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    self.condition.wait(timeout=self.blocked_until - now)
+                    continue
+
+                self._refill()
+                if self.available >= tokens:
+                    self.available -= tokens
+                    break
+
+                # Sleep until enough tokens should have refilled
+                shortfall = tokens - self.available
+                self.condition.wait(timeout=shortfall / self.refill_rate)
+
+            waited = time.monotonic() - start
+            self.calls += 1
+            self.tokens_reserved += int(tokens)
+            self.total_wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+            if waited > 0.01:
+                self.throttled_calls += 1
+
+        return waited, tokens
+
+    def reconcile(self, reserved: float, actual: int):
+        """
+        Correct a reservation with the tokens the call actually used
+
+        Over-estimates are refunded; under-estimates are charged (the bucket
+        may go negative, delaying later calls).
+
+        Args:
+            reserved: Tokens debited by acquire() (its second return value,
+                which is capped at capacity)
+            actual: Tokens reported in the API usage
+        """
+        with self.condition:
+            self._refill()
+            self.available = min(self.capacity, self.available + reserved - actual)
+            self.tokens_used += actual
+            self.condition.notify_all()
+
+    def sync(self, limit: Optional[int] = None, remaining: Optional[int] = None):
+        """
+        Align the bucket with rate-limit response headers
+
+        Args:
+            limit: Server-reported tokens-per-minute limit
+            remaining: Server-reported tokens remaining in the current window
+        """
+        with self.condition:
+            self._refill()
+            if limit and limit != self.capacity:
+                self.capacity = float(limit)
+                self.refill_rate = limit / 60.0
+            if remaining is not None:
+                # Trust the server when it reports less than we think we have
+                self.available = min(self.available, float(remaining))
+
+    def pause(self, seconds: float):
+        """
+        Block all admissions for a period (after a 429) and drain the bucket
+
+        Args:
+            seconds: Seconds to wait (e.g. from the retry-after header)
+        """
+        with self.condition:
+            self.rate_limit_errors += 1
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.available = min(self.available, 0.0)
+            self.last_refill = self.blocked_until
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get wait-time and throughput metrics
+
+        Returns:
+            Dict of limiter metrics
+        """
+        with self.lock:
+            return {
+                "tokens_per_minute": int(self.capacity),
+                "calls": self.calls,
+                "throttled_calls": self.throttled_calls,
+                "total_wait_seconds": round(self.total_wait_seconds, 2),
+                "avg_wait_seconds": round(self.total_wait_seconds / self.calls, 2) if self.calls else 0.0,
+                "max_wait_seconds": round(self.max_wait_seconds, 2),
+                "tokens_reserved": self.tokens_reserved,
+                "tokens_used": self.tokens_used,
+                "rate_limit_errors": self.rate_limit_errors
+            }
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token estimate for budgeting (1 token ~ 4 characters)
+
+    Args:
+        text: Prompt text
+
+    Returns:
+        int: Estimated token count
+    """
+    return len(text) // 4
+
+
+def estimate_request_tokens(**kwargs) -> int:
+    """
+    Estimate the token cost of a messages.create() call
+
+    Counts system and message text plus max_tokens for the output.
+
+    Args:
+        **kwargs: Arguments for client.messages.create()
+
+    Returns:
+        int: Estimated token count
+    """
+    def text_of(content: Any) -> str:
+        if isinstance(content, str):
+            return content
+        if isinstance(content, list):
+            return "".join(
+                block.get("text", "") if isinstance(block, dict) else str(block)
+                for block in content
+            )
+        return ""
+
+    text = text_of(kwargs.get("system", ""))
+    for message in kwargs.get("messages", []):
+        text += text_of(message.get("content", ""))
+
+    return estimate_tokens(text) + int(kwargs.get("max_tokens", 0))
+
+
+# Global limiter instance (singleton pattern, shared by all agents)
+_global_limiter: Optional[TokenBucketLimiter] = None
+_global_limiter_lock = Lock()
+
+
+def get_rate_limiter(tokens_per_minute: int) -> TokenBucketLimiter:
+    """
+    Get or create the global rate limiter
+
+    Args:
+        tokens_per_minute: Workspace token limit per minute
+
+    Returns:
+        TokenBucketLimiter: Shared limiter
+    """
+    global _global_limiter
+
+    with _global_limiter_lock:
+        if _global_limiter is None:
+            _global_limiter = TokenBucketLimiter(tokens_per_minute)
+
+    return _global_limiter
@@ -0,0 +1,378 @@
+"""Persistent response cache for Anthropic Messages API calls
+Memoizes responses in SQLite, keyed by a hash of model, prompt, parameters and tools
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import anthropic
+
+# Request arguments that only affect transport, not the response
+TRANSPORT_ARGS = ("timeout", "extra_headers", "extra_query", "extra_body")
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600  # One week
+DEFAULT_MAX_SIZE_MB = 200
+
+# Only complete answers are stored (not max_tokens truncations, refusals, ...)
+CACHEABLE_STOP_REASONS = ("end_turn", "tool_use")
+
+# Set by refreshing() for the calls made in the current thread/context
+_refresh_scope: ContextVar[bool] = ContextVar("response_cache_refresh", default=False)
+
+
+@contextmanager
+def refreshing():
+    """
+    Calls inside the block skip cached responses but store the new ones
+
+    Use for retries: an identical retry prompt would otherwise be answered
+    with the cached response that failed.
+    """
+    token = _refresh_scope.set(True)
+    try:
+        yield
+    finally:
+        _refresh_scope.reset(token)
+
+
+class _CachedStream:
+    """Replays a cached Message through the parts of MessageStream the agents use"""
+
+    def __init__(self, message: anthropic.types.Message):
+        self._message = message
+
+    @property
+    def text_stream(self) -> Iterator[str]:
+        for block in self._message.content:
+            if getattr(block, "text", None):
+                yield block.text
+
+    def until_done(self):
+        pass
+
+    def get_final_message(self) -> anthropic.types.Message:
+        return self._message
+
+
+class ResponseCache:
+    """
+    SQLite-backed memoization of messages.create() and messages.stream() responses
+
+    Entries expire after ttl_seconds and the least recently used entries are
+    evicted once the stored responses exceed max_size_mb. Setting bypass
+    skips the cache entirely; setting refresh (or calling inside
+    refreshing()) ignores cached entries but stores the new responses (to
+    overwrite stale results). Responses that did not finish normally are
+    never stored, and callers invalidate() responses they could not use.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_size_mb: float = DEFAULT_MAX_SIZE_MB,
+        bypass: bool = False,
+        refresh: bool = False
+    ):
+        """
+        Initialize the response cache
+
+        Args:
+            path: SQLite database file
+            ttl_seconds: Entry lifetime (0 = never expire)
+            max_size_mb: Total stored response size before LRU eviction
+            bypass: Do not read or write the cache
+            refresh: Do not read the cache, but store new responses
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.bypass = bypass
+        self.refresh = refresh
+        self.lock = Lock()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (last_accessed)")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection (one per operation, so threads never share one)"""
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def make_key(**kwargs) -> str:
+        """
+        Build the cache key for a request
+
+        Args:
+            **kwargs: Arguments for client.messages.create()
+
+        Returns:
+            str: SHA-256 hex digest of the response-relevant arguments
+        """
+        request = {k: v for k, v in kwargs.items() if k not in TRANSPORT_ARGS}
+        payload = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[anthropic.types.Message]:
+        """
+        Look up a cached response
+
+        Args:
+            key: Cache key from make_key()
+
+        Returns:
+            The cached Message, or None on a miss or expired entry
+        """
+        now = time.time()
+        with self.lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            response, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+
+            try:
+                message = anthropic.types.Message.model_validate_json(response)
+            except Exception:
+                # Written by an incompatible SDK version; treat as a miss
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+
+            conn.execute("UPDATE responses SET last_accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return message
+
+    def put(self, key: str, message: Any):
+        """
+        Store a response and evict if over the size budget
+
+        Args:
+            key: Cache key from make_key()
+            message: Message returned by the API
+        """
+        if not hasattr(message, "model_dump_json"):
+            return  # Not an SDK response (e.g. a test double)
+        if getattr(message, "stop_reason", None) not in CACHEABLE_STOP_REASONS:
+            return  # Truncated or otherwise incomplete: ask again next time
+
+        response = message.model_dump_json()
+        now = time.time()
+        with self.lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, created_at, last_accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, getattr(message, "model", None), response, len(response), now, now)
+            )
+            self.writes += 1
+            self._evict(conn, now)
+
+    def invalidate(self, key: str) -> bool:
+        """
+        Remove a cached response (e.g. one the caller could not parse)
+
+        Args:
+            key: Cache key from make_key()
+
+        Returns:
+            bool: True if an entry was removed
+        """
+        with self.lock, self._connect() as conn:
+            return conn.execute("DELETE FROM responses WHERE key = ?", (key,)).rowcount > 0
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        """Drop expired entries, then least recently used ones over budget (caller holds the lock)"""
+        if self.ttl_seconds:
+            cursor = conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            self.evictions += cursor.rowcount
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_size_bytes:
+            return
+
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_accessed").fetchall():
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.evictions += 1
+            total -= size
+            if total <= self.max_size_bytes:
+                break
+
+    def create(self, create_fn: Callable[..., Any], **kwargs) -> Any:
+        """
+        Serve a messages.create() call from the cache, calling the API on a miss
+
+        Args:
+            create_fn: Function that performs the real call
+            **kwargs: Arguments for client.messages.create()
+
+        Returns:
+            Message response (cached or fresh)
+        """
+        if self.bypass or kwargs.get("stream"):
+            return create_fn(**kwargs)
+
+        key = self.make_key(**kwargs)
+        if not (self.refresh or _refresh_scope.get()):
+            cached = self.get(key)
+            if cached is not None:
+                return cached
+
+        message = create_fn(**kwargs)
+        self.put(key, message)
+        return message
+
+    @contextmanager
+    def stream(self, stream_fn: Callable[..., Any], **kwargs):
+        """
+        Serve a messages.stream() call from the cache, streaming from the API on a miss
+
+        A hit replays the cached text as a single chunk. A miss stores the
+        final message once the stream completes; interrupted or truncated
+        streams are not cached. Streamed and non-streamed requests with the
+        same arguments share an entry.
+
+        Args:
+            stream_fn: Function that opens the real stream
+            **kwargs: Arguments for client.messages.stream()
+
+        Yields:
+            MessageStream (fresh) or an object with the same text_stream /
+            get_final_message() interface (cached)
+        """
+        if self.bypass:
+            with stream_fn(**kwargs) as stream:
+                yield stream
+            return
+
+        key = self.make_key(**kwargs)
+        if not (self.refresh or _refresh_scope.get()):
+            cached = self.get(key)
+            if cached is not None:
+                yield _CachedStream(cached)
+                return
+
+        with stream_fn(**kwargs) as stream:
+            yield stream
+            message = stream.get_final_message()
+        self.put(key, message)
+
+    def clear(self):
+        """Remove all cached responses"""
+        with self.lock, self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get hit/miss counts and storage size
+
+        Returns:
+            Dict of cache metrics
+        """
+        with self.lock, self._connect() as conn:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "entries": entries,
+            "size_mb": round(size / (1024 * 1024), 2)
+        }
+
+
+class _CachingMessages:
+    """messages resource proxy whose create() and stream() go through a ResponseCache"""
+
+    def __init__(self, messages, cache: ResponseCache):
+        self._messages = messages
+        self._cache = cache
+
+    def create(self, **kwargs):
+        return self._cache.create(self._messages.create, **kwargs)
+
+    def stream(self, **kwargs):
+        return self._cache.stream(self._messages.stream, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._messages, name)
+
+
+class CachingClient:
+    """
+    Anthropic client proxy with cached messages.create() and messages.stream()
+
+    All other attributes are forwarded to the wrapped client.
+    """
+
+    def __init__(self, client: anthropic.Anthropic, cache: ResponseCache):
+        self._client = client
+        self.messages = _CachingMessages(client.messages, cache)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+# Global cache instances by path (singleton pattern, shared by all agents)
+_caches: Dict[str, ResponseCache] = {}
+_caches_lock = Lock()
+
+
+def get_response_cache(
+    path: str,
+    ttl_seconds: float = DEFAULT_TTL_SECONDS,
+    max_size_mb: float = DEFAULT_MAX_SIZE_MB,
+    bypass: bool = False,
+    refresh: bool = False
+) -> ResponseCache:
+    """
+    Get or create the shared response cache for a database file
+
+    Args:
+        path: SQLite database file
+        ttl_seconds: Entry lifetime (0 = never expire)
+        max_size_mb: Total stored response size before LRU eviction
+        bypass: Do not read or write the cache
+        refresh: Do not read the cache, but store new responses
+
+    Returns:
+        ResponseCache: Shared cache
+    """
+    path = os.path.abspath(path)
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = ResponseCache(path, ttl_seconds, max_size_mb, bypass, refresh)
+    return _caches[path]
@@ -0,0 +1,101 @@
+"""Concurrent task scheduler for Stage 2 agents
+Runs independent API-bound tasks in parallel with retries, keeping results in order
+"""
+import time
+from typing import Any, Callable, List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+class ConcurrentScheduler:
+    """
+    Runs tasks on a thread pool and returns results in submission order
+
+    Each task is retried with exponential backoff if it raises. Rate limiting
+    is left to the shared token budget, so there are no fixed sleeps between
+    tasks.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_retries: int = 3,
+        backoff_seconds: float = 2.0,
+        on_progress: Optional[Callable[[int, int, int, Any], None]] = None
+    ):
+        """
+        Initialize the scheduler
+
+        Args:
+            max_workers: Maximum tasks running at once
+            max_retries: Attempts per task before giving up
+            backoff_seconds: Initial retry delay (doubles on each retry)
+            on_progress: Optional callback(completed, total, index, result)
+                called as each task finishes
+        """
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max(1, max_retries)
+        self.backoff_seconds = backoff_seconds
+        self.on_progress = on_progress
+
+    def _run_with_retry(self, task: Callable[[], Any]) -> Any:
+        """
+        Run one task, retrying on exceptions
+
+        Args:
+            task: Zero-argument callable
+
+        Returns:
+            Task result
+        """
+        delay = self.backoff_seconds
+        for attempt in range(self.max_retries):
+            try:
+                return task()
+            except Exception as e:
+                if attempt == self.max_retries - 1:
+                    raise
+                print(f"  [RETRY] Task failed ({e}); retrying in {delay:.0f}s (attempt {attempt + 1}/{self.max_retries})")
+                time.sleep(delay)
+                delay *= 2
+
+    def run(
+        self,
+        tasks: List[Callable[[], Any]],
+        on_error: Optional[Callable[[Exception, int], Any]] = None
+    ) -> List[Any]:
+        """
+        Run all tasks concurrently
+
+        Args:
+            tasks: Zero-argument callables
+            on_error: Optional function(error, index) mapping a task's final
+                exception to a result; if not given, the first failure is raised
+
+        Returns:
+            List of results in the same order as tasks
+        """
+        results: List[Any] = [None] * len(tasks)
+        if not tasks:
+            return results
+
+        completed = 0
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(tasks))) as executor:
+            futures = {
+                executor.submit(self._run_with_retry, task): index
+                for index, task in enumerate(tasks)
+            }
+
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    if on_error is None:
+                        raise
+                    results[index] = on_error(e, index)
+
+                completed += 1
+                if self.on_progress:
+                    self.on_progress(completed, len(tasks), index, results[index])
+
+        return results
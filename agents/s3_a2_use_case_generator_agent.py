@@ -10,16 +10,44 @@ Responsibilities:
 """
   
 import json  
-from typing import List, Dict  
-from config.config_tr_auth import get_anthropic_client, ANTHROPIC_MODEL
+import threading
+from typing import List, Dict, Callable, Optional  
+from contextlib import nullcontext
+from config.config_tr_auth import get_anthropic_client, refresh_responses, invalidate_cached_response, ANTHROPIC_MODEL
+from concurrent.futures import ThreadPoolExecutor
+from config.settings import STREAM_GENERATION, MAX_GENERATION_RETRIES, GENERATION_SUB_BATCH_SIZE, MAX_CONCURRENT_GENERATION_CALLS
+from utils.json_stream import JSONArrayStreamParser
+from utils.use_case_schema import USE_CASE_TOOL, USE_CASE_TOOL_CHOICE, TOOL_OUTPUT_INSTRUCTION, extract_tool_use_cases
+
+# One budget for every generation call in the process: the supervisor's
+# sub-function pool and each generator's sub-batch threads all wait here, so
+# at most MAX_CONCURRENT_GENERATION_CALLS 16k-token requests are in flight
+GENERATION_SLOTS = threading.BoundedSemaphore(MAX_CONCURRENT_GENERATION_CALLS)
   
 class UseCaseGeneratorAgent:  
     """Agent responsible for generating use cases with Claude Sonnet 4.5 via direct API calls"""
       
-    def __init__(self):  
+    def __init__(
+        self,
+        stream: bool = STREAM_GENERATION,
+        max_retries: int = MAX_GENERATION_RETRIES,
+        sub_batch_size: int = GENERATION_SUB_BATCH_SIZE
+    ):  
+        """
+        Args:
+            stream: Stream generations and parse use cases as they arrive
+            max_retries: Follow-up calls for use cases missing from a
+                truncated or malformed response
+            sub_batch_size: If > 0, split the 8 use cases into parallel
+                requests of this many activities each, with pre-assigned
+                UC IDs and tool-use (schema-constrained) output
+        """
         self.name = "Use Case Generator Agent"  
         self.client = get_anthropic_client()  
         self.model = ANTHROPIC_MODEL  
+        self.stream = stream
+        self.max_retries = max_retries
+        self.sub_batch_size = max(0, sub_batch_size)
         print(f"🤖 {self.name} initialized with model: {self.model}")
       
     def generate_use_cases(  
@@ -27,16 +55,25 @@ class UseCaseGeneratorAgent:
         sub_function_name: str,   
         activities: List[Dict],   
         bu_context: str,   
-        uc_counter: int  
+        uc_counter: int,
+        on_use_case: Optional[Callable[[Dict], None]] = None
     ) -> List[Dict]:  
         """  
         Generate 8 use cases for a sub-function using Claude Sonnet 4.5
+
+        Use cases are parsed one by one as the response arrives, so a
+        truncated or partly malformed response keeps every complete use case
+        and only the missing UC IDs are requested again. With sub_batch_size
+        set, activity slices are generated by parallel tool-use requests with
+        pre-assigned UC IDs and merged in activity order.
           
         Args:  
             sub_function_name: Name of the sub-function (e.g., "Demand Generation")  
             activities: List of top 8 activities with time_spent_pct and current_tools  
             bu_context: Business context from BU Intelligence document  
             uc_counter: Running counter for UC ID numbering
+            on_use_case: Optional callback called with each use case as soon
+                as it is parsed
           
         Returns:  
             List of 8 use case dictionaries (27 columns each)  
@@ -48,84 +85,285 @@ class UseCaseGeneratorAgent:
         print(f"   Activities: {len(activities)}")  
         print(f"   Starting UC ID: {uc_counter + 1}")
           
+        # Generate sub-function abbreviation for UC ID  
+        abbrev = self.sub_function_abbrev(sub_function_name)
+
+        if self.sub_batch_size and self.sub_batch_size < len(activities):
+            # Parallel sub-batches: each gets an activity slice and its pre-assigned UC IDs
+            slices = [
+                (offset, activities[offset:offset + self.sub_batch_size])
+                for offset in range(0, len(activities), self.sub_batch_size)
+            ]
+            print(f"   🤖 Calling Claude Sonnet 4.5 in {len(slices)} parallel sub-batches of up to {self.sub_batch_size}...")
+
+            with ThreadPoolExecutor(max_workers=len(slices)) as executor:
+                futures = [
+                    executor.submit(
+                        self._generate_slice,
+                        sub_function_name, activity_slice, bu_context, abbrev,
+                        uc_counter + offset, len(activity_slice),
+                        self._request_use_cases_tool, on_use_case
+                    )
+                    for offset, activity_slice in slices
+                ]
+                # Merge in slice order (deterministic regardless of completion order)
+                use_cases = [uc for future in futures for uc in future.result()]
+            expected = len(activities)
+        else:
+            print(f"   🤖 Calling Claude Sonnet 4.5{' (streaming)' if self.stream else ''}...")
+            use_cases = self._generate_slice(
+                sub_function_name, activities, bu_context, abbrev,
+                uc_counter, 8, self._request_use_cases, on_use_case
+            )
+            expected = 8
+
+        if len(use_cases) < expected:
+            print(f"   ⚠️  Generated {len(use_cases)}/{expected} use cases for '{sub_function_name}'")
+        else:
+            print(f"   ✅ Generated {len(use_cases)} use cases for '{sub_function_name}'")
+
+        return use_cases
+
+    def _generate_slice(
+        self,
+        sub_function_name: str,
+        activities: List[Dict],
+        bu_context: str,
+        abbrev: str,
+        uc_counter: int,
+        count: int,
+        request_fn: Callable[[str, Optional[Callable[[Dict], None]]], List[Dict]],
+        on_use_case: Optional[Callable[[Dict], None]] = None
+    ) -> List[Dict]:
+        """
+        Generate count use cases (IDs from uc_counter + 1) for an activity slice
+
+        Complete use cases are kept from every attempt; retries request only
+        the missing UC IDs and only those IDs are accepted from them.
+
+        Returns:
+            Use cases in activity (UC ID) order
+        """
         # Build activities text for prompt  
         activities_text = "\n".join([  
             f"{i+1}. {a['activity']} (Time Spent: {a['time_spent_pct']}%, Current Tools: {a['current_tools']})"   
             for i, a in enumerate(activities)  
         ])
-          
-        # Generate sub-function abbreviation for UC ID  
-        abbrev = ''.join([c for c in sub_function_name if c.isupper()])[:4]  
-        if not abbrev:  
-            abbrev = sub_function_name[:4].upper()
-          
-        # Build prompt  
-        prompt = self._build_prompt(  
+
+        base_prompt = self._build_prompt(  
             sub_function_name,   
             activities_text,   
             bu_context,   
             abbrev,   
-            uc_counter  
+            uc_counter,
+            count
         )
-          
-        # Call Claude Sonnet 4.5  
-        print(f"   🤖 Calling Claude Sonnet 4.5...")
-          
-        try:  
-            response = self.client.messages.create(  
-                model=self.model,  
-                max_tokens=16000,  
-                temperature=0.7,  
-                messages=[{"role": "user", "content": prompt}]  
-            )
-              
-            # Parse response  
-            response_text = response.content[0].text
-              
-            # Extract JSON (Claude might wrap in markdown)  
-            if "```json" in response_text:  
-                response_text = response_text.split("```json")[1].split("```")[0].strip()  
-            elif "```" in response_text:  
-                response_text = response_text.split("```")[1].split("```")[0].strip()
-              
-            use_cases = json.loads(response_text)
-              
-            print(f"   ✅ Generated {len(use_cases)} use cases for '{sub_function_name}'")
-              
-            return use_cases
-              
-        except json.JSONDecodeError as e:  
-            print(f"   ❌ JSON parsing error: {e}")  
-            print(f"   Response (first 500 chars): {response_text[:500]}...")  
-            return []  
-        except Exception as e:  
-            print(f"   ❌ Error generating use cases: {e}")  
-            return []
-      
+        if request_fn == self._request_use_cases_tool:
+            base_prompt = f"{base_prompt}\n\n{TOOL_OUTPUT_INSTRUCTION}"
+
+        # One UC ID per activity, in prompt order
+        expected_ids = [f"UC-{abbrev}-{uc_counter + i:03d}" for i in range(1, count + 1)]
+        received: Dict[str, Dict] = {}
+        missing = expected_ids
+
+        def accept(use_case: Dict) -> None:
+            # Keep only requested IDs, first copy wins (no duplicates or extras)
+            uc_id = use_case.get('use_case_id')
+            if uc_id in missing and uc_id not in received:
+                received[uc_id] = use_case
+                if on_use_case:
+                    on_use_case(use_case)
+
+        for attempt in range(self.max_retries + 1):
+            prompt = base_prompt
+            if attempt > 0:
+                print(f"   🔁 Retrying {len(missing)} missing use case(s): {', '.join(missing)}")
+                prompt = self._build_retry_prompt(base_prompt, missing, expected_ids, activities)
+
+            try:
+                # Retries never reuse a cached answer (the same missing set gives the same prompt)
+                with GENERATION_SLOTS, (refresh_responses() if attempt > 0 else nullcontext()):
+                    batch = request_fn(prompt, accept)
+            except Exception as e:
+                print(f"   ❌ Error generating use cases: {e}")
+                batch = []
+
+            ignored = len(batch) - sum(1 for uc in batch if received.get(uc.get('use_case_id')) is uc)
+            if ignored:
+                print(f"   ⚠️  Ignored {ignored} duplicate or unexpected use case(s)")
+
+            missing = [uc_id for uc_id in expected_ids if uc_id not in received]
+            if not missing:
+                break
+
+        # Keep prompt (activity) order regardless of which call produced each use case
+        return [received[uc_id] for uc_id in expected_ids if uc_id in received]
+
+    def _request_use_cases(
+        self,
+        prompt: str,
+        on_use_case: Optional[Callable[[Dict], None]] = None
+    ) -> List[Dict]:
+        """
+        Call Claude and parse the use case array incrementally
+
+        Returns every complete use case object, even if the response was cut
+        off (max_tokens, network error) or later objects are malformed.
+        """
+        parser = JSONArrayStreamParser()
+        use_cases: List[Dict] = []
+
+        def collect(objects: List) -> None:
+            for obj in objects:
+                if isinstance(obj, dict):
+                    use_cases.append(obj)
+                    print(f"   📥 Parsed {obj.get('use_case_id', 'use case')} ({len(use_cases)})")
+                    if on_use_case:
+                        on_use_case(obj)
+
+        params = {
+            "model": self.model,
+            "max_tokens": 16000,
+            "temperature": 0.7,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+
+        stop_reason = None
+        try:
+            if self.stream:
+                with self.client.messages.stream(**params) as stream:
+                    for text in stream.text_stream:
+                        collect(parser.feed(text))
+                    stop_reason = stream.get_final_message().stop_reason
+            else:
+                response = self.client.messages.create(**params)
+                stop_reason = response.stop_reason
+                collect(parser.feed("".join(b.text for b in response.content if hasattr(b, 'text'))))
+        except Exception as e:
+            if not use_cases:
+                raise
+            print(f"   ⚠️  Generation interrupted after {len(use_cases)} use case(s): {e}")
+
+        if stop_reason == "max_tokens":
+            print(f"   ⚠️  Response hit max_tokens after {len(use_cases)} use case(s)")
+        if parser.errors:
+            print(f"   ⚠️  Skipped {parser.errors} malformed use case object(s)")
+            invalidate_cached_response(**params)
+
+        return use_cases
+
+    def _request_use_cases_tool(
+        self,
+        prompt: str,
+        on_use_case: Optional[Callable[[Dict], None]] = None
+    ) -> List[Dict]:
+        """
+        Call Claude with the record_use_cases tool forced
+
+        The tool's input schema constrains the output to the 27 columns, so
+        no fence stripping or JSON repair is needed.
+        """
+        response = self.client.messages.create(
+            model=self.model,
+            max_tokens=16000,
+            temperature=0.7,
+            tools=[USE_CASE_TOOL],
+            tool_choice=USE_CASE_TOOL_CHOICE,
+            messages=[{"role": "user", "content": prompt}]
+        )
+
+        if response.stop_reason == "max_tokens":
+            print(f"   ⚠️  Response hit max_tokens; tool input may be incomplete")
+
+        use_cases = extract_tool_use_cases(response)
+        for use_case in use_cases:
+            print(f"   📥 Received {use_case.get('use_case_id', 'use case')}")
+            if on_use_case:
+                on_use_case(use_case)
+
+        return use_cases
+
+    def _build_retry_prompt(
+        self,
+        prompt: str,
+        missing_ids: List[str],
+        expected_ids: List[str],
+        activities: List[Dict]
+    ) -> str:
+        """Narrow the generation prompt to the missing UC IDs"""
+        lines = []
+        for uc_id in missing_ids:
+            index = expected_ids.index(uc_id)
+            activity = activities[index]['activity'] if index < len(activities) else "the corresponding activity"
+            lines.append(f"- {uc_id}: {activity}")
+
+        return f"""{prompt}
+
+**RETRY - PARTIAL GENERATION:**
+The other use cases were already generated. Generate ONLY the following {len(missing_ids)} use case(s), keeping these exact IDs and activities and all 27 fields:
+{chr(10).join(lines)}
+
+Return ONLY a valid JSON array with exactly {len(missing_ids)} object(s)."""
+
+    @staticmethod
+    def sub_function_abbrev(sub_function_name: str) -> str:
+        """Abbreviation used in UC IDs (e.g. "Demand Generation" -> "DG")"""
+        abbrev = ''.join([c for c in sub_function_name if c.isupper()])[:4]
+        if not abbrev:
+            abbrev = sub_function_name[:4].upper()
+        return abbrev
+
+    def assign_use_case_ids(
+        self,
+        use_cases: List[Dict],
+        sub_function_name: str,
+        uc_counter: int
+    ) -> int:
+        """
+        Number use cases sequentially from a running counter
+
+        Used when sub-functions are generated concurrently, so IDs are
+        assigned after the results are merged in sub-function order.
+
+        Args:
+            use_cases: Use cases of one sub-function (updated in place)
+            sub_function_name: Name of the sub-function
+            uc_counter: Running counter before this sub-function
+
+        Returns:
+            Updated running counter
+        """
+        abbrev = self.sub_function_abbrev(sub_function_name)
+        for use_case in use_cases:
+            uc_counter += 1
+            use_case['use_case_id'] = f"UC-{abbrev}-{uc_counter:03d}"
+        return uc_counter
+
     def _build_prompt(  
         self,   
         sub_function_name: str,   
         activities_text: str,   
         bu_context: str,   
         abbrev: str,   
-        uc_counter: int  
+        uc_counter: int,
+        count: int = 8
     ) -> str:  
-        """Build the Claude prompt for use case generation"""
+        """Build the Claude prompt for use case generation (count use cases from uc_counter + 1)"""
           
         # Calculate UC IDs  
         uc_start = uc_counter + 1  
-        uc_end = uc_counter + 8
+        uc_end = uc_counter + count
           
         prompt = f"""You are an AI consultant generating AI/ML use cases for the **{sub_function_name}** sub-function of Thomson Reuters Marketing organization.
   
 **BUSINESS CONTEXT (Summary):**  
 {bu_context[:1500]}
   
-**TARGET ACTIVITIES (Top 8 by Time Spent %):**  
+**TARGET ACTIVITIES ({count} by Time Spent %):**  
 {activities_text}
   
 **TASK:**  
-Generate exactly **8 AI/ML use cases** (one per activity) with the following 27 columns in JSON format.
+Generate exactly **{count} AI/ML use cases** (one per activity) with the following 27 columns in JSON format.
   
 **COLUMN DEFINITIONS:**  
 1. use_case_id: Format "UC-{abbrev}-{uc_start:03d}" through "UC-{abbrev}-{uc_end:03d}" (increment by 1 for each use case)  
@@ -219,15 +457,15 @@ Generate exactly **8 AI/ML use cases** (one per activity) with the following 27
 ]
   
 **CRITICAL REQUIREMENTS:**  
-1. Generate exactly 8 use cases (one per activity in the TARGET ACTIVITIES list)  
+1. Generate exactly {count} use cases (one per activity in the TARGET ACTIVITIES list)  
 2. Each use case MUST have all 27 fields  
 3. Use case IDs must increment: UC-{abbrev}-{uc_start:03d}, UC-{abbrev}-{uc_start+1:03d}, ..., UC-{abbrev}-{uc_end:03d}  
 4. Map "target_process_area" and "impacted_activities" to actual activity names from the TARGET ACTIVITIES list  
 5. Include specific FTE/Time Impact calculations in "business_impact" (MANDATORY)  
 6. Apply sub-headings (using **bold**) in columns 6, 8, 17, 18, 19, 21, 22, 26  
 7. Word counts: detailed_description (150-200), business_impact (120-150), current_tool_adaptation (80-120), etc.  
-8. Return ONLY a valid JSON array with 8 objects, no additional text before or after
+8. Return ONLY a valid JSON array with {count} objects, no additional text before or after
   
-Generate the 8 use cases now in JSON format."""
+Generate the {count} use cases now in JSON format."""
           
         return prompt
\ No newline at end of file
@@ -10,7 +10,13 @@ Responsibilities:
   
 from langgraph.graph import StateGraph, END  
 from state_schema import AgentState  
-from typing import Dict, Callable, Optional  
+from typing import Dict, List, Callable, Optional  
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config.settings import (
+    MAX_PARALLEL_SUB_FUNCTIONS, DEDUP_ACTION, DEDUP_SEMANTIC_THRESHOLD,
+    DEDUP_LEXICAL_THRESHOLD, DEDUP_EMBEDDING_MODEL
+)
+from utils.dedup import find_near_duplicates, apply_duplicates
 from agents.s3_a1_file_orchestrator_agent import FileOrchestratorAgent  
 from agents.s3_a2_use_case_generator_agent import UseCaseGeneratorAgent  
 from agents.s3_a3_output_assembler_agent import OutputAssemblerAgent
@@ -18,8 +24,17 @@ from agents.s3_a3_output_assembler_agent import OutputAssemblerAgent
 class SupervisorAgent:  
     """LangGraph supervisor that orchestrates all agents"""
       
-    def __init__(self):  
+    def __init__(self, max_parallel_sub_functions: int = MAX_PARALLEL_SUB_FUNCTIONS):  
+        """
+        Args:
+            max_parallel_sub_functions: Sub-functions generated concurrently;
+                1 keeps the sequential process_sub_function -> check_remaining
+                loop. Generation calls in flight are capped separately by
+                MAX_CONCURRENT_GENERATION_CALLS, shared with the sub-batches
+        """
         self.name = "Supervisor Agent (LangGraph)"
+        self.max_parallel_sub_functions = max(1, max_parallel_sub_functions)
+        self.progress_callback: Optional[Callable] = None
           
         print(f"\n{'='*70}")  
         print(f"🎯 {self.name} - INITIALIZING")  
@@ -42,13 +57,25 @@ class SupervisorAgent:
         # Add nodes  
         workflow.add_node("parse_files", self._parse_files_node)  
         workflow.add_node("check_strategic_priorities", self._check_strategic_priorities_node)  
+        workflow.add_node("deduplicate", self._deduplicate_node)  
+        workflow.add_node("validate_and_export", self._validate_and_export_node)
+
+        workflow.set_entry_point("parse_files")  
+        workflow.add_edge("parse_files", "check_strategic_priorities")
+
+        if self.max_parallel_sub_functions > 1:
+            # Fan out: all sub-functions in one node on a bounded executor
+            workflow.add_node("process_sub_functions_parallel", self._process_sub_functions_parallel_node)
+            workflow.add_edge("check_strategic_priorities", "process_sub_functions_parallel")
+            workflow.add_edge("process_sub_functions_parallel", "deduplicate")  
+            workflow.add_edge("deduplicate", "validate_and_export")
+            workflow.add_edge("validate_and_export", END)
+            return workflow.compile()
+
         workflow.add_node("process_sub_function", self._process_sub_function_node)  
         workflow.add_node("check_remaining", self._check_remaining_node)  
-        workflow.add_node("validate_and_export", self._validate_and_export_node)
           
         # Define edges  
-        workflow.set_entry_point("parse_files")  
-        workflow.add_edge("parse_files", "check_strategic_priorities")  
         workflow.add_edge("check_strategic_priorities", "process_sub_function")  
         workflow.add_edge("process_sub_function", "check_remaining")
           
@@ -58,10 +85,11 @@ class SupervisorAgent:
             self._route_next_action,  
             {  
                 "continue": "process_sub_function",  
-                "finalize": "validate_and_export"  
+                "finalize": "deduplicate"  
             }  
         )
           
+        workflow.add_edge("deduplicate", "validate_and_export")  
         workflow.add_edge("validate_and_export", END)
           
         return workflow.compile()
@@ -163,6 +191,89 @@ class SupervisorAgent:
           
         return state
       
+    def _generate_for_sub_function(  
+        self,  
+        file3_path: str,  
+        sub_function_name: str,  
+        bu_context: str  
+    ) -> Optional[List[Dict]]:  
+        """Extract activities and generate use cases for one sub-function (None if no activities)"""
+        activities = self.file_orchestrator.extract_activities_for_sub_function(  
+            file3_path=file3_path,  
+            sub_function_name=sub_function_name  
+        )
+
+        if not activities:  
+            print(f"⚠️  No activities found for '{sub_function_name}', skipping...")  
+            return None
+
+        # IDs are assigned after the merge, so every call starts from 0
+        return self.use_case_generator.generate_use_cases(  
+            sub_function_name=sub_function_name,  
+            activities=activities,  
+            bu_context=bu_context,  
+            uc_counter=0  
+        )
+
+    def _process_sub_functions_parallel_node(self, state: AgentState) -> AgentState:  
+        """Node: Process all sub-functions concurrently, then merge in sub-function order"""
+        sub_functions = state['sub_functions']  
+        total = len(sub_functions)
+
+        print(f"\n{'='*70}")  
+        print(f"📋 NODE: Process Sub-Functions in Parallel ({total} sub-functions, up to {self.max_parallel_sub_functions} at once)")  
+        print(f"{'='*70}")
+
+        results: List[Optional[List[Dict]]] = [None] * total
+        if total:
+            with ThreadPoolExecutor(max_workers=min(self.max_parallel_sub_functions, total)) as executor:  
+                futures = {  
+                    executor.submit(  
+                        self._generate_for_sub_function,  
+                        state['file3_path'],  
+                        sub_function_name,  
+                        state['bu_intelligence']  
+                    ): index  
+                    for index, sub_function_name in enumerate(sub_functions)  
+                }
+
+                completed = 0  
+                for future in as_completed(futures):  
+                    index = futures[future]  
+                    sub_function_name = sub_functions[index]  
+                    try:  
+                        results[index] = future.result()  
+                    except Exception as e:  
+                        state['errors'].append(f"Error processing {sub_function_name}: {str(e)}")  
+                        print(f"❌ Error processing '{sub_function_name}': {e}")
+
+                    completed += 1  
+                    if results[index]:  
+                        print(f"✅ [{completed}/{total}] Completed '{sub_function_name}': {len(results[index])} use cases")  
+                    if self.progress_callback:  
+                        self.progress_callback(completed, total, sub_function_name)
+
+        # Deterministic merge: sub-function order, then UC IDs from a single counter
+        uc_counter = 0  
+        generated_use_cases = []  
+        for sub_function_name, use_cases in zip(sub_functions, results):  
+            if use_cases is None:  
+                continue  
+            if not use_cases:  
+                state['errors'].append(f"Failed to generate use cases for {sub_function_name}")  
+                continue  
+            uc_counter = self.use_case_generator.assign_use_case_ids(use_cases, sub_function_name, uc_counter)  
+            generated_use_cases.extend(use_cases)
+
+        state['generated_use_cases'] = generated_use_cases  
+        state['uc_counter'] = uc_counter  
+        state['current_sub_function_index'] = total  
+        state['processing_complete'] = True
+
+        print(f"\n✅ All {total} sub-functions processed: {len(generated_use_cases)} use cases")
+
+        return state
+      
     def _check_remaining_node(self, state: AgentState) -> AgentState:  
         """Node: Check if more sub-functions remain"""  
         remaining = state['total_sub_functions'] - state['current_sub_function_index']
@@ -176,6 +287,45 @@ class SupervisorAgent:
           
         return state
       
+    def _deduplicate_node(self, state: AgentState) -> AgentState:  
+        """Node: Flag or drop near-duplicates (vs existing and earlier generated use cases)"""  
+        print(f"\n{'='*70}")  
+        print(f"📋 NODE: Deduplicate ({DEDUP_ACTION})")  
+        print(f"{'='*70}")
+
+        state['duplicate_pairs'] = []  
+        if DEDUP_ACTION == "off" or not state['generated_use_cases']:  
+            return state
+
+        try:  
+            pairs = find_near_duplicates(  
+                generated=state['generated_use_cases'],  
+                existing=state['enriched_use_cases'],  
+                semantic_threshold=DEDUP_SEMANTIC_THRESHOLD,  
+                lexical_threshold=DEDUP_LEXICAL_THRESHOLD,  
+                model_name=DEDUP_EMBEDDING_MODEL  
+            )  
+            # Logged before dropping renumbers the kept use cases
+            for pair in pairs:  
+                print(f"   🔁 {pair['use_case_id']} ~ {pair['duplicate_of']} ({pair['duplicate_kind']}, {pair['method']} {pair['similarity']})")
+
+            before = len(state['generated_use_cases'])  
+            state['generated_use_cases'] = apply_duplicates(state['generated_use_cases'], pairs, DEDUP_ACTION)  
+            state['duplicate_pairs'] = pairs
+
+            if DEDUP_ACTION == "drop":  
+                state['uc_counter'] = len(state['generated_use_cases'])  
+                print(f"✅ Dropped {before - len(state['generated_use_cases'])} near-duplicate use case(s); UC IDs renumbered")  
+            else:  
+                flagged = sum(1 for uc in state['generated_use_cases'] if 'duplicate_of' in uc)  
+                print(f"✅ Flagged {flagged} near-duplicate use case(s)")
+
+        except Exception as e:  
+            state['errors'].append(f"Deduplication error: {str(e)}")  
+            print(f"❌ Error: {e}")
+
+        return state
+      
     def _validate_and_export_node(self, state: AgentState) -> AgentState:  
         """Node: Validate and export"""  
         print(f"\n{'='*70}")  
@@ -219,6 +369,8 @@ class SupervisorAgent:
         print(f"\n{'='*70}")  
         print(f"🎯 {self.name} - STARTING WORKFLOW")  
         print(f"{'='*70}")
+
+        self.progress_callback = progress_callback
           
         initial_state = {  
             'file1_path': file1_path,  
@@ -235,6 +387,7 @@ class SupervisorAgent:
             'current_activities': [],  
             'uc_counter': 0,  
             'generated_use_cases': [],  
+            'duplicate_pairs': [],  
             'has_strategic_priorities': False,  
             'processing_complete': False,  
             'validation_report': None,  
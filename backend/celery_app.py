@@ -14,18 +14,15 @@ import os
 import sys
 from pathlib import Path
 from datetime import datetime
+from typing import Any, Dict, Optional
 import traceback
 
 # Add project root to path
 sys.path.append(str(Path(__file__).parent.parent))
 
-# Import your existing modules
-try:
-    from Automation.Business_Units.Marketing.Stage2.orchestrator import Stage2Orchestrator
-    from rag_pipeline.main import RAGPipeline
-    from rag_pipeline.config.settings import RAGConfig
-except ImportError as e:
-    logging.warning(f"Could not import some modules: {e}")
+# The Stage 2 orchestrator and RAG pipeline (anthropic, openai, pandas, torch,
+# opensearch-py, ...) are imported inside the tasks that use them, so worker
+# start-up and the RSS of idle workers only pay for Celery itself
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -62,23 +59,74 @@ celery_app.conf.update(
     task_max_retries=3,
 )
 
-# Progress callback for job updates
-def update_progress(job_id: str, progress: float, status: str, current_step: str = None):
-    """Update job progress in Redis/Database"""
-    # In production, this would update a database or Redis
-    # For now, we'll log the progress
-    logger.info(f"Job {job_id}: {progress:.1%} - {status} - {current_step}")
-
-    # You can also use Celery's result backend to store progress
-    celery_app.backend.set(
-        f"job_progress_{job_id}",
-        {
-            "progress": progress,
-            "status": status,
-            "current_step": current_step,
-            "updated_at": datetime.now().isoformat()
-        }
-    )
+# Progress of each Stage 2 agent as a (start, end) fraction of the job
+AGENT_PROGRESS = {1: (0.0, 0.1), 2: (0.1, 0.4), 3: (0.4, 0.8), 4: (0.8, 0.9), 5: (0.9, 1.0)}
+
+
+def update_progress(job_id: str, progress: Optional[float], status: str, current_step: str = None, **detail):
+    """
+    Update job progress in the job store and publish it to WebSocket clients
+
+    Args:
+        job_id: Job identifier
+        progress: Fraction complete (None keeps the current value)
+        status: Job status
+        current_step: Human-readable step description
+        **detail: Extra event fields (completed_steps, results, error_message,
+            agent, use_case, ...)
+    """
+    from backend.progress import get_progress_publisher
+
+    logger.info(f"Job {job_id}: {status} - {current_step}" + (f" ({progress:.1%})" if progress is not None else ""))
+    get_progress_publisher().publish(job_id, status, progress=progress, current_step=current_step, **detail)
+
+
+def is_cancelled(job_id: str) -> bool:
+    """True if the job was cancelled before the task started"""
+    from backend.job_store import get_job_store
+
+    job = get_job_store().get(job_id, include_results=False)
+    return job is not None and job["status"] == "cancelled"
+
+
+def report_failure(task, job_id: str, label: str, error: Exception):
+    """Publish a failure (or the pending retry) and retry the task if attempts remain"""
+    error_msg = f"{label} failed: {str(error)}"
+    logger.error(f"Job {job_id} failed: {error_msg}")
+    logger.error(traceback.format_exc())
+
+    if task.request.retries < task.max_retries:
+        logger.info(f"Retrying job {job_id} (attempt {task.request.retries + 1})")
+        update_progress(job_id, None, "running", f"Retrying after error: {error} (attempt {task.request.retries + 2})")
+        raise task.retry(countdown=60, exc=error)
+
+    update_progress(job_id, None, "failed", f"Error: {error_msg}", error_message=error_msg)
+    raise error
+
+
+def stage2_progress_callback(job_id: str):
+    """Translate Stage 2 orchestrator events (per agent, per use case) into job progress"""
+    def on_event(event: Dict[str, Any]):
+        agent = event["agent"]
+        start, end = AGENT_PROGRESS[agent]
+        step = f"Agent {agent}: {event['name']}"
+
+        if event["event"] == "agent_started":
+            update_progress(job_id, start, "running", step, completed_steps=agent - 1, **event)
+        elif event["event"] == "item_completed":
+            fraction = event["completed"] / event["total"] if event["total"] else 1.0
+            item = event.get("use_case")
+            update_progress(
+                job_id,
+                start + (end - start) * fraction,
+                "running",
+                f"{step} ({event['completed']}/{event['total']})" + (f" - {item}" if item else ""),
+                **event
+            )
+        else:  # agent_completed / agent_skipped
+            update_progress(job_id, end, "running", step, completed_steps=agent, **event)
+    return on_event
+
 
 @celery_app.task(bind=True)
 def process_stage2_automation(self, job_id: str, files: list, parameters: dict):
@@ -88,8 +136,13 @@ def process_stage2_automation(self, job_id: str, files: list, parameters: dict):
     Args:
         job_id: Unique job identifier
         files: List of uploaded file paths
-        parameters: Job configuration parameters
+        parameters: Job configuration parameters (skip_web_research,
+            batch_mode, resume, use_cache)
     """
+    if is_cancelled(job_id):
+        logger.info(f"Job {job_id} was cancelled; skipping")
+        return {"status": "cancelled"}
+
     try:
         logger.info(f"Starting Stage 2 automation for job {job_id}")
 
@@ -97,79 +150,40 @@ def process_stage2_automation(self, job_id: str, files: list, parameters: dict):
         update_progress(job_id, 0.0, "running", "Initializing automation pipeline...")
 
         # Initialize orchestrator
+        from Automation.Business_Units.Marketing.Stage2.orchestrator import Stage2Orchestrator
+
         orchestrator = Stage2Orchestrator()
 
-        # Step 1: Data Ingestion
-        update_progress(job_id, 0.1, "running", "Agent 1: Data Ingestion")
-
-        # Find required files
-        use_cases_file = None
-        bu_intelligence_file = None
-        function_updates_file = None
-
-        for file_path in files:
-            if "use_cases" in file_path.lower():
-                use_cases_file = file_path
-            elif "bu_intelligence" in file_path.lower() or file_path.endswith('.docx'):
-                bu_intelligence_file = file_path
-            elif "function_updates" in file_path.lower():
-                function_updates_file = file_path
-
-        if not use_cases_file or not bu_intelligence_file:
-            raise ValueError("Required files missing: Use cases CSV and BU intelligence DOCX")
-
-        # Execute Agent 1: Data Ingestion
-        context_data = orchestrator.run_agent1(
-            bu_intelligence_path=bu_intelligence_file,
-            use_cases_path=use_cases_file,
-            function_updates_path=function_updates_file
+        # Retries resume from the per-use-case checkpoints of the failed attempt
+        outcome = orchestrator.run(
+            skip_web_research=parameters.get("skip_web_research", False),
+            batch_mode=parameters.get("batch_mode", False),
+            resume=parameters.get("resume", False) or self.request.retries > 0,
+            use_cache=parameters.get("use_cache", True),
+            progress_callback=stage2_progress_callback(job_id)
         )
-
-        # Step 2: Web Research
-        update_progress(job_id, 0.25, "running", "Agent 2: Web Research")
-
-        research_data = orchestrator.run_agent2(context_data)
-
-        # Step 3: Use Case Enrichment
-        update_progress(job_id, 0.4, "running", "Agent 3: Use Case Enrichment")
-
-        enriched_data = orchestrator.run_agent3(context_data, research_data)
-
-        # Step 4: Quality Assurance
-        update_progress(job_id, 0.7, "running", "Agent 4: Quality Assurance")
-
-        qa_results = orchestrator.run_agent4(enriched_data)
-
-        # Step 5: Output Formatting
-        update_progress(job_id, 0.9, "running", "Agent 5: Output Formatting")
-
-        output_file = orchestrator.run_agent5(qa_results)
+        if not outcome.get("success"):
+            raise Exception(outcome.get("error", "unknown error"))
+
+        summary = outcome["summary"]
+        qa_total = summary["qa_passed"] + summary["qa_failed"]
+        results = {
+            "output_file": summary["output_file"],
+            "enriched_use_cases": summary["use_cases_enriched"],
+            "qa_passed": summary["qa_passed"],
+            "qa_failed": summary["qa_failed"],
+            "processing_time": f"{summary['duration_seconds']:.0f} seconds",
+            "quality_score": round(summary["qa_passed"] / qa_total, 2) if qa_total else 0.0
+        }
 
         # Complete
-        update_progress(job_id, 1.0, "completed", "All agents completed successfully")
-
-        return {
-            "status": "completed",
-            "output_file": output_file,
-            "enriched_use_cases": len(enriched_data.get("use_cases", [])),
-            "processing_time": "Completed",
-            "agents_executed": 5,
-            "quality_score": qa_results.get("quality_score", 0.0)
-        }
+        update_progress(job_id, 1.0, "completed", "All agents completed successfully",
+                        completed_steps=5, results=results)
+        return {"status": "completed", **results}
 
     except Exception as e:
-        error_msg = f"Stage 2 automation failed: {str(e)}"
-        logger.error(f"Job {job_id} failed: {error_msg}")
-        logger.error(traceback.format_exc())
-
-        update_progress(job_id, 0.0, "failed", f"Error: {error_msg}")
+        report_failure(self, job_id, "Stage 2 automation", e)
 
-        # Retry logic
-        if self.request.retries < self.max_retries:
-            logger.info(f"Retrying job {job_id} (attempt {self.request.retries + 1})")
-            raise self.retry(countdown=60, exc=e)
-
-        raise e
 
 @celery_app.task(bind=True)
 def process_rag_pipeline(self, job_id: str, files: list, parameters: dict):
@@ -181,59 +195,50 @@ def process_rag_pipeline(self, job_id: str, files: list, parameters: dict):
         files: List of document files to index
         parameters: RAG configuration parameters
     """
+    if is_cancelled(job_id):
+        logger.info(f"Job {job_id} was cancelled; skipping")
+        return {"status": "cancelled"}
+
     try:
         logger.info(f"Starting RAG pipeline setup for job {job_id}")
 
         update_progress(job_id, 0.0, "running", "Initializing RAG pipeline...")
 
         # Initialize RAG pipeline with config
-        config = RAGConfig()
-        rag_pipeline = RAGPipeline(config)
-
-        # Step 1: Document Loading
-        update_progress(job_id, 0.2, "running", "Loading and chunking documents...")
-
-        documents = []
-        for file_path in files:
-            docs = rag_pipeline.load_documents(file_path)
-            documents.extend(docs)
-
-        logger.info(f"Loaded {len(documents)} document chunks")
-
-        # Step 2: Generate Embeddings
-        update_progress(job_id, 0.5, "running", "Generating embeddings...")
-
-        embeddings = rag_pipeline.generate_embeddings(documents)
-
-        # Step 3: Create Vector Index
-        update_progress(job_id, 0.8, "running", "Creating vector index...")
-
-        index_info = rag_pipeline.create_vector_index(documents, embeddings)
+        from rag_pipeline.main import RAGPipeline
+
+        rag_pipeline = RAGPipeline()
+        rag_pipeline.setup()
+        update_progress(job_id, 0.1, "running", "Loading and indexing documents...", completed_steps=1)
+
+        # Load, embed and index each document
+        for i, file_path in enumerate(files):
+            rag_pipeline.load_and_index_documents(file_path)
+            update_progress(
+                job_id,
+                0.1 + 0.8 * (i + 1) / len(files),
+                "running",
+                f"Indexed {Path(file_path).name} ({i + 1}/{len(files)})",
+                event="item_completed", completed=i + 1, total=len(files), document=Path(file_path).name
+            )
+
+        index_stats = rag_pipeline.vector_store.get_index_stats()
+        rag_pipeline.cleanup()
+        results = {
+            "documents_indexed": index_stats.get("document_count", 0),
+            "vector_dimensions": rag_pipeline.config.embedding.dimensions,
+            "index_name": index_stats.get("index_name", rag_pipeline.vector_store.index_name),
+            "index_status": "ready"
+        }
 
         # Complete
-        update_progress(job_id, 1.0, "completed", "RAG pipeline ready for queries")
-
-        return {
-            "status": "completed",
-            "documents_indexed": len(documents),
-            "vector_dimensions": config.embedding_config.dimension,
-            "index_name": index_info.get("index_name"),
-            "ready_for_queries": True
-        }
+        update_progress(job_id, 1.0, "completed", "RAG pipeline ready for queries",
+                        completed_steps=3, results=results)
+        return {"status": "completed", **results}
 
     except Exception as e:
-        error_msg = f"RAG pipeline setup failed: {str(e)}"
-        logger.error(f"Job {job_id} failed: {error_msg}")
-        logger.error(traceback.format_exc())
-
-        update_progress(job_id, 0.0, "failed", f"Error: {error_msg}")
+        report_failure(self, job_id, "RAG pipeline setup", e)
 
-        # Retry logic
-        if self.request.retries < self.max_retries:
-            logger.info(f"Retrying job {job_id} (attempt {self.request.retries + 1})")
-            raise self.retry(countdown=60, exc=e)
-
-        raise e
 
 @celery_app.task(bind=True)
 def process_rag_query(self, query_id: str, query: str, parameters: dict):
@@ -249,23 +254,23 @@ def process_rag_query(self, query_id: str, query: str, parameters: dict):
         logger.info(f"Processing RAG query {query_id}: {query}")
 
         # Initialize RAG pipeline
-        config = RAGConfig()
-        rag_pipeline = RAGPipeline(config)
+        from rag_pipeline.main import RAGPipeline
+
+        rag_pipeline = RAGPipeline()
+        rag_pipeline.setup()
+        rag_pipeline.initialize_retrieval()
 
         # Process query through RAG pipeline
-        result = rag_pipeline.query(
-            query=query,
-            max_results=parameters.get("max_results", 10),
-            include_sources=parameters.get("include_sources", True)
-        )
+        start_time = datetime.now()
+        result = rag_pipeline.query(query, refine_query=parameters.get("refine_query", True))
 
         return {
             "query_id": query_id,
             "query": query,
             "answer": result.get("answer", ""),
             "sources": result.get("sources", []),
-            "processing_time": result.get("processing_time", 0.0),
-            "tokens_used": result.get("tokens_used", 0)
+            "processing_time": (datetime.now() - start_time).total_seconds(),
+            "tokens_used": result.get("usage", {}).get("input_tokens", 0) + result.get("usage", {}).get("output_tokens", 0)
         }
 
     except Exception as e:
@@ -280,12 +285,19 @@ def process_rag_query(self, query_id: str, query: str, parameters: dict):
 def task_prerun_handler(sender=None, task_id=None, task=None, args=None, kwargs=None, **kwds):
     """Handler called before task execution"""
     logger.info(f"Task {task.name} [{task_id}] started")
+    # Report this worker process's stage metrics to the API's /metrics
+    from backend.metrics import get_metrics_pusher
+
+    get_metrics_pusher().ensure_started()
 
 @task_postrun.connect
 def task_postrun_handler(sender=None, task_id=None, task=None, args=None, kwargs=None,
                         retval=None, state=None, **kwds):
     """Handler called after task execution"""
     logger.info(f"Task {task.name} [{task_id}] finished with state: {state}")
+    from backend.metrics import get_metrics_pusher
+
+    get_metrics_pusher().push()
 
 @task_failure.connect
 def task_failure_handler(sender=None, task_id=None, exception=None, args=None, kwargs=None,
@@ -296,10 +308,13 @@ def task_failure_handler(sender=None, task_id=None, exception=None, args=None, k
 
 # Utility function to get job progress
 def get_job_progress(job_id: str):
-    """Get current job progress from backend"""
+    """Get current job progress from the job store"""
+    from backend.job_store import get_job_store
+    from backend.progress import job_snapshot
+
     try:
-        progress_data = celery_app.backend.get(f"job_progress_{job_id}")
-        return progress_data
+        job = get_job_store().get(job_id, include_results=False)
+        return job_snapshot(job) if job is not None else None
     except Exception as e:
         logger.error(f"Error getting progress for job {job_id}: {e}")
         return None
@@ -9,10 +9,11 @@ This backend provides REST API endpoints for:
 5. Real-time progress updates via WebSocket
 """
 
-from fastapi import FastAPI, UploadFile, File, HTTPException, WebSocket, WebSocketDisconnect
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import asyncio
@@ -28,13 +29,18 @@ from pathlib import Path
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
 
-# Import existing automation and RAG components
-try:
-    from Automation.Business_Units.Marketing.Stage2.orchestrator import Stage2Orchestrator
-    from rag_pipeline.main import RAGPipeline
-    from rag_pipeline.config.settings import RAGConfig
-except ImportError as e:
-    logging.warning(f"Could not import some modules: {e}")
+# The Stage 2 orchestrator and RAG pipeline are imported by the handlers that
+# run them (or by the Celery workers), not at start-up: they pull in the LLM
+# SDKs, pandas, torch and opensearch-py
+
+# Stage latency metrics, merged with those reported by the Celery workers
+from backend.metrics import aggregated_registry
+
+# Persistent job records (SQLite by default; PostgreSQL/Redis via JOB_STORE_URL)
+from backend.job_store import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, get_job_store
+
+# Progress events published by the Celery workers (Redis pub/sub)
+from backend.progress import ProgressHub, TERMINAL_STATUSES, get_progress_publisher, job_snapshot
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -63,9 +69,19 @@ TEMP_DIR = Path("temp")
 for dir_path in [UPLOAD_DIR, RESULTS_DIR, TEMP_DIR]:
     dir_path.mkdir(exist_ok=True)
 
-# In-memory storage for jobs (in production, use Redis/Database)
-jobs_store: Dict[str, Dict] = {}
-active_connections: Dict[str, WebSocket] = {}
+# Job records live in the shared job store so every API worker sees them
+job_store = get_job_store()
+
+# Jobs run on the Celery workers, which publish progress; the hub relays it to
+# this process's WebSocket clients
+progress_publisher = get_progress_publisher()
+progress_hub = ProgressHub()
+
+# Celery task per workflow (rag_query jobs build the index the queries run against)
+WORKFLOW_TASKS = {
+    "stage2_automation": "process_stage2_automation",
+    "rag_query": "process_rag_pipeline",
+}
 
 # Pydantic models for API requests/responses
 class JobRequest(BaseModel):
@@ -96,29 +112,6 @@ class RAGResponse(BaseModel):
     query_id: str
     processing_time: float
 
-# WebSocket connection manager
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
-
-    async def connect(self, websocket: WebSocket, job_id: str):
-        await websocket.accept()
-        self.active_connections[job_id] = websocket
-
-    def disconnect(self, job_id: str):
-        if job_id in self.active_connections:
-            del self.active_connections[job_id]
-
-    async def send_job_update(self, job_id: str, update: Dict):
-        if job_id in self.active_connections:
-            try:
-                await self.active_connections[job_id].send_text(json.dumps(update))
-            except Exception as e:
-                logger.error(f"Error sending update to {job_id}: {e}")
-                self.disconnect(job_id)
-
-manager = ConnectionManager()
-
 # Utility functions
 def create_job_id() -> str:
     return str(uuid.uuid4())
@@ -126,36 +119,32 @@ def create_job_id() -> str:
 def update_job_status(job_id: str, status: str, progress: float = None,
                      current_step: str = None, error_message: str = None,
                      completed_steps: int = None, results: Dict = None):
-    """Update job status and notify WebSocket clients"""
-    if job_id not in jobs_store:
-        return
-
-    job = jobs_store[job_id]
-    job["status"] = status
-    job["updated_at"] = datetime.now()
-
-    if progress is not None:
-        job["progress"] = progress
-    if current_step is not None:
-        job["current_step"] = current_step
-    if error_message is not None:
-        job["error_message"] = error_message
-    if completed_steps is not None:
-        job["completed_steps"] = completed_steps
-    if results is not None:
-        job["results"] = results
-
-    # Send WebSocket update
-    update = {
-        "job_id": job_id,
-        "status": status,
-        "progress": job.get("progress", 0.0),
-        "current_step": current_step,
-        "completed_steps": job.get("completed_steps", 0),
-        "total_steps": job.get("total_steps", 0)
-    }
+    """Update job status and notify WebSocket clients (of every API process)"""
+    progress_publisher.publish(
+        job_id, status,
+        progress=progress,
+        current_step=current_step,
+        completed_steps=completed_steps,
+        error_message=error_message,
+        results=results
+    )
 
-    asyncio.create_task(manager.send_job_update(job_id, update))
+def dispatch_job(job_id: str, workflow_type: str, files: List[str], parameters: Dict[str, Any]):
+    """Queue a job on the Celery workers (the Celery task id is the job id)"""
+    from backend import celery_app  # Deferred: only needed once jobs are submitted
+
+    task = getattr(celery_app, WORKFLOW_TASKS[workflow_type])
+    task.apply_async(args=[job_id, files, parameters], task_id=job_id)
+
+@app.on_event("startup")
+async def start_progress_hub():
+    await progress_hub.start()
+    # Without Redis, events published in this process still reach its clients
+    progress_publisher.local_hub = progress_hub
+
+@app.on_event("shutdown")
+async def stop_progress_hub():
+    await progress_hub.stop()
 
 # API Endpoints
 
@@ -167,6 +156,19 @@ async def root():
 async def health_check():
     return {"status": "healthy", "timestamp": datetime.now()}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus scrape endpoint: per-stage latency histograms, quantiles and LLM token counters of all workers"""
+    return PlainTextResponse(
+        aggregated_registry().render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+@app.get("/api/metrics/latency")
+def latency_summary():
+    """Per-stage latency summary across all workers (count, mean, p50/p95/p99 in ms)"""
+    return {"stages": aggregated_registry().snapshot(), "timestamp": datetime.now()}
+
 @app.post("/api/upload")
 async def upload_files(files: List[UploadFile] = File(...)):
     """Upload multiple files for processing"""
@@ -205,7 +207,7 @@ async def upload_files(files: List[UploadFile] = File(...)):
     return {"uploaded_files": uploaded_files, "count": len(uploaded_files)}
 
 @app.post("/api/jobs")
-async def create_job(job_request: JobRequest):
+def create_job(job_request: JobRequest):
     """Create a new processing job"""
     job_id = create_job_id()
 
@@ -222,7 +224,7 @@ async def create_job(job_request: JobRequest):
     # Create job entry
     total_steps = 5 if job_request.workflow_type == "stage2_automation" else 3
 
-    jobs_store[job_id] = {
+    job_store.create({
         "job_id": job_id,
         "workflow_type": job_request.workflow_type,
         "files": job_request.files,
@@ -234,64 +236,87 @@ async def create_job(job_request: JobRequest):
         "completed_steps": 0,
         "created_at": datetime.now(),
         "updated_at": datetime.now(),
-        "error_message": None,
-        "results": None
-    }
+        "error_message": None
+    })
 
-    # Start background processing
-    asyncio.create_task(process_job(job_id))
+    # Queue on the Celery workers
+    files = [str((UPLOAD_DIR / filename).resolve()) for filename in job_request.files]
+    try:
+        dispatch_job(job_id, job_request.workflow_type, files, job_request.parameters)
+    except Exception as e:
+        logger.error(f"Could not queue job {job_id}: {e}")
+        update_job_status(job_id, "failed", error_message=f"Could not queue job: {e}")
+        raise HTTPException(status_code=503, detail="Job queue unavailable")
 
     return {"job_id": job_id, "status": "created"}
 
 @app.get("/api/jobs/{job_id}")
-async def get_job_status(job_id: str):
+def get_job_status(job_id: str):
     """Get job status and progress"""
-    if job_id not in jobs_store:
+    job = job_store.get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    return jobs_store[job_id]
+    return job
 
 @app.get("/api/jobs")
-async def list_jobs():
-    """List all jobs"""
-    return {"jobs": list(jobs_store.values())}
+def list_jobs(
+    status: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include_results: bool = False
+):
+    """List jobs, newest first (pass next_cursor back as cursor for the next page)"""
+    try:
+        jobs, next_cursor = job_store.list(status=status, limit=limit, cursor=cursor, include_results=include_results)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"jobs": jobs, "next_cursor": next_cursor, "total": job_store.count(status)}
 
 @app.delete("/api/jobs/{job_id}")
-async def cancel_job(job_id: str):
+def cancel_job(job_id: str):
     """Cancel a running job"""
-    if job_id not in jobs_store:
+    job = job_store.get(job_id, include_results=False)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    job = jobs_store[job_id]
-    if job["status"] in ["completed", "failed"]:
+    if job["status"] in TERMINAL_STATUSES:
         raise HTTPException(status_code=400, detail="Cannot cancel completed job")
 
-    update_job_status(job_id, "cancelled")
+    # Workers skip queued jobs marked cancelled; running ones are terminated
+    update_job_status(job_id, "cancelled", current_step="Cancelled")
+    try:
+        from backend.celery_app import celery_app
+
+        celery_app.control.revoke(job_id, terminate=True)
+    except Exception as e:
+        logger.warning(f"Could not revoke task for job {job_id}: {e}")
     return {"message": "Job cancelled"}
 
 @app.get("/api/jobs/{job_id}/results")
-async def get_job_results(job_id: str):
+def get_job_results(job_id: str):
     """Get job results"""
-    if job_id not in jobs_store:
+    job = job_store.get(job_id, include_results=False)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    job = jobs_store[job_id]
     if job["status"] != "completed":
         raise HTTPException(status_code=400, detail="Job not completed")
 
-    return job.get("results", {})
+    return job_store.get_results(job_id) or {}
 
 @app.get("/api/jobs/{job_id}/download")
-async def download_results(job_id: str):
+def download_results(job_id: str):
     """Download job result files"""
-    if job_id not in jobs_store:
+    job = job_store.get(job_id, include_results=False)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    job = jobs_store[job_id]
     if job["status"] != "completed":
         raise HTTPException(status_code=400, detail="Job not completed")
 
-    results = job.get("results", {})
+    results = job_store.get_results(job_id) or {}
     if "output_file" not in results:
         raise HTTPException(status_code=404, detail="No output file available")
 
@@ -315,7 +340,8 @@ async def rag_query(query_request: RAGQuery):
         start_time = datetime.now()
 
         # This would use your actual RAG pipeline
-        # rag_pipeline = RAGPipeline(RAGConfig())
+        # from rag_pipeline.main import RAGPipeline
+        # rag_pipeline = RAGPipeline()
         # response = await rag_pipeline.query(query_request.query)
 
         # Mock response for now
@@ -344,97 +370,53 @@ async def rag_query(query_request: RAGQuery):
         logger.error(f"Error processing RAG query: {e}")
         raise HTTPException(status_code=500, detail=f"Query processing failed: {str(e)}")
 
-@app.websocket("/ws/{job_id}")
-async def websocket_endpoint(websocket: WebSocket, job_id: str):
-    """WebSocket endpoint for real-time job updates"""
-    await manager.connect(websocket, job_id)
+async def receive_until_disconnect(websocket: WebSocket):
+    """Drain client messages until the client disconnects"""
     try:
         while True:
-            # Keep connection alive
-            await asyncio.sleep(1)
+            await websocket.receive_text()
     except WebSocketDisconnect:
-        manager.disconnect(job_id)
-
-# Background processing function
-async def process_job(job_id: str):
-    """Process job in background"""
-    try:
-        job = jobs_store[job_id]
-        workflow_type = job["workflow_type"]
+        pass
 
-        update_job_status(job_id, "running", 0.1, "Starting job...")
-
-        if workflow_type == "stage2_automation":
-            await process_stage2_automation(job_id)
-        elif workflow_type == "rag_query":
-            await process_rag_job(job_id)
-
-    except Exception as e:
-        logger.error(f"Job {job_id} failed: {e}")
-        update_job_status(job_id, "failed", error_message=str(e))
-
-async def process_stage2_automation(job_id: str):
-    """Process Stage 2 Marketing Automation"""
-    job = jobs_store[job_id]
-
-    try:
-        # Step 1: Data Ingestion
-        update_job_status(job_id, "running", 0.2, "Agent 1: Data Ingestion", completed_steps=1)
-        await asyncio.sleep(2)  # Simulate processing time
-
-        # Step 2: Web Research
-        update_job_status(job_id, "running", 0.4, "Agent 2: Web Research", completed_steps=2)
-        await asyncio.sleep(3)
-
-        # Step 3: Use Case Enrichment
-        update_job_status(job_id, "running", 0.6, "Agent 3: Use Case Enrichment", completed_steps=3)
-        await asyncio.sleep(5)
-
-        # Step 4: Quality Assurance
-        update_job_status(job_id, "running", 0.8, "Agent 4: Quality Assurance", completed_steps=4)
-        await asyncio.sleep(2)
-
-        # Step 5: Output Formatting
-        update_job_status(job_id, "running", 0.9, "Agent 5: Output Formatting", completed_steps=5)
-        await asyncio.sleep(1)
-
-        # Complete with results
-        results = {
-            "output_file": "data/Business Units/Marketing/Stage 2/2b-MKTG-Existing Use Cases Enriched.xlsx",
-            "enriched_use_cases": 15,
-            "processing_time": "12 minutes",
-            "quality_score": 0.92
-        }
-
-        update_job_status(job_id, "completed", 1.0, "Job completed successfully",
-                         completed_steps=5, results=results)
-
-    except Exception as e:
-        update_job_status(job_id, "failed", error_message=str(e))
-
-async def process_rag_job(job_id: str):
-    """Process RAG pipeline job"""
+@app.websocket("/ws/{job_id}")
+async def websocket_endpoint(websocket: WebSocket, job_id: str):
+    """
+    WebSocket endpoint for real-time job updates
+
+    Sends the job's current state, then each progress event until the job
+    finishes. Every event carries the full progress snapshot, so a client that
+    falls behind is sent only the newest one.
+    """
+    # Subscribe before reading the snapshot so no event is missed in between
+    subscriber = progress_hub.subscribe(job_id)
+    await websocket.accept()
+    disconnected = asyncio.create_task(receive_until_disconnect(websocket))
     try:
-        # Step 1: Document Loading
-        update_job_status(job_id, "running", 0.3, "Loading documents...", completed_steps=1)
-        await asyncio.sleep(2)
-
-        # Step 2: Vector Indexing
-        update_job_status(job_id, "running", 0.7, "Creating vector index...", completed_steps=2)
-        await asyncio.sleep(3)
-
-        # Step 3: Ready for queries
-        results = {
-            "documents_indexed": 25,
-            "vector_dimensions": 3072,
-            "index_status": "ready"
-        }
-
-        update_job_status(job_id, "completed", 1.0, "RAG pipeline ready",
-                         completed_steps=3, results=results)
+        job = await run_in_threadpool(job_store.get, job_id, include_results=False)
+        if job is None:
+            await websocket.close(code=1000, reason="Job not found")
+            return
 
-    except Exception as e:
-        update_job_status(job_id, "failed", error_message=str(e))
+        update = job_snapshot(job)
+        while True:
+            await websocket.send_text(json.dumps(update, default=str))
+            if update["status"] in TERMINAL_STATUSES:
+                await websocket.close(code=1000)
+                return
+
+            next_update = asyncio.create_task(subscriber.next_event())
+            await asyncio.wait({next_update, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if disconnected.done():
+                next_update.cancel()
+                return
+            update = next_update.result()
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        disconnected.cancel()
+        progress_hub.unsubscribe(subscriber)
+        if subscriber.dropped:
+            logger.debug(f"WebSocket for job {job_id} skipped {subscriber.dropped} intermediate updates")
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,142 @@
+"""
+Worker Metrics Aggregation
+The RAG pipeline runs in the Celery workers, so its stage latencies and token
+counters are recorded in the worker processes, not in the API process.
+
+- Each worker process writes its metrics registry state to Redis (one key per
+  process) every few seconds and after each task
+- Keys expire when a process stops reporting, so stopped workers drop out
+- The API's /metrics endpoints merge every reported state with its own
+  registry
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+from typing import Any, Dict, List, Optional
+
+from rag_pipeline.observability import MetricsRegistry, get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+METRICS_KEY_PREFIX = "bu_research:metrics:"
+PUSH_INTERVAL_SECONDS = float(os.getenv("METRICS_PUSH_INTERVAL_SECONDS", "15"))
+STATE_TTL_SECONDS = max(60, int(PUSH_INTERVAL_SECONDS * 4))
+
+
+def _redis_client(redis_url: str):
+    import redis  # Deferred: only loaded when metrics are pushed or scraped
+
+    return redis.Redis.from_url(redis_url, socket_connect_timeout=2, socket_timeout=5)
+
+
+class MetricsPusher:
+    """Periodically writes this process's metrics registry to Redis (worker side)"""
+
+    def __init__(self, redis_url: str = REDIS_URL, interval_s: float = PUSH_INTERVAL_SECONDS):
+        """
+        Initialize pusher
+
+        Args:
+            redis_url: Redis URL
+            interval_s: Seconds between pushes
+        """
+        self.redis_url = redis_url
+        self.interval_s = interval_s
+        self._client = None
+        self._pid: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    @property
+    def key(self) -> str:
+        """Redis key of this process's state"""
+        return f"{METRICS_KEY_PREFIX}{socket.gethostname()}:{os.getpid()}"
+
+    def ensure_started(self):
+        """Start the push thread in this process (idempotent, fork-safe)"""
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        # A forked child inherits neither the thread nor a usable connection
+        self._pid = os.getpid()
+        self._client = None
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="MetricsPusher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop pushing (the last state expires after STATE_TTL_SECONDS)"""
+        self._stopped.set()
+
+    def push(self):
+        """Write the current registry state now (errors are logged, never raised)"""
+        try:
+            if self._client is None:
+                self._client = _redis_client(self.redis_url)
+            state = get_metrics_registry().export_state()
+            self._client.set(self.key, json.dumps(state), ex=STATE_TTL_SECONDS)
+        except Exception as e:
+            logger.warning(f"Could not push metrics to Redis: {e}")
+
+    def _run(self):
+        while not self._stopped.wait(self.interval_s):
+            self.push()
+
+
+def worker_states(redis_url: str = REDIS_URL, exclude: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Metrics states reported by the worker processes
+
+    Args:
+        redis_url: Redis URL
+        exclude: Key to skip (the calling process's own state)
+
+    Returns:
+        List of MetricsRegistry.export_state() dicts (empty if Redis is unavailable)
+    """
+    try:
+        client = _redis_client(redis_url)
+        keys = [key for key in client.scan_iter(match=f"{METRICS_KEY_PREFIX}*", count=100)
+                if (key.decode() if isinstance(key, bytes) else key) != exclude]
+        if not keys:
+            return []
+        return [json.loads(raw) for raw in client.mget(keys) if raw is not None]
+    except Exception as e:
+        logger.warning(f"Could not read worker metrics from Redis: {e}")
+        return []
+
+
+def aggregated_registry(redis_url: str = REDIS_URL) -> MetricsRegistry:
+    """
+    Metrics of this process combined with those of every reporting worker
+
+    Args:
+        redis_url: Redis URL
+
+    Returns:
+        Merged MetricsRegistry
+    """
+    own_key = get_metrics_pusher().key  # This process is counted from its live registry
+    return MetricsRegistry.merged([get_metrics_registry().export_state()] + worker_states(redis_url, exclude=own_key))
+
+
+# Global pusher (singleton pattern)
+_pusher: Optional[MetricsPusher] = None
+_pusher_lock = threading.Lock()
+
+
+def get_metrics_pusher() -> MetricsPusher:
+    """
+    Get or create the shared metrics pusher
+
+    Returns:
+        MetricsPusher instance
+    """
+    global _pusher
+    with _pusher_lock:
+        if _pusher is None:
+            _pusher = MetricsPusher()
+    return _pusher
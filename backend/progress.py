@@ -0,0 +1,280 @@
+"""
+Job Progress Events
+Celery workers publish job progress over Redis pub/sub; every API process
+holds one subscription and fans the events out to the WebSocket clients
+watching each job.
+
+- Each event carries the job's full progress snapshot (status, progress,
+  current step, step counts) plus event detail (agent, use case, ...), so
+  coalescing - a slow client only receives the newest event - loses no state
+- Publishing also writes the snapshot to the job store, so REST polling and
+  newly connected clients see the current state
+- Without Redis, events still reach clients connected to the same process
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Set
+
+from backend.job_store import JobStore, get_job_store
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+CHANNEL_PREFIX = "bu_research:progress:"
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+RECONNECT_DELAY_SECONDS = 2.0
+
+
+def progress_channel(job_id: str) -> str:
+    """Redis pub/sub channel for a job's progress events"""
+    return f"{CHANNEL_PREFIX}{job_id}"
+
+
+def job_snapshot(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Progress fields of a job record, as sent to WebSocket clients"""
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "progress": job.get("progress", 0.0),
+        "current_step": job.get("current_step"),
+        "completed_steps": job.get("completed_steps", 0),
+        "total_steps": job.get("total_steps", 0),
+        "error_message": job.get("error_message"),
+    }
+
+
+class ProgressPublisher:
+    """Records job progress in the job store and publishes it (worker side)"""
+
+    def __init__(self, redis_url: Optional[str] = REDIS_URL, job_store: Optional[JobStore] = None):
+        """
+        Initialize publisher
+
+        Args:
+            redis_url: Redis URL (None: only update the job store)
+            job_store: Job store (default: the shared store)
+        """
+        self.redis_url = redis_url
+        self.job_store = job_store or get_job_store()
+        self._client = None
+        self.local_hub: Optional["ProgressHub"] = None
+
+    def _redis(self):
+        if self._client is None and self.redis_url:
+            import redis  # Deferred: only loaded when progress is published
+
+            self._client = redis.Redis.from_url(self.redis_url, socket_connect_timeout=2, socket_timeout=5)
+        return self._client
+
+    def publish(
+        self,
+        job_id: str,
+        status: str,
+        progress: Optional[float] = None,
+        current_step: Optional[str] = None,
+        completed_steps: Optional[int] = None,
+        error_message: Optional[str] = None,
+        results: Optional[Dict[str, Any]] = None,
+        **detail
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Update a job and publish the progress event
+
+        Publishing failures are logged, never raised: progress reporting must
+        not fail the job.
+
+        Args:
+            job_id: Job identifier
+            status: Job status
+            progress: Fraction complete (0.0 to 1.0)
+            current_step: Human-readable step description
+            completed_steps: Completed top-level steps
+            error_message: Error for failed jobs
+            results: Result payload (stored out of line, not published)
+            **detail: Event detail (e.g. event, agent, use_case, completed, total)
+
+        Returns:
+            Published event, or None if the job does not exist or was cancelled
+        """
+        fields = {"status": status}
+        for name, value in (("progress", progress), ("current_step", current_step),
+                            ("completed_steps", completed_steps), ("error_message", error_message),
+                            ("results", results)):
+            if value is not None:
+                fields[name] = value
+
+        # Late events from a task being revoked must not overwrite the cancellation
+        unless_status = () if status == "cancelled" else ("cancelled",)
+        job = self.job_store.update(job_id, unless_status=unless_status, **fields)
+        if job is None:
+            return None
+
+        event = {**job_snapshot(job), **detail, "timestamp": time.time()}
+        published = False
+        try:
+            client = self._redis()
+            if client is not None:
+                client.publish(progress_channel(job_id), json.dumps(event, default=str))
+                published = True
+        except Exception as e:
+            logger.warning(f"Could not publish progress for job {job_id}: {e}")
+
+        # Without Redis, clients of this process still get the event
+        if not published and self.local_hub is not None:
+            self.local_hub.dispatch_threadsafe(job_id, event)
+        return event
+
+
+class Subscriber:
+    """
+    One WebSocket client's view of a job
+
+    Holds only the newest undelivered event: a client that falls behind skips
+    intermediate events instead of queueing them.
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.dropped = 0
+        self._latest: Optional[Dict[str, Any]] = None
+        self._ready = asyncio.Event()
+
+    def offer(self, event: Dict[str, Any]):
+        """Replace the pending event (called on the event loop)"""
+        if self._latest is not None:
+            self.dropped += 1
+        self._latest = event
+        self._ready.set()
+
+    async def next_event(self) -> Dict[str, Any]:
+        """Wait for the newest event"""
+        await self._ready.wait()
+        self._ready.clear()
+        event, self._latest = self._latest, None
+        return event
+
+
+class ProgressHub:
+    """Fans out progress events to the WebSocket clients of this process (API side)"""
+
+    def __init__(self, redis_url: Optional[str] = REDIS_URL):
+        """
+        Initialize hub
+
+        Args:
+            redis_url: Redis URL to subscribe to (None: local events only)
+        """
+        self.redis_url = redis_url
+        self.subscribers: Dict[str, Set[Subscriber]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start the Redis listener (call from the application's startup)"""
+        self._loop = asyncio.get_running_loop()
+        if self.redis_url and self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        """Stop the Redis listener"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def subscribe(self, job_id: str) -> Subscriber:
+        """
+        Register a client for a job's events
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            Subscriber to read events from
+        """
+        subscriber = Subscriber(job_id)
+        self.subscribers.setdefault(job_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        """Remove a client"""
+        subscribers = self.subscribers.get(subscriber.job_id)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self.subscribers[subscriber.job_id]
+
+    def dispatch(self, job_id: str, event: Dict[str, Any]):
+        """Offer an event to every client of a job (on the event loop)"""
+        for subscriber in list(self.subscribers.get(job_id, ())):
+            subscriber.offer(event)
+
+    def dispatch_threadsafe(self, job_id: str, event: Dict[str, Any]):
+        """dispatch() from any thread"""
+        if self._loop is None or self._loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self.dispatch(job_id, event)
+        else:
+            self._loop.call_soon_threadsafe(self.dispatch, job_id, event)
+
+    async def _listen(self):
+        """Forward Redis events to local clients, reconnecting on errors"""
+        import redis.asyncio as aioredis  # Deferred: only loaded by API processes
+
+        while True:
+            client = aioredis.Redis.from_url(self.redis_url, socket_connect_timeout=5)
+            pubsub = client.pubsub()
+            try:
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                logger.info("Subscribed to job progress events")
+                async for message in pubsub.listen():
+                    if message.get("type") != "pmessage":
+                        continue
+                    channel = message["channel"]
+                    channel = channel.decode() if isinstance(channel, bytes) else channel
+                    job_id = channel[len(CHANNEL_PREFIX):]
+                    if job_id in self.subscribers:
+                        self.dispatch(job_id, json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Progress subscription lost ({e}); reconnecting in {RECONNECT_DELAY_SECONDS}s")
+                await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+            finally:
+                try:
+                    await pubsub.aclose()
+                    await client.aclose()
+                except Exception:
+                    pass
+
+
+# Global publisher (singleton pattern)
+_publisher: Optional[ProgressPublisher] = None
+_publisher_lock = threading.Lock()
+
+
+def get_progress_publisher() -> ProgressPublisher:
+    """
+    Get or create the shared progress publisher
+
+    Returns:
+        ProgressPublisher instance
+    """
+    global _publisher
+    with _publisher_lock:
+        if _publisher is None:
+            _publisher = ProgressPublisher()
+    return _publisher
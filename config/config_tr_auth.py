@@ -1,10 +1,9 @@
 # config_tr_auth.py  
-import json  
 import os  
-import time  
-import requests  
 from anthropic import Anthropic  
 from dotenv import load_dotenv
+
+from rag_pipeline.auth import get_credential_provider
   
 load_dotenv()
   
@@ -13,69 +12,31 @@ TOKEN_URL = os.getenv("TOKEN_URL")
 TOKEN_CACHE_FILE = os.getenv("TOKEN_CACHE_FILE", ".api_token")  
 TOKEN_EXPIRY_SECONDS = int(os.getenv("TOKEN_EXPIRY_SECONDS", "3600"))  
 ANTHROPIC_MODEL = os.getenv("ANTHROPIC_MODEL", "claude-sonnet-4-5-20250929")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STAGE2_DIR = os.path.join(ROOT_DIR, "Automation", "Business_Units", "Marketing", "Stage2")
+
+# Response cache (same file as Stage 2's, independent of the working directory;
+# identical requests are served from disk)
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", os.path.join(STAGE2_DIR, ".cache", "llm_responses.sqlite"))
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+RESPONSE_CACHE_MAX_MB = int(os.getenv("RESPONSE_CACHE_MAX_MB", "200"))
+RESPONSE_CACHE_BYPASS = os.getenv("LLM_CACHE_BYPASS", "0") == "1"
+RESPONSE_CACHE_REFRESH = os.getenv("LLM_CACHE_REFRESH", "0") == "1"
   
 class TokenManager:  
-    """Manages dynamic API token fetching and caching for Thomson Reuters"""
+    """Manages dynamic API token fetching and caching for Thomson Reuters (via the shared credential provider)"""
       
     def __init__(self):  
         self.token_cache_file = TOKEN_CACHE_FILE  
         self.token_expiry_seconds = TOKEN_EXPIRY_SECONDS
-      
-    def _fetch_new_token(self):  
-        """Fetch a fresh token from the TR endpoint"""  
-        payload = {"workspace_id": WORKSPACE_ID}
-          
-        try:  
-            print(f"🔐 Fetching new token from TR endpoint...")  
-            resp = requests.post(TOKEN_URL, headers=None, json=payload, timeout=30)  
-            resp.raise_for_status()  
-            credentials = resp.json()
-              
-            if 'anthropic_api_key' not in credentials:  
-                raise ValueError(f"API key not found in response: {credentials}")
-              
-            # Add timestamp for cache management  
-            credentials['fetched_at'] = time.time()  
-            print(f"✅ Token fetched successfully")  
-            return credentials
-              
-        except requests.RequestException as e:  
-            print(f"❌ Failed to fetch token: {e}")  
-            raise Exception(f"Failed to fetch token: {e}")
-      
-    def _save_token_cache(self, credentials):  
-        """Save token to local cache file"""  
-        try:  
-            with open(self.token_cache_file, 'w') as f:  
-                json.dump(credentials, f)  
-            print(f"💾 Token cached to {self.token_cache_file}")  
-        except OSError as e:  
-            print(f"⚠️  Failed to cache token: {e}")
-      
-    def _load_token_cache(self):  
-        """Load token from cache if exists and not expired"""  
-        if not os.path.exists(self.token_cache_file):  
-            print(f"📝 No token cache found")  
-            return None
-          
-        try:  
-            with open(self.token_cache_file, 'r') as f:  
-                credentials = json.load(f)
-              
-            # Check if token is expired  
-            fetched_at = credentials.get('fetched_at', 0)  
-            age = time.time() - fetched_at
-              
-            if age > self.token_expiry_seconds:  
-                print(f"⏰ Token expired (age: {age:.0f}s > {self.token_expiry_seconds}s)")  
-                return None  # Token expired
-              
-            print(f"✅ Using cached token (age: {age:.0f}s)")  
-            return credentials
-              
-        except (json.JSONDecodeError, OSError) as e:  
-            print(f"⚠️  Failed to load token cache: {e}")  
-            return None
+        self.provider = get_credential_provider(
+            TOKEN_URL,
+            {"workspace_id": WORKSPACE_ID},
+            required_keys=("anthropic_api_key",),
+            ttl_s=self.token_expiry_seconds,
+            cache_path=self.token_cache_file
+        )
       
     def get_api_key(self, force_refresh=False):  
         """  
@@ -87,28 +48,75 @@ class TokenManager:
         Returns:  
             Valid Anthropic API key  
         """  
-        if not force_refresh:  
-            cached = self._load_token_cache()  
-            if cached and 'anthropic_api_key' in cached:  
-                return cached['anthropic_api_key']
-          
-        # Fetch new token  
-        credentials = self._fetch_new_token()  
-        self._save_token_cache(credentials)  
+        fetches = self.provider.stats["fetches"]
+        try:
+            credentials = self.provider.get(force_refresh)
+        except Exception as e:
+            print(f"❌ Failed to fetch token: {e}")  
+            raise Exception(f"Failed to fetch token: {e}")
+        if self.provider.stats["fetches"] > fetches:
+            print(f"✅ Token fetched successfully (cached to {self.token_cache_file})")
         return credentials['anthropic_api_key']
   
 # Singleton instance  
 _token_manager = TokenManager()
   
-def get_anthropic_client(force_refresh=False):  
+def get_response_cache():
+    """
+    Get the shared LLM response cache configured from the environment
+
+    Returns:
+        ResponseCache instance
+    """
+    from Automation.Business_Units.Marketing.Stage2.utils.response_cache import get_response_cache as _get_cache
+
+    return _get_cache(
+        RESPONSE_CACHE_PATH,
+        RESPONSE_CACHE_TTL_SECONDS,
+        RESPONSE_CACHE_MAX_MB,
+        bypass=RESPONSE_CACHE_BYPASS,
+        refresh=RESPONSE_CACHE_REFRESH
+    )
+
+def refresh_responses():
+    """
+    Context manager: calls inside skip cached responses but store new ones
+
+    Use around retries, whose prompt may be identical to a failed attempt.
+    """
+    from Automation.Business_Units.Marketing.Stage2.utils.response_cache import refreshing
+
+    return refreshing()
+
+def invalidate_cached_response(**params):
+    """
+    Drop the cached response for a request the caller could not use
+
+    Args:
+        **params: Arguments that were passed to messages.create()/stream()
+    """
+    if RESPONSE_CACHE_BYPASS:
+        return
+    from Automation.Business_Units.Marketing.Stage2.utils.response_cache import ResponseCache
+
+    get_response_cache().invalidate(ResponseCache.make_key(**params))
+
+def get_anthropic_client(force_refresh=False, use_cache=True):  
     """  
     Get configured Anthropic client with TR authentication
       
     Args:  
         force_refresh: Force fetching a new token
+        use_cache: Serve identical messages.create() requests from the
+            response cache (set LLM_CACHE_BYPASS=1 to disable globally)
       
     Returns:  
         Configured Anthropic client  
     """  
     api_key = _token_manager.get_api_key(force_refresh)  
-    return Anthropic(api_key=api_key)
\ No newline at end of file
+    client = Anthropic(api_key=api_key)
+    if not use_cache or RESPONSE_CACHE_BYPASS:
+        return client
+
+    from Automation.Business_Units.Marketing.Stage2.utils.response_cache import CachingClient
+    return CachingClient(client, get_response_cache())
\ No newline at end of file
@@ -16,4 +16,13 @@ ANTHROPIC_MODEL = os.getenv("ANTHROPIC_MODEL", "claude-sonnet-4-5-20250929")
 MAX_TOKENS = 8000  
 TEMPERATURE = 0.1 
 USE_CASES_PER_SUB_FUNCTION = 8  
-BATCH_SIZE = 3
\ No newline at end of file
+BATCH_SIZE = 3
+MAX_PARALLEL_SUB_FUNCTIONS = 4  # Sub-functions generated concurrently (1 = sequential loop)
+STREAM_GENERATION = True  # Parse generated use cases as they stream in
+MAX_GENERATION_RETRIES = 2  # Follow-up calls for use cases missing from a cut-off response
+GENERATION_SUB_BATCH_SIZE = 2  # Activities per parallel tool-use request (0 = one 8-use-case call)
+MAX_CONCURRENT_GENERATION_CALLS = 4  # Generation calls in flight across all sub-functions and sub-batches
+DEDUP_ACTION = "flag"  # Near-duplicate handling before export: "flag", "drop" or "off"
+DEDUP_SEMANTIC_THRESHOLD = 0.9  # Cosine similarity of title + description embeddings
+DEDUP_LEXICAL_THRESHOLD = 0.8  # Estimated Jaccard similarity of word 3-gram shingles (MinHash)
+DEDUP_EMBEDDING_MODEL = "all-MiniLM-L6-v2"  # sentence-transformers model (lexical pass only if not installed)
\ No newline at end of file
@@ -9,6 +9,13 @@ interface WebSocketUpdate {
   completed_steps: number;
   total_steps: number;
   error_message?: string;
+  // Event detail from the workers (e.g. per-use-case progress of an agent)
+  event?: string;
+  agent?: number;
+  name?: string;
+  use_case?: string;
+  completed?: number;
+  total?: number;
 }
 
 interface UseWebSocketOptions {
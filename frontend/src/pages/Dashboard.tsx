@@ -36,7 +36,7 @@ const Dashboard: React.FC = () => {
   const navigate = useNavigate();
 
   // Fetch recent jobs
-  const { data: jobs, isLoading: jobsLoading } = useQuery('recent-jobs', getJobs);
+  const { data: jobs, isLoading: jobsLoading } = useQuery('recent-jobs', () => getJobs({ limit: 5 }));
   const { data: health } = useQuery('system-health', getSystemHealth);
 
   // Mock data for charts
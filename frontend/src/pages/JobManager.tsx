@@ -41,7 +41,7 @@ import {
   ExpandMore as ExpandMoreIcon,
   ExpandLess as ExpandLessIcon
 } from '@mui/icons-material';
-import { useQuery, useMutation, useQueryClient } from 'react-query';
+import { useInfiniteQuery, useMutation, useQueryClient } from 'react-query';
 import { toast } from 'react-toastify';
 import { useNavigate } from 'react-router-dom';
 
@@ -207,11 +207,19 @@ const JobManager: React.FC = () => {
   const navigate = useNavigate();
   const queryClient = useQueryClient();
 
-  // Fetch jobs
-  const { data: jobsData, isLoading, refetch } = useQuery(
+  // Fetch jobs, one page at a time (next_cursor points at the following page)
+  const {
+    data: jobsData,
+    isLoading,
+    refetch,
+    fetchNextPage,
+    hasNextPage,
+    isFetchingNextPage
+  } = useInfiniteQuery(
     'jobs',
-    getJobs,
+    ({ pageParam }) => getJobs({ include_results: true, cursor: pageParam }),
     {
+      getNextPageParam: (lastPage) => lastPage.next_cursor ?? undefined,
       refetchInterval: 5000, // Refresh every 5 seconds
       refetchIntervalInBackground: true
     }
@@ -249,7 +257,8 @@ const JobManager: React.FC = () => {
     },
   });
 
-  const jobs = jobsData?.jobs || [];
+  const jobs = jobsData?.pages.flatMap(page => page.jobs) || [];
+  const totalJobs = jobsData?.pages[0]?.total ?? jobs.length;
 
   const handleMenuOpen = (event: React.MouseEvent<HTMLElement>, job: JobStatus) => {
     setMenuAnchor(event.currentTarget);
@@ -366,7 +375,7 @@ const JobManager: React.FC = () => {
           <Card>
             <CardContent>
               <Typography variant="h4">
-                {jobs.length}
+                {totalJobs}
               </Typography>
               <Typography variant="body2" color="text.secondary">
                 Total Jobs
@@ -478,6 +487,18 @@ const JobManager: React.FC = () => {
               </Table>
             </TableContainer>
           )}
+
+          {hasNextPage && (
+            <Box sx={{ textAlign: 'center', mt: 2 }}>
+              <Button
+                variant="outlined"
+                onClick={() => fetchNextPage()}
+                disabled={isFetchingNextPage}
+              >
+                {isFetchingNextPage ? 'Loading...' : `Load More (${jobs.length} of ${totalJobs})`}
+              </Button>
+            </Box>
+          )}
         </CardContent>
       </Card>
 
@@ -117,8 +117,17 @@ export const getJob = async (jobId: string): Promise<JobStatus> => {
   return response.data;
 };
 
-export const getJobs = async (): Promise<{ jobs: JobStatus[] }> => {
-  const response = await api.get('/api/jobs');
+export interface JobListParams {
+  status?: string;
+  limit?: number;
+  cursor?: string;
+  include_results?: boolean;
+}
+
+export const getJobs = async (
+  params: JobListParams = {}
+): Promise<{ jobs: JobStatus[]; next_cursor: string | null; total: number }> => {
+  const response = await api.get('/api/jobs', { params });
   return response.data;
 };
 
@@ -0,0 +1 @@
+"""Load testing: local stub server for the TR/Anthropic/OpenAI endpoints and a workload driver"""
@@ -0,0 +1,308 @@
+"""
+Load Test Driver
+Replays Stage 2 (web research + enrichment) and RAG (embed, retrieve,
+generate) workloads against the local stub server with the real clients,
+and reports throughput, latency percentiles, rate limiting and token rates.
+
+Usage:
+    python -m loadtest.stub_server --tokens-per-minute 100000 &
+    python -m loadtest.driver --workload stage2 --use-cases 40 --concurrency 4
+    python -m loadtest.driver --workload rag --queries 200 --concurrency 8 --stream
+    python -m loadtest.driver --workload stage2 --spawn-stub --stub-config '{"error_rate": 0.02}'
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import requests
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STAGE2_DIR = os.path.join(ROOT_DIR, "Automation", "Business_Units", "Marketing", "Stage2")
+
+FUNCTIONS = ["Demand Gen", "Prod Marketing", "Digital Marketing", "Creative-Design", "Events", "Ops & Analytics"]
+TOOLS = ["Enterprise Writer", "Adobe Firefly / Express", "Microsoft Copilot", "Open Arena", "Treasure Data AI Agent", "Gong"]
+STAGES = ["Ideation", "Experimentation", "Pilot", "Production"]
+ACTIVITIES = [
+    "campaign planning and channel mix", "insight-driven product messaging", "web and social content management",
+    "event planning and attendee registration", "customer segmentation and personas", "martech inventory and renewals",
+]
+
+
+def point_clients_at(stub_url: str):
+    """Route the TR token, Anthropic and OpenAI clients to the stub (set before the clients are imported)"""
+    stub_url = stub_url.rstrip("/")
+    os.environ["TR_ANTHROPIC_TOKEN_URL"] = f"{stub_url}/v1/anthropic/token"
+    os.environ["TR_OPENAI_TOKEN_URL"] = f"{stub_url}/v1/openai/token"
+    os.environ["TR_OPENAI_BASE_URL"] = stub_url
+    os.environ["ANTHROPIC_BASE_URL"] = stub_url
+    os.environ["OPENAI_BASE_URL"] = f"{stub_url}/v1"
+    os.environ["OPENAI_API_KEY"] = os.environ.get("OPENAI_API_KEY", "stub")
+    # Every request should reach the stub
+    os.environ["LLM_CACHE_BYPASS"] = "1"
+
+
+def spawn_stub(port: int, extra_args: List[str]) -> subprocess.Popen:
+    """Start the stub server in a subprocess and wait until it is healthy"""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "loadtest.stub_server", "--port", str(port), *extra_args],
+        cwd=ROOT_DIR
+    )
+    for _ in range(100):
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/health", timeout=1).ok:
+                return process
+        except requests.RequestException:
+            pass
+        if process.poll() is not None:
+            break
+        time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Stub server did not start")
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile (0.0 for no samples)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def latency_summary(values: List[float]) -> Dict[str, float]:
+    """Count, mean and p50/p95/p99 of millisecond samples"""
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values), 1) if values else 0.0,
+        "p50_ms": round(percentile(values, 0.50), 1),
+        "p95_ms": round(percentile(values, 0.95), 1),
+        "p99_ms": round(percentile(values, 0.99), 1),
+    }
+
+
+class CallRecorder:
+    """Thread-safe latency and error log for one kind of call"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies_ms: List[float] = []
+        self.errors: Dict[str, int] = {}
+
+    def record(self, started: float, error: Optional[Exception] = None):
+        with self.lock:
+            if error is None:
+                self.latencies_ms.append((time.perf_counter() - started) * 1000)
+            else:
+                name = type(error).__name__
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+    def summary(self) -> Dict[str, Any]:
+        return {**latency_summary(self.latencies_ms), "errors": dict(self.errors)}
+
+
+def timed(fn, recorder: CallRecorder):
+    """Wrap a callable so each call is recorded"""
+    def call(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            recorder.record(started, e)
+            raise
+        recorder.record(started)
+        return result
+    return call
+
+
+# ---------- Stage 2 ----------
+
+def synthetic_ingestion(count: int, seed: int) -> Dict[str, Any]:
+    """Agent 1-shaped output with synthetic use cases and BU intelligence"""
+    rng = random.Random(seed)
+    use_cases = []
+    for i in range(count):
+        activity = rng.choice(ACTIVITIES)
+        tool = rng.choice(TOOLS)
+        use_cases.append({
+            "original_name": f"AI-assisted {activity} #{i + 1}",
+            "function": rng.choice(FUNCTIONS),
+            "original_description": f"Use {tool} to speed up {activity}, reduce manual effort and improve consistency "
+                                    f"across regions. " * rng.randint(2, 5),
+            "ai_tools": tool,
+            "stage": rng.choice(STAGES),
+        })
+    bu_intelligence = " ".join(
+        f"The {rng.choice(FUNCTIONS)} team reports {rng.randint(5, 60)}% time spent on {rng.choice(ACTIVITIES)} "
+        f"and is piloting {rng.choice(TOOLS)}."
+        for _ in range(150)
+    )
+    return {"use_cases": use_cases, "bu_intelligence": bu_intelligence}
+
+
+def run_stage2(args: argparse.Namespace) -> Dict[str, Any]:
+    """Web research then enrichment through the Stage 2 agents and their shared API client"""
+    sys.path.insert(0, STAGE2_DIR)
+    from agents.agent2_web_research import WebResearchAgent
+    from agents.agent3_use_case_enricher import UseCaseEnricherAgent
+
+    ingestion = synthetic_ingestion(args.use_cases, args.seed)
+    research_agent = WebResearchAgent(max_concurrency=args.concurrency)
+    enricher = UseCaseEnricherAgent(max_concurrency=args.concurrency)
+
+    # Both agents share the singleton client: time every API call
+    api_client = research_agent.api_client
+    calls = CallRecorder()
+    api_client._create_message = timed(api_client._create_message, calls)
+
+    phases = {}
+    started = time.perf_counter()
+    research = research_agent.run(ingestion)
+    phases["research_s"] = round(time.perf_counter() - started, 2)
+
+    started = time.perf_counter()
+    enrichment = enricher.run(ingestion, research)
+    phases["enrichment_s"] = round(time.perf_counter() - started, 2)
+
+    results = enrichment["enriched_use_cases"]
+    return {
+        "use_cases": args.use_cases,
+        **phases,
+        "api_calls": calls.summary(),
+        "failed_use_cases": sum(1 for r in results if not r.get("success")),
+        # Stub text is not enrichment JSON unless the stub has a --response-file
+        "unparsed_responses": sum(1 for r in results if "parse_error" in r),
+        "client_rate_limiter": api_client.get_rate_limit_metrics(),
+    }
+
+
+# ---------- RAG ----------
+
+def run_rag(args: argparse.Namespace) -> Dict[str, Any]:
+    """Index a synthetic corpus with TR embeddings, then retrieve and generate per query"""
+    sys.path.insert(0, ROOT_DIR)
+    from rag_pipeline.benchmark.fixtures import InMemoryVectorStore, LexicalReranker, synthetic_corpus, synthetic_queries
+    from rag_pipeline.agents.rag_agents import MultiStageRetriever
+    from rag_pipeline.config.settings import RetrievalConfig
+    from rag_pipeline.embeddings.tr_openai_embeddings import TROpenAIEmbeddings
+    from rag_pipeline.llm.claude_wrapper import ClaudeStreamingLLM
+    from rag_pipeline.observability import set_log_level
+
+    set_log_level("WARNING")
+    chunks, labels = synthetic_corpus(args.docs, seed=args.seed)
+    queries = synthetic_queries(labels, args.queries, seed=args.seed)
+
+    embeddings = TROpenAIEmbeddings()
+    llm = ClaudeStreamingLLM()
+
+    started = time.perf_counter()
+    store = InMemoryVectorStore()
+    store.add_documents(chunks, embeddings)
+    index_s = round(time.perf_counter() - started, 2)
+
+    # The stub's embeddings are bag-of-words vectors: cosines sit far below
+    # text-embedding-3-large ones (see rag_pipeline.benchmark)
+    config = RetrievalConfig(similarity_threshold=0.1)
+    retriever = MultiStageRetriever(store, embeddings, config, reranker=LexicalReranker())
+
+    retrieval, generation, first_token, end_to_end = CallRecorder(), CallRecorder(), CallRecorder(), CallRecorder()
+
+    def answer(query: str):
+        started = time.perf_counter()
+        try:
+            step = time.perf_counter()
+            context = retriever.retrieve(query)["context"]
+            retrieval.record(step)
+
+            step = time.perf_counter()
+            if args.stream:
+                message = llm.build_context_message(f"Context:\n{context}", f"Question: {query}")
+                for i, _ in enumerate(llm.invoke_stream([message], max_tokens=args.max_tokens)):
+                    if i == 0:
+                        first_token.record(step)
+            else:
+                llm.generate_with_context(query, context, max_tokens=args.max_tokens)
+            generation.record(step)
+        except Exception as e:
+            end_to_end.record(started, e)
+            return
+        end_to_end.record(started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(answer, [q["query"] for q in queries]))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "chunks_indexed": len(chunks),
+        "index_s": index_s,
+        "queries": len(queries),
+        "elapsed_s": round(elapsed, 2),
+        "queries_per_s": round(len(end_to_end.latencies_ms) / elapsed, 2) if elapsed else 0.0,
+        "end_to_end": end_to_end.summary(),
+        "retrieval": retrieval.summary(),
+        "generation": generation.summary(),
+        **({"first_token": first_token.summary()} if args.stream else {}),
+    }
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m loadtest.driver", description="Replay pipeline workloads against the stub server")
+    parser.add_argument("--workload", choices=["stage2", "rag", "all"], default="all")
+    parser.add_argument("--stub-url", default="http://127.0.0.1:8900")
+    parser.add_argument("--spawn-stub", action="store_true", help="Start the stub server for this run")
+    parser.add_argument("--stub-args", default="", help="Extra stub server arguments when spawning")
+    parser.add_argument("--stub-config", help="JSON settings posted to /stub/config before the run")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--use-cases", type=int, default=20, help="Stage 2 use cases")
+    parser.add_argument("--docs", type=int, default=40, help="RAG corpus documents")
+    parser.add_argument("--queries", type=int, default=100, help="RAG queries")
+    parser.add_argument("--stream", action="store_true", help="Stream RAG answers")
+    parser.add_argument("--max-tokens", type=int, default=1024, help="RAG answer max_tokens")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Write the JSON report here")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    stub = None
+    if args.spawn_stub:
+        port = int(args.stub_url.rstrip("/").rsplit(":", 1)[-1])
+        stub = spawn_stub(port, args.stub_args.split())
+
+    try:
+        point_clients_at(args.stub_url)
+        requests.post(f"{args.stub_url}/stub/reset", timeout=5).raise_for_status()
+        if args.stub_config:
+            requests.post(f"{args.stub_url}/stub/config", json=json.loads(args.stub_config), timeout=5).raise_for_status()
+
+        report = {
+            "stub_config": requests.get(f"{args.stub_url}/stub/config", timeout=5).json(),
+            "concurrency": args.concurrency,
+        }
+        if args.workload in ("stage2", "all"):
+            report["stage2"] = run_stage2(args)
+        if args.workload in ("rag", "all"):
+            report["rag"] = run_rag(args)
+        report["stub_stats"] = requests.get(f"{args.stub_url}/stub/stats", timeout=5).json()
+    finally:
+        if stub is not None:
+            stub.terminate()
+            stub.wait(timeout=10)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,509 @@
+"""
+Local Stub Server
+Imitates the TR AI Platform token endpoints, the Anthropic Messages API
+(streaming, prompt caching, 429 rate limiting) and Azure OpenAI embeddings,
+so the pipelines can be load tested without spending live quota.
+
+Usage:
+    python -m loadtest.stub_server [--port 8900] [--latency-ms 400] [--output-tps 60]
+                                   [--tokens-per-minute 100000] [--error-rate 0.01]
+
+Point the clients at it:
+    TR_ANTHROPIC_TOKEN_URL=http://127.0.0.1:8900/v1/anthropic/token
+    TR_OPENAI_TOKEN_URL=http://127.0.0.1:8900/v1/openai/token
+    TR_OPENAI_BASE_URL=http://127.0.0.1:8900
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8900
+    OPENAI_BASE_URL=http://127.0.0.1:8900/v1
+
+Runtime control:
+    GET  /stub/config, POST /stub/config  current settings / change settings (JSON)
+    GET  /stub/stats,  POST /stub/reset   counters / clear counters, buckets and cache
+"""
+import json
+import math
+import time
+import uuid
+import zlib
+import base64
+import random
+import asyncio
+import argparse
+from collections import Counter
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+WORDS = (
+    "analysis shows the marketing team can accelerate campaign delivery with governed AI "
+    "assistants while customer insight improves through consistent segmentation and "
+    "measurable outcomes across regions content velocity rises as reviews shrink and "
+    "analysts reuse validated research in every launch plan"
+).split()
+
+
+@dataclass
+class StubConfig:
+    """Stub behaviour (all values can be changed at runtime via POST /stub/config)"""
+    # Messages latency: time to first token, then output at a fixed token rate
+    latency_ms: float = 400.0
+    latency_jitter_ms: float = 100.0
+    output_tokens_per_second: float = 60.0
+    output_tokens: int = 600  # Response length (capped by max_tokens)
+    response_text: Optional[str] = None  # Fixed response text instead of generated words
+
+    # Embeddings latency
+    embedding_latency_ms: float = 80.0
+    embedding_ms_per_input: float = 1.0
+
+    # Rate limits (tokens per minute per API key; 0 = unlimited)
+    tokens_per_minute: int = 100000
+    embedding_tokens_per_minute: int = 0
+
+    # Error injection (share of requests)
+    error_rate: float = 0.0  # 500 api_error / 529 overloaded_error
+    rate_limit_rate: float = 0.0  # Forced 429 regardless of the bucket
+    token_error_rate: float = 0.0  # Token endpoint failures
+
+    # Prompt caching
+    cache_ttl_s: float = 300.0
+
+    seed: Optional[int] = None
+
+    def update(self, values: Dict[str, Any]) -> List[str]:
+        """
+        Apply known settings from a dict
+
+        Args:
+            values: Setting name -> value
+
+        Returns:
+            Names of settings that were not recognised
+        """
+        known = {f.name for f in fields(self)}
+        for name, value in values.items():
+            if name in known:
+                setattr(self, name, value)
+        return sorted(set(values) - known)
+
+
+class TokenBucket:
+    """Per-minute token budget refilled continuously"""
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = tokens_per_minute
+        self.tokens = float(tokens_per_minute)
+        self.updated = time.monotonic()
+
+    def take(self, amount: int) -> float:
+        """
+        Consume tokens if available
+
+        Args:
+            amount: Tokens requested
+
+        Returns:
+            0.0 if admitted, else seconds until the request would fit
+        """
+        if self.capacity <= 0:
+            return 0.0
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return 0.0
+        return (amount - self.tokens) * 60 / self.capacity
+
+    @property
+    def remaining(self) -> int:
+        return max(0, int(self.tokens)) if self.capacity > 0 else 0
+
+
+def estimate_tokens(value: Any) -> int:
+    """Rough token count (4 characters per token) of text or content blocks"""
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return max(1, len(value) // 4) if value else 0
+    if isinstance(value, dict) and value.get("type") == "text":
+        return estimate_tokens(value.get("text", ""))
+    if isinstance(value, list):
+        return sum(estimate_tokens(item) for item in value)
+    return len(json.dumps(value)) // 4
+
+
+def hashed_embedding(text: str, dimensions: int) -> np.ndarray:
+    """
+    Deterministic bag-of-words embedding (feature hashing of words and word
+    bigrams, L2-normalized), so similar texts get similar vectors
+    """
+    words = text.lower().split()
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for feature, weight in Counter(features).items():
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % dimensions] += (1.0 if h & 0x80000000 else -1.0) * (1.0 + math.log(weight))
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def error_body(error_type: str, message: str) -> Dict[str, Any]:
+    """Anthropic-style error body"""
+    return {"type": "error", "error": {"type": error_type, "message": message}}
+
+
+class StubState:
+    """Mutable server state: settings, rate-limit buckets, prompt cache and counters"""
+
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self.prompt_cache: Dict[str, float] = {}
+        self.stats: Counter = Counter()
+        self.in_flight = 0
+
+    def reset(self):
+        self.rng = random.Random(self.config.seed)
+        self.buckets.clear()
+        self.prompt_cache.clear()
+        self.stats.clear()
+
+    def bucket(self, kind: str, key: str) -> TokenBucket:
+        limit = self.config.tokens_per_minute if kind == "messages" else self.config.embedding_tokens_per_minute
+        bucket = self.buckets.get((kind, key))
+        if bucket is None or bucket.capacity != limit:
+            bucket = self.buckets[(kind, key)] = TokenBucket(limit)
+        return bucket
+
+    def injected_error(self, endpoint: str) -> Optional[JSONResponse]:
+        """Random 429/500/529 according to the error settings"""
+        roll = self.rng.random()
+        if roll < self.config.rate_limit_rate:
+            self.stats[f"{endpoint}.429"] += 1
+            return JSONResponse(error_body("rate_limit_error", "Injected rate limit"), status_code=429,
+                                headers={"retry-after": "1"})
+        if roll < self.config.rate_limit_rate + self.config.error_rate:
+            status, error_type = self.rng.choice([(500, "api_error"), (529, "overloaded_error")])
+            self.stats[f"{endpoint}.{status}"] += 1
+            return JSONResponse(error_body(error_type, "Injected error"), status_code=status)
+        return None
+
+    def cache_usage(self, body: Dict[str, Any]) -> Tuple[int, int, int]:
+        """
+        Split input tokens into uncached, cache-write and cache-read parts
+
+        Every block with cache_control ends a cacheable prefix; the longest
+        prefix seen within the TTL is read, later breakpoints are written.
+
+        Returns:
+            (input_tokens, cache_creation_input_tokens, cache_read_input_tokens)
+        """
+        system = body.get("system") or []
+        blocks = [{"type": "text", "text": system}] if isinstance(system, str) else list(system)
+        for message in body.get("messages", []):
+            content = message.get("content")
+            blocks.extend([{"type": "text", "text": content}] if isinstance(content, str) else content or [])
+
+        now = time.monotonic()
+        total = 0
+        read = written = 0
+        digest = zlib.crc32(json.dumps(body.get("tools", []), sort_keys=True).encode())
+        for block in blocks:
+            total += estimate_tokens(block)
+            digest = zlib.crc32(json.dumps({k: v for k, v in block.items() if k != "cache_control"}, sort_keys=True).encode(), digest)
+            if isinstance(block, dict) and block.get("cache_control"):
+                key = f"{body.get('model')}:{digest}:{total}"
+                if self.prompt_cache.get(key, 0) > now:
+                    read = total
+                    written = 0
+                else:
+                    written = total - read
+                self.prompt_cache[key] = now + self.config.cache_ttl_s
+        return total - read - written, written, read
+
+    def response_text(self, output_tokens: int) -> str:
+        if self.config.response_text:
+            return self.config.response_text
+        return " ".join(self.rng.choice(WORDS) for _ in range(output_tokens))
+
+    def first_token_delay(self) -> float:
+        jitter = self.rng.uniform(-1, 1) * self.config.latency_jitter_ms
+        return max(0.0, self.config.latency_ms + jitter) / 1000
+
+
+def create_app(config: Optional[StubConfig] = None) -> FastAPI:
+    """
+    Build the stub application
+
+    Args:
+        config: Stub behaviour (defaults if not provided)
+
+    Returns:
+        FastAPI app
+    """
+    state = StubState(config or StubConfig())
+    app = FastAPI(title="TR AI Platform stub")
+    app.state.stub = state
+
+    # ---------- TR AI Platform token endpoints ----------
+
+    def token_failure() -> Optional[JSONResponse]:
+        if state.rng.random() < state.config.token_error_rate:
+            state.stats["token.500"] += 1
+            return JSONResponse({"error": "Injected token endpoint failure"}, status_code=500)
+        return None
+
+    @app.post("/v1/anthropic/token")
+    async def anthropic_token(request: Request):
+        body = await request.json()
+        state.stats["token.requests"] += 1
+        failure = token_failure()
+        if failure is not None:
+            return failure
+        return {"anthropic_api_key": f"stub-{body.get('workspace_id', 'workspace')}"}
+
+    @app.post("/v1/openai/token")
+    async def openai_token(request: Request):
+        body = await request.json()
+        state.stats["token.requests"] += 1
+        failure = token_failure()
+        if failure is not None:
+            return failure
+        workspace = body.get("workspace_id", "workspace")
+        return {
+            "openai_key": f"stub-{workspace}",
+            "openai_endpoint": str(request.base_url).rstrip("/"),
+            "azure_deployment": "text-embedding-3-large",
+            "openai_api_version": "2024-02-01",
+            "token": f"stub-token-{uuid.uuid4().hex[:8]}",
+        }
+
+    # ---------- Anthropic Messages ----------
+
+    @app.post("/v1/messages")
+    async def messages(request: Request):
+        api_key = request.headers.get("x-api-key")
+        if not api_key:
+            return JSONResponse(error_body("authentication_error", "x-api-key header is required"), status_code=401)
+
+        body = await request.json()
+        state.stats["messages.requests"] += 1
+        error = state.injected_error("messages")
+        if error is not None:
+            return error
+
+        input_tokens, cache_creation, cache_read = state.cache_usage(body)
+        max_tokens = int(body.get("max_tokens", 1024))
+        output_tokens = min(max_tokens, state.config.output_tokens)
+        text = state.response_text(output_tokens)
+        if state.config.response_text:
+            output_tokens = min(max_tokens, estimate_tokens(text))
+
+        # Cache reads do not count against the input limit
+        bucket = state.bucket("messages", api_key)
+        retry_after = bucket.take(input_tokens + cache_creation + output_tokens)
+        if retry_after:
+            state.stats["messages.429"] += 1
+            return JSONResponse(
+                error_body("rate_limit_error", "Number of request tokens has exceeded your per-minute rate limit"),
+                status_code=429,
+                headers={"retry-after": str(max(1, math.ceil(retry_after))),
+                         "anthropic-ratelimit-tokens-limit": str(bucket.capacity),
+                         "anthropic-ratelimit-tokens-remaining": str(bucket.remaining)}
+            )
+
+        usage = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "cache_creation_input_tokens": cache_creation,
+            "cache_read_input_tokens": cache_read,
+        }
+        state.stats["messages.input_tokens"] += input_tokens + cache_creation + cache_read
+        state.stats["messages.output_tokens"] += output_tokens
+        message = {
+            "id": f"msg_stub_{uuid.uuid4().hex[:16]}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "claude-stub"),
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "max_tokens" if output_tokens >= max_tokens else "end_turn",
+            "stop_sequence": None,
+            "usage": usage,
+        }
+        headers = {
+            "request-id": f"req_stub_{uuid.uuid4().hex[:16]}",
+            "anthropic-ratelimit-tokens-limit": str(bucket.capacity),
+            "anthropic-ratelimit-tokens-remaining": str(bucket.remaining),
+        }
+
+        if body.get("stream"):
+            return StreamingResponse(stream_message(message), media_type="text/event-stream", headers=headers)
+
+        state.in_flight += 1
+        state.stats["messages.peak_in_flight"] = max(state.stats["messages.peak_in_flight"], state.in_flight)
+        try:
+            await asyncio.sleep(state.first_token_delay() + output_tokens / state.config.output_tokens_per_second)
+        finally:
+            state.in_flight -= 1
+        return JSONResponse(message, headers=headers)
+
+    async def stream_message(message: Dict[str, Any]):
+        """Server-sent events in Messages streaming order, at the configured token rate"""
+        def event(name: str, data: Dict[str, Any]) -> str:
+            return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+        usage = message["usage"]
+        start = {**message, "content": [], "stop_reason": None, "usage": {**usage, "output_tokens": 1}}
+        words = message["content"][0]["text"].split(" ")
+        step = 5
+        delay = step / state.config.output_tokens_per_second
+
+        state.in_flight += 1
+        state.stats["messages.peak_in_flight"] = max(state.stats["messages.peak_in_flight"], state.in_flight)
+        try:
+            await asyncio.sleep(state.first_token_delay())
+            yield event("message_start", {"type": "message_start", "message": start})
+            yield event("content_block_start", {"type": "content_block_start", "index": 0,
+                                                "content_block": {"type": "text", "text": ""}})
+            yield event("ping", {"type": "ping"})
+            for i in range(0, len(words), step):
+                piece = " ".join(words[i:i + step]) + (" " if i + step < len(words) else "")
+                yield event("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                                    "delta": {"type": "text_delta", "text": piece}})
+                await asyncio.sleep(delay)
+            yield event("content_block_stop", {"type": "content_block_stop", "index": 0})
+            yield event("message_delta", {"type": "message_delta",
+                                          "delta": {"stop_reason": message["stop_reason"], "stop_sequence": None},
+                                          "usage": {"output_tokens": usage["output_tokens"]}})
+            yield event("message_stop", {"type": "message_stop"})
+        finally:
+            state.in_flight -= 1
+
+    # ---------- Azure OpenAI / OpenAI embeddings ----------
+
+    async def embeddings(request: Request, api_key: str):
+        body = await request.json()
+        state.stats["embeddings.requests"] += 1
+        error = state.injected_error("embeddings")
+        if error is not None:
+            return error
+
+        inputs = body.get("input", [])
+        texts = [inputs] if isinstance(inputs, str) else [str(item) for item in inputs]
+        dimensions = int(body.get("dimensions") or 3072)
+        tokens = sum(estimate_tokens(text) for text in texts)
+
+        retry_after = state.bucket("embeddings", api_key).take(tokens)
+        if retry_after:
+            state.stats["embeddings.429"] += 1
+            return JSONResponse({"error": {"code": "429", "message": "Rate limit exceeded"}}, status_code=429,
+                                headers={"retry-after": str(max(1, math.ceil(retry_after)))})
+
+        await asyncio.sleep((state.config.embedding_latency_ms + state.config.embedding_ms_per_input * len(texts)) / 1000)
+
+        data = []
+        for i, text in enumerate(texts):
+            vector = hashed_embedding(text, dimensions)
+            if body.get("encoding_format") == "base64":
+                embedding = base64.b64encode(vector.astype("<f4").tobytes()).decode("ascii")
+            else:
+                embedding = vector.tolist()
+            data.append({"object": "embedding", "index": i, "embedding": embedding})
+
+        state.stats["embeddings.inputs"] += len(texts)
+        state.stats["embeddings.tokens"] += tokens
+        return {
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "text-embedding-3-large"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    @app.post("/openai/deployments/{deployment}/embeddings")
+    async def azure_embeddings(deployment: str, request: Request):
+        api_key = request.headers.get("api-key")
+        if not api_key:
+            return JSONResponse({"error": {"code": "401", "message": "api-key header is required"}}, status_code=401)
+        return await embeddings(request, api_key)
+
+    @app.post("/v1/embeddings")
+    async def openai_embeddings(request: Request):
+        api_key = request.headers.get("authorization", "").removeprefix("Bearer ").strip()
+        if not api_key:
+            return JSONResponse({"error": {"code": "401", "message": "Authorization header is required"}}, status_code=401)
+        return await embeddings(request, api_key)
+
+    # ---------- Stub control ----------
+
+    @app.get("/stub/config")
+    async def get_config():
+        return asdict(state.config)
+
+    @app.post("/stub/config")
+    async def set_config(request: Request):
+        ignored = state.config.update(await request.json())
+        return {"config": asdict(state.config), "ignored": ignored}
+
+    @app.get("/stub/stats")
+    async def get_stats():
+        return {"in_flight": state.in_flight, **dict(state.stats)}
+
+    @app.post("/stub/reset")
+    async def reset():
+        state.reset()
+        return {"status": "reset"}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    return app
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m loadtest.stub_server", description="Local TR/Anthropic/OpenAI stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=StubConfig.latency_ms, help="Time to first token")
+    parser.add_argument("--jitter-ms", type=float, default=StubConfig.latency_jitter_ms)
+    parser.add_argument("--output-tps", type=float, default=StubConfig.output_tokens_per_second, help="Output tokens per second")
+    parser.add_argument("--output-tokens", type=int, default=StubConfig.output_tokens, help="Response length in tokens")
+    parser.add_argument("--response-file", help="Return this file's text as every response")
+    parser.add_argument("--embedding-latency-ms", type=float, default=StubConfig.embedding_latency_ms)
+    parser.add_argument("--tokens-per-minute", type=int, default=StubConfig.tokens_per_minute, help="Messages limit per key (0 = off)")
+    parser.add_argument("--embedding-tokens-per-minute", type=int, default=StubConfig.embedding_tokens_per_minute)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of 500/529 responses")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of forced 429 responses")
+    parser.add_argument("--token-error-rate", type=float, default=0.0, help="Share of token endpoint failures")
+    parser.add_argument("--seed", type=int)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    import uvicorn
+
+    args = parse_args(argv)
+    config = StubConfig(
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.jitter_ms,
+        output_tokens_per_second=args.output_tps,
+        output_tokens=args.output_tokens,
+        response_text=open(args.response_file, encoding="utf-8").read() if args.response_file else None,
+        embedding_latency_ms=args.embedding_latency_ms,
+        tokens_per_minute=args.tokens_per_minute,
+        embedding_tokens_per_minute=args.embedding_tokens_per_minute,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        token_error_rate=args.token_error_rate,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Lazy Package Exports
+PEP 562 module __getattr__ so package __init__s can re-export classes without
+importing their submodules (and heavy dependencies) until first use
+"""
+import sys
+from importlib import import_module
+from typing import Callable, Dict, List, Tuple
+
+
+def lazy_exports(package: str, exports: Dict[str, str]) -> Tuple[Callable, Callable, List[str]]:
+    """
+    Build module-level __getattr__, __dir__ and __all__ for a package
+
+    Usage in a package __init__:
+        __getattr__, __dir__, __all__ = lazy_exports(__name__, {"ClaudeLLM": ".claude_wrapper"})
+
+    Args:
+        package: Package name (__name__ of the calling __init__)
+        exports: Exported name -> relative submodule defining it
+
+    Returns:
+        Tuple of (__getattr__, __dir__, __all__)
+    """
+    def __getattr__(name: str):
+        submodule = exports.get(name)
+        if submodule is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(import_module(submodule, package), name)
+        # Cache on the package so later lookups skip __getattr__
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(sys.modules[package])) | set(exports))
+
+    return __getattr__, __dir__, list(exports)
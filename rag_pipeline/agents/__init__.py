@@ -1,2 +1,7 @@
 """RAG agents module"""
-from .rag_agents import MultiStageRetriever
+from .._lazy import lazy_exports
+
+# Submodules are imported on first access (PEP 562)
+__getattr__, __dir__, __all__ = lazy_exports(__name__, {
+    "MultiStageRetriever": ".rag_agents",
+})
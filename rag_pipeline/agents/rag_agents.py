@@ -3,13 +3,21 @@ RAG Agents Implementation
 Implements multi-stage retrieval funnel from architecture section 7.6
 Agents: R-03 (Search), R-04 (Filter), R-05 (Assembly), R-06 (Rerank)
 """
+import re
+import time
+import zlib
+import logging
 import numpy as np
-from typing import List, Dict, Any, Optional
-from datetime import datetime
-from dataclasses import dataclass
-from sentence_transformers import CrossEncoder
+from typing import List, Dict, Any, Optional, Callable, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from functools import lru_cache
 
 from ..config.settings import RetrievalConfig
+from ..llm.token_accounting import count_tokens, add_usage
+from ..observability import current_span, get_logger, propagate, span
+
+logger = get_logger(__name__)
 
 
 @dataclass
@@ -23,6 +31,7 @@ class RetrievalResult:
     similarity: float
     rank: Optional[int] = None
     rerank_score: Optional[float] = None
+    fusion_score: Optional[float] = None
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary"""
@@ -32,10 +41,126 @@ class RetrievalResult:
             "metadata": self.metadata,
             "similarity": self.similarity,
             "rank": self.rank,
-            "rerank_score": self.rerank_score
+            "rerank_score": self.rerank_score,
+            "fusion_score": self.fusion_score
         }
 
 
+def reciprocal_rank_fusion(
+    result_lists: List[List[RetrievalResult]],
+    rrf_k: int = 60
+) -> List[RetrievalResult]:
+    """
+    Fuse ranked result lists with Reciprocal Rank Fusion (architecture section 7.8)
+
+    Each document scores sum(1 / (rrf_k + rank)) over the lists it appears in.
+    The highest similarity seen for a document is kept for threshold filtering.
+
+    Args:
+        result_lists: Ranked result lists (best first)
+        rrf_k: RRF constant
+
+    Returns:
+        Unique results sorted by fused score
+    """
+    fused = {}
+    scores = {}
+
+    for results in result_lists:
+        for rank, result in enumerate(results, 1):
+            scores[result.id] = scores.get(result.id, 0.0) + 1.0 / (rrf_k + rank)
+            existing = fused.get(result.id)
+            if existing is None or result.similarity > existing.similarity:
+                fused[result.id] = result
+
+    for doc_id, result in fused.items():
+        result.fusion_score = scores[doc_id]
+
+    return sorted(fused.values(), key=lambda r: r.fusion_score, reverse=True)
+
+
+class QueryExpander:
+    """
+    Splits compound analyst questions into focused sub-queries
+    Rule-based by default; uses the LLM when configured and available
+    """
+
+    # Clause boundaries that usually separate independent questions
+    SPLIT_PATTERN = re.compile(r"\s*(?:\?|;|\bas well as\b|\band also\b|,\s*and\b|\bversus\b|\bvs\.?(?=\s))\s*", re.IGNORECASE)
+    AND_PATTERN = re.compile(r"\s+and\s+", re.IGNORECASE)
+
+    def __init__(self, config: Optional[RetrievalConfig] = None, llm=None):
+        """
+        Initialize query expander
+
+        Args:
+            config: Retrieval configuration
+            llm: Optional ClaudeLLM instance for LLM expansion
+        """
+        self.config = config or RetrievalConfig()
+        self.llm = llm
+
+    def expand(self, query: str) -> Tuple[List[str], Dict[str, int]]:
+        """
+        Produce sub-queries for a query (original query always first)
+
+        Args:
+            query: User query
+
+        Returns:
+            Tuple of (up to max_sub_queries unique queries, LLM token usage
+            of the expansion - empty for rule-based expansion)
+        """
+        usage: Dict[str, int] = {}
+        if self.config.query_expansion_mode == "llm" and self.llm is not None:
+            sub_queries, usage = self._expand_with_llm(query)
+        else:
+            sub_queries = self._expand_with_rules(query)
+
+        # Deduplicate (case-insensitive), keep order, cap count
+        queries = []
+        seen = set()
+        for q in [query] + sub_queries:
+            q = q.strip()
+            if q and q.lower() not in seen:
+                seen.add(q.lower())
+                queries.append(q)
+
+        return queries[:self.config.max_sub_queries], usage
+
+    def _expand_with_rules(self, query: str) -> List[str]:
+        """Split on clause boundaries, and on "and" between multi-word clauses"""
+        parts = []
+        for clause in self.SPLIT_PATTERN.split(query):
+            pieces = self.AND_PATTERN.split(clause)
+            # Only split on "and" when every side is a clause, not a noun pair
+            if len(pieces) > 1 and all(len(p.split()) >= 3 for p in pieces):
+                parts.extend(pieces)
+            else:
+                parts.append(clause)
+
+        parts = [p for p in parts if len(p.split()) >= 2]
+        return parts if len(parts) > 1 else []
+
+    def _expand_with_llm(self, query: str) -> Tuple[List[str], Dict[str, int]]:
+        """Ask the LLM for focused search queries (falls back to rules on error)"""
+        prompt = f"""Break this question into at most {self.config.max_sub_queries - 1} short, focused search queries that together cover every part of it.
+If the question is already a single focused question, return it unchanged.
+
+Question: {query}
+
+Output one query per line, nothing else."""
+
+        try:
+            response, usage = self.llm.generate(prompt, return_usage=True, max_tokens=200)
+            # Strip list markers ("-", "*", "1.", "2)") the model may add
+            lines = [re.sub(r"^\s*(?:[-*]|\d+[.)])\s+", "", line).strip() for line in response.splitlines()]
+            return [line for line in lines if line], usage
+        except Exception as e:
+            logger.warning("  Error expanding query: %s", e)
+            return self._expand_with_rules(query), {}
+
+
 class AgentR03_SemanticSearch:
     """
     Agent R-03: Semantic Search (Stage 1)
@@ -74,14 +199,76 @@ class AgentR03_SemanticSearch:
         """
         k = k or self.config.stage1_top_k
 
-        print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Agent R-03: Semantic Search")
-        print(f"  Query: {query}")
-        print(f"  Retrieving top-{k} candidates...")
+        logger.info("Agent R-03: Semantic Search")
+        logger.debug("  Query: %s", query)
+        logger.debug("  Retrieving top-%d candidates...", k)
 
         # Generate query embedding
-        query_embedding = self.embeddings.embed_query(query)
+        with span("embed", queries=1):
+            query_embedding = self.embeddings.embed_query(query)
+
+        retrieval_results = self._search_embedding(query, query_embedding, k, use_hybrid)
+
+        logger.info("  Retrieved %d candidates", len(retrieval_results))
+        if retrieval_results and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("  Similarity range: %.2f - %.2f",
+                         min(r.similarity for r in retrieval_results), max(r.similarity for r in retrieval_results))
+
+        return retrieval_results
+
+    def search_multi(
+        self,
+        queries: List[str],
+        k: Optional[int] = None,
+        use_hybrid: bool = False
+    ) -> List[RetrievalResult]:
+        """
+        Stage 1: Multi-query fan-out - embed all sub-queries in one batch,
+        search them concurrently and fuse with reciprocal rank fusion
+
+        Args:
+            queries: Sub-queries (original query first)
+            k: Number of results per sub-query and after fusion (default from config)
+            use_hybrid: Use hybrid search (vector + keyword)
+
+        Returns:
+            Fused retrieval results
+        """
+        k = k or self.config.stage1_top_k
+
+        logger.info("Agent R-03: Multi-Query Semantic Search")
+        for q in queries:
+            logger.debug("  Query: %s", q)
+        logger.debug("  Retrieving top-%d candidates per query...", k)
+
+        # One embeddings call for all sub-queries
+        with span("embed", queries=len(queries)):
+            query_embeddings = self.embeddings.embed_texts(queries, batch_size=len(queries))
+
+        # Search concurrently (I/O bound); spans stay in this trace
+        with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+            result_lists = list(executor.map(
+                propagate(lambda args: self._search_embedding(args[0], args[1], k, use_hybrid)),
+                zip(queries, query_embeddings)
+            ))
 
-        # Search
+        retrieval_results = reciprocal_rank_fusion(result_lists, self.config.rrf_k)[:k]
+
+        logger.info("  Retrieved %d candidates, %d after RRF fusion", sum(len(r) for r in result_lists), len(retrieval_results))
+        if retrieval_results and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("  Similarity range: %.2f - %.2f",
+                         min(r.similarity for r in retrieval_results), max(r.similarity for r in retrieval_results))
+
+        return retrieval_results
+
+    def _search_embedding(
+        self,
+        query: str,
+        query_embedding: List[float],
+        k: int,
+        use_hybrid: bool
+    ) -> List[RetrievalResult]:
+        """Run one vector (or hybrid) search and convert the hits"""
         if use_hybrid:
             results = self.vector_store.hybrid_search(
                 query_embedding=query_embedding,
@@ -95,19 +282,15 @@ class AgentR03_SemanticSearch:
             )
 
         # Convert to RetrievalResult objects
-        retrieval_results = []
-        for result in results:
-            retrieval_results.append(RetrievalResult(
+        return [
+            RetrievalResult(
                 id=result['id'],
                 text=result['text'],
                 metadata=result['metadata'],
                 similarity=result.get('similarity', result.get('score', 0.0))
-            ))
-
-        print(f"  Retrieved {len(retrieval_results)} candidates")
-        print(f"  Similarity range: {min(r.similarity for r in retrieval_results):.2f} - {max(r.similarity for r in retrieval_results):.2f}")
-
-        return retrieval_results
+            )
+            for result in results
+        ]
 
 
 class AgentR04_RelevanceFiltering:
@@ -135,9 +318,9 @@ class AgentR04_RelevanceFiltering:
         Returns:
             Filtered results meeting threshold
         """
-        print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Agent R-04: Relevance Filtering")
-        print(f"  Threshold: {self.config.similarity_threshold * 100}%")
-        print(f"  Input: {len(results)} candidates")
+        logger.info("Agent R-04: Relevance Filtering")
+        logger.debug("  Threshold: %s%%", self.config.similarity_threshold * 100)
+        logger.debug("  Input: %d candidates", len(results))
 
         # Filter by threshold
         filtered = [
@@ -145,10 +328,11 @@ class AgentR04_RelevanceFiltering:
             if r.similarity >= self.config.similarity_threshold
         ]
 
-        print(f"  Output: {len(filtered)} results (removed {len(results) - len(filtered)})")
+        logger.info("  Output: %d results (removed %d)", len(filtered), len(results) - len(filtered))
 
-        if filtered:
-            print(f"  Similarity range: {min(r.similarity for r in filtered):.2f} - {max(r.similarity for r in filtered):.2f}")
+        if filtered and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("  Similarity range: %.2f - %.2f",
+                         min(r.similarity for r in filtered), max(r.similarity for r in filtered))
 
         return filtered
 
@@ -159,17 +343,25 @@ class AgentR06_Reranking:
     Implements high-precision reranking from architecture section 7.6
     """
 
-    def __init__(self, config: Optional[RetrievalConfig] = None):
+    def __init__(self, config: Optional[RetrievalConfig] = None, reranker=None):
         """
         Initialize reranking agent
 
         Args:
             config: Retrieval configuration
+            reranker: Optional scorer with a CrossEncoder-style predict(pairs)
+                (loads config.reranker_model when omitted)
         """
         self.config = config or RetrievalConfig()
 
-        # Load cross-encoder model
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] Loading reranker model: {self.config.reranker_model}")
+        if reranker is not None:
+            self.reranker = reranker
+            return
+
+        # Load cross-encoder model (sentence-transformers/torch deferred until needed)
+        from sentence_transformers import CrossEncoder
+
+        logger.info("Loading reranker model: %s", self.config.reranker_model)
         self.reranker = CrossEncoder(self.config.reranker_model)
 
     def rerank(
@@ -191,9 +383,9 @@ class AgentR06_Reranking:
         """
         top_k = top_k or self.config.stage3_top_k
 
-        print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Agent R-06: Cross-Encoder Reranking")
-        print(f"  Input: {len(results)} candidates")
-        print(f"  Reranking to top-{top_k}...")
+        logger.info("Agent R-06: Cross-Encoder Reranking")
+        logger.debug("  Input: %d candidates", len(results))
+        logger.debug("  Reranking to top-%d...", top_k)
 
         if not results:
             return []
@@ -218,12 +410,117 @@ class AgentR06_Reranking:
         for rank, result in enumerate(reranked, 1):
             result.rank = rank
 
-        print(f"  Output: {len(reranked)} results")
-        print(f"  Rerank score range: {min(r.rerank_score for r in reranked):.3f} - {max(r.rerank_score for r in reranked):.3f}")
+        logger.info("  Output: %d results", len(reranked))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("  Rerank score range: %.3f - %.3f",
+                         min(r.rerank_score for r in reranked), max(r.rerank_score for r in reranked))
 
         return reranked
 
 
+# Near-duplicate detection for context assembly
+MINHASH_PRIME = 4294967311  # Smallest prime above 2**32
+_WORD_RE = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=8)
+def _minhash_params(num_perm: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Hash family coefficients (a, b) for (a * h + b) % MINHASH_PRIME"""
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, 2 ** 31, size=num_perm).astype(np.uint64)
+    b = rng.randint(0, 2 ** 31, size=num_perm).astype(np.uint64)
+    return a, b
+
+
+def minhash_signature(text: str, num_perm: int = 64, shingle_size: int = 3, seed: int = 1) -> np.ndarray:
+    """
+    MinHash signature of the word shingles of a text
+
+    The share of equal slots between two signatures estimates the Jaccard
+    similarity of their shingle sets.
+
+    Args:
+        text: Input text
+        num_perm: Hash permutations
+        shingle_size: Words per shingle
+        seed: Permutation seed (signatures are only comparable with the same seed)
+
+    Returns:
+        uint64 array of length num_perm
+    """
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < shingle_size:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)}
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+    a, b = _minhash_params(num_perm, seed)
+    return ((hashes[:, None] * a + b) % MINHASH_PRIME).min(axis=0)
+
+
+def overlap_length(previous: str, following: str, min_chars: int = 20) -> int:
+    """
+    Length of the longest suffix of previous that is also a prefix of following
+
+    Args:
+        previous: Earlier chunk text
+        following: Next chunk text
+        min_chars: Shorter overlaps are ignored (treated as coincidence)
+
+    Returns:
+        Overlap length in characters (0 if none)
+    """
+    limit = min(len(previous), len(following))
+    if limit < min_chars:
+        return 0
+
+    probe = following[:min_chars]
+    pos = previous.find(probe, len(previous) - limit)
+    # First hit is the longest candidate overlap
+    while pos != -1:
+        if following.startswith(previous[pos:]):
+            return len(previous) - pos
+        pos = previous.find(probe, pos + 1)
+    return 0
+
+
+def knapsack_select(weights: List[int], values: List[float], capacity: int) -> List[int]:
+    """
+    0/1 knapsack: items with the highest total value that fit the capacity
+
+    Dynamic programming over capacities, one vectorized step per item
+    (O(items x capacity)).
+
+    Args:
+        weights: Item weights (tokens)
+        values: Item values
+        capacity: Maximum total weight
+
+    Returns:
+        Indices of the chosen items, ascending
+    """
+    if capacity <= 0 or not weights:
+        return []
+
+    best = np.zeros(capacity + 1)
+    take = np.zeros((len(weights), capacity + 1), dtype=bool)
+    for i, (weight, value) in enumerate(zip(weights, values)):
+        if weight > capacity:
+            continue
+        candidate = best[:capacity + 1 - weight] + value
+        improved = candidate > best[weight:]
+        take[i, weight:] = improved
+        best[weight:] = np.where(improved, candidate, best[weight:])
+
+    chosen = []
+    remaining = capacity
+    for i in range(len(weights) - 1, -1, -1):
+        if take[i, remaining]:
+            chosen.append(i)
+            remaining -= weights[i]
+    return chosen[::-1]
+
+
 class AgentR05_ContextAssembly:
     """
     Agent R-05: Context Assembly (Stage 4)
@@ -279,6 +576,108 @@ class AgentR05_ContextAssembly:
         # Adjacent if indices differ by 1
         return abs(idx1 - idx2) == 1
 
+    def _render_chunk(self, chunk: RetrievalResult) -> str:
+        """Render a chunk as it appears in the final context"""
+        if self.config.enable_source_attribution:
+            return f"{chunk.metadata.get('attribution', '')}\n{chunk.text}"
+        return chunk.text
+
+    @staticmethod
+    def _score(chunk: RetrievalResult) -> float:
+        """Ranking score of a chunk (rerank score, else similarity)"""
+        return chunk.rerank_score if chunk.rerank_score is not None else chunk.similarity
+
+    @staticmethod
+    def _position(chunk: RetrievalResult) -> Tuple[str, int]:
+        """Sort key: (source_file, chunk_index)"""
+        return (chunk.metadata.get('source_file', ''), chunk.metadata.get('chunk_index', -1))
+
+    def remove_near_duplicates(self, results: List[RetrievalResult]) -> List[RetrievalResult]:
+        """
+        Drop chunks whose shingles mostly repeat a better-ranked chunk
+
+        Args:
+            results: Chunks (any order)
+
+        Returns:
+            Kept chunks, best score first
+        """
+        threshold = self.config.near_duplicate_threshold
+        num_perm = self.config.minhash_permutations
+
+        kept: List[RetrievalResult] = []
+        signatures = np.empty((len(results), num_perm), dtype=np.uint64)
+        for result in sorted(results, key=self._score, reverse=True):
+            signature = minhash_signature(result.text, num_perm)
+            if kept and (signatures[:len(kept)] == signature).mean(axis=1).max() >= threshold:
+                continue
+            signatures[len(kept)] = signature
+            kept.append(result)
+        return kept
+
+    def merge_runs(self, chunks: List[RetrievalResult]) -> Tuple[List[Tuple[RetrievalResult, List[RetrievalResult]]], int]:
+        """
+        Merge every run of consecutive chunks from the same source
+
+        Chunks are sorted by (source_file, chunk_index), so each run is
+        contiguous; the text the splitter repeated at each boundary (chunk
+        overlap) is kept once.
+
+        Args:
+            chunks: Chunks to merge
+
+        Returns:
+            ([(merged chunk, member chunks)] in source order, overlap tokens removed)
+        """
+        runs: List[List[RetrievalResult]] = []
+        for chunk in sorted(chunks, key=self._position):
+            if runs and self.is_adjacent(runs[-1][-1], chunk):
+                runs[-1].append(chunk)
+            else:
+                runs.append([chunk])
+
+        merged = []
+        removed_tokens = 0
+        for members in runs:
+            if len(members) == 1:
+                merged.append((members[0], members))
+                continue
+
+            text = members[0].text
+            for member in members[1:]:
+                overlap = overlap_length(text, member.text)
+                if overlap:
+                    removed_tokens += count_tokens(member.text[:overlap])
+                    text += member.text[overlap:]
+                else:
+                    text += "\n\n" + member.text
+
+            first = members[0]
+            best = max(members, key=self._score)
+            metadata = dict(first.metadata)
+            metadata["merged"] = True
+            metadata["merged_chunk_indices"] = [m.metadata.get('chunk_index') for m in members]
+            metadata["token_count"] = count_tokens(text)
+            merged.append((replace(
+                first,
+                text=text,
+                metadata=metadata,
+                similarity=best.similarity,
+                rerank_score=best.rerank_score
+            ), members))
+
+        return merged, removed_tokens
+
+    def _items(self, chunks: List[RetrievalResult]) -> Tuple[List[Tuple[RetrievalResult, List[RetrievalResult]]], int]:
+        """Chunks as they will be rendered: merged runs (if enabled) in source order"""
+        if self.config.enable_chunk_merging:
+            return self.merge_runs(chunks)
+        return [(chunk, [chunk]) for chunk in sorted(chunks, key=self._position)], 0
+
+    def _tokens(self, chunk: RetrievalResult, separator_tokens: int) -> int:
+        """Tokens a rendered chunk adds to the context"""
+        return count_tokens(self._render_chunk(chunk)) + separator_tokens
+
     def assemble_context(self, results: List[RetrievalResult]) -> Dict[str, Any]:
         """
         Stage 4: Context Assembly - Deduplicate, merge, and optimize
@@ -289,8 +688,8 @@ class AgentR05_ContextAssembly:
         Returns:
             Assembled context with metadata
         """
-        print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Agent R-05: Context Assembly")
-        print(f"  Input: {len(results)} chunks")
+        logger.info("Agent R-05: Context Assembly")
+        logger.debug("  Input: %d chunks", len(results))
 
         if not results:
             return {
@@ -300,52 +699,14 @@ class AgentR05_ContextAssembly:
                 "sources": []
             }
 
-        assembled = []
-        seen_signatures = set()
-
-        # 1. Deduplication
-        for result in results:
-            signature = self.normalize_text(result.text)
-
-            if signature in seen_signatures:
-                continue
-
-            seen_signatures.add(signature)
-            assembled.append(result)
-
-        print(f"  After deduplication: {len(assembled)} chunks")
-
-        # 2. Merge adjacent chunks (if enabled)
-        if self.config.enable_chunk_merging:
-            merged = []
-            i = 0
-            while i < len(assembled):
-                current = assembled[i]
-
-                # Check if next chunk is adjacent
-                if i + 1 < len(assembled) and self.is_adjacent(current, assembled[i + 1]):
-                    # Merge
-                    next_chunk = assembled[i + 1]
-                    current.text = current.text + "\n\n" + next_chunk.text
-                    current.metadata["merged"] = True
-                    i += 2  # Skip next
-                else:
-                    i += 1
-
-                merged.append(current)
-
-            assembled = merged
-            print(f"  After merging: {len(assembled)} chunks")
-
-        # 3. Sort by source and index
-        assembled.sort(
-            key=lambda c: (
-                c.metadata.get('source_file', ''),
-                c.metadata.get('chunk_index', 0)
-            )
-        )
+        # 1. Near-duplicate removal (MinHash over word shingles)
+        if self.config.enable_deduplication:
+            assembled = self.remove_near_duplicates(results)
+            logger.debug("  After deduplication: %d chunks", len(assembled))
+        else:
+            assembled = list(results)
 
-        # 4. Add source attribution
+        # 2. Add source attribution
         if self.config.enable_source_attribution:
             for chunk in assembled:
                 source = chunk.metadata.get('source_file', 'Unknown')
@@ -361,42 +722,56 @@ class AgentR05_ContextAssembly:
 
                 chunk.metadata['attribution'] = attribution
 
-        # 5. Token optimization
-        total_tokens = sum(c.metadata.get('token_count', len(c.text) // 4) for c in assembled)
-
-        if total_tokens > self.config.max_context_tokens:
-            # Keep highest-ranked chunks until under budget
-            trimmed = []
-            current_tokens = 0
-
-            for chunk in assembled:
-                chunk_tokens = chunk.metadata.get('token_count', len(chunk.text) // 4)
-                if current_tokens + chunk_tokens <= self.config.max_context_tokens:
-                    trimmed.append(chunk)
-                    current_tokens += chunk_tokens
-                else:
-                    break
-
-            assembled = trimmed
-            total_tokens = current_tokens
-            print(f"  After token optimization: {len(assembled)} chunks, {total_tokens} tokens")
-
-        # 6. Build final context
+        # 3. Sort by source and index, merge adjacent runs (if enabled)
+        items, removed_tokens = self._items(assembled)
+        if self.config.enable_chunk_merging:
+            logger.debug("  After merging: %d chunks (%d overlap tokens removed)", len(items), removed_tokens)
+
+        # 4. Token optimization
+        # Count the rendered part (attribution + text + separator) so the
+        # budget matches what is actually sent to the LLM
+        separator = "\n\n---\n\n"
+        separator_tokens = count_tokens(separator)
+        budget = self.config.max_context_tokens
+        total_tokens = sum(self._tokens(chunk, separator_tokens) for chunk, _ in items)
+
+        if total_tokens > budget:
+            # Highest total rerank value that fits: each chunk's standalone
+            # size bounds what it adds once merged, so the pick always fits.
+            # Scores are scaled to (0, 1] so every kept chunk adds value.
+            scores = [self._score(chunk) for chunk in assembled]
+            low, spread = min(scores), (max(scores) - min(scores)) or 1.0
+            values = [0.05 + 0.95 * (score - low) / spread for score in scores]
+            weights = [self._tokens(chunk, separator_tokens) for chunk in assembled]
+            selected = [assembled[i] for i in knapsack_select(weights, values, budget)]
+
+            # Merging frees the repeated overlap: spend it on the best chunks left out
+            chosen_ids = {id(chunk) for chunk in selected}
+            for chunk in sorted(assembled, key=self._score, reverse=True):
+                if id(chunk) in chosen_ids:
+                    continue
+                trial, _ = self._items(selected + [chunk])
+                if sum(self._tokens(c, separator_tokens) for c, _ in trial) <= budget:
+                    selected.append(chunk)
+
+            items, _ = self._items(selected)
+            total_tokens = sum(self._tokens(chunk, separator_tokens) for chunk, _ in items)
+            logger.debug("  After token optimization: %d chunks, %d tokens", len(items), total_tokens)
+
+        assembled = [chunk for chunk, _ in items]
+
+        # 5. Build final context
         context_parts = []
         sources = set()
 
         for chunk in assembled:
-            if self.config.enable_source_attribution:
-                context_parts.append(f"{chunk.metadata.get('attribution', '')}\n{chunk.text}")
-            else:
-                context_parts.append(chunk.text)
-
+            context_parts.append(self._render_chunk(chunk))
             sources.add(chunk.metadata.get('source_file', 'Unknown'))
 
-        context = "\n\n---\n\n".join(context_parts)
+        context = separator.join(context_parts)
 
-        print(f"  Final context: {len(assembled)} chunks, {total_tokens} tokens")
-        print(f"  Sources: {len(sources)} files")
+        logger.info("  Final context: %d chunks, %d tokens", len(assembled), total_tokens)
+        logger.info("  Sources: %d files", len(sources))
 
         return {
             "context": context,
@@ -417,7 +792,9 @@ class MultiStageRetriever:
         self,
         vector_store,
         embeddings,
-        config: Optional[RetrievalConfig] = None
+        config: Optional[RetrievalConfig] = None,
+        llm=None,
+        reranker=None
     ):
         """
         Initialize multi-stage retriever
@@ -426,59 +803,204 @@ class MultiStageRetriever:
             vector_store: OpenSearch vector store
             embeddings: Embeddings model
             config: Retrieval configuration
+            llm: Optional ClaudeLLM for LLM query expansion
+            reranker: Optional scorer replacing the cross-encoder (see AgentR06_Reranking)
         """
         self.config = config or RetrievalConfig()
 
         # Initialize agents
+        self.query_expander = QueryExpander(config, llm=llm)
         self.agent_r03 = AgentR03_SemanticSearch(vector_store, embeddings, config)
         self.agent_r04 = AgentR04_RelevanceFiltering(config)
-        self.agent_r06 = AgentR06_Reranking(config)
+        self.agent_r06 = AgentR06_Reranking(config, reranker=reranker)
         self.agent_r05 = AgentR05_ContextAssembly(config)
 
-    def retrieve(
+    def retrieve_candidates(
         self,
         query: str,
         use_hybrid: bool = False
-    ) -> Dict[str, Any]:
+    ) -> Tuple[List[RetrievalResult], Dict[str, int]]:
         """
-        Execute full multi-stage retrieval pipeline
+        Stages 1-2: Semantic search and relevance filtering
 
         Args:
-            query: User query
+            query: Search query
             use_hybrid: Use hybrid search (vector + keyword)
 
         Returns:
-            Assembled context and metadata
+            Tuple of (filtered candidates, LLM token usage of query expansion)
         """
-        start_time = datetime.now()
-
-        print(f"\n{'='*70}")
-        print(f"MULTI-STAGE RETRIEVAL PIPELINE")
-        print(f"Query: {query}")
-        print(f"{'='*70}")
-
         # Stage 1: Semantic Search (Broad Recall)
-        stage1_results = self.agent_r03.search(query, use_hybrid=use_hybrid)
+        usage: Dict[str, int] = {}
+        if self.config.enable_multi_query:
+            with span("expand"):
+                queries, usage = self.query_expander.expand(query)
+        else:
+            queries = [query]
+
+        with span("search", k=self.config.stage1_top_k, queries=len(queries), hybrid=use_hybrid) as search_span:
+            if len(queries) > 1:
+                stage1_results = self.agent_r03.search_multi(queries, use_hybrid=use_hybrid)
+            else:
+                stage1_results = self.agent_r03.search(query, use_hybrid=use_hybrid)
+            search_span.set_attributes(candidates=len(stage1_results))
 
         # Stage 2: Relevance Filtering (75% threshold)
-        stage2_results = self.agent_r04.filter(stage1_results)
+        with span("filter", candidates=len(stage1_results), threshold=self.config.similarity_threshold) as filter_span:
+            filtered = self.agent_r04.filter(stage1_results)
+            filter_span.set_attributes(kept=len(filtered))
+        return filtered, usage
+
+    @staticmethod
+    def fuse_candidates(*candidate_sets: List[RetrievalResult]) -> List[RetrievalResult]:
+        """
+        Merge candidate sets by chunk id, keeping the highest similarity
+
+        Args:
+            *candidate_sets: Candidate lists from retrieve_candidates()
+
+        Returns:
+            Unique candidates sorted by similarity
+        """
+        fused = {}
+        for candidates in candidate_sets:
+            for result in candidates:
+                existing = fused.get(result.id)
+                if existing is None or result.similarity > existing.similarity:
+                    fused[result.id] = result
+
+        return sorted(fused.values(), key=lambda r: r.similarity, reverse=True)
+
+    def rerank_and_assemble(
+        self,
+        query: str,
+        candidates: List[RetrievalResult],
+        start_time: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Stages 3-4: Rerank candidates and assemble context
+
+        Args:
+            query: Query used for cross-encoder scoring
+            candidates: Filtered candidates
+            start_time: Retrieval start (time.perf_counter() value, for timing)
+
+        Returns:
+            Assembled context and metadata (with retrieval_time_ms and the
+            per-stage breakdown stage_timings_ms)
+        """
+        start_time = start_time or time.perf_counter()
 
         # Stage 3: Reranking (High Precision)
-        stage3_results = self.agent_r06.rerank(query, stage2_results)
+        with span("rerank", candidates=len(candidates), top_k=self.config.stage3_top_k) as rerank_span:
+            stage3_results = self.agent_r06.rerank(query, candidates)
+            rerank_span.set_attributes(kept=len(stage3_results))
 
         # Stage 4: Context Assembly
-        assembled = self.agent_r05.assemble_context(stage3_results)
+        with span("assemble", chunks=len(stage3_results), budget_tokens=self.config.max_context_tokens) as assemble_span:
+            assembled = self.agent_r05.assemble_context(stage3_results)
+            assemble_span.set_attributes(kept=assembled.get('num_chunks', 0), tokens=assembled['total_tokens'])
 
         # Calculate timing
-        elapsed = (datetime.now() - start_time).total_seconds() * 1000
-
-        print(f"\n{'='*70}")
-        print(f"PIPELINE COMPLETE")
-        print(f"  Total time: {elapsed:.0f}ms")
-        print(f"  Token savings: {((1 - assembled['total_tokens'] / 150000) * 100):.1f}%")
-        print(f"{'='*70}\n")
+        elapsed = (time.perf_counter() - start_time) * 1000
+        parent = current_span()
+        stage_timings = {name: round(ms, 1) for name, ms in parent.stage_timings.items()} if parent else {}
+
+        logger.info("=" * 70)
+        logger.info("PIPELINE COMPLETE")
+        logger.info("  Total time: %.0fms", elapsed)
+        if stage_timings:
+            logger.info("  Stages: %s", ", ".join(f"{name} {ms:.0f}ms" for name, ms in stage_timings.items()))
+        logger.info("  Token savings: %.1f%%", (1 - assembled['total_tokens'] / 150000) * 100)
+        logger.info("=" * 70)
 
         # Add timing to result
         assembled['retrieval_time_ms'] = elapsed
+        assembled['stage_timings_ms'] = stage_timings
 
         return assembled
+
+    def retrieve(
+        self,
+        query: str,
+        use_hybrid: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Execute full multi-stage retrieval pipeline
+
+        Args:
+            query: User query
+            use_hybrid: Use hybrid search (vector + keyword)
+
+        Returns:
+            Assembled context and metadata (usage holds the LLM token usage
+            of query expansion)
+        """
+        start_time = time.perf_counter()
+
+        logger.info("=" * 70)
+        logger.info("MULTI-STAGE RETRIEVAL PIPELINE")
+        logger.info("Query: %s", query)
+        logger.info("=" * 70)
+
+        with span("retrieve", hybrid=use_hybrid):
+            candidates, usage = self.retrieve_candidates(query, use_hybrid=use_hybrid)
+
+            assembled = self.rerank_and_assemble(query, candidates, start_time=start_time)
+            assembled['usage'] = usage
+            return assembled
+
+    def speculative_retrieve(
+        self,
+        query: str,
+        refine_fn: Callable[[str], str],
+        use_hybrid: bool = False
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Retrieve for the original query while the query is being refined
+
+        Candidate retrieval for the original query starts immediately on a
+        worker thread; refinement runs on the calling thread. If refinement
+        changes the query, its candidates are retrieved as well and both sets
+        are fused before reranking, so refinement is off the critical path.
+
+        Args:
+            query: Original user query
+            refine_fn: Function returning the refined query
+            use_hybrid: Use hybrid search (vector + keyword)
+
+        Returns:
+            Tuple of (refined query, assembled context and metadata; usage
+            holds the LLM token usage of query expansion, not of refine_fn)
+        """
+        start_time = time.perf_counter()
+
+        logger.info("=" * 70)
+        logger.info("SPECULATIVE MULTI-STAGE RETRIEVAL")
+        logger.info("Query: %s", query)
+        logger.info("=" * 70)
+
+        with span("retrieve", hybrid=use_hybrid, speculative=True) as retrieve_span:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                futures = [executor.submit(propagate(self.retrieve_candidates), query, use_hybrid)]
+
+                with span("refine"):
+                    refined_query = (refine_fn(query) or "").strip() or query
+                if refined_query != query:
+                    futures.append(executor.submit(propagate(self.retrieve_candidates), refined_query, use_hybrid))
+
+                candidate_sets = []
+                usage: Dict[str, int] = {}
+                for future in futures:
+                    candidate_set, expansion_usage = future.result()
+                    candidate_sets.append(candidate_set)
+                    usage = add_usage(usage, expansion_usage)
+
+            candidates = self.fuse_candidates(*candidate_sets)
+            retrieve_span.set_attributes(queries=len(candidate_sets), candidates=len(candidates))
+            logger.info("Fused %d candidates from %d queries into %d",
+                        sum(len(c) for c in candidate_sets), len(candidate_sets), len(candidates))
+
+            assembled = self.rerank_and_assemble(refined_query, candidates, start_time=start_time)
+            assembled['usage'] = usage
+            return refined_query, assembled
@@ -0,0 +1,2 @@
+"""Auth module: shared, cached TR AI Platform credentials"""
+from .credentials import CredentialError, CredentialProvider, get_credential_provider
@@ -0,0 +1,343 @@
+"""
+TR Credential Provider
+One cache for the TR AI Platform token endpoints, shared by every client in
+the process and, through a file-locked disk cache, by worker processes:
+- in-memory credentials served without I/O while valid
+- on-disk cache (one JSON file per endpoint + payload, written atomically)
+- single-flight fetching: one request per refresh, even across processes
+- background refresh shortly before expiry
+- the same connect/read timeouts and retries for every caller
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+from ..observability import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = get_logger(__name__)
+
+DEFAULT_TTL_SECONDS = int(os.getenv("TR_TOKEN_TTL_SECONDS", "3600"))
+REFRESH_MARGIN_SECONDS = 300  # Refresh this long before expiry
+REQUEST_TIMEOUT = (5, 30)  # Connect, read (seconds)
+FETCH_ATTEMPTS = 3
+RETRY_DELAY_SECONDS = 1.0
+CACHE_DIR = os.getenv("TR_CREDENTIAL_CACHE_DIR", os.path.join(Path.home(), ".cache", "bu-research", "credentials"))
+
+
+class CredentialError(Exception):
+    """Credentials could not be obtained from the token endpoint"""
+
+
+@contextmanager
+def _file_lock(path: str) -> Iterator[None]:
+    """Exclusive inter-process lock on a lock file (blocking)"""
+    with open(path, "a+b") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class CredentialProvider:
+    """
+    Cached credentials for one token endpoint and request payload
+
+    Credentials are dicts as returned by the endpoint plus "fetched_at" and
+    "expires_at" (epoch seconds). expires_in/expires_at in the response are
+    honoured; otherwise credentials live for ttl_s.
+    """
+
+    def __init__(
+        self,
+        token_url: str,
+        payload: Dict[str, Any],
+        required_keys: Sequence[str] = ("anthropic_api_key",),
+        ttl_s: float = DEFAULT_TTL_SECONDS,
+        refresh_margin_s: float = REFRESH_MARGIN_SECONDS,
+        timeout: Tuple[float, float] = REQUEST_TIMEOUT,
+        cache_path: Optional[str] = None
+    ):
+        """
+        Initialize provider
+
+        Args:
+            token_url: TR token endpoint
+            payload: JSON body of the token request
+            required_keys: Keys a valid response must contain
+            ttl_s: Credential lifetime when the response has no expiry
+            refresh_margin_s: Refresh this long before expiry
+            timeout: requests (connect, read) timeout
+            cache_path: On-disk cache file (None: derived from URL and payload
+                under TR_CREDENTIAL_CACHE_DIR; "" disables the disk cache)
+        """
+        self.token_url = token_url
+        self.payload = dict(payload)
+        self.required_keys = tuple(required_keys)
+        self.ttl_s = ttl_s
+        self.refresh_margin_s = min(refresh_margin_s, ttl_s / 2)
+        self.timeout = timeout
+
+        if cache_path is None:
+            digest = hashlib.sha256(json.dumps([token_url, self.payload], sort_keys=True).encode()).hexdigest()[:16]
+            cache_path = os.path.join(CACHE_DIR, f"{digest}.json")
+        self.cache_path = cache_path or None
+
+        self._credentials: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._listeners: list = []
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "fetches": 0, "background_refreshes": 0, "failures": 0}
+
+    # ---------- Public API ----------
+
+    def get(self, force_refresh: bool = False) -> Dict[str, Any]:
+        """
+        Get valid credentials
+
+        Args:
+            force_refresh: Fetch new credentials (e.g. after an auth or rate
+                limit error); concurrent forced calls share one fetch
+
+        Returns:
+            Credentials dict
+
+        Raises:
+            CredentialError: If no valid credentials can be obtained
+        """
+        requested_at = time.time()
+        credentials = self._credentials
+        if not force_refresh and self._valid(credentials):
+            self.stats["memory_hits"] += 1
+            return credentials
+
+        with self._lock:
+            credentials = self._credentials
+            # Someone else refreshed while we waited
+            fresh_after = requested_at if force_refresh else 0.0
+            if self._valid(credentials) and credentials["fetched_at"] >= fresh_after:
+                self.stats["memory_hits"] += 1
+                return credentials
+            return self._load_or_fetch(fresh_after)
+
+    def invalidate(self):
+        """Drop cached credentials (memory and disk)"""
+        with self._lock:
+            self._credentials = None
+            self._cancel_timer()
+            if self.cache_path:
+                try:
+                    os.remove(self.cache_path)
+                except OSError:
+                    pass
+
+    def add_listener(self, callback: Callable[[Dict[str, Any]], None]):
+        """
+        Call callback(credentials) whenever new credentials are adopted
+
+        Args:
+            callback: Listener (should be fast; errors are logged and ignored)
+        """
+        self._listeners.append(callback)
+
+    # ---------- Internals ----------
+
+    def _valid(self, credentials: Optional[Dict[str, Any]], margin: float = 0.0) -> bool:
+        return bool(credentials) and credentials.get("expires_at", 0) - margin > time.time()
+
+    def _load_or_fetch(self, fresh_after: float, margin: float = 0.0) -> Dict[str, Any]:
+        """
+        Disk cache, then the endpoint (caller holds self._lock)
+
+        Args:
+            fresh_after: Only accept cached credentials fetched after this time
+            margin: Only accept cached credentials valid for this much longer
+        """
+        if not self.cache_path:
+            return self._adopt(self._fetch())
+
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        with _file_lock(self.cache_path + ".lock"):
+            cached = self._read_disk()
+            # Another process may have refreshed while we waited for the lock
+            if self._valid(cached, margin) and cached.get("fetched_at", 0) >= fresh_after:
+                self.stats["disk_hits"] += 1
+                return self._adopt(cached)
+
+            credentials = self._fetch()
+            self._write_disk(credentials)
+        return self._adopt(credentials)
+
+    def _fetch(self) -> Dict[str, Any]:
+        """Request credentials from the endpoint (with retries on network errors)"""
+        import requests
+
+        last_error = None
+        for attempt in range(FETCH_ATTEMPTS):
+            try:
+                resp = requests.post(self.token_url, json=self.payload, timeout=self.timeout)
+                if resp.status_code >= 500:
+                    raise requests.HTTPError(f"{resp.status_code} from token endpoint", response=resp)
+                credentials = resp.json()
+            except (requests.RequestException, ValueError) as e:
+                last_error = e
+                if attempt < FETCH_ATTEMPTS - 1:
+                    time.sleep(RETRY_DELAY_SECONDS * (attempt + 1))
+                continue
+
+            missing = [key for key in self.required_keys if key not in credentials]
+            if missing:
+                # A well-formed refusal will not change on retry
+                self.stats["failures"] += 1
+                # Only the key names: the rest of the response may hold secrets
+                raise CredentialError(f"Token endpoint response is missing {missing}")
+
+            now = time.time()
+            credentials["fetched_at"] = now
+            if "expires_in" in credentials:
+                credentials["expires_at"] = now + float(credentials["expires_in"])
+            elif not isinstance(credentials.get("expires_at"), (int, float)):
+                credentials["expires_at"] = now + self.ttl_s
+            self.stats["fetches"] += 1
+            logger.debug("Fetched credentials from %s", self.token_url)
+            return credentials
+
+        self.stats["failures"] += 1
+        raise CredentialError(f"Token endpoint request failed: {last_error}")
+
+    def _read_disk(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, credentials: Dict[str, Any]):
+        """Atomic write readable only by the owner"""
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(credentials, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.warning("Could not write credential cache %s: %s", self.cache_path, e)
+
+    def _adopt(self, credentials: Dict[str, Any]) -> Dict[str, Any]:
+        """Make credentials current, schedule their refresh and notify listeners"""
+        changed = self._credentials is not credentials
+        self._credentials = credentials
+        self._schedule_refresh(credentials["expires_at"] - self.refresh_margin_s - time.time())
+        if changed:
+            for listener in self._listeners:
+                try:
+                    listener(credentials)
+                except Exception as e:
+                    logger.warning("Credential listener failed: %s", e)
+        return credentials
+
+    def _schedule_refresh(self, delay_s: float):
+        self._cancel_timer()
+        self._timer = threading.Timer(max(delay_s, 1.0), self._background_refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _background_refresh(self):
+        """Timer callback: replace credentials that are about to expire"""
+        with self._lock:
+            if self._valid(self._credentials, margin=self.refresh_margin_s):
+                return  # Already refreshed (e.g. by another process, adopted via get())
+            try:
+                self._load_or_fetch(fresh_after=0.0, margin=self.refresh_margin_s)
+                self.stats["background_refreshes"] += 1
+            except Exception as e:
+                logger.warning("Background credential refresh failed: %s", e)
+                if self._valid(self._credentials):
+                    self._schedule_refresh(min(30.0, self.refresh_margin_s / 4))
+
+    def _after_fork(self):
+        """Reset locks and timer in a forked child (e.g. a prefork Celery worker)"""
+        self._lock = threading.Lock()
+        self._timer = None
+        if self._credentials:
+            self._schedule_refresh(self._credentials["expires_at"] - self.refresh_margin_s - time.time())
+
+
+# Shared providers, one per endpoint + payload + validation + cache file (singleton pattern)
+_providers: Dict[str, CredentialProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_credential_provider(
+    token_url: str,
+    payload: Dict[str, Any],
+    required_keys: Sequence[str] = ("anthropic_api_key",),
+    ttl_s: Optional[float] = None,
+    cache_path: Optional[str] = None
+) -> CredentialProvider:
+    """
+    Get or create the shared provider for a token endpoint and payload
+
+    Callers that differ in required_keys or cache_path get separate
+    providers, so each response is validated against the keys its caller
+    needs.
+
+    Args:
+        token_url: TR token endpoint
+        payload: JSON body of the token request
+        required_keys: Keys a valid response must contain
+        ttl_s: Credential lifetime when the response has no expiry; the
+            shortest lifetime requested for a provider wins
+        cache_path: On-disk cache file (see CredentialProvider)
+
+    Returns:
+        CredentialProvider
+    """
+    key = json.dumps([token_url, payload, sorted(required_keys), cache_path], sort_keys=True)
+    with _providers_lock:
+        provider = _providers.get(key)
+        if provider is None:
+            provider = _providers[key] = CredentialProvider(
+                token_url, payload, required_keys,
+                ttl_s=ttl_s or DEFAULT_TTL_SECONDS,
+                cache_path=cache_path
+            )
+        elif ttl_s and ttl_s < provider.ttl_s:
+            provider.ttl_s = ttl_s
+            provider.refresh_margin_s = min(provider.refresh_margin_s, ttl_s / 2)
+    return provider
+
+
+def _reset_after_fork():
+    global _providers_lock
+    _providers_lock = threading.Lock()
+    for provider in _providers.values():
+        provider._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,18 @@
+"""Benchmark module: offline retrieval benchmark (recall, latency, cost)"""
+from .._lazy import lazy_exports
+
+# Submodules are imported on first access (PEP 562)
+__getattr__, __dir__, __all__ = lazy_exports(__name__, {
+    "HashingEmbeddings": ".fixtures",
+    "SentenceTransformerEmbeddings": ".fixtures",
+    "InMemoryVectorStore": ".fixtures",
+    "LexicalReranker": ".fixtures",
+    "synthetic_corpus": ".fixtures",
+    "synthetic_queries": ".fixtures",
+    "compare_reports": ".harness",
+    "format_comparison": ".harness",
+    "format_summary": ".harness",
+    "load_corpus": ".harness",
+    "run_benchmark": ".harness",
+    "save_report": ".harness",
+})
@@ -0,0 +1,110 @@
+"""
+Offline retrieval benchmark
+
+Indexes a corpus in memory and runs a labelled query set through
+MultiStageRetriever; no OpenSearch, embeddings API or LLM calls.
+
+Usage:
+    python -m rag_pipeline.benchmark [--corpus synthetic] [--docs 40] [--num-queries 100]
+    python -m rag_pipeline.benchmark --corpus data/RAGInput --queries rag_pipeline/benchmark/raginput_queries.json
+    python -m rag_pipeline.benchmark --output after.json --compare before.json
+
+Hashing embeddings are bag-of-words vectors, so their cosine scores sit far
+below those of text-embedding-3-large; the similarity threshold defaults to
+0.1 for them instead of the production 0.75.
+"""
+import sys
+import json
+import argparse
+from pathlib import Path
+
+from ..config.settings import RetrievalConfig
+from ..observability import set_log_level
+from .fixtures import HashingEmbeddings, LexicalReranker, SentenceTransformerEmbeddings, synthetic_corpus, synthetic_queries
+from .harness import compare_reports, format_comparison, format_summary, load_corpus, run_benchmark, save_report
+
+HASHING_SIMILARITY_THRESHOLD = 0.1
+DEFAULT_QUERIES = Path(__file__).parent / "raginput_queries.json"
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m rag_pipeline.benchmark", description="Offline retrieval benchmark")
+    parser.add_argument("--corpus", default="synthetic", help="'synthetic' or a directory of .docx/.csv/.xlsx files")
+    parser.add_argument("--queries", help="Labelled query JSON (default for a directory: raginput_queries.json)")
+    parser.add_argument("--docs", type=int, default=40, help="Synthetic documents")
+    parser.add_argument("--chunks-per-doc", type=int, default=8, help="Synthetic chunks per document")
+    parser.add_argument("--num-queries", type=int, default=100, help="Synthetic queries")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--embeddings", default="hash", help="'hash' or 'st:MODEL' (local sentence-transformers)")
+    parser.add_argument("--reranker", choices=["lexical", "cross-encoder"], default="lexical")
+    parser.add_argument("--hybrid", action="store_true", help="Hybrid k-NN + BM25 search")
+    parser.add_argument("--multi-query", action="store_true", help="Enable multi-query expansion")
+    parser.add_argument("--similarity-threshold", type=float, help="Stage 2 threshold (default depends on --embeddings)")
+    parser.add_argument("--top-k", type=int, help="Stage 3 top k")
+    parser.add_argument("--max-context-tokens", type=int, help="Stage 4 token budget")
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--compare", help="Baseline JSON report to compare against")
+    parser.add_argument("--trace-memory", action="store_true", help="Report Python allocation peak (tracemalloc)")
+    parser.add_argument("--log-level", default="WARNING", help="Pipeline log level")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    set_log_level(args.log_level)
+
+    if args.corpus == "synthetic":
+        chunks, labels = synthetic_corpus(args.docs, args.chunks_per_doc, seed=args.seed)
+        queries = synthetic_queries(labels, args.num_queries, seed=args.seed)
+        if args.queries:
+            queries = json.loads(Path(args.queries).read_text(encoding="utf-8"))
+    else:
+        chunks = load_corpus(args.corpus)
+        queries = json.loads(Path(args.queries or DEFAULT_QUERIES).read_text(encoding="utf-8"))
+    if not chunks or not queries:
+        print("Error: empty corpus or query set")
+        return 1
+
+    if args.embeddings == "hash":
+        embeddings = HashingEmbeddings()
+        threshold = HASHING_SIMILARITY_THRESHOLD
+    elif args.embeddings.startswith("st:"):
+        embeddings = SentenceTransformerEmbeddings(args.embeddings[3:])
+        threshold = RetrievalConfig.similarity_threshold
+    else:
+        print(f"Error: unknown embeddings '{args.embeddings}'")
+        return 1
+
+    config = RetrievalConfig(
+        enable_multi_query=args.multi_query,
+        similarity_threshold=args.similarity_threshold if args.similarity_threshold is not None else threshold
+    )
+    if args.top_k:
+        config.stage3_top_k = args.top_k
+    if args.max_context_tokens:
+        config.max_context_tokens = args.max_context_tokens
+
+    report = run_benchmark(
+        chunks,
+        queries,
+        embeddings,
+        reranker=LexicalReranker() if args.reranker == "lexical" else None,
+        config=config,
+        use_hybrid=args.hybrid,
+        trace_memory=args.trace_memory,
+        meta={"corpus": args.corpus, "embeddings": args.embeddings, "reranker": args.reranker, "seed": args.seed}
+    )
+
+    print(format_summary(report))
+    if args.output:
+        save_report(report, args.output)
+        print(f"\nReport: {args.output}")
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        print(f"\nCompared with {args.compare} ({baseline.get('meta', {}).get('git_commit')}):")
+        print(format_comparison(compare_reports(baseline, report)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,424 @@
+"""
+Benchmark Fixtures
+Offline stand-ins for the external services of the retrieval pipeline:
+deterministic hashing embeddings (or a local sentence-transformer), an
+in-memory vector store with the OpenSearch search/hybrid_search interface, a
+lexical reranker, and a synthetic labelled corpus
+"""
+import math
+import random
+import re
+import zlib
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..loaders.document_loader import DocumentChunk
+from ..llm.token_accounting import count_tokens
+from ..observability import span
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens"""
+    return _WORD_RE.findall(text.lower())
+
+
+# ---------- Embeddings ----------
+
+class HashingEmbeddings:
+    """
+    Deterministic bag-of-words embeddings (feature hashing of words and
+    word bigrams, L2-normalized); same interface as the OpenAI wrappers
+    """
+
+    def __init__(self, dimensions: int = 512):
+        """
+        Initialize embeddings
+
+        Args:
+            dimensions: Vector size
+        """
+        self.dimensions = dimensions
+        self.total_tokens = 0
+
+    def embed_text(self, text: str) -> List[float]:
+        """Embed one text"""
+        return self._embed(text).tolist()
+
+    def embed_texts(self, texts: List[str], batch_size: int = 100) -> List[List[float]]:
+        """Embed texts (batch_size is accepted for interface compatibility)"""
+        return [self._embed(text).tolist() for text in texts]
+
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a query"""
+        return self._embed(query).tolist()
+
+    def _embed(self, text: str) -> np.ndarray:
+        self.total_tokens += count_tokens(text)
+        words = tokenize(text)
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for feature, weight in Counter(features).items():
+            h = zlib.crc32(feature.encode("utf-8"))
+            # Sign bit from the hash keeps collisions unbiased
+            vector[h % self.dimensions] += (1.0 if h & 0x80000000 else -1.0) * (1.0 + math.log(weight))
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class SentenceTransformerEmbeddings:
+    """Local sentence-transformers model behind the embeddings interface"""
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+        """
+        Initialize embeddings
+
+        Args:
+            model_name: sentence-transformers model name
+        """
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name)
+        self.dimensions = self.model.get_sentence_embedding_dimension()
+        self.total_tokens = 0
+
+    def embed_texts(self, texts: List[str], batch_size: int = 100) -> List[List[float]]:
+        """Embed texts, L2-normalized"""
+        self.total_tokens += sum(count_tokens(t) for t in texts)
+        vectors = self.model.encode(texts, batch_size=batch_size, normalize_embeddings=True, show_progress_bar=False)
+        return [v.tolist() for v in vectors]
+
+    def embed_text(self, text: str) -> List[float]:
+        """Embed one text"""
+        return self.embed_texts([text])[0]
+
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a query"""
+        return self.embed_texts([query])[0]
+
+
+# ---------- Vector store ----------
+
+class InMemoryVectorStore:
+    """
+    Exact k-NN (cosine) plus BM25 over an in-memory corpus, returning results
+    shaped like OpenSearchVectorStore.search()/hybrid_search()
+    """
+
+    def __init__(self, bm25_k1: float = 1.2, bm25_b: float = 0.75):
+        """
+        Initialize store
+
+        Args:
+            bm25_k1: BM25 term frequency saturation
+            bm25_b: BM25 length normalization
+        """
+        self.bm25_k1 = bm25_k1
+        self.bm25_b = bm25_b
+        self.ids: List[str] = []
+        self.chunks: List[DocumentChunk] = []
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self._term_freqs: List[Counter] = []
+        self._doc_freq: Counter = Counter()
+        self._lengths = np.zeros(0)
+
+    def add_documents(self, chunks: List[DocumentChunk], embeddings, batch_size: int = 100):
+        """
+        Embed and index chunks
+
+        Args:
+            chunks: Document chunks
+            embeddings: Embeddings model (embed_texts)
+            batch_size: Texts per embeddings call
+        """
+        vectors = []
+        for i in range(0, len(chunks), batch_size):
+            vectors.extend(embeddings.embed_texts([c.text for c in chunks[i:i + batch_size]], batch_size=batch_size))
+
+        new = np.asarray(vectors, dtype=np.float32)
+        self.matrix = new if not len(self.matrix) else np.vstack([self.matrix, new])
+        for chunk in chunks:
+            self.ids.append(chunk.metadata.get("chunk_id") or f"{chunk.metadata.get('source_file', 'doc')}#{chunk.metadata.get('chunk_index', len(self.ids))}")
+            self.chunks.append(chunk)
+            terms = Counter(tokenize(chunk.text))
+            self._term_freqs.append(terms)
+            self._doc_freq.update(terms.keys())
+        self._lengths = np.array([sum(tf.values()) for tf in self._term_freqs], dtype=np.float64)
+
+    @property
+    def index_bytes(self) -> int:
+        """Size of the embedding matrix"""
+        return int(self.matrix.nbytes)
+
+    def _hit(self, i: int, score: float) -> Dict[str, Any]:
+        chunk = self.chunks[i]
+        return {"id": self.ids[i], "text": chunk.text, "metadata": chunk.metadata, "score": score, "similarity": score}
+
+    def search(self, query_embedding: List[float], k: int = 50, filter_dict: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Exact cosine k-NN
+
+        Args:
+            query_embedding: Query vector
+            k: Number of results
+            filter_dict: Optional exact-match metadata filters
+
+        Returns:
+            Results with id, text, metadata, score and similarity
+        """
+        with span("knn", k=k, filtered=bool(filter_dict)) as knn_span:
+            if not self.ids:
+                return []
+            scores = self.matrix @ np.asarray(query_embedding, dtype=np.float32)
+            if filter_dict:
+                mask = np.array([all(c.metadata.get(key) == value for key, value in filter_dict.items()) for c in self.chunks])
+                scores = np.where(mask, scores, -np.inf)
+            k = min(k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            hits = [self._hit(int(i), float(scores[i])) for i in top if np.isfinite(scores[i])]
+            knn_span.set_attributes(hits=len(hits))
+            return hits
+
+    def keyword_search(self, query_text: str, k: int = 50) -> List[Dict[str, Any]]:
+        """
+        BM25 keyword search
+
+        Args:
+            query_text: Query text
+            k: Number of results
+
+        Returns:
+            Results with id, text, metadata and score
+        """
+        with span("bm25", k=k) as bm25_span:
+            n = len(self.chunks)
+            if not n:
+                return []
+            avg_length = self._lengths.mean() or 1.0
+            scores = np.zeros(n)
+            for term in set(tokenize(query_text)):
+                df = self._doc_freq.get(term, 0)
+                if not df:
+                    continue
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                tf = np.array([tfs.get(term, 0) for tfs in self._term_freqs], dtype=np.float64)
+                scores += idf * tf * (self.bm25_k1 + 1) / (tf + self.bm25_k1 * (1 - self.bm25_b + self.bm25_b * self._lengths / avg_length))
+            top = [int(i) for i in np.argsort(-scores)[:k] if scores[i] > 0]
+            bm25_span.set_attributes(hits=len(top))
+            return [self._hit(i, float(scores[i])) for i in top]
+
+    def hybrid_search(
+        self,
+        query_embedding: List[float],
+        query_text: str,
+        k: int = 50,
+        vector_weight: float = 0.7,
+        keyword_weight: float = 0.3
+    ) -> List[Dict[str, Any]]:
+        """
+        k-NN and BM25 fused with reciprocal rank fusion (as OpenSearchVectorStore)
+
+        Returns:
+            Results ranked by RRF score
+        """
+        vector_results = self.search(query_embedding, k=k)
+        keyword_results = self.keyword_search(query_text, k=k)
+
+        rrf_constant = 61
+        rrf_scores: Dict[str, float] = {}
+        for results in (vector_results, keyword_results):
+            for rank, result in enumerate(results):
+                rrf_scores[result['id']] = rrf_scores.get(result['id'], 0) + 1 / (rank + rrf_constant)
+
+        all_docs = {r['id']: r for r in keyword_results}
+        all_docs.update({r['id']: r for r in vector_results})  # Keep cosine similarity where known
+        ranked = sorted(all_docs.values(), key=lambda d: rrf_scores[d['id']], reverse=True)
+        for result in ranked:
+            result['rrf_score'] = rrf_scores[result['id']]
+        return ranked[:k]
+
+    def get_document_count(self) -> int:
+        """Number of indexed chunks"""
+        return len(self.ids)
+
+
+# ---------- Reranker ----------
+
+class LexicalReranker:
+    """
+    Deterministic stand-in for the cross-encoder: BM25-style overlap of
+    query terms with each candidate (CrossEncoder-style predict)
+    """
+
+    def __init__(self, k1: float = 1.2):
+        """
+        Initialize reranker
+
+        Args:
+            k1: Term frequency saturation
+        """
+        self.k1 = k1
+
+    def predict(self, pairs: List[List[str]]) -> List[float]:
+        """
+        Score (query, text) pairs
+
+        Args:
+            pairs: [query, text] pairs
+
+        Returns:
+            One score per pair (higher is more relevant)
+        """
+        scores = []
+        for query, text in pairs:
+            terms = Counter(tokenize(text))
+            length_norm = math.sqrt(sum(terms.values()) or 1)
+            score = 0.0
+            for term in set(tokenize(query)):
+                tf = terms.get(term, 0)
+                if tf:
+                    score += tf * (self.k1 + 1) / (tf + self.k1)
+            scores.append(score / math.log(1 + length_norm))
+        return scores
+
+
+# ---------- Synthetic corpus ----------
+
+_SYLLABLES = ["ka", "lo", "mi", "ra", "ven", "dor", "sul", "tek", "bri", "zan", "quo", "fel", "mar", "tis", "nox", "pra"]
+FILLER_WORDS = (
+    "the team market customer growth strategy data platform content campaign analysis insight "
+    "process program revenue segment channel digital brand product quarter report pipeline "
+    "adoption workflow budget partner audience launch research operations value performance"
+).split()
+
+
+def _made_up_words(rng: random.Random, count: int, used: set) -> List[str]:
+    """Unique pseudo-words (stand-ins for entity names and jargon)"""
+    words = []
+    while len(words) < count:
+        word = "".join(rng.choice(_SYLLABLES) for _ in range(3))
+        if word not in used:
+            used.add(word)
+            words.append(word)
+    return words
+
+
+def synthetic_corpus(
+    num_docs: int = 40,
+    chunks_per_doc: int = 8,
+    chunk_words: int = 160,
+    overlap_words: int = 30,
+    duplicate_ratio: float = 0.1,
+    seed: int = 7
+) -> Tuple[List[DocumentChunk], Dict[str, Dict[str, Any]]]:
+    """
+    Build a corpus of topical documents split into overlapping chunks
+
+    Each document has topic words shared by all its chunks; each chunk adds
+    a few fact words found nowhere else. Consecutive chunks repeat
+    overlap_words words, like the token-overlap splitter, and a share of
+    chunks get a near-duplicate copy in another file.
+
+    Args:
+        num_docs: Documents (source files)
+        chunks_per_doc: Chunks per document
+        chunk_words: Words per chunk
+        overlap_words: Words repeated from the previous chunk
+        duplicate_ratio: Share of chunks copied (lightly edited) into a "mirror" file
+        seed: Random seed
+
+    Returns:
+        (chunks, {chunk_id: {"source_file", "chunk_index", "topic", "facts"}})
+    """
+    rng = random.Random(seed)
+    used: set = set()
+    chunks: List[DocumentChunk] = []
+    labels: Dict[str, Dict[str, Any]] = {}
+
+    for d in range(num_docs):
+        source_file = f"doc_{d:03d}.docx"
+        topic = _made_up_words(rng, 6, used)
+        stream: List[str] = []
+        for c in range(chunks_per_doc):
+            facts = _made_up_words(rng, 3, used)
+            body = [rng.choice(FILLER_WORDS) for _ in range(chunk_words - overlap_words)]
+            for word in topic[:3] + rng.sample(topic, 2) + facts + facts[:1]:
+                body.insert(rng.randrange(len(body) + 1), word)
+
+            words = (stream[-overlap_words:] if stream else []) + body
+            stream.extend(body)
+            chunk_id = f"{source_file}#{c}"
+            chunks.append(DocumentChunk(
+                text=" ".join(words),
+                metadata={
+                    "source_file": source_file,
+                    "section": str(c // 3 + 1),
+                    "heading": " ".join(topic[:2]).title(),
+                    "chunk_index": c,
+                    "chunk_id": chunk_id,
+                    "token_count": count_tokens(" ".join(words)),
+                }
+            ))
+            labels[chunk_id] = {"source_file": source_file, "chunk_index": c, "topic": topic, "facts": facts}
+
+    # Near-duplicates in mirror files (exercise dedup)
+    originals = list(chunks)
+    mirror_count = 0
+    for chunk in originals:
+        if rng.random() < duplicate_ratio:
+            words = chunk.text.split()
+            for _ in range(max(1, len(words) // 50)):
+                words[rng.randrange(len(words))] = rng.choice(FILLER_WORDS)
+            source_file = f"mirror_{mirror_count:03d}.docx"
+            chunk_id = f"{source_file}#0"
+            chunks.append(DocumentChunk(
+                text=" ".join(words),
+                metadata={**chunk.metadata, "source_file": source_file, "chunk_index": 0, "chunk_id": chunk_id}
+            ))
+            labels[chunk_id] = {**labels[chunk.metadata["chunk_id"]], "source_file": source_file, "chunk_index": 0,
+                                "duplicate_of": chunk.metadata["chunk_id"]}
+            mirror_count += 1
+
+    return chunks, labels
+
+
+def synthetic_queries(labels: Dict[str, Dict[str, Any]], num_queries: int = 100, seed: int = 7) -> List[Dict[str, Any]]:
+    """
+    Labelled queries for a synthetic corpus
+
+    Half ask for one chunk (topic + fact words; relevant: that chunk and its
+    near-duplicates), half ask for a document (topic words only; relevant:
+    the document).
+
+    Args:
+        labels: Chunk labels from synthetic_corpus()
+        num_queries: Number of queries
+        seed: Random seed
+
+    Returns:
+        List of {"query", "relevant_chunks"} or {"query", "relevant_sources"}
+    """
+    rng = random.Random(seed)
+    originals = [(cid, label) for cid, label in sorted(labels.items()) if "duplicate_of" not in label]
+    copies: Dict[str, List[str]] = {}
+    for cid, label in labels.items():
+        if "duplicate_of" in label:
+            copies.setdefault(label["duplicate_of"], []).append(cid)
+
+    queries = []
+    for i in range(num_queries):
+        chunk_id, label = rng.choice(originals)
+        filler = rng.sample(FILLER_WORDS, 2)
+        if i % 2 == 0:
+            words = rng.sample(label["topic"][:3], 1) + rng.sample(label["facts"], 2) + filler
+            rng.shuffle(words)
+            queries.append({"query": " ".join(words), "relevant_chunks": [chunk_id] + copies.get(chunk_id, [])})
+        else:
+            words = rng.sample(label["topic"][:3], 2) + filler
+            rng.shuffle(words)
+            queries.append({"query": " ".join(words), "relevant_sources": [label["source_file"]]})
+    return queries
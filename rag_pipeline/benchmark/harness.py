@@ -0,0 +1,341 @@
+"""
+Retrieval Benchmark Harness
+Runs a labelled query set through MultiStageRetriever over an offline corpus
+and reports recall@k, MRR, per-stage latency percentiles, context tokens,
+memory and cost as JSON that can be compared across commits
+"""
+import json
+import math
+import subprocess
+import time
+import tracemalloc
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from ..agents.rag_agents import MultiStageRetriever
+from ..config.settings import ChunkingConfig, ObservabilityConfig, RetrievalConfig
+from ..loaders.document_loader import DocumentChunk, MultiFormatDocumentLoader
+from ..observability import configure_tracing, get_logger
+from .fixtures import InMemoryVectorStore
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = get_logger(__name__)
+
+RECALL_AT = (1, 5, 10)
+
+# Same prices as the embeddings and Claude cost estimates
+EMBEDDING_COST_PER_MILLION = 0.13  # text-embedding-3-large
+CONTEXT_COST_PER_MILLION = 3.0  # Claude input tokens
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """
+    Nearest-rank percentile
+
+    Args:
+        values: Samples
+        q: Quantile in [0, 1]
+
+    Returns:
+        Percentile (0.0 for no samples)
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return float(ordered[max(0, math.ceil(q * len(ordered)) - 1)])
+
+
+def latency_summary(values: Sequence[float]) -> Dict[str, float]:
+    """Mean and p50/p95/p99 of millisecond samples"""
+    return {
+        "mean_ms": round(sum(values) / len(values), 2) if values else 0.0,
+        "p50_ms": round(percentile(values, 0.50), 2),
+        "p95_ms": round(percentile(values, 0.95), 2),
+        "p99_ms": round(percentile(values, 0.99), 2),
+    }
+
+
+def ranked_units(chunks: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """
+    Assembled chunks as a ranking of original chunks
+
+    Chunks are ordered by rerank score; merged runs expand to their member
+    chunk indices (all at the run's rank).
+
+    Args:
+        chunks: "chunks" of an assembled retrieval result
+
+    Returns:
+        [{"chunk": "source#index", "source": source}] best first
+    """
+    def score(chunk):
+        value = chunk.get("rerank_score")
+        return value if value is not None else chunk.get("similarity", 0.0)
+
+    units = []
+    for chunk in sorted(chunks, key=score, reverse=True):
+        metadata = chunk.get("metadata", {})
+        source = metadata.get("source_file", "Unknown")
+        for index in metadata.get("merged_chunk_indices") or [metadata.get("chunk_index")]:
+            units.append({"chunk": f"{source}#{index}", "source": source})
+    return units
+
+
+def score_query(units: List[Dict[str, str]], query: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Rank metrics for one query
+
+    Queries are labelled with relevant_chunks ("source#index": a chunk and
+    its near-duplicates) or, for document-level labels, relevant_sources;
+    sources are then ranked by their first appearance.
+
+    Args:
+        units: Output of ranked_units()
+        query: Labelled query
+
+    Returns:
+        recall@k, reciprocal rank and context recall
+    """
+    if query.get("relevant_chunks"):
+        relevant = set(query["relevant_chunks"])
+        ranking = [u["chunk"] for u in units]
+    else:
+        relevant = set(query.get("relevant_sources", []))
+        ranking = list(dict.fromkeys(u["source"] for u in units))
+
+    # A chunk and its near-duplicate copies are alternatives (dedup keeps
+    # one), so any of them counts; each relevant source counts separately
+    needed = 1 if query.get("relevant_chunks") else len(relevant)
+
+    def recall(hits: List[str]) -> float:
+        if not relevant:
+            return 0.0
+        return min(1.0, len(relevant.intersection(hits)) / needed)
+
+    first = next((rank for rank, item in enumerate(ranking, 1) if item in relevant), None)
+    metrics = {f"recall@{k}": recall(ranking[:k]) for k in RECALL_AT}
+    metrics["reciprocal_rank"] = 1.0 / first if first else 0.0
+    metrics["context_recall"] = recall(ranking)
+    return metrics
+
+
+def load_corpus(corpus: str, chunking: Optional[ChunkingConfig] = None) -> List[DocumentChunk]:
+    """
+    Load a document directory with the pipeline's loader
+
+    Args:
+        corpus: Directory of .docx/.csv/.xlsx files
+        chunking: Chunking configuration
+
+    Returns:
+        Chunks with chunk_id metadata ("source#index")
+    """
+    chunks = MultiFormatDocumentLoader(chunking or ChunkingConfig()).load_directory(corpus)
+    for chunk in chunks:
+        chunk.metadata.setdefault("chunk_id", f"{chunk.metadata.get('source_file')}#{chunk.metadata.get('chunk_index')}")
+    return chunks
+
+
+def git_commit() -> Optional[str]:
+    """Current git commit (None outside a checkout)"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=5, cwd=Path(__file__).parent
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process (None where unsupported)"""
+    if resource is None:
+        return None
+    # ru_maxrss is KB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def run_benchmark(
+    chunks: List[DocumentChunk],
+    queries: List[Dict[str, Any]],
+    embeddings,
+    reranker=None,
+    config: Optional[RetrievalConfig] = None,
+    use_hybrid: bool = False,
+    trace_memory: bool = False,
+    meta: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Index a corpus and run a labelled query set through MultiStageRetriever
+
+    Args:
+        chunks: Corpus chunks
+        queries: Labelled queries ({"query", "relevant_chunks"|"relevant_sources"})
+        embeddings: Embeddings model (embed_texts/embed_query, total_tokens)
+        reranker: Optional stage 3 scorer (None loads the configured cross-encoder)
+        config: Retrieval configuration
+        use_hybrid: Use hybrid (k-NN + BM25) search
+        trace_memory: Track Python allocation peak with tracemalloc (slower)
+        meta: Extra run metadata for the report
+
+    Returns:
+        Report with meta, summary and per-query results
+    """
+    config = config or RetrievalConfig()
+    # Stage timings come from the retrieve span
+    configure_tracing(ObservabilityConfig(enable_tracing=True))
+
+    if trace_memory:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    store = InMemoryVectorStore()
+    store.add_documents(chunks, embeddings)
+    index_ms = (time.perf_counter() - start) * 1000
+    index_embedding_tokens = embeddings.total_tokens
+    logger.info("Indexed %d chunks in %.0fms", len(chunks), index_ms)
+
+    retriever = MultiStageRetriever(store, embeddings, config, reranker=reranker)
+
+    per_query = []
+    for i, query in enumerate(queries):
+        result = retriever.retrieve(query["query"], use_hybrid=use_hybrid)
+        units = ranked_units(result["chunks"])
+        per_query.append({
+            "query": query["query"],
+            **score_query(units, query),
+            "total_ms": round(result.get("retrieval_time_ms", 0.0), 2),
+            "stage_timings_ms": result.get("stage_timings_ms", {}),
+            "context_tokens": result["total_tokens"],
+            "num_chunks": result.get("num_chunks", 0),
+            "retrieved": [u["chunk"] for u in units[:10]],
+        })
+        logger.debug("Query %d/%d: rr=%.2f", i + 1, len(queries), per_query[-1]["reciprocal_rank"])
+
+    python_peak_mb = None
+    if trace_memory:
+        python_peak_mb = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+        tracemalloc.stop()
+
+    n = len(per_query) or 1
+    stages = sorted({stage for q in per_query for stage in q["stage_timings_ms"]})
+    query_embedding_tokens = embeddings.total_tokens - index_embedding_tokens
+    context_tokens = [q["context_tokens"] for q in per_query]
+
+    summary = {
+        "queries": len(per_query),
+        "chunks_indexed": len(chunks),
+        "index_ms": round(index_ms, 1),
+        **{f"recall@{k}": round(sum(q[f"recall@{k}"] for q in per_query) / n, 4) for k in RECALL_AT},
+        "mrr": round(sum(q["reciprocal_rank"] for q in per_query) / n, 4),
+        "context_recall": round(sum(q["context_recall"] for q in per_query) / n, 4),
+        "latency": {
+            "total": latency_summary([q["total_ms"] for q in per_query]),
+            **{stage: latency_summary([q["stage_timings_ms"].get(stage, 0.0) for q in per_query]) for stage in stages},
+        },
+        "context_tokens": {
+            "mean": round(sum(context_tokens) / n, 1),
+            "p95": percentile(context_tokens, 0.95),
+        },
+        "memory": {
+            "peak_rss_mb": peak_rss_mb(),
+            "python_peak_mb": python_peak_mb,
+            "index_mb": round(store.index_bytes / 2**20, 2),
+        },
+        "cost_usd": {
+            "index_embeddings": round(index_embedding_tokens / 1_000_000 * EMBEDDING_COST_PER_MILLION, 6),
+            "query_embeddings_per_query": round(query_embedding_tokens / n / 1_000_000 * EMBEDDING_COST_PER_MILLION, 8),
+            "context_input_per_query": round(sum(context_tokens) / n / 1_000_000 * CONTEXT_COST_PER_MILLION, 6),
+        },
+    }
+
+    return {
+        "meta": {
+            "git_commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "use_hybrid": use_hybrid,
+            "retrieval_config": asdict(config),
+            **(meta or {}),
+        },
+        "summary": summary,
+        "queries": per_query,
+    }
+
+
+def _flatten(summary: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """Numeric leaves of a summary as dotted keys"""
+    flat = {}
+    for key, value in summary.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Summary metrics of two reports side by side
+
+    Args:
+        baseline: Earlier report
+        current: New report
+
+    Returns:
+        [{"metric", "baseline", "current", "delta", "delta_pct"}]
+    """
+    before = _flatten(baseline.get("summary", {}))
+    after = _flatten(current.get("summary", {}))
+    rows = []
+    for metric in after:
+        if metric not in before:
+            continue
+        delta = after[metric] - before[metric]
+        rows.append({
+            "metric": metric,
+            "baseline": before[metric],
+            "current": after[metric],
+            "delta": round(delta, 4),
+            "delta_pct": round(delta / before[metric] * 100, 1) if before[metric] else None,
+        })
+    return rows
+
+
+def format_summary(report: Dict[str, Any]) -> str:
+    """Human-readable summary of a report"""
+    summary = report["summary"]
+    lines = [
+        f"Queries: {summary['queries']}  Chunks: {summary['chunks_indexed']}  Index: {summary['index_ms']:.0f}ms",
+        "Recall: " + "  ".join(f"@{k} {summary[f'recall@{k}']:.3f}" for k in RECALL_AT)
+        + f"  MRR {summary['mrr']:.3f}  context {summary['context_recall']:.3f}",
+        f"{'Stage':<12}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}  (ms)",
+    ]
+    for stage, stats in summary["latency"].items():
+        lines.append(f"{stage:<12}{stats['mean_ms']:>10.1f}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}")
+    memory, cost = summary["memory"], summary["cost_usd"]
+    lines.append(f"Context tokens: mean {summary['context_tokens']['mean']:.0f}, p95 {summary['context_tokens']['p95']}")
+    lines.append(f"Memory: peak RSS {memory['peak_rss_mb']} MB, Python peak {memory['python_peak_mb']} MB, index {memory['index_mb']} MB")
+    lines.append(f"Cost: index ${cost['index_embeddings']:.4f}, context ${cost['context_input_per_query']:.4f}/query")
+    return "\n".join(lines)
+
+
+def format_comparison(rows: List[Dict[str, Any]]) -> str:
+    """Human-readable comparison table"""
+    lines = [f"{'Metric':<36}{'baseline':>12}{'current':>12}{'delta':>12}{'%':>8}"]
+    for row in rows:
+        pct = f"{row['delta_pct']:+.1f}" if row["delta_pct"] is not None else "-"
+        lines.append(f"{row['metric']:<36}{row['baseline']:>12.4g}{row['current']:>12.4g}{row['delta']:>+12.4g}{pct:>8}")
+    return "\n".join(lines)
+
+
+def save_report(report: Dict[str, Any], path: str):
+    """Write a report as JSON"""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
@@ -16,6 +16,14 @@ class ClaudeConfig:
     max_tokens: int = 4096
     temperature: float = 0.7
 
+    # Prompt caching (cache_control on system blocks and stable context prefixes)
+    enable_prompt_caching: bool = True
+
+    def __post_init__(self):
+        # Override from environment if available (e.g. the local stub server)
+        if os.getenv("TR_ANTHROPIC_TOKEN_URL"):
+            self.token_url = os.getenv("TR_ANTHROPIC_TOKEN_URL")
+
 
 @dataclass
 class EmbeddingConfig:
@@ -46,6 +54,10 @@ class TROpenAIConfig:
             self.workspace_id = os.getenv("TR_WORKSPACE_ID")
         if os.getenv("TR_ASSET_ID"):
             self.asset_id = os.getenv("TR_ASSET_ID")
+        if os.getenv("TR_OPENAI_TOKEN_URL"):
+            self.token_url = os.getenv("TR_OPENAI_TOKEN_URL")
+        if os.getenv("TR_OPENAI_BASE_URL"):
+            self.base_url = os.getenv("TR_OPENAI_BASE_URL")
 
 
 @dataclass
@@ -103,6 +115,12 @@ class RetrievalConfig:
     # Stage 1: Broad Recall
     stage1_top_k: int = 50
 
+    # Stage 1: Multi-query fan-out (sub-queries fused with reciprocal rank fusion)
+    enable_multi_query: bool = False
+    query_expansion_mode: str = "rules"  # "rules" or "llm"
+    max_sub_queries: int = 4
+    rrf_k: int = 60
+
     # Stage 2: Relevance Filtering
     similarity_threshold: float = 0.75  # 75% threshold from architecture
 
@@ -113,9 +131,16 @@ class RetrievalConfig:
     # Stage 4: Context Assembly
     max_context_tokens: int = 15000
     enable_deduplication: bool = True
+    near_duplicate_threshold: float = 0.8  # Estimated Jaccard (MinHash) above which a lower-ranked chunk is dropped
+    minhash_permutations: int = 64
     enable_chunk_merging: bool = True
     enable_source_attribution: bool = True
 
+    # Query refinement
+    speculative_retrieval: bool = True  # Retrieve for the original query while refining
+    refine_min_words: int = 4  # Shorter queries are not refined
+    refine_max_words: int = 12  # Longer queries are treated as already specific
+
 
 @dataclass
 class JobMemoryConfig:
@@ -130,6 +155,30 @@ class JobMemoryConfig:
     retain_cost_tracking: bool = True
 
 
+@dataclass
+class ObservabilityConfig:
+    """Logging, Tracing and Metrics Configuration"""
+    log_level: str = "INFO"  # DEBUG adds per-stage detail lines; WARNING silences progress output
+    enable_tracing: bool = True  # Per-stage spans and latency metrics
+
+    # Span export (OTLP/HTTP JSON to an OpenTelemetry collector, or a local file)
+    service_name: str = "bu-research-rag"
+    otlp_endpoint: Optional[str] = None  # e.g. http://otel-collector:4318/v1/traces
+    trace_file: Optional[str] = None  # Used when no endpoint is set
+    export_batch_size: int = 256
+    export_interval_s: float = 5.0
+
+    def __post_init__(self):
+        # Standard OpenTelemetry environment variables
+        self.log_level = os.getenv("RAG_LOG_LEVEL", self.log_level)
+        self.service_name = os.getenv("OTEL_SERVICE_NAME", self.service_name)
+        if not self.otlp_endpoint:
+            if os.getenv("OTEL_EXPORTER_OTLP_TRACES_ENDPOINT"):
+                self.otlp_endpoint = os.getenv("OTEL_EXPORTER_OTLP_TRACES_ENDPOINT")
+            elif os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+                self.otlp_endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT").rstrip("/") + "/v1/traces"
+
+
 @dataclass
 class RAGPipelineConfig:
     """Complete RAG Pipeline Configuration"""
@@ -140,6 +189,7 @@ class RAGPipelineConfig:
     opensearch: OpenSearchConfig = None
     retrieval: RetrievalConfig = None
     job_memory: JobMemoryConfig = None
+    observability: ObservabilityConfig = None
 
     # Embedding provider selection
     use_tr_openai: bool = True  # True = TR OpenAI, False = Direct OpenAI
@@ -170,6 +220,8 @@ class RAGPipelineConfig:
             self.retrieval = RetrievalConfig()
         if not self.job_memory:
             self.job_memory = JobMemoryConfig()
+        if not self.observability:
+            self.observability = ObservabilityConfig()
 
 
 # Singleton configuration instance
@@ -1,3 +1,12 @@
 """Embeddings module"""
-from .openai_embeddings import OpenAIEmbeddings, CachedOpenAIEmbeddings, get_embeddings
-from .tr_openai_embeddings import TROpenAIEmbeddings, CachedTROpenAIEmbeddings, get_tr_embeddings
+from .._lazy import lazy_exports
+
+# Submodules are imported on first access (PEP 562)
+__getattr__, __dir__, __all__ = lazy_exports(__name__, {
+    "OpenAIEmbeddings": ".openai_embeddings",
+    "CachedOpenAIEmbeddings": ".openai_embeddings",
+    "get_embeddings": ".openai_embeddings",
+    "TROpenAIEmbeddings": ".tr_openai_embeddings",
+    "CachedTROpenAIEmbeddings": ".tr_openai_embeddings",
+    "get_tr_embeddings": ".tr_openai_embeddings",
+})
@@ -4,10 +4,12 @@ OpenAI Embeddings Wrapper for text-embedding-3-large
 """
 import numpy as np
 from typing import List, Union, Optional
-from datetime import datetime
-import openai
 
+from ..llm.token_accounting import count_tokens
 from ..config.settings import EmbeddingConfig
+from ..observability import get_logger
+
+logger = get_logger(__name__)
 
 
 class OpenAIEmbeddings:
@@ -24,6 +26,7 @@ class OpenAIEmbeddings:
             config: Embedding configuration (uses default if not provided)
         """
         self.config = config or EmbeddingConfig()
+        self.total_tokens_used = 0
 
         if not self.config.api_key:
             raise ValueError(
@@ -31,11 +34,13 @@ class OpenAIEmbeddings:
                 "or pass api_key in config."
             )
 
+        import openai  # Deferred: the SDK is only loaded when a client is built
+
         # Set API key
         openai.api_key = self.config.api_key
         self.client = openai.OpenAI(api_key=self.config.api_key)
 
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] OpenAI Embeddings initialized: {self.config.model}")
+        logger.info("OpenAI Embeddings initialized: %s", self.config.model)
 
     def embed_text(self, text: str) -> List[float]:
         """
@@ -54,6 +59,7 @@ class OpenAIEmbeddings:
                 dimensions=self.config.dimensions
             )
             embedding = response.data[0].embedding
+            self._record_usage(response)
             return embedding
 
         except Exception as e:
@@ -86,10 +92,11 @@ class OpenAIEmbeddings:
                 # Extract embeddings in order
                 batch_embeddings = [item.embedding for item in response.data]
                 all_embeddings.extend(batch_embeddings)
+                self._record_usage(response)
 
                 # Progress logging
                 if (i + batch_size) % 500 == 0:
-                    print(f"[{datetime.now().strftime('%H:%M:%S')}] Embedded {min(i + batch_size, len(texts))}/{len(texts)} texts")
+                    logger.debug("Embedded %s/%s texts", min(i + batch_size, len(texts)), len(texts))
 
             except Exception as e:
                 raise Exception(f"Batch embedding failed at index {i}: {str(e)}")
@@ -196,16 +203,20 @@ class OpenAIEmbeddings:
 
     def estimate_tokens(self, text: str) -> int:
         """
-        Estimate token count for text
+        Count tokens for text (same cl100k tokenizer as the embedding model)
 
         Args:
             text: Input text
 
         Returns:
-            Estimated token count
+            Token count
         """
-        # Rough approximation: 1 token ≈ 4 characters
-        return len(text) // 4
+        return count_tokens(text)
+
+    def _record_usage(self, response):
+        """Accumulate billed tokens reported by the embeddings API"""
+        usage = getattr(response, "usage", None)
+        self.total_tokens_used += getattr(usage, "total_tokens", 0) or 0
 
 
 class EmbeddingCache:
@@ -5,12 +5,13 @@ Supports text-embedding-3-large (3072 dimensions)
 """
 import numpy as np
 from typing import List, Union, Optional
-from datetime import datetime
-from openai import AzureOpenAI
-import requests
-import json
 
+from ..auth import get_credential_provider
+from ..llm.token_accounting import count_tokens
 from ..config.settings import TROpenAIConfig
+from ..observability import get_logger
+
+logger = get_logger(__name__)
 
 
 class TROpenAIEmbeddings:
@@ -29,65 +30,71 @@ class TROpenAIEmbeddings:
         """
         self.config = config or TROpenAIConfig()
         self.client = None
+        self.total_tokens_used = 0
         self.credentials = None
+        self.credential_provider = get_credential_provider(
+            self.config.token_url,
+            {"workspace_id": self.config.workspace_id, "model_name": self.config.model_name},
+            required_keys=("openai_key", "openai_endpoint", "azure_deployment", "openai_api_version", "token")
+        )
         self._authenticate()
 
-    def _authenticate(self):
-        """Authenticate with Thomson Reuters AI Platform for OpenAI"""
-        payload = {
-            "workspace_id": self.config.workspace_id,
-            "model_name": self.config.model_name
-        }
+    def _authenticate(self, force_refresh: bool = False):
+        """
+        Authenticate with Thomson Reuters AI Platform for OpenAI
 
+        Credentials come from the shared provider (cached in memory and on
+        disk, refreshed in the background); the client is rebuilt only when
+        the token changes, so calling this before each request is cheap.
+
+        Args:
+            force_refresh: Fetch new credentials from the token endpoint
+        """
         try:
-            resp = requests.post(
-                self.config.token_url,
-                json=payload
-            )
-            credentials = json.loads(resp.content)
-
-            if "openai_key" in credentials and "openai_endpoint" in credentials:
-                self.credentials = credentials
-
-                # Extract credentials
-                openai_api_key = credentials["openai_key"]
-                openai_deployment_id = credentials["azure_deployment"]
-                openai_api_version = credentials["openai_api_version"]
-                token = credentials["token"]
-                llm_profile_key = openai_deployment_id.split("/")[0]
-
-                # Build headers
-                headers = {
-                    "Authorization": f"Bearer {token}",
-                    "api-key": openai_api_key,
-                    "Content-Type": "application/json",
-                    "x-tr-chat-profile-name": "ai-platforms-chatprofile-prod",
-                    "x-tr-userid": self.config.workspace_id,
-                    "x-tr-llm-profile-key": llm_profile_key,
-                    "x-tr-user-sensitivity": "true",
-                    "x-tr-sessionid": openai_deployment_id,
-                    "x-tr-asset-id": self.config.asset_id,
-                    "x-tr-authorization": self.config.base_url
-                }
-
-                # Initialize AzureOpenAI client
-                self.client = AzureOpenAI(
-                    azure_endpoint=self.config.base_url,
-                    api_key=openai_api_key,
-                    api_version=openai_api_version,
-                    azure_deployment=openai_deployment_id,
-                    default_headers=headers
-                )
+            credentials = self.credential_provider.get(force_refresh)
+        except Exception as e:
+            raise Exception(f"TR OpenAI authentication failed: {str(e)}")
 
-                print(f"[{datetime.now().strftime('%H:%M:%S')}] TR OpenAI Embeddings authenticated successfully")
-                print(f"[{datetime.now().strftime('%H:%M:%S')}] Using model: {self.config.embedding_model}")
-                print(f"[{datetime.now().strftime('%H:%M:%S')}] Dimensions: {self.config.dimensions}")
+        if self.credentials is not None and credentials["token"] == self.credentials["token"] \
+                and credentials["openai_key"] == self.credentials["openai_key"]:
+            return
+        self.credentials = credentials
+
+        # Extract credentials
+        openai_api_key = credentials["openai_key"]
+        openai_deployment_id = credentials["azure_deployment"]
+        openai_api_version = credentials["openai_api_version"]
+        token = credentials["token"]
+        llm_profile_key = openai_deployment_id.split("/")[0]
+
+        # Build headers
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "api-key": openai_api_key,
+            "Content-Type": "application/json",
+            "x-tr-chat-profile-name": "ai-platforms-chatprofile-prod",
+            "x-tr-userid": self.config.workspace_id,
+            "x-tr-llm-profile-key": llm_profile_key,
+            "x-tr-user-sensitivity": "true",
+            "x-tr-sessionid": openai_deployment_id,
+            "x-tr-asset-id": self.config.asset_id,
+            "x-tr-authorization": self.config.base_url
+        }
 
-            else:
-                raise Exception(f"Failed to get OpenAI credentials: {credentials}")
+        # Initialize AzureOpenAI client (SDK deferred until first authentication)
+        from openai import AzureOpenAI
 
-        except Exception as e:
-            raise Exception(f"TR OpenAI authentication failed: {str(e)}")
+        self.client = AzureOpenAI(
+            azure_endpoint=self.config.base_url,
+            api_key=openai_api_key,
+            api_version=openai_api_version,
+            azure_deployment=openai_deployment_id,
+            default_headers=headers
+        )
+
+        logger.info("TR OpenAI Embeddings authenticated successfully")
+        logger.info("Using model: %s", self.config.embedding_model)
+        logger.info("Dimensions: %s", self.config.dimensions)
 
     def embed_text(self, text: str) -> List[float]:
         """
@@ -101,6 +108,7 @@ class TROpenAIEmbeddings:
         """
         if not self.client:
             raise Exception("Client not authenticated. Call _authenticate() first.")
+        self._authenticate()
 
         try:
             response = self.client.embeddings.create(
@@ -109,6 +117,7 @@ class TROpenAIEmbeddings:
                 dimensions=self.config.dimensions
             )
             embedding = response.data[0].embedding
+            self._record_usage(response)
             return embedding
 
         except Exception as e:
@@ -127,6 +136,7 @@ class TROpenAIEmbeddings:
         """
         if not self.client:
             raise Exception("Client not authenticated.")
+        self._authenticate()
 
         all_embeddings = []
 
@@ -144,10 +154,11 @@ class TROpenAIEmbeddings:
                 # Extract embeddings in order
                 batch_embeddings = [item.embedding for item in response.data]
                 all_embeddings.extend(batch_embeddings)
+                self._record_usage(response)
 
                 # Progress logging
                 if (i + batch_size) % 500 == 0 or (i + batch_size) >= len(texts):
-                    print(f"[{datetime.now().strftime('%H:%M:%S')}] Embedded {min(i + batch_size, len(texts))}/{len(texts)} texts")
+                    logger.debug("Embedded %s/%s texts", min(i + batch_size, len(texts)), len(texts))
 
             except Exception as e:
                 raise Exception(f"Batch embedding failed at index {i}: {str(e)}")
@@ -254,16 +265,20 @@ class TROpenAIEmbeddings:
 
     def estimate_tokens(self, text: str) -> int:
         """
-        Estimate token count for text
+        Count tokens for text (same cl100k tokenizer as the embedding model)
 
         Args:
             text: Input text
 
         Returns:
-            Estimated token count
+            Token count
         """
-        # Rough approximation: 1 token ≈ 4 characters
-        return len(text) // 4
+        return count_tokens(text)
+
+    def _record_usage(self, response):
+        """Accumulate billed tokens reported by the embeddings API"""
+        usage = getattr(response, "usage", None)
+        self.total_tokens_used += getattr(usage, "total_tokens", 0) or 0
 
 
 class EmbeddingCache:
@@ -1,2 +1,11 @@
 """LLM module"""
-from .claude_wrapper import ClaudeLLM, get_claude_llm
+from .._lazy import lazy_exports
+
+# Submodules are imported on first access (PEP 562)
+__getattr__, __dir__, __all__ = lazy_exports(__name__, {
+    "ClaudeLLM": ".claude_wrapper",
+    "get_claude_llm": ".claude_wrapper",
+    "count_tokens": ".token_accounting",
+    "add_usage": ".token_accounting",
+    "empty_usage": ".token_accounting",
+})
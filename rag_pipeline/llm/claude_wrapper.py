@@ -2,13 +2,15 @@
 Claude LLM Wrapper for Thomson Reuters AI Platform
 Handles authentication and message generation using Claude Sonnet 4
 """
-import anthropic
-import requests
-import json
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+import time
+from typing import List, Dict, Any, Optional, Tuple, Union
 
+from ..auth import get_credential_provider
 from ..config.settings import ClaudeConfig
+from .token_accounting import count_tokens
+from ..observability import get_logger, get_metrics_registry, get_tracer, span
+
+logger = get_logger(__name__)
 
 
 class ClaudeLLM:
@@ -27,64 +29,120 @@ class ClaudeLLM:
         self.config = config or ClaudeConfig()
         self.client = None
         self.api_key = None
+        self.last_usage: Dict[str, int] = {}  # Most recent call only; use return_usage when calls overlap
+        self.credential_provider = get_credential_provider(
+            self.config.token_url,
+            {"workspace_id": self.config.workspace_id},
+            required_keys=("anthropic_api_key",)
+        )
         self._authenticate()
 
-    def _authenticate(self):
-        """Authenticate with Thomson Reuters AI Platform"""
-        payload = {
-            "workspace_id": self.config.workspace_id,
-        }
+    def _authenticate(self, force_refresh: bool = False):
+        """
+        Authenticate with Thomson Reuters AI Platform
 
-        try:
-            resp = requests.post(
-                self.config.token_url,
-                headers=None,
-                json=payload
-            )
-            credentials = json.loads(resp.content)
-
-            if 'anthropic_api_key' in credentials:
-                self.api_key = credentials["anthropic_api_key"]
-                self.client = anthropic.Anthropic(api_key=self.api_key)
-                print(f"[{datetime.now().strftime('%H:%M:%S')}] Claude client authenticated successfully")
-            else:
-                raise Exception(f"Failed to get API key: {credentials}")
+        Credentials come from the shared provider (cached in memory and on
+        disk, refreshed in the background); the client is rebuilt only when
+        the API key changes, so calling this before each request is cheap.
 
+        Args:
+            force_refresh: Fetch new credentials from the token endpoint
+        """
+        try:
+            credentials = self.credential_provider.get(force_refresh)
         except Exception as e:
             raise Exception(f"Claude authentication failed: {str(e)}")
 
-    def invoke(self, messages: List[Dict[str, str]], **kwargs) -> Any:
+        if credentials["anthropic_api_key"] != self.api_key:
+            import anthropic  # Deferred: the SDK is only loaded when a client is built
+
+            self.api_key = credentials["anthropic_api_key"]
+            self.client = anthropic.Anthropic(api_key=self.api_key)
+            logger.info("Claude client authenticated successfully")
+
+    @staticmethod
+    def _to_blocks(content: Any) -> List[Dict[str, Any]]:
         """
-        Invoke Claude API with messages (LangChain-compatible interface)
+        Normalise message content into a list of content blocks
 
         Args:
-            messages: List of message dicts with 'role' and 'content'
-            **kwargs: Additional parameters (temperature, max_tokens, etc.)
+            content: String content or list of content blocks
 
         Returns:
-            Claude message response object
+            List of content block dicts
         """
-        if not self.client:
-            raise Exception("Claude client not authenticated. Call _authenticate() first.")
+        if isinstance(content, list):
+            return [dict(block) for block in content]
+        return [{"type": "text", "text": str(content)}]
 
-        # Extract system message if present
-        system_message = None
+    @staticmethod
+    def _mark_cacheable(blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Add an ephemeral cache breakpoint to the last block
+
+        Everything up to and including the marked block becomes a cacheable
+        prefix; subsequent calls with an identical prefix are billed as cache reads.
+
+        Args:
+            blocks: Content blocks
+
+        Returns:
+            Same blocks with cache_control set on the last one
+        """
+        if blocks:
+            blocks[-1]["cache_control"] = {"type": "ephemeral"}
+        return blocks
+
+    def _prepare_request(self, messages: List[Any], **kwargs) -> Dict[str, Any]:
+        """
+        Build Messages API parameters from LangChain-style messages
+
+        Multiple system messages are kept as separate system blocks (in order).
+        With cache_system, the first system message (the static prompt) gets
+        its own cache breakpoint, so later system text cannot invalidate it;
+        per-query text belongs in the final user turn (see
+        build_context_message). A message dict with ``"cache": True`` gets a
+        cache breakpoint on its content.
+
+        Args:
+            messages: List of message dicts or LangChain message objects
+            **kwargs: Additional parameters (model, max_tokens, temperature,
+                cache_system)
+
+        Returns:
+            Keyword arguments for client.messages.create()/stream()
+        """
+        caching = self.config.enable_prompt_caching
+        cache_system = kwargs.get("cache_system", caching)
+
+        system_blocks = []
+        static_system_end = 0  # Number of blocks in the first system message
         claude_messages = []
 
         for msg in messages:
+            cache = False
             if isinstance(msg, dict):
                 role = msg.get("role")
                 content = msg.get("content")
+                cache = bool(msg.get("cache", False))
             else:
                 # Handle LangChain message objects
                 role = "user" if msg.__class__.__name__ == "HumanMessage" else "assistant"
                 content = msg.content
                 if msg.__class__.__name__ == "SystemMessage":
-                    system_message = content
-                    continue
+                    role = "system"
 
             if role == "system":
-                system_message = content
+                blocks = self._to_blocks(content)
+                if cache and caching:
+                    self._mark_cacheable(blocks)
+                system_blocks.extend(blocks)
+                static_system_end = static_system_end or len(system_blocks)
+            elif cache and caching:
+                claude_messages.append({
+                    "role": role,
+                    "content": self._mark_cacheable(self._to_blocks(content))
+                })
             else:
                 claude_messages.append({
                     "role": role,
@@ -105,9 +163,15 @@ class ClaudeLLM:
             "messages": claude_messages,
         }
 
-        # Add system message if present
-        if system_message:
-            api_params["system"] = system_message
+        # Add system prompt if present
+        if system_blocks:
+            has_breakpoint = any("cache_control" in b for b in system_blocks)
+            if caching and cache_system and not has_breakpoint:
+                # Breakpoint after the static prompt caches it on its own
+                self._mark_cacheable(system_blocks[:static_system_end])
+            elif not has_breakpoint:
+                system_blocks = "\n\n".join(b.get("text", "") for b in system_blocks)
+            api_params["system"] = system_blocks
 
         # Add optional parameters
         if "temperature" in kwargs:
@@ -115,97 +179,207 @@ class ClaudeLLM:
         elif self.config.temperature:
             api_params["temperature"] = self.config.temperature
 
+        return api_params
+
+    def invoke(self, messages: List[Dict[str, str]], **kwargs) -> Any:
+        """
+        Invoke Claude API with messages (LangChain-compatible interface)
+
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+                (optionally 'cache': True to mark a stable prefix)
+            **kwargs: Additional parameters (temperature, max_tokens,
+                cache_system, etc.)
+
+        Returns:
+            Claude message response object
+        """
+        if not self.client:
+            raise Exception("Claude client not authenticated. Call _authenticate() first.")
+        self._authenticate()  # Pick up refreshed credentials
+
+        api_params = self._prepare_request(messages, **kwargs)
+
         # Call Claude API
         try:
-            response = self.client.messages.create(**api_params)
+            with span("llm", model=api_params.get("model"), max_tokens=api_params.get("max_tokens")) as llm_span:
+                response = self.client.messages.create(**api_params)
+                self.last_usage = self.get_usage(response)
+                llm_span.set_attributes(**self.last_usage)
+            self._record_usage_metrics(self.last_usage)
             return response
         except Exception as e:
             raise Exception(f"Claude API call failed: {str(e)}")
 
-    def generate(self, prompt: str, **kwargs) -> str:
+    @staticmethod
+    def _record_usage_metrics(usage: Dict[str, int]):
+        """Add a call's token usage to the LLM token counters"""
+        registry = get_metrics_registry()
+        for key, value in usage.items():
+            if value:
+                registry.inc("rag_llm_tokens_total", value, type=key)
+
+    @staticmethod
+    def get_usage(response: Any) -> Dict[str, int]:
+        """
+        Extract token usage (including prompt-cache tokens) from a response
+
+        Args:
+            response: Claude message response object
+
+        Returns:
+            Dict with input_tokens, output_tokens, cache_creation_input_tokens
+            and cache_read_input_tokens
+        """
+        usage = getattr(response, "usage", None)
+        return {
+            "input_tokens": getattr(usage, "input_tokens", 0) or 0,
+            "output_tokens": getattr(usage, "output_tokens", 0) or 0,
+            "cache_creation_input_tokens": getattr(usage, "cache_creation_input_tokens", 0) or 0,
+            "cache_read_input_tokens": getattr(usage, "cache_read_input_tokens", 0) or 0,
+        }
+
+    @staticmethod
+    def extract_text(response: Any) -> str:
+        """
+        Concatenate text blocks from a response
+
+        Args:
+            response: Claude message response object
+
+        Returns:
+            Response text
+        """
+        text_content = ""
+        for block in response.content:
+            if hasattr(block, 'text'):
+                text_content += block.text
+        return text_content
+
+    def generate(self, prompt: str, return_usage: bool = False, **kwargs) -> Union[str, Tuple[str, Dict[str, int]]]:
         """
         Simple generation interface - returns text directly
 
         Args:
             prompt: User prompt
+            return_usage: Also return this call's token usage (safe when
+                calls run concurrently, unlike last_usage)
             **kwargs: Additional parameters
 
         Returns:
-            Generated text string
+            Generated text string, or (text, usage) if return_usage
         """
         messages = [{"role": "user", "content": prompt}]
         response = self.invoke(messages, **kwargs)
 
-        # Extract text from response
-        text_content = ""
-        for block in response.content:
-            if hasattr(block, 'text'):
-                text_content += block.text
+        text = self.extract_text(response)
+        return (text, self.get_usage(response)) if return_usage else text
 
-        return text_content
+    def build_context_message(
+        self,
+        context: str,
+        question: str,
+        memory_context: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Build a user message with the context as a cacheable prefix
+
+        Args:
+            context: Stable context text (retrieved documents)
+            question: Per-call question text
+            memory_context: Optional job memory; it changes between queries,
+                so it goes after the cache breakpoint, ahead of the question
+
+        Returns:
+            User message dict with two text blocks
+        """
+        if memory_context:
+            question = f"Job Context:\n{memory_context}\n\n{question}"
+        content = [
+            {"type": "text", "text": context},
+            {"type": "text", "text": question}
+        ]
+
+        # Context is the stable prefix; the question varies per call
+        if self.config.enable_prompt_caching:
+            self._mark_cacheable(content[:1])
+
+        return {"role": "user", "content": content}
 
     def generate_with_context(
         self,
         query: str,
         context: str,
         system_prompt: Optional[str] = None,
+        memory_context: Optional[str] = None,
+        return_usage: bool = False,
         **kwargs
-    ) -> str:
+    ) -> Union[str, Tuple[str, Dict[str, int]]]:
         """
         Generate response with context (RAG pattern)
 
+        The static system prompt and the retrieved context are sent as
+        separate cacheable prefixes; the job memory changes per query, so it
+        follows the context breakpoint together with the question. Repeated
+        queries over the same context are billed as cache reads.
+
         Args:
             query: User query
             context: Retrieved context
             system_prompt: Optional system prompt
+            memory_context: Optional compressed job memory
+            return_usage: Also return this call's token usage
             **kwargs: Additional parameters
 
         Returns:
-            Generated text string
+            Generated text string, or (text, usage) if return_usage
         """
-        # Build prompt with context
-        user_message = f"""Context:
-{context}
-
-Question: {query}
+        messages = []
 
-Please answer the question based on the provided context. If the context doesn't contain enough information to answer the question, say so clearly."""
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
 
-        messages = [{"role": "user", "content": user_message}]
+        # Build prompt with context
+        messages.append(self.build_context_message(
+            f"Context:\n{context}",
+            f"""Question: {query}
 
-        if system_prompt:
-            messages.insert(0, {"role": "system", "content": system_prompt})
+Please answer the question based on the provided context. If the context doesn't contain enough information to answer the question, say so clearly.""",
+            memory_context
+        ))
 
         response = self.invoke(messages, **kwargs)
 
-        # Extract text from response
-        text_content = ""
-        for block in response.content:
-            if hasattr(block, 'text'):
-                text_content += block.text
-
-        return text_content
+        text = self.extract_text(response)
+        return (text, self.get_usage(response)) if return_usage else text
 
     def count_tokens(self, text: str) -> int:
         """
-        Estimate token count for text
+        Count tokens for pre-flight budgeting (billed usage comes from get_usage)
 
         Args:
             text: Input text
 
         Returns:
-            Estimated token count
+            Token count
         """
-        # Rough approximation: 1 token ≈ 4 characters
-        return len(text) // 4
+        return count_tokens(text)
 
-    def calculate_cost(self, input_tokens: int, output_tokens: int) -> float:
+    def calculate_cost(
+        self,
+        input_tokens: int,
+        output_tokens: int,
+        cache_write_tokens: int = 0,
+        cache_read_tokens: int = 0
+    ) -> float:
         """
         Calculate API call cost
 
         Args:
-            input_tokens: Number of input tokens
+            input_tokens: Number of uncached input tokens
             output_tokens: Number of output tokens
+            cache_write_tokens: Number of input tokens written to the prompt cache
+            cache_read_tokens: Number of input tokens read from the prompt cache
 
         Returns:
             Cost in USD
@@ -213,9 +387,29 @@ Please answer the question based on the provided context. If the context doesn't
         # Claude Sonnet 4 pricing (as of 2025)
         # Input: $3 per million tokens
         # Output: $15 per million tokens
+        # Cache write: 1.25x input, cache read: 0.1x input
         input_cost = (input_tokens / 1_000_000) * 3.0
         output_cost = (output_tokens / 1_000_000) * 15.0
-        return input_cost + output_cost
+        cache_write_cost = (cache_write_tokens / 1_000_000) * 3.75
+        cache_read_cost = (cache_read_tokens / 1_000_000) * 0.30
+        return input_cost + output_cost + cache_write_cost + cache_read_cost
+
+    def calculate_usage_cost(self, usage: Dict[str, int]) -> float:
+        """
+        Calculate cost from a usage dict returned by get_usage()
+
+        Args:
+            usage: Token usage dict
+
+        Returns:
+            Cost in USD
+        """
+        return self.calculate_cost(
+            usage.get("input_tokens", 0),
+            usage.get("output_tokens", 0),
+            cache_write_tokens=usage.get("cache_creation_input_tokens", 0),
+            cache_read_tokens=usage.get("cache_read_input_tokens", 0)
+        )
 
 
 class ClaudeStreamingLLM(ClaudeLLM):
@@ -234,44 +428,27 @@ class ClaudeStreamingLLM(ClaudeLLM):
         """
         if not self.client:
             raise Exception("Claude client not authenticated.")
+        self._authenticate()  # Pick up refreshed credentials
 
         # Prepare messages same as invoke()
-        system_message = None
-        claude_messages = []
-
-        for msg in messages:
-            if isinstance(msg, dict):
-                role = msg.get("role")
-                content = msg.get("content")
-            else:
-                role = "user" if msg.__class__.__name__ == "HumanMessage" else "assistant"
-                content = msg.content
-                if msg.__class__.__name__ == "SystemMessage":
-                    system_message = content
-                    continue
-
-            if role == "system":
-                system_message = content
-            else:
-                claude_messages.append({"role": role, "content": content})
-
-        if not claude_messages:
-            claude_messages.append({"role": "user", "content": "Hello"})
-
-        # Prepare API call
-        api_params = {
-            "model": kwargs.get("model", self.config.model),
-            "max_tokens": kwargs.get("max_tokens", self.config.max_tokens),
-            "messages": claude_messages,
-        }
-
-        if system_message:
-            api_params["system"] = system_message
+        api_params = self._prepare_request(messages, **kwargs)
 
-        # Stream response
+        # Stream response (timed manually: a span cannot stay open across yields)
+        start_ns = time.perf_counter_ns()
+        first_token_ms = None
         with self.client.messages.stream(**api_params) as stream:
             for text in stream.text_stream:
+                if first_token_ms is None:
+                    first_token_ms = round((time.perf_counter_ns() - start_ns) / 1e6, 1)
                 yield text
+            self.last_usage = self.get_usage(stream.get_final_message())
+
+        get_tracer().record(
+            "llm", start_ns,
+            model=api_params.get("model"), streamed=True,
+            first_token_ms=first_token_ms or 0.0, **self.last_usage
+        )
+        self._record_usage_metrics(self.last_usage)
 
 
 # Convenience function
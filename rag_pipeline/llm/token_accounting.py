@@ -0,0 +1,94 @@
+"""
+Token Accounting
+Shared tokenizer for pre-flight budgeting and helpers for exact API usage
+"""
+from functools import lru_cache
+from typing import Dict, Optional
+
+from ..observability import get_logger
+
+logger = get_logger(__name__)
+
+
+USAGE_KEYS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+)
+
+
+@lru_cache(maxsize=1)
+def get_tokenizer():
+    """
+    Get the shared tiktoken encoding (loaded once per process)
+
+    Returns:
+        tiktoken Encoding instance, or None if the encoding cannot be loaded
+        (e.g. BPE file not cached and no network access)
+    """
+    import tiktoken  # Deferred: only loaded when text is first counted
+
+    try:
+        return tiktoken.encoding_for_model("gpt-4")
+    except Exception:
+        pass
+
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning("Tokenizer unavailable (%s), falling back to character estimate", e)
+        return None
+
+
+@lru_cache(maxsize=8192)
+def count_tokens(text: str) -> int:
+    """
+    Count tokens in text for pre-flight budgeting
+
+    Exact for OpenAI embedding models; a close estimate for Claude. Billed
+    Claude usage should always be taken from the API response instead.
+
+    Args:
+        text: Input text
+
+    Returns:
+        Token count
+    """
+    if not text:
+        return 0
+
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        # Rough approximation: 1 token ≈ 4 characters
+        return max(1, len(text) // 4)
+
+    return len(tokenizer.encode(text, disallowed_special=()))
+
+
+def empty_usage() -> Dict[str, int]:
+    """
+    Create a zeroed usage dict
+
+    Returns:
+        Dict with all usage keys set to 0
+    """
+    return {key: 0 for key in USAGE_KEYS}
+
+
+def add_usage(total: Optional[Dict[str, int]], usage: Optional[Dict[str, int]]) -> Dict[str, int]:
+    """
+    Sum two usage dicts
+
+    Args:
+        total: Running usage totals (may be None or empty)
+        usage: Usage to add (may be None or empty)
+
+    Returns:
+        New dict with summed counts
+    """
+    result = empty_usage()
+    for source in (total or {}, usage or {}):
+        for key, value in source.items():
+            result[key] = result.get(key, 0) + (value or 0)
+    return result
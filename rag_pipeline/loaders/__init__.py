@@ -1,2 +1,9 @@
 """Document loaders module"""
-from .document_loader import MultiFormatDocumentLoader, DocumentChunk, load_documents
+from .._lazy import lazy_exports
+
+# Submodules are imported on first access (PEP 562)
+__getattr__, __dir__, __all__ = lazy_exports(__name__, {
+    "MultiFormatDocumentLoader": ".document_loader",
+    "DocumentChunk": ".document_loader",
+    "load_documents": ".document_loader",
+})
@@ -9,13 +9,14 @@ from pathlib import Path
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from dataclasses import dataclass
-import tiktoken
 
-# Document parsers
-from docx import Document as DocxDocument
-import pandas as pd
+# Document parsers (python-docx, pandas) and tiktoken are imported by the
+# methods that use them, so importing this module stays cheap
 
 from ..config.settings import ChunkingConfig
+from ..observability import get_logger
+
+logger = get_logger(__name__)
 
 
 @dataclass
@@ -50,6 +51,8 @@ class MetadataAwareChunker:
         """
         self.config = config or ChunkingConfig()
 
+        import tiktoken
+
         # Initialize tokenizer for accurate token counting
         try:
             self.tokenizer = tiktoken.encoding_for_model("gpt-4")
@@ -225,6 +228,8 @@ class DOCXLoader:
         Returns:
             List of DocumentChunk objects
         """
+        from docx import Document as DocxDocument
+
         try:
             doc = DocxDocument(file_path)
             source_file = os.path.basename(file_path)
@@ -242,7 +247,7 @@ class DOCXLoader:
             # Chunk with metadata
             chunks = self.chunker.chunk_document(paragraphs, source_file)
 
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] Loaded {len(chunks)} chunks from {source_file}")
+            logger.info("Loaded %s chunks from %s", len(chunks), source_file)
             return chunks
 
         except Exception as e:
@@ -266,6 +271,8 @@ class CSVLoader:
         Returns:
             List of DocumentChunk objects
         """
+        import pandas as pd
+
         try:
             df = pd.read_csv(file_path)
             source_file = os.path.basename(file_path)
@@ -290,7 +297,7 @@ class CSVLoader:
             if text_column is None:
                 raise ValueError(f"Could not auto-detect text column in {source_file}")
 
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] Using column '{text_column}' for text content")
+            logger.info("Using column '%s' for text content", text_column)
 
             # Convert rows to paragraphs
             paragraphs = []
@@ -307,7 +314,7 @@ class CSVLoader:
             # Chunk with metadata
             chunks = self.chunker.chunk_document(paragraphs, source_file)
 
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] Loaded {len(chunks)} chunks from {source_file}")
+            logger.info("Loaded %s chunks from %s", len(chunks), source_file)
             return chunks
 
         except Exception as e:
@@ -331,6 +338,8 @@ class XLSXLoader:
         Returns:
             List of DocumentChunk objects
         """
+        import pandas as pd
+
         try:
             source_file = os.path.basename(file_path)
 
@@ -360,7 +369,7 @@ class XLSXLoader:
                 chunks = self.chunker.chunk_document(paragraphs, f"{source_file}:{sheet}")
                 all_chunks.extend(chunks)
 
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] Loaded {len(all_chunks)} chunks from {source_file}")
+            logger.info("Loaded %s chunks from %s", len(all_chunks), source_file)
             return all_chunks
 
         except Exception as e:
@@ -430,9 +439,9 @@ class MultiFormatDocumentLoader:
                     chunks = self.load_document(str(file_path))
                     all_chunks.extend(chunks)
                 except Exception as e:
-                    print(f"[{datetime.now().strftime('%H:%M:%S')}] Warning: Failed to load {file_path.name}: {str(e)}")
+                    logger.warning("Failed to load %s: %s", file_path.name, str(e))
 
-        print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Total: Loaded {len(all_chunks)} chunks from {directory_path}")
+        logger.info("Total: Loaded %s chunks from %s", len(all_chunks), directory_path)
         return all_chunks
 
     def get_statistics(self, chunks: List[DocumentChunk]) -> Dict[str, Any]:
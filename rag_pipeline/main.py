@@ -22,6 +22,7 @@ from rag_pipeline.vectorstore.opensearch_store import OpenSearchVectorStore
 from rag_pipeline.agents.rag_agents import MultiStageRetriever
 from rag_pipeline.memory.job_memory import create_job_memory
 from rag_pipeline.workflows.agentic_rag import SimpleRAGWorkflow
+from rag_pipeline.observability import configure_tracing, set_log_level, shutdown_tracing
 
 
 class RAGPipeline:
@@ -39,6 +40,10 @@ class RAGPipeline:
         """
         self.config = config or get_config()
 
+        # Log level, tracing and span export
+        set_log_level(self.config.observability.log_level)
+        configure_tracing(self.config.observability)
+
         # Components (initialized in setup)
         self.llm = None
         self.embeddings = None
@@ -123,10 +128,13 @@ class RAGPipeline:
         # 2. Generate embeddings
         print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Generating embeddings...")
         texts = [chunk.text for chunk in chunks]
+        tokens_before = self.embeddings.total_tokens_used
         embeddings = self.embeddings.embed_texts(texts, batch_size=100)
 
-        # Calculate embedding cost
-        total_tokens = sum(self.embeddings.estimate_tokens(text) for text in texts)
+        # Calculate embedding cost from billed tokens (tokenizer count as fallback)
+        total_tokens = self.embeddings.total_tokens_used - tokens_before
+        if not total_tokens:
+            total_tokens = sum(self.embeddings.estimate_tokens(text) for text in texts)
         embedding_cost = self.embeddings.calculate_cost(total_tokens)
         self.total_cost += embedding_cost
         print(f"  Embeddings generated: {len(embeddings)}")
@@ -142,6 +150,7 @@ class RAGPipeline:
         )
 
         # Update job memory
+        self.job_memory.record_usage(stage=0, usage={"input_tokens": total_tokens})
         self.job_memory.complete_stage(
             stage=0,
             key_findings=[
@@ -172,7 +181,8 @@ class RAGPipeline:
         self.retriever = MultiStageRetriever(
             vector_store=self.vector_store,
             embeddings=self.embeddings,
-            config=self.config.retrieval
+            config=self.config.retrieval,
+            llm=self.llm
         )
 
         # Initialize workflow
@@ -203,6 +213,11 @@ class RAGPipeline:
 
         # Update cost tracking
         self.total_cost += result.get('cost', 0)
+        self.job_memory.record_usage(
+            stage=1,
+            usage=result.get('usage', {}),
+            cost=result.get('cost', 0)
+        )
 
         # Update job memory
         self.job_memory.update_current_stage(
@@ -245,6 +260,8 @@ class RAGPipeline:
                 print(f"  Chunks: {result['num_chunks']}")
                 print(f"  Retrieval time: {result['retrieval_time_ms']:.0f}ms")
                 print(f"  Total time: {result['total_time_s']:.2f}s")
+                usage = result.get('usage', {})
+                print(f"  Tokens: {usage.get('input_tokens', 0):,} in / {usage.get('output_tokens', 0):,} out / {usage.get('cache_read_input_tokens', 0):,} cached")
                 print(f"  Cost: ${result['cost']:.4f}")
                 print(f"  Total pipeline cost: ${self.total_cost:.4f}")
                 print(f"{'='*70}")
@@ -293,7 +310,13 @@ class RAGPipeline:
         memory_file = f"job_memory_{self.job_id}.json"
         self.job_memory.save_to_file(memory_file)
 
+        # Export buffered spans
+        shutdown_tracing()
+
         print(f"[{datetime.now().strftime('%H:%M:%S')}] Final cost: ${self.total_cost:.4f}")
+        tokens = self.job_memory.get_token_totals()
+        if tokens:
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] Tokens: {tokens['input_tokens']:,} in / {tokens['output_tokens']:,} out / {tokens['cache_read_input_tokens']:,} cached")
         print(f"[{datetime.now().strftime('%H:%M:%S')}] ✓ Cleanup complete\n")
 
 
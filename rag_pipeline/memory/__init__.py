@@ -1,2 +1,8 @@
 """Job memory module"""
-from .job_memory import JobMemoryManager, create_job_memory
+from .._lazy import lazy_exports
+
+# Submodules are imported on first access (PEP 562)
+__getattr__, __dir__, __all__ = lazy_exports(__name__, {
+    "JobMemoryManager": ".job_memory",
+    "create_job_memory": ".job_memory",
+})
@@ -6,9 +6,13 @@ Maintains state across stages with progressive compression
 import json
 from typing import List, Dict, Any, Optional
 from datetime import datetime
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 
 from ..config.settings import JobMemoryConfig
+from ..llm.token_accounting import count_tokens, add_usage
+from ..observability import get_logger
+
+logger = get_logger(__name__)
 
 
 @dataclass
@@ -38,6 +42,7 @@ class JobMemory:
     constraints: Dict[str, Any]
     risks: List[str]
     costs_by_stage: Dict[str, float]
+    tokens_by_stage: Dict[str, Dict[str, int]] = field(default_factory=dict)
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary"""
@@ -51,7 +56,8 @@ class JobMemory:
             "gaps_identified": self.gaps_identified,
             "constraints": self.constraints,
             "risks": self.risks,
-            "costs_by_stage": self.costs_by_stage
+            "costs_by_stage": self.costs_by_stage,
+            "tokens_by_stage": self.tokens_by_stage
         }
 
     def to_json(self) -> str:
@@ -157,10 +163,46 @@ class JobMemoryManager:
 
         self.memory.updated_at = datetime.now().isoformat()
 
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] Stage {stage} completed")
-        print(f"  Quality Score: {quality_score:.1f}")
-        print(f"  Cost: ${cost:.2f}")
-        print(f"  Total Cost: ${total_cost:.2f}")
+        logger.info("Stage %s completed", stage)
+        logger.info("  Quality Score: %.1f", quality_score)
+        logger.info("  Cost: $%.2f", cost)
+        logger.info("  Total Cost: $%.2f", total_cost)
+
+    def record_usage(
+        self,
+        stage: int,
+        usage: Dict[str, int],
+        cost: float = 0.0
+    ):
+        """
+        Accumulate token usage and cost for a stage
+
+        Args:
+            stage: Stage number
+            usage: Token usage dict (input/output/cache token counts from the API)
+            cost: Cost in USD for this usage
+        """
+        key = f"stage_{stage}"
+        self.memory.tokens_by_stage[key] = add_usage(self.memory.tokens_by_stage.get(key), usage)
+        self.memory.costs_by_stage[key] = self.memory.costs_by_stage.get(key, 0.0) + cost
+
+        # Update constraints
+        self.memory.constraints["budget_used"] = sum(self.memory.costs_by_stage.values())
+        self._update_risks()
+
+        self.memory.updated_at = datetime.now().isoformat()
+
+    def get_token_totals(self) -> Dict[str, int]:
+        """
+        Get token usage summed across all stages
+
+        Returns:
+            Token usage dict
+        """
+        totals = {}
+        for usage in self.memory.tokens_by_stage.values():
+            totals = add_usage(totals, usage)
+        return totals
 
     def update_current_stage(
         self,
@@ -292,6 +334,8 @@ class JobMemoryManager:
         if self.config.retain_cost_tracking:
             compressed.append(f"  Budget: ${constraints.get('budget_used', 0):.2f} / ${constraints.get('budget_limit', 200):.2f}")
         compressed.append(f"  Time: {constraints.get('time_elapsed_hours', 0):.1f}h / {constraints.get('time_limit_hours', 12)}h")
+        # Token totals change on every query; they are reported via
+        # get_token_totals(), not sent to the model
         compressed.append("")
 
         # Risks (if any)
@@ -302,12 +346,13 @@ class JobMemoryManager:
 
         result = "\n".join(compressed)
 
-        # Estimate tokens and truncate if needed
-        estimated_tokens = len(result) // 4
-        if estimated_tokens > max_tokens:
-            # Aggressive truncation
-            target_chars = max_tokens * 4
-            result = result[:target_chars] + "\n[... truncated]"
+        # Count tokens and truncate if needed
+        if count_tokens(result) > max_tokens:
+            # Aggressive truncation: drop trailing lines until under budget
+            lines = result.split("\n")
+            while lines and count_tokens("\n".join(lines) + "\n[... truncated]") > max_tokens:
+                lines.pop()
+            result = "\n".join(lines) + "\n[... truncated]"
 
         return result
 
@@ -325,7 +370,7 @@ class JobMemoryManager:
         with open(file_path, 'w') as f:
             json.dump(self.memory.to_dict(), f, indent=2)
 
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] Job memory saved to {file_path}")
+        logger.info("Job memory saved to %s", file_path)
 
     @classmethod
     def load_from_file(cls, file_path: str, config: Optional[JobMemoryConfig] = None):
@@ -356,6 +401,7 @@ class JobMemoryManager:
         manager.memory.constraints = data['constraints']
         manager.memory.risks = data['risks']
         manager.memory.costs_by_stage = data['costs_by_stage']
+        manager.memory.tokens_by_stage = data.get('tokens_by_stage', {})
 
         return manager
 
@@ -0,0 +1,16 @@
+"""Observability module: leveled logging, tracing spans and latency metrics"""
+from .log import get_logger, set_log_level
+from .tracing import (
+    Span,
+    Tracer,
+    MetricsRegistry,
+    OTLPHttpExporter,
+    FileSpanExporter,
+    configure_tracing,
+    current_span,
+    get_tracer,
+    get_metrics_registry,
+    propagate,
+    shutdown_tracing,
+    span,
+)
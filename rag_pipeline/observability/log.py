@@ -0,0 +1,57 @@
+"""
+Pipeline Logging
+Leveled loggers for the pipeline's progress output, in the same
+"[HH:MM:SS] message" format the pipeline has always printed
+"""
+import os
+import sys
+import logging
+from typing import Union
+
+ROOT_LOGGER = "rag_pipeline"
+LOG_FORMAT = "[%(asctime)s] %(message)s"
+DATE_FORMAT = "%H:%M:%S"
+
+_configured = False
+
+
+def _configure_root():
+    """Attach a stdout handler to the package logger (once)"""
+    global _configured
+    if _configured:
+        return
+    root = logging.getLogger(ROOT_LOGGER)
+    if not root.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT, DATE_FORMAT))
+        root.addHandler(handler)
+        root.propagate = False
+    root.setLevel(os.getenv("RAG_LOG_LEVEL", "INFO").upper())
+    _configured = True
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Get a logger under the rag_pipeline package logger
+
+    Args:
+        name: Module name (usually __name__)
+
+    Returns:
+        logging.Logger
+    """
+    _configure_root()
+    if name != ROOT_LOGGER and not name.startswith(ROOT_LOGGER + "."):
+        name = f"{ROOT_LOGGER}.{name}"
+    return logging.getLogger(name)
+
+
+def set_log_level(level: Union[str, int]):
+    """
+    Set the pipeline log level
+
+    Args:
+        level: Level name ("DEBUG", "INFO", "WARNING", ...) or number
+    """
+    _configure_root()
+    logging.getLogger(ROOT_LOGGER).setLevel(level.upper() if isinstance(level, str) else level)
@@ -0,0 +1,662 @@
+"""
+Tracing and Latency Metrics
+Lightweight spans with monotonic timers for the retrieval pipeline, per-stage
+latency histograms and quantiles (Prometheus text format), and exporters that
+write spans as OTLP/HTTP JSON, which any OpenTelemetry collector accepts
+"""
+import json
+import math
+import time
+import secrets
+import threading
+import contextvars
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from ..config.settings import ObservabilityConfig
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+# Histogram bucket upper bounds (seconds), embed/k-NN up to LLM generation
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUANTILES = (0.5, 0.95, 0.99)
+RESERVOIR_SIZE = 1024  # Recent observations per stage used for quantiles
+
+COUNTER_HELP = {
+    "rag_llm_tokens_total": "LLM tokens by usage type",
+    "rag_stage_errors_total": "Pipeline stages that raised an exception",
+}
+
+
+@dataclass
+class Span:
+    """
+    One timed operation; parent links form a trace
+    """
+    name: str
+    trace_id: str
+    span_id: str
+    parent: Optional["Span"]
+    start_unix_ns: int
+    start_ns: int
+    end_ns: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    # Milliseconds spent in descendant spans, summed per span name
+    stage_timings: Dict[str, float] = field(default_factory=dict)
+
+    def set_attributes(self, **attributes):
+        """Add or overwrite span attributes"""
+        self.attributes.update(attributes)
+
+    @property
+    def duration_s(self) -> float:
+        """Duration in seconds (so far, if the span is still open)"""
+        end_ns = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return (end_ns - self.start_ns) / 1e9
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """
+        Convert to an OTLP JSON span
+
+        Returns:
+            Span dict as used in ExportTraceServiceRequest.resourceSpans[].scopeSpans[].spans
+        """
+        duration_ns = (self.end_ns or self.start_ns) - self.start_ns
+        otlp = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_unix_ns),
+            "endTimeUnixNano": str(self.start_unix_ns + duration_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent is not None:
+            otlp["parentSpanId"] = self.parent.span_id
+        return otlp
+
+
+class _NoopSpan:
+    """Stand-in yielded when tracing is disabled"""
+    stage_timings: Dict[str, float] = {}
+
+    def set_attributes(self, **attributes):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    """Encode one attribute as an OTLP KeyValue"""
+    if isinstance(value, bool):
+        encoded = {"boolValue": value}
+    elif isinstance(value, int):
+        encoded = {"intValue": str(value)}
+    elif isinstance(value, float):
+        encoded = {"doubleValue": value}
+    else:
+        encoded = {"stringValue": str(value)}
+    return {"key": key, "value": encoded}
+
+
+def otlp_payload(spans: List[Span], service_name: str) -> Dict[str, Any]:
+    """
+    Wrap finished spans in an OTLP ExportTraceServiceRequest
+
+    Args:
+        spans: Finished spans
+        service_name: service.name resource attribute
+
+    Returns:
+        JSON-serializable request body
+    """
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [_otlp_attribute("service.name", service_name)]},
+            "scopeSpans": [{
+                "scope": {"name": "rag_pipeline"},
+                "spans": [span.to_otlp() for span in spans],
+            }],
+        }]
+    }
+
+
+# ---------- Metrics ----------
+
+class StageStats:
+    """Latency histogram plus a window of recent observations for one stage"""
+
+    def __init__(self, reservoir_size: int = RESERVOIR_SIZE):
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)  # Last bucket is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=reservoir_size)
+
+    def observe(self, seconds: float):
+        """Record one duration"""
+        self.bucket_counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.recent.append(seconds)
+
+    def quantiles(self) -> Dict[float, float]:
+        """Quantiles over the recent window (nearest rank)"""
+        values = sorted(self.recent)
+        if not values:
+            return {q: 0.0 for q in QUANTILES}
+        return {q: values[max(0, math.ceil(q * len(values)) - 1)] for q in QUANTILES}
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of per-stage latencies and counters
+    """
+
+    def __init__(self, reservoir_size: int = RESERVOIR_SIZE):
+        """
+        Initialize registry
+
+        Args:
+            reservoir_size: Recent observations per stage kept for quantiles
+        """
+        self.reservoir_size = reservoir_size
+        self._lock = threading.Lock()
+        self._stages: Dict[str, StageStats] = {}
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+
+    @classmethod
+    def merged(cls, states: List[Dict[str, Any]]) -> "MetricsRegistry":
+        """
+        Combine registries exported by several processes (e.g. Celery workers)
+
+        Histograms and counters are summed; quantiles are computed over the
+        recent windows of all processes.
+
+        Args:
+            states: Results of export_state()
+
+        Returns:
+            New registry holding the combined metrics
+        """
+        registry = cls(reservoir_size=RESERVOIR_SIZE * max(1, len(states)))
+        for state in states:
+            registry.merge_state(state)
+        return registry
+
+    def observe(self, stage: str, seconds: float):
+        """
+        Record a stage duration
+
+        Args:
+            stage: Stage (span) name
+            seconds: Duration
+        """
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = StageStats(self.reservoir_size)
+            stats.observe(seconds)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """
+        Increase a counter
+
+        Args:
+            name: Counter name (e.g. rag_llm_tokens_total)
+            value: Amount to add
+            **labels: Label values
+        """
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def export_state(self) -> Dict[str, Any]:
+        """
+        Raw histogram, window and counter state, for merging in another process
+
+        Returns:
+            JSON-serializable dict (see merge_state)
+        """
+        with self._lock:
+            return {
+                "stages": {
+                    stage: {
+                        "bucket_counts": list(stats.bucket_counts),
+                        "count": stats.count,
+                        "total": stats.total,
+                        "recent": list(stats.recent),
+                    }
+                    for stage, stats in self._stages.items()
+                },
+                "counters": [[name, [list(label) for label in labels], value]
+                             for (name, labels), value in self._counters.items()],
+            }
+
+    def merge_state(self, state: Dict[str, Any]):
+        """
+        Add another registry's exported state to this one
+
+        Args:
+            state: Result of export_state()
+        """
+        with self._lock:
+            for stage, data in state.get("stages", {}).items():
+                stats = self._stages.get(stage)
+                if stats is None:
+                    stats = self._stages[stage] = StageStats(self.reservoir_size)
+                stats.bucket_counts = [a + b for a, b in zip(stats.bucket_counts, data["bucket_counts"])]
+                stats.count += data["count"]
+                stats.total += data["total"]
+                stats.recent.extend(data["recent"])
+            for name, labels, value in state.get("counters", []):
+                key = (name, tuple(tuple(label) for label in labels))
+                self._counters[key] = self._counters.get(key, 0) + value
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """
+        Per-stage summary
+
+        Returns:
+            {stage: {"count", "mean_ms", "p50_ms", "p95_ms", "p99_ms"}}
+        """
+        with self._lock:
+            summary = {}
+            for stage, stats in sorted(self._stages.items()):
+                quantiles = stats.quantiles()
+                summary[stage] = {
+                    "count": stats.count,
+                    "mean_ms": round(stats.total / stats.count * 1000, 2) if stats.count else 0.0,
+                    **{f"p{int(q * 100)}_ms": round(v * 1000, 2) for q, v in quantiles.items()},
+                }
+            return summary
+
+    def render_prometheus(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format
+
+        Returns:
+            Exposition text (for a /metrics endpoint)
+        """
+        lines = [
+            "# HELP rag_stage_duration_seconds Retrieval pipeline stage latency",
+            "# TYPE rag_stage_duration_seconds histogram",
+        ]
+        with self._lock:
+            stages = sorted(self._stages.items())
+            for stage, stats in stages:
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), stats.bucket_counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'rag_stage_duration_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+                lines.append(f'rag_stage_duration_seconds_sum{{stage="{stage}"}} {stats.total}')
+                lines.append(f'rag_stage_duration_seconds_count{{stage="{stage}"}} {stats.count}')
+
+            lines.append(f"# HELP rag_stage_latency_seconds Stage latency quantiles over the last {RESERVOIR_SIZE} runs")
+            lines.append("# TYPE rag_stage_latency_seconds summary")
+            for stage, stats in stages:
+                for q, value in stats.quantiles().items():
+                    lines.append(f'rag_stage_latency_seconds{{stage="{stage}",quantile="{q}"}} {value}')
+                lines.append(f'rag_stage_latency_seconds_sum{{stage="{stage}"}} {stats.total}')
+                lines.append(f'rag_stage_latency_seconds_count{{stage="{stage}"}} {stats.count}')
+
+            counters: Dict[str, List[str]] = {}
+            for (name, labels), value in sorted(self._counters.items()):
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+                counters.setdefault(name, []).append(f"{name}{{{label_text}}} {value}" if labels else f"{name} {value}")
+
+        for name, samples in counters.items():
+            lines.append(f"# HELP {name} {COUNTER_HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} counter")
+            lines.extend(samples)
+
+        return "\n".join(lines) + "\n"
+
+
+# ---------- Exporters ----------
+
+class BatchSpanExporter:
+    """
+    Buffers finished spans and hands them to _send() in batches on a
+    background thread, so exporting never blocks the pipeline
+    """
+
+    def __init__(self, service_name: str, batch_size: int = 256, interval_s: float = 5.0):
+        """
+        Initialize exporter
+
+        Args:
+            service_name: service.name resource attribute
+            batch_size: Spans per export (a full buffer flushes immediately)
+            interval_s: Maximum seconds between exports
+        """
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.interval_s = interval_s
+        self._buffer: List[Span] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span):
+        """Queue a finished span"""
+        with self._lock:
+            self._buffer.append(span)
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        """Export everything buffered now (on the calling thread)"""
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        if batch:
+            try:
+                self._send(otlp_payload(batch, self.service_name))
+            except Exception as e:
+                logger.warning("Span export failed, dropped %d spans: %s", len(batch), e)
+
+    def shutdown(self):
+        """Stop the background thread and export remaining spans"""
+        self._stopped = True
+        self._wakeup.set()
+        self._thread.join(timeout=self.interval_s)
+        self.flush()
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.interval_s)
+            self._wakeup.clear()
+            self.flush()
+
+    def _send(self, payload: Dict[str, Any]):
+        raise NotImplementedError
+
+
+class OTLPHttpExporter(BatchSpanExporter):
+    """Exports spans to an OpenTelemetry collector via OTLP/HTTP with JSON encoding"""
+
+    def __init__(self, endpoint: str, service_name: str, headers: Optional[Dict[str, str]] = None,
+                 timeout_s: float = 5.0, **kwargs):
+        """
+        Initialize exporter
+
+        Args:
+            endpoint: Traces endpoint (e.g. http://collector:4318/v1/traces)
+            service_name: service.name resource attribute
+            headers: Extra HTTP headers (e.g. auth)
+            timeout_s: HTTP timeout
+            **kwargs: BatchSpanExporter options
+        """
+        self.endpoint = endpoint
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        self.timeout_s = timeout_s
+        super().__init__(service_name, **kwargs)
+
+    def _send(self, payload: Dict[str, Any]):
+        import requests
+
+        response = requests.post(self.endpoint, data=json.dumps(payload), headers=self.headers, timeout=self.timeout_s)
+        response.raise_for_status()
+
+
+class FileSpanExporter(BatchSpanExporter):
+    """Appends OTLP JSON export requests to a file, one per line (no collector needed)"""
+
+    def __init__(self, path: str, service_name: str, **kwargs):
+        """
+        Initialize exporter
+
+        Args:
+            path: Output .jsonl path
+            service_name: service.name resource attribute
+            **kwargs: BatchSpanExporter options
+        """
+        self.path = path
+        super().__init__(service_name, **kwargs)
+
+    def _send(self, payload: Dict[str, Any]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(payload) + "\n")
+
+
+# ---------- Tracer ----------
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("rag_current_span", default=None)
+
+
+class Tracer:
+    """
+    Creates spans, records their durations as stage latencies and passes
+    finished spans to the exporter
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        exporter: Optional[BatchSpanExporter] = None,
+        registry: Optional[MetricsRegistry] = None
+    ):
+        """
+        Initialize tracer
+
+        Args:
+            enabled: When False, span() only yields a no-op span
+            exporter: Optional span exporter
+            registry: Metrics registry (a new one if omitted)
+        """
+        self.enabled = enabled
+        self.exporter = exporter
+        self.registry = registry or MetricsRegistry()
+        self._lock = threading.Lock()
+
+    def _start(self, name: str, attributes: Dict[str, Any]) -> Span:
+        parent = _current_span.get()
+        return Span(
+            name=name,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent=parent,
+            start_unix_ns=time.time_ns(),
+            start_ns=time.perf_counter_ns(),
+            attributes=attributes
+        )
+
+    def _finish(self, span: Span):
+        duration_s = span.duration_s
+        self.registry.observe(span.name, duration_s)
+        if span.error:
+            self.registry.inc("rag_stage_errors_total", stage=span.name)
+
+        # Per-stage breakdown on every enclosing span
+        duration_ms = duration_s * 1000
+        with self._lock:
+            ancestor = span.parent
+            while ancestor is not None:
+                ancestor.stage_timings[span.name] = ancestor.stage_timings.get(span.name, 0.0) + duration_ms
+                ancestor = ancestor.parent
+
+        if self.exporter is not None:
+            self.exporter.export(span)
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span]:
+        """
+        Time a block as a child of the current span
+
+        Args:
+            name: Stage name (also the latency metric's stage label)
+            **attributes: Span attributes (k, candidate counts, ...)
+
+        Yields:
+            The open span (add attributes with set_attributes)
+        """
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+
+        span = self._start(name, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end_ns = time.perf_counter_ns()
+            _current_span.reset(token)
+            self._finish(span)
+
+    def record(self, name: str, start_ns: int, **attributes) -> Optional[Span]:
+        """
+        Record an already-finished operation as a child of the current span
+
+        For work that cannot be wrapped in span(), e.g. a streamed response
+        consumed across generator yields.
+
+        Args:
+            name: Stage name
+            start_ns: time.perf_counter_ns() when the operation started
+            **attributes: Span attributes
+
+        Returns:
+            The finished span (None when tracing is disabled)
+        """
+        if not self.enabled:
+            return None
+        end_ns = time.perf_counter_ns()
+        span = self._start(name, attributes)
+        span.start_unix_ns -= end_ns - start_ns
+        span.start_ns = start_ns
+        span.end_ns = end_ns
+        self._finish(span)
+        return span
+
+
+def current_span() -> Optional[Span]:
+    """
+    Get the innermost open span of the calling context
+
+    Returns:
+        Span or None (outside any span, or tracing disabled)
+    """
+    return _current_span.get()
+
+
+def propagate(fn: Callable) -> Callable:
+    """
+    Bind fn to the caller's trace context so spans opened on a worker
+    thread (ThreadPoolExecutor) become children of the current span
+
+    Args:
+        fn: Function to run on another thread
+
+    Returns:
+        Wrapped function (safe to call concurrently)
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+
+    return run
+
+
+# Global tracer instance (singleton pattern)
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.RLock()
+
+
+def configure_tracing(config: Optional[ObservabilityConfig] = None) -> Tracer:
+    """
+    (Re)create the shared tracer from configuration
+
+    The metrics registry is kept, so latencies recorded before
+    reconfiguration stay visible.
+
+    Args:
+        config: Observability configuration (defaults read the environment)
+
+    Returns:
+        Tracer: Shared tracer
+    """
+    global _tracer
+    config = config or ObservabilityConfig()
+
+    with _tracer_lock:
+        return _configure_tracing(config)
+
+
+def _configure_tracing(config: ObservabilityConfig) -> Tracer:
+    """configure_tracing() body (caller holds _tracer_lock)"""
+    global _tracer
+    exporter = None
+    if config.enable_tracing:
+        options = {"batch_size": config.export_batch_size, "interval_s": config.export_interval_s}
+        if config.otlp_endpoint:
+            exporter = OTLPHttpExporter(config.otlp_endpoint, config.service_name, **options)
+        elif config.trace_file:
+            exporter = FileSpanExporter(config.trace_file, config.service_name, **options)
+
+    previous = _tracer
+    _tracer = Tracer(
+        enabled=config.enable_tracing,
+        exporter=exporter,
+        registry=previous.registry if previous else None
+    )
+    if previous is not None and previous.exporter is not None:
+        previous.exporter.shutdown()
+    return _tracer
+
+
+def shutdown_tracing():
+    """Export buffered spans and stop the shared tracer's exporter"""
+    if _tracer is not None and _tracer.exporter is not None:
+        _tracer.exporter.shutdown()
+
+
+def get_tracer() -> Tracer:
+    """
+    Get or create the shared tracer
+
+    Returns:
+        Tracer: Shared tracer
+    """
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                return configure_tracing()
+    return _tracer
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """
+    Get the shared metrics registry
+
+    Returns:
+        MetricsRegistry: Registry of the shared tracer
+    """
+    return get_tracer().registry
+
+
+def span(name: str, **attributes):
+    """
+    Time a block with the shared tracer (see Tracer.span)
+
+    Args:
+        name: Stage name
+        **attributes: Span attributes
+
+    Returns:
+        Context manager yielding the span
+    """
+    return get_tracer().span(name, **attributes)
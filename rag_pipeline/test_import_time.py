@@ -0,0 +1,199 @@
+"""
+Import Time Regression Test
+Checks that the API server, Celery worker and RAG pipeline entry modules
+import within a time budget and without loading heavy dependencies (LLM SDKs,
+torch, pandas, opensearch-py, ...), which are deferred until first use
+
+Run directly (python rag_pipeline/test_import_time.py) or under pytest.
+Budgets can be overridden with IMPORT_TIME_BUDGET_SCALE (e.g. 2 on slow CI).
+"""
+import os
+import sys
+import json
+import subprocess
+from typing import Any, Dict, List, Optional, Tuple
+
+# Entry modules are imported from the repository root
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+
+# Entry module -> import budget in milliseconds (best of RUNS)
+BUDGETS_MS = {
+    "rag_pipeline.main": 400,
+    "backend.main": 1500,
+    "backend.celery_app": 1500,
+}
+
+# Must not be imported just by importing an entry module
+HEAVY_MODULES = [
+    "anthropic",
+    "openai",
+    "tiktoken",
+    "pandas",
+    "docx",
+    "opensearchpy",
+    "boto3",
+    "langgraph",
+    "sentence_transformers",
+    "torch",
+]
+
+RUNS = 3
+BUDGET_SCALE = float(os.getenv("IMPORT_TIME_BUDGET_SCALE", "1"))
+
+_CHILD = """
+import sys, time, json, importlib
+start = time.perf_counter()
+importlib.import_module(sys.argv[1])
+elapsed_ms = (time.perf_counter() - start) * 1000
+try:
+    import resource
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+except ImportError:
+    rss_mb = None
+print(json.dumps({"ms": elapsed_ms, "rss_mb": rss_mb, "heavy": [m for m in json.loads(sys.argv[2]) if m in sys.modules]}))
+"""
+
+
+def slowest_imports(importtime_log: str, n: int = 5) -> List[str]:
+    """
+    Top-level packages with the largest cumulative time in an -X importtime log
+
+    Args:
+        importtime_log: stderr of python -X importtime
+        n: Number of entries to return
+
+    Returns:
+        List of "package: N ms" strings
+    """
+    cumulative = {}
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line.split("|")
+        try:
+            us = int(parts[1])
+        except ValueError:
+            continue  # Header line
+        name = parts[2].strip().split(".")[0]
+        cumulative[name] = max(cumulative.get(name, 0), us)
+    ranked = sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[:n]
+    return [f"{name}: {us / 1000:.0f} ms" for name, us in ranked]
+
+
+def measure_import(module: str, runs: int = RUNS) -> Dict[str, Any]:
+    """
+    Import a module in fresh interpreters and measure it
+
+    Args:
+        module: Dotted module name
+        runs: Number of interpreters (the fastest run is reported)
+
+    Returns:
+        Dict with ms, rss_mb, heavy (heavy modules loaded) and slowest, or
+        error if the module cannot be imported in this environment
+    """
+    best = None
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _CHILD, module, json.dumps(HEAVY_MODULES)],
+            cwd=parent_dir,
+            capture_output=True,
+            text=True
+        )
+        if proc.returncode != 0:
+            last_line = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "unknown error"
+            return {"error": last_line}
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        if best is None or result["ms"] < best["ms"]:
+            best = result
+            best["slowest"] = slowest_imports(proc.stderr)
+    return best
+
+
+def check_module(module: str) -> Tuple[List[str], Optional[str]]:
+    """
+    Measure one entry module against its budget
+
+    Args:
+        module: Key of BUDGETS_MS
+
+    Returns:
+        Tuple of (failure messages, skip reason if the module cannot be
+        imported in this environment because of a missing dependency)
+    """
+    budget_ms = BUDGETS_MS[module] * BUDGET_SCALE
+    result = measure_import(module)
+
+    if "error" in result:
+        # Missing optional dependencies (e.g. celery) are not regressions
+        if "ModuleNotFoundError" in result["error"] or "pip install" in result["error"]:
+            print(f"  - {module}: skipped ({result['error']})")
+            return [], result["error"]
+        print(f"  ✗ {module}: import failed ({result['error']})")
+        return [f"{module} failed to import: {result['error']}"], None
+
+    failures = []
+    rss = f", RSS {result['rss_mb']:.0f} MB" if result["rss_mb"] is not None else ""
+    ok = result["ms"] <= budget_ms and not result["heavy"]
+    print(f"  {'✓' if ok else '✗'} {module}: {result['ms']:.0f} ms (budget {budget_ms:.0f} ms){rss}")
+    if result["heavy"]:
+        failures.append(f"{module} eagerly imports {', '.join(result['heavy'])}")
+    if result["ms"] > budget_ms:
+        failures.append(f"{module} took {result['ms']:.0f} ms > {budget_ms:.0f} ms")
+    if not ok:
+        print(f"      slowest: {'; '.join(result['slowest'])}")
+    return failures, None
+
+
+def check_budgets() -> Tuple[List[str], List[str]]:
+    """
+    Measure every entry module against its budget
+
+    Returns:
+        Tuple of (failure messages, skipped modules); no failures means all
+        measured modules are within budget
+    """
+    failures, skipped = [], []
+    for module in BUDGETS_MS:
+        module_failures, skip_reason = check_module(module)
+        failures.extend(module_failures)
+        if skip_reason:
+            skipped.append(module)
+    return failures, skipped
+
+
+def pytest_generate_tests(metafunc):
+    """One pytest case per entry module, so skips are reported individually"""
+    if "module" in metafunc.fixturenames:
+        metafunc.parametrize("module", list(BUDGETS_MS))
+
+
+def test_import_time_budget(module):
+    """pytest entry point"""
+    import pytest
+
+    failures, skip_reason = check_module(module)
+    if skip_reason:
+        pytest.skip(f"{module} cannot be imported here: {skip_reason}")
+    assert not failures, "\n".join(failures)
+
+
+def main():
+    print("=" * 70)
+    print("IMPORT TIME TEST")
+    print("=" * 70)
+    failures, skipped = check_budgets()
+    if failures:
+        print(f"\n✗ {len(failures)} import time regression(s):")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    if skipped:
+        print(f"\n✓ All measured entry modules within budget ({len(skipped)} SKIPPED, not measured: {', '.join(skipped)})")
+        return
+    print("\n✓ All entry modules within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,8 @@
 """Vector store module"""
-from .opensearch_store import OpenSearchVectorStore, create_vector_store
+from .._lazy import lazy_exports
+
+# Submodules are imported on first access (PEP 562)
+__getattr__, __dir__, __all__ = lazy_exports(__name__, {
+    "OpenSearchVectorStore": ".opensearch_store",
+    "create_vector_store": ".opensearch_store",
+})
@@ -6,11 +6,12 @@ Uses k-NN with HNSW algorithm and cosine similarity
 import uuid
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
-from opensearchpy import OpenSearch, RequestsHttpConnection, AWSV4SignerAuth
-import boto3
 
 from ..config.settings import OpenSearchConfig
 from ..loaders.document_loader import DocumentChunk
+from ..observability import get_logger, span
+
+logger = get_logger(__name__)
 
 
 class OpenSearchVectorStore:
@@ -40,6 +41,10 @@ class OpenSearchVectorStore:
 
     def _connect(self):
         """Establish connection to OpenSearch Serverless"""
+        # Deferred: opensearch-py and boto3 are only loaded when a store connects
+        from opensearchpy import OpenSearch, RequestsHttpConnection, AWSV4SignerAuth
+        import boto3
+
         try:
             # Get AWS credentials
             credentials = boto3.Session(
@@ -64,7 +69,7 @@ class OpenSearchVectorStore:
                 timeout=30
             )
 
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] Connected to OpenSearch Serverless")
+            logger.info("Connected to OpenSearch Serverless")
 
         except Exception as e:
             raise Exception(f"Failed to connect to OpenSearch: {str(e)}")
@@ -125,9 +130,9 @@ class OpenSearchVectorStore:
         try:
             if not self.client.indices.exists(index=self.index_name):
                 self.client.indices.create(index=self.index_name, body=index_body)
-                print(f"[{datetime.now().strftime('%H:%M:%S')}] Created index: {self.index_name}")
+                logger.info("Created index: %s", self.index_name)
             else:
-                print(f"[{datetime.now().strftime('%H:%M:%S')}] Index already exists: {self.index_name}")
+                logger.info("Index already exists: %s", self.index_name)
 
         except Exception as e:
             raise Exception(f"Failed to create index: {str(e)}")
@@ -151,7 +156,7 @@ class OpenSearchVectorStore:
         if len(chunks) != len(embeddings):
             raise ValueError("Number of chunks and embeddings must match")
 
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] Indexing {len(chunks)} documents...")
+        logger.info("Indexing %s documents...", len(chunks))
 
         # Prepare documents in batches
         for i in range(0, len(chunks), batch_size):
@@ -186,18 +191,18 @@ class OpenSearchVectorStore:
                 response = self.client.bulk(body=bulk_data)
 
                 if response.get('errors'):
-                    print(f"[{datetime.now().strftime('%H:%M:%S')}] Warning: Some documents failed to index")
+                    logger.warning("Some documents failed to index")
 
                 # Progress
                 indexed = min(i + batch_size, len(chunks))
-                print(f"[{datetime.now().strftime('%H:%M:%S')}] Indexed {indexed}/{len(chunks)} documents")
+                logger.info("Indexed %s/%s documents", indexed, len(chunks))
 
             except Exception as e:
                 raise Exception(f"Bulk indexing failed at batch {i}: {str(e)}")
 
         # Refresh index
         self.client.indices.refresh(index=self.index_name)
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] Indexing complete")
+        logger.info("Indexing complete")
 
     def search(
         self,
@@ -244,7 +249,9 @@ class OpenSearchVectorStore:
             }
 
         try:
-            response = self.client.search(index=self.index_name, body=query)
+            with span("knn", k=k, filtered=bool(filter_dict)) as knn_span:
+                response = self.client.search(index=self.index_name, body=query)
+                knn_span.set_attributes(hits=len(response['hits']['hits']))
 
             # Parse results
             results = []
@@ -302,7 +309,9 @@ class OpenSearchVectorStore:
         }
 
         try:
-            keyword_response = self.client.search(index=self.index_name, body=keyword_query)
+            with span("bm25", k=k) as bm25_span:
+                keyword_response = self.client.search(index=self.index_name, body=keyword_query)
+                bm25_span.set_attributes(hits=len(keyword_response['hits']['hits']))
             keyword_results = [
                 {
                     "id": hit['_id'],
@@ -352,7 +361,7 @@ class OpenSearchVectorStore:
         try:
             if self.client.indices.exists(index=self.index_name):
                 self.client.indices.delete(index=self.index_name)
-                print(f"[{datetime.now().strftime('%H:%M:%S')}] Deleted index: {self.index_name}")
+                logger.info("Deleted index: %s", self.index_name)
         except Exception as e:
             raise Exception(f"Failed to delete index: {str(e)}")
 
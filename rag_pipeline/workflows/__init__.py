@@ -1,2 +1,8 @@
 """Workflows module"""
-from .agentic_rag import AgenticRAGWorkflow, SimpleRAGWorkflow
+from .._lazy import lazy_exports
+
+# Submodules are imported on first access (PEP 562)
+__getattr__, __dir__, __all__ = lazy_exports(__name__, {
+    "AgenticRAGWorkflow": ".agentic_rag",
+    "SimpleRAGWorkflow": ".agentic_rag",
+})
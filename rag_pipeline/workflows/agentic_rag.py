@@ -3,15 +3,47 @@ Agentic RAG Workflow with LangGraph
 Orchestrates the complete RAG pipeline with multi-stage retrieval
 """
 from typing import TypedDict, List, Dict, Any, Optional
-from datetime import datetime
 import operator
-from langgraph.graph import StateGraph, END
+import re
+import time
 
-from ..config.settings import RAGPipelineConfig
+from ..config.settings import RAGPipelineConfig, RetrievalConfig
 from ..llm.claude_wrapper import ClaudeLLM
+from ..llm.token_accounting import add_usage
 from ..embeddings.openai_embeddings import CachedOpenAIEmbeddings
 from ..agents.rag_agents import MultiStageRetriever
 from ..memory.job_memory import JobMemoryManager
+from ..observability import get_logger, span
+
+logger = get_logger(__name__)
+
+
+# Abbreviations such as "GTM", "B2B" or "M&A" benefit from LLM expansion
+ABBREVIATION_PATTERN = re.compile(r"^[A-Z][A-Z0-9&]{1,5}s?$")
+
+
+def should_refine_query(query: str, config: Optional[RetrievalConfig] = None) -> bool:
+    """
+    Decide whether a query is worth an LLM refinement call
+
+    Queries with abbreviations are always refined so they get expanded.
+    Otherwise short keyword queries and long, already-specific queries are
+    searched as-is.
+
+    Args:
+        query: User query
+        config: Retrieval configuration (word-count thresholds)
+
+    Returns:
+        True if the query should be refined
+    """
+    config = config or RetrievalConfig()
+    words = query.split()
+
+    if any(ABBREVIATION_PATTERN.match(word.strip(".,;:!?()\"'")) for word in words):
+        return True
+
+    return config.refine_min_words <= len(words) <= config.refine_max_words
 
 
 class RAGState(TypedDict):
@@ -35,6 +67,7 @@ class RAGState(TypedDict):
     # Metadata
     job_memory: str
     cost: float
+    usage: Dict[str, int]
     quality_score: float
 
     # Workflow control
@@ -72,24 +105,31 @@ class AgenticRAGWorkflow:
         # Build workflow graph
         self.workflow = self._build_workflow()
 
-    def _build_workflow(self) -> StateGraph:
+    def _build_workflow(self) -> Any:
         """
         Build LangGraph workflow
 
         Returns:
             Compiled workflow graph
         """
+        # Deferred: langgraph is only loaded when an agentic workflow is built
+        from langgraph.graph import StateGraph, END
+
         # Define workflow
         workflow = StateGraph(RAGState)
 
         # Add nodes
+        workflow.add_node("refine_and_retrieve", self._refine_and_retrieve)
         workflow.add_node("refine_query", self._refine_query)
         workflow.add_node("retrieve", self._retrieve)
         workflow.add_node("generate", self._generate)
         workflow.add_node("evaluate", self._evaluate)
 
         # Define edges
-        workflow.set_entry_point("refine_query")
+        # First pass refines and retrieves together; later iterations reuse
+        # the refined query
+        workflow.set_entry_point("refine_and_retrieve")
+        workflow.add_edge("refine_and_retrieve", "generate")
         workflow.add_edge("refine_query", "retrieve")
         workflow.add_edge("retrieve", "generate")
         workflow.add_edge("generate", "evaluate")
@@ -107,17 +147,22 @@ class AgenticRAGWorkflow:
         # Compile
         return workflow.compile()
 
-    def _refine_query(self, state: RAGState) -> RAGState:
-        """
-        Node: Refine query for better retrieval
+    def _run_refinement(self, state: RAGState, query: str) -> str:
         """
-        print(f"\n[{datetime.now().strftime('%H:%M:%S')}] NODE: Refine Query")
+        Ask the LLM for a refined query and record its cost
 
-        query = state.get("query", state.get("original_query", ""))
+        Args:
+            state: Current state (cost and usage are updated)
+            query: Query to refine
 
-        # On first iteration, analyze and potentially refine
-        if state.get("iteration", 0) == 0:
-            prompt = f"""Analyze this user query and refine it for semantic search if needed.
+        Returns:
+            Refined query (or the original query on error / no change)
+        """
+        if not should_refine_query(query, self.config.retrieval):
+            logger.info("  Refinement skipped (query already specific)")
+            return query
+
+        prompt = f"""Analyze this user query and refine it for semantic search if needed.
 Focus on extracting key concepts and expanding abbreviations.
 
 Original Query: {query}
@@ -125,20 +170,36 @@ Original Query: {query}
 Provide a refined query that will retrieve better results. If the query is already clear, return it as-is.
 Output only the refined query, nothing else."""
 
-            try:
-                refined = self.llm.generate(prompt, max_tokens=200)
-                refined = refined.strip()
-
-                if refined and refined != query:
-                    print(f"  Original: {query}")
-                    print(f"  Refined:  {refined}")
-                    state["refined_query"] = refined
-                    state["query"] = refined
-                else:
-                    state["refined_query"] = query
-            except Exception as e:
-                print(f"  Error refining query: {e}")
-                state["refined_query"] = query
+        try:
+            refined, usage = self.llm.generate(prompt, return_usage=True, max_tokens=200)
+            refined = refined.strip()
+
+            # Track refinement cost from API usage
+            state["cost"] = state.get("cost", 0) + self.llm.calculate_usage_cost(usage)
+            state["usage"] = add_usage(state.get("usage"), usage)
+
+            if refined and refined != query:
+                logger.info("  Original: %s", query)
+                logger.info("  Refined:  %s", refined)
+                return refined
+        except Exception as e:
+            logger.warning("  Error refining query: %s", e)
+
+        return query
+
+    def _refine_query(self, state: RAGState) -> RAGState:
+        """
+        Node: Refine query for better retrieval
+        """
+        logger.info("NODE: Refine Query")
+
+        query = state.get("query", state.get("original_query", ""))
+
+        # On first iteration, analyze and potentially refine
+        if state.get("iteration", 0) == 0:
+            refined = self._run_refinement(state, query)
+            state["refined_query"] = refined
+            state["query"] = refined
 
         else:
             # Subsequent iterations - keep refined query
@@ -146,11 +207,48 @@ Output only the refined query, nothing else."""
 
         return state
 
+    def _refine_and_retrieve(self, state: RAGState) -> RAGState:
+        """
+        Node: Refine query and retrieve (speculatively in parallel if enabled)
+        """
+        if not self.config.retrieval.speculative_retrieval:
+            return self._retrieve(self._refine_query(state))
+
+        logger.info("NODE: Refine Query + Retrieve (speculative)")
+
+        query = state.get("query", state.get("original_query", ""))
+
+        refined, result = self.retriever.speculative_retrieve(
+            query,
+            lambda q: self._run_refinement(state, q),
+            use_hybrid=False
+        )
+
+        state["refined_query"] = refined
+        state["query"] = refined
+        self._apply_retrieval(state, result)
+
+        return state
+
+    def _apply_retrieval(self, state: RAGState, result: Dict[str, Any]):
+        """Copy a retrieval result into the workflow state (and add its query expansion cost)"""
+        state["context"] = result["context"]
+        state["chunks"] = result["chunks"]
+        state["sources"] = result["sources"]
+        state["retrieval_time_ms"] = result["retrieval_time_ms"]
+
+        usage = result.get("usage")
+        if usage:
+            state["cost"] = state.get("cost", 0) + self.llm.calculate_usage_cost(usage)
+            state["usage"] = add_usage(state.get("usage"), usage)
+
+        logger.info("  Retrieved %s chunks from %s sources", result['num_chunks'], len(result['sources']))
+
     def _retrieve(self, state: RAGState) -> RAGState:
         """
         Node: Multi-stage retrieval
         """
-        print(f"\n[{datetime.now().strftime('%H:%M:%S')}] NODE: Retrieve")
+        logger.info("NODE: Retrieve")
 
         query = state["query"]
 
@@ -158,12 +256,7 @@ Output only the refined query, nothing else."""
         result = self.retriever.retrieve(query, use_hybrid=False)
 
         # Update state
-        state["context"] = result["context"]
-        state["chunks"] = result["chunks"]
-        state["sources"] = result["sources"]
-        state["retrieval_time_ms"] = result["retrieval_time_ms"]
-
-        print(f"  Retrieved {result['num_chunks']} chunks from {len(result['sources'])} sources")
+        self._apply_retrieval(state, result)
 
         return state
 
@@ -171,7 +264,7 @@ Output only the refined query, nothing else."""
         """
         Node: Generate answer using Claude
         """
-        print(f"\n[{datetime.now().strftime('%H:%M:%S')}] NODE: Generate Answer")
+        logger.info("NODE: Generate Answer")
 
         query = state["original_query"]
         context = state["context"]
@@ -179,7 +272,7 @@ Output only the refined query, nothing else."""
         # Get job memory if available
         memory_context = ""
         if self.job_memory:
-            memory_context = f"\n\nJob Context:\n{self.job_memory.get_compressed_memory()}\n"
+            memory_context = self.job_memory.get_compressed_memory()
 
         # Build system prompt
         system_prompt = """You are a highly knowledgeable AI assistant specializing in business intelligence and marketing analysis.
@@ -192,44 +285,38 @@ Your task is to answer questions based on the provided context documents. Follow
 4. Provide actionable insights when relevant
 5. Structure your answer clearly with sections if appropriate"""
 
-        # Build user prompt
-        user_prompt = f"""{memory_context}
-
-Context Documents:
-{context}
-
-Question: {query}
-
-Please provide a comprehensive answer based on the context provided."""
-
         # Generate answer
         try:
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
+            # Stable prefixes first (system prompt, context) so repeated
+            # queries hit the prompt cache; job memory and the question vary
+            messages = [{"role": "system", "content": system_prompt}]
+            messages.append(self.llm.build_context_message(
+                f"Context Documents:\n{context}",
+                f"""Question: {query}
+
+Please provide a comprehensive answer based on the context provided.""",
+                memory_context
+            ))
 
             response = self.llm.invoke(messages, temperature=0.7)
 
             # Extract answer
-            answer = ""
-            for block in response.content:
-                if hasattr(block, 'text'):
-                    answer += block.text
+            answer = self.llm.extract_text(response)
 
             state["answer"] = answer
 
-            # Calculate cost (rough estimate)
-            input_tokens = self.llm.count_tokens(user_prompt + system_prompt)
-            output_tokens = self.llm.count_tokens(answer)
-            cost = self.llm.calculate_cost(input_tokens, output_tokens)
+            # Calculate cost from API usage (includes cache reads/writes)
+            usage = self.llm.get_usage(response)
+            cost = self.llm.calculate_usage_cost(usage)
             state["cost"] = state.get("cost", 0) + cost
+            state["usage"] = add_usage(state.get("usage"), usage)
 
-            print(f"  Generated {output_tokens} tokens")
-            print(f"  Cost: ${cost:.4f}")
+            logger.info("  Generated %s tokens", usage['output_tokens'])
+            logger.info("  Cache: %s read, %s written", usage['cache_read_input_tokens'], usage['cache_creation_input_tokens'])
+            logger.info("  Cost: $%.4f", cost)
 
         except Exception as e:
-            print(f"  Error generating answer: {e}")
+            logger.warning("  Error generating answer: %s", e)
             state["answer"] = f"Error generating answer: {str(e)}"
             state["needs_refinement"] = False
 
@@ -239,7 +326,7 @@ Please provide a comprehensive answer based on the context provided."""
         """
         Node: Evaluate answer quality
         """
-        print(f"\n[{datetime.now().strftime('%H:%M:%S')}] NODE: Evaluate")
+        logger.info("NODE: Evaluate")
 
         # Simple heuristic evaluation
         answer = state.get("answer", "")
@@ -250,31 +337,31 @@ Please provide a comprehensive answer based on the context provided."""
         # Check 1: Answer length (should be substantive)
         if len(answer) < 100:
             quality_score -= 20
-            print("  Quality check: Answer too short (-20)")
+            logger.info("  Quality check: Answer too short (-20)")
 
         # Check 2: Contains "I don't know" or similar
         uncertain_phrases = ["i don't know", "not sure", "cannot determine", "unclear"]
         if any(phrase in answer.lower() for phrase in uncertain_phrases):
             quality_score -= 15
-            print("  Quality check: Contains uncertainty (-15)")
+            logger.info("  Quality check: Contains uncertainty (-15)")
 
         # Check 3: Has sources
         num_sources = len(state.get("sources", []))
         if num_sources == 0:
             quality_score -= 25
-            print("  Quality check: No sources (-25)")
+            logger.info("  Quality check: No sources (-25)")
         elif num_sources < 2:
             quality_score -= 10
-            print("  Quality check: Limited sources (-10)")
+            logger.info("  Quality check: Limited sources (-10)")
 
         # Check 4: Error in answer
         if "error" in answer.lower():
             quality_score -= 30
-            print("  Quality check: Contains error (-30)")
+            logger.info("  Quality check: Contains error (-30)")
 
         state["quality_score"] = max(0, quality_score)
 
-        print(f"  Quality Score: {state['quality_score']:.1f}")
+        logger.info("  Quality Score: %.1f", state['quality_score'])
 
         # Update iteration
         state["iteration"] = state.get("iteration", 0) + 1
@@ -306,14 +393,21 @@ Please provide a comprehensive answer based on the context provided."""
             query: User query
 
         Returns:
-            Result dictionary
+            Result dictionary (stage_timings_ms holds the per-stage breakdown)
         """
-        print(f"\n{'='*70}")
-        print(f"AGENTIC RAG WORKFLOW")
-        print(f"Query: {query}")
-        print(f"{'='*70}")
+        with span("rag_query", workflow="agentic") as query_span:
+            result = self._run_query(query)
+        result["stage_timings_ms"] = {name: round(ms, 1) for name, ms in query_span.stage_timings.items()}
+        return result
 
-        start_time = datetime.now()
+    def _run_query(self, query: str) -> Dict[str, Any]:
+        """Run the LangGraph workflow for one query"""
+        logger.info("=" * 70)
+        logger.info("AGENTIC RAG WORKFLOW")
+        logger.info("Query: %s", query)
+        logger.info("=" * 70)
+
+        start_time = time.perf_counter()
 
         # Initialize state
         initial_state = RAGState(
@@ -327,6 +421,7 @@ Please provide a comprehensive answer based on the context provided."""
             refined_query=query,
             job_memory="",
             cost=0,
+            usage={},
             quality_score=0,
             needs_refinement=False,
             iteration=0
@@ -336,14 +431,14 @@ Please provide a comprehensive answer based on the context provided."""
         final_state = self.workflow.invoke(initial_state)
 
         # Calculate total time
-        elapsed = (datetime.now() - start_time).total_seconds()
+        elapsed = time.perf_counter() - start_time
 
-        print(f"\n{'='*70}")
-        print(f"WORKFLOW COMPLETE")
-        print(f"  Total time: {elapsed:.2f}s")
-        print(f"  Quality score: {final_state['quality_score']:.1f}")
-        print(f"  Total cost: ${final_state['cost']:.4f}")
-        print(f"{'='*70}\n")
+        logger.info("=" * 70)
+        logger.info("WORKFLOW COMPLETE")
+        logger.info("  Total time: %.2fs", elapsed)
+        logger.info("  Quality score: %.1f", final_state['quality_score'])
+        logger.info("  Total cost: $%.4f", final_state['cost'])
+        logger.info("=" * 70)
 
         # Return result
         return {
@@ -355,6 +450,7 @@ Please provide a comprehensive answer based on the context provided."""
             "sources": final_state["sources"],
             "quality_score": final_state["quality_score"],
             "cost": final_state["cost"],
+            "usage": final_state.get("usage", {}),
             "retrieval_time_ms": final_state["retrieval_time_ms"],
             "total_time_s": elapsed,
             "num_chunks": len(final_state["chunks"])
@@ -397,100 +493,120 @@ class SimpleRAGWorkflow:
             refine_query: Whether to refine the query first
 
         Returns:
-            Result dictionary
+            Result dictionary (stage_timings_ms holds the per-stage breakdown)
         """
-        print(f"\n{'='*70}")
-        print(f"RAG WORKFLOW")
-        print(f"Query: {query}")
-        print(f"{'='*70}")
-
-        start_time = datetime.now()
+        with span("rag_query", workflow="simple", refine=refine_query) as query_span:
+            result = self._run_query(query, refine_query)
+        result["stage_timings_ms"] = {name: round(ms, 1) for name, ms in query_span.stage_timings.items()}
+        return result
+
+    def _run_query(self, query: str, refine_query: bool) -> Dict[str, Any]:
+        """Refine, retrieve and generate for one query"""
+        logger.info("=" * 70)
+        logger.info("RAG WORKFLOW")
+        logger.info("Query: %s", query)
+        logger.info("=" * 70)
+
+        start_time = time.perf_counter()
         total_cost = 0
+        total_usage = {}
+
+        def refine(q: str) -> str:
+            nonlocal total_cost, total_usage
+
+            if not should_refine_query(q, self.config.retrieval):
+                logger.info("  Refinement skipped (query already specific)")
+                return q
 
-        # Step 1: Refine query (optional)
-        refined_query = query
-        if refine_query:
-            print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Step 1: Refine Query")
             try:
                 prompt = f"""Analyze this query and refine it for semantic search if needed.
 Focus on key concepts and expand abbreviations.
 
-Query: {query}
+Query: {q}
 
 Provide a refined query. If already clear, return as-is. Output only the refined query."""
 
-                refined_query = self.llm.generate(prompt, max_tokens=200).strip()
-                if refined_query != query:
-                    print(f"  Refined: {refined_query}")
+                refined, usage = self.llm.generate(prompt, return_usage=True, max_tokens=200)
+                refined = refined.strip() or q
+                if refined != q:
+                    logger.info("  Refined: %s", refined)
                 else:
-                    print(f"  Query unchanged")
+                    logger.info("  Query unchanged")
 
-                # Estimate cost
-                cost = self.llm.calculate_cost(
-                    self.llm.count_tokens(prompt),
-                    self.llm.count_tokens(refined_query)
-                )
-                total_cost += cost
+                # Calculate cost from API usage
+                total_cost += self.llm.calculate_usage_cost(usage)
+                total_usage = add_usage(total_usage, usage)
+
+                return refined
 
             except Exception as e:
-                print(f"  Error refining: {e}")
-                refined_query = query
+                logger.warning("  Error refining: %s", e)
+                return q
+
+        # Steps 1-2: Refine query (optional) and retrieve
+        refined_query = query
+        if refine_query and self.config.retrieval.speculative_retrieval:
+            # Retrieval for the original query runs while the LLM refines it
+            logger.info("Step 1-2: Refine Query + Retrieve Context (speculative)")
+            refined_query, retrieval_result = self.retriever.speculative_retrieve(query, refine)
+        else:
+            if refine_query:
+                logger.info("Step 1: Refine Query")
+                refined_query = refine(query)
+
+            logger.info("Step 2: Retrieve Context")
+            retrieval_result = self.retriever.retrieve(refined_query)
 
-        # Step 2: Retrieve
-        print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Step 2: Retrieve Context")
-        retrieval_result = self.retriever.retrieve(refined_query)
+        # Query expansion cost (LLM expansion mode)
+        expansion_usage = retrieval_result.get('usage')
+        if expansion_usage:
+            total_cost += self.llm.calculate_usage_cost(expansion_usage)
+            total_usage = add_usage(total_usage, expansion_usage)
 
         # Step 3: Generate
-        print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Step 3: Generate Answer")
+        logger.info("Step 3: Generate Answer")
 
         # Get job memory if available
-        memory_context = ""
+        memory_context = None
         if self.job_memory:
-            memory_context = f"\n\nJob Context:\n{self.job_memory.get_compressed_memory()}\n"
+            memory_context = self.job_memory.get_compressed_memory()
 
         # Generate answer
         system_prompt = """You are a highly knowledgeable AI assistant specializing in business intelligence and marketing analysis.
 
 Answer questions based ONLY on the provided context. Be specific, cite sources, and provide actionable insights."""
 
-        user_prompt = f"""{memory_context}
-
-Context Documents:
-{retrieval_result['context']}
-
-Question: {query}
-
-Please provide a comprehensive answer based on the context provided."""
-
         try:
-            answer = self.llm.generate_with_context(
+            answer, usage = self.llm.generate_with_context(
                 query=query,
                 context=retrieval_result['context'],
                 system_prompt=system_prompt,
+                memory_context=memory_context,
+                return_usage=True,
                 temperature=0.7
             )
 
-            # Calculate cost
-            input_tokens = self.llm.count_tokens(user_prompt + system_prompt)
-            output_tokens = self.llm.count_tokens(answer)
-            cost = self.llm.calculate_cost(input_tokens, output_tokens)
+            # Calculate cost from API usage (includes cache reads/writes)
+            cost = self.llm.calculate_usage_cost(usage)
             total_cost += cost
+            total_usage = add_usage(total_usage, usage)
 
-            print(f"  Generated {output_tokens} tokens")
-            print(f"  Cost: ${cost:.4f}")
+            logger.info("  Generated %s tokens", usage.get('output_tokens', 0))
+            logger.info("  Cache: %s read, %s written", usage.get('cache_read_input_tokens', 0), usage.get('cache_creation_input_tokens', 0))
+            logger.info("  Cost: $%.4f", cost)
 
         except Exception as e:
-            print(f"  Error generating: {e}")
+            logger.warning("  Error generating: %s", e)
             answer = f"Error: {str(e)}"
 
         # Calculate total time
-        elapsed = (datetime.now() - start_time).total_seconds()
+        elapsed = time.perf_counter() - start_time
 
-        print(f"\n{'='*70}")
-        print(f"WORKFLOW COMPLETE")
-        print(f"  Total time: {elapsed:.2f}s")
-        print(f"  Total cost: ${total_cost:.4f}")
-        print(f"{'='*70}\n")
+        logger.info("=" * 70)
+        logger.info("WORKFLOW COMPLETE")
+        logger.info("  Total time: %.2fs", elapsed)
+        logger.info("  Total cost: $%.4f", total_cost)
+        logger.info("=" * 70)
 
         return {
             "query": query,
@@ -500,6 +616,7 @@ Please provide a comprehensive answer based on the context provided."""
             "chunks": retrieval_result['chunks'],
             "sources": retrieval_result['sources'],
             "cost": total_cost,
+            "usage": total_usage,
             "retrieval_time_ms": retrieval_result['retrieval_time_ms'],
             "total_time_s": elapsed,
             "num_chunks": retrieval_result['num_chunks']
@@ -1,8 +1,7 @@
 import os
-import requests
-import json
 from dotenv import load_dotenv
 from src.vectorstore import FaissVectorStore
+from rag_pipeline.auth import CredentialError, get_credential_provider
 import anthropic
 
 load_dotenv()
@@ -22,12 +21,11 @@ class RAGSearch:
 
         # Get Claude API key using TR's authentication
         payload = {"workspace_id": workspace_id}
-        url = "https://aiplatform.gcs.int.thomsonreuters.com/v1/anthropic/token"
-        resp = requests.post(url, headers=None, json=payload)
-        credentials = json.loads(resp.content)
-
-        if 'anthropic_api_key' not in credentials:
-            raise ValueError(f"Failed to retrieve Anthropic API key: {credentials}")
+        url = os.getenv("TR_ANTHROPIC_TOKEN_URL", "https://aiplatform.gcs.int.thomsonreuters.com/v1/anthropic/token")
+        try:
+            credentials = get_credential_provider(url, payload).get()
+        except CredentialError as e:
+            raise ValueError(f"Failed to retrieve Anthropic API key: {e}")
 
         self.llm = anthropic.Anthropic(api_key=credentials["anthropic_api_key"])
         self.llm_model = llm_model
@@ -35,7 +35,8 @@ class AgentState(TypedDict):
     uc_counter: int  # Running UC ID counter for numbering (always starts from 0, no continuation)
       
     # ========== GENERATED OUTPUT ==========  
-    generated_use_cases: List[Dict]  # All generated use cases (N sub-functions × 8 use cases)
+    generated_use_cases: List[Dict]  # All generated use cases (N sub-functions × 8 use cases)  
+    duplicate_pairs: List[Dict]  # Near-duplicates found before export (vs existing and earlier generated use cases)
       
     # ========== ROUTING FLAGS ==========  
     has_strategic_priorities: bool  # True if File 5+ uploaded (triggers strategic priority boost logic)  
@@ -0,0 +1,162 @@
+"""Test script for job cancellation
+Checks that progress events arriving after a cancel never overwrite it
+
+Run directly (python test_job_cancel.py) or under pytest. The Redis store
+cases need fakeredis and are skipped without it.
+"""
+import os
+import sys
+import tempfile
+import threading
+
+# backend is imported from the repository root
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backend.job_store import SQLiteJobStore, RedisJobStore
+from backend.progress import ProgressPublisher
+
+
+class Skipped(Exception):
+    """Raised by skip() when run as a script"""
+
+
+def skip(reason: str):
+    if "pytest" in sys.modules:
+        import pytest
+        pytest.skip(reason)
+    raise Skipped(reason)
+
+
+def sqlite_store() -> SQLiteJobStore:
+    return SQLiteJobStore(os.path.join(tempfile.mkdtemp(), "jobs.sqlite3"))
+
+
+def redis_store() -> RedisJobStore:
+    try:
+        import fakeredis
+    except ImportError:
+        skip("fakeredis is not installed")
+    store = RedisJobStore.__new__(RedisJobStore)
+    store.client = fakeredis.FakeRedis(decode_responses=True)
+    store.prefix = "test:"
+    return store
+
+
+def running_job(store, job_id: str = "job-1"):
+    store.create({
+        "job_id": job_id,
+        "status": "running",
+        "workflow_type": "agentic",
+        "progress": 10,
+        "current_stage": "retrieve",
+        "message": ""
+    })
+
+
+def check_late_event_ignored(store):
+    publisher = ProgressPublisher(redis_url=None, job_store=store)
+    running_job(store)
+
+    assert publisher.publish("job-1", status="cancelled", current_step="Cancelled by user") is not None
+    assert publisher.publish("job-1", status="running", progress=80, current_step="generate") is None
+    assert publisher.publish("job-1", status="completed", progress=100, results={"answer": "late"}) is None
+
+    job = store.get("job-1")
+    assert job["status"] == "cancelled", job["status"]
+    assert job["progress"] == 10, job["progress"]
+    assert job["results"] is None, job["results"]
+
+
+def check_update_unless_status(store):
+    running_job(store)
+
+    assert store.update("job-1", unless_status=("cancelled",), progress=50)["progress"] == 50
+    store.update("job-1", status="cancelled")
+    assert store.update("job-1", unless_status=("cancelled",), status="running") is None
+    assert store.update("missing", unless_status=("cancelled",), progress=1) is None
+    assert store.get("job-1", include_results=False)["status"] == "cancelled"
+
+
+def check_cancel_race(store):
+    """Progress events racing a cancel from several threads never win"""
+    publisher = ProgressPublisher(redis_url=None, job_store=store)
+    for attempt in range(10):
+        job_id = f"race-{attempt}"
+        running_job(store, job_id)
+        start = threading.Barrier(5)
+
+        def progress_events():
+            start.wait()
+            for step in range(20):
+                publisher.publish(job_id, status="running", progress=20 + step, current_step="generate")
+
+        threads = [threading.Thread(target=progress_events) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        start.wait()
+        publisher.publish(job_id, status="cancelled", current_step="Cancelled by user")
+        for thread in threads:
+            thread.join()
+
+        status = store.get(job_id, include_results=False)["status"]
+        assert status == "cancelled", f"{job_id}: {status}"
+
+
+def test_sqlite_late_event_ignored():
+    check_late_event_ignored(sqlite_store())
+
+
+def test_sqlite_update_unless_status():
+    check_update_unless_status(sqlite_store())
+
+
+def test_sqlite_cancel_race():
+    check_cancel_race(sqlite_store())
+
+
+def test_redis_late_event_ignored():
+    check_late_event_ignored(redis_store())
+
+
+def test_redis_update_unless_status():
+    check_update_unless_status(redis_store())
+
+
+def test_redis_cancel_race():
+    check_cancel_race(redis_store())
+
+
+TESTS = [
+    test_sqlite_late_event_ignored,
+    test_sqlite_update_unless_status,
+    test_sqlite_cancel_race,
+    test_redis_late_event_ignored,
+    test_redis_update_unless_status,
+    test_redis_cancel_race,
+]
+
+
+def main():
+    print("=" * 70)
+    print("JOB CANCEL TEST")
+    print("=" * 70)
+
+    failures = 0
+    for test in TESTS:
+        try:
+            test()
+            print(f"  ✓ {test.__name__}")
+        except Skipped as e:
+            print(f"  - {test.__name__}: SKIPPED ({e})")
+        except AssertionError as e:
+            failures += 1
+            print(f"  ✗ {test.__name__}: {e}")
+
+    if failures:
+        print(f"\n✗ {failures}/{len(TESTS)} test(s) failed")
+        sys.exit(1)
+    print("\n✓ All tests passed")
+
+
+if __name__ == "__main__":
+    main()
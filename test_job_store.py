@@ -0,0 +1,139 @@
+"""Test script for the API job store
+Checks lazy database creation, cursor paging and status filters on SQLite
+
+Run directly (python test_job_store.py) or under pytest.
+"""
+import os
+import sys
+import tempfile
+
+# backend is imported from the repository root
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backend.job_store import SQLiteJobStore, MAX_PAGE_SIZE
+
+
+def make_store(num_jobs: int = 0, same_timestamp: bool = False) -> SQLiteJobStore:
+    """Store in a temp dir with jobs job-000.. (created one second apart unless same_timestamp)"""
+    store = SQLiteJobStore(os.path.join(tempfile.mkdtemp(), "results", "jobs.sqlite3"))
+    for i in range(num_jobs):
+        store.create({
+            "job_id": f"job-{i:03d}",
+            "status": "completed" if i % 3 == 0 else "queued",
+            "workflow_type": "agentic",
+            "progress": 0,
+            "current_stage": "queued",
+            "message": "",
+            "created_at": 1_700_000_000 if same_timestamp else 1_700_000_000 + i,
+            "results": {"index": i} if i % 3 == 0 else None
+        })
+    return store
+
+
+def all_pages(store: SQLiteJobStore, **kwargs):
+    """Follow next_cursor to the last page; returns (job ids in order, page sizes)"""
+    job_ids, sizes, cursor = [], [], None
+    while True:
+        jobs, cursor = store.list(cursor=cursor, **kwargs)
+        job_ids.extend(job["job_id"] for job in jobs)
+        sizes.append(len(jobs))
+        if cursor is None:
+            return job_ids, sizes
+
+
+def test_database_created_lazily():
+    """Constructing the store touches no file; the first query creates it"""
+    path = os.path.join(tempfile.mkdtemp(), "results", "jobs.sqlite3")
+    store = SQLiteJobStore(path)
+    assert not os.path.exists(path)
+
+    assert store.count() == 0
+    assert os.path.exists(path)
+
+
+def test_paging_covers_every_job_once():
+    """Pages are newest first, and the last page has no next_cursor"""
+    store = make_store(23)
+    job_ids, sizes = all_pages(store, limit=10)
+
+    assert sizes == [10, 10, 3], sizes
+    assert job_ids == [f"job-{i:03d}" for i in range(22, -1, -1)]
+
+
+def test_paging_with_equal_timestamps():
+    """Jobs created in the same instant are ordered by job_id, not skipped or repeated"""
+    store = make_store(12, same_timestamp=True)
+    job_ids, _ = all_pages(store, limit=5)
+
+    assert len(job_ids) == len(set(job_ids)) == 12, job_ids
+
+
+def test_exact_page_boundary():
+    """A full last page does not return a cursor to an empty page"""
+    store = make_store(10)
+    jobs, cursor = store.list(limit=10)
+
+    assert len(jobs) == 10 and cursor is None
+
+
+def test_status_filter_and_count():
+    """Filtered paging and count agree"""
+    store = make_store(23)
+    job_ids, _ = all_pages(store, status="completed", limit=3)
+
+    assert len(job_ids) == store.count("completed") == 8, job_ids
+    assert store.count() == 23
+
+
+def test_limit_is_capped():
+    """Page size is capped at MAX_PAGE_SIZE"""
+    store = make_store(MAX_PAGE_SIZE + 5)
+    jobs, cursor = store.list(limit=MAX_PAGE_SIZE * 10)
+
+    assert len(jobs) == MAX_PAGE_SIZE and cursor is not None
+
+
+def test_results_only_on_request():
+    """Result payloads are attached only with include_results"""
+    store = make_store(3)
+    jobs, _ = store.list()
+    assert all("results" not in job for job in jobs)
+
+    jobs, _ = store.list(include_results=True)
+    results = {job["job_id"]: job["results"] for job in jobs}
+    assert results == {"job-002": None, "job-001": None, "job-000": {"index": 0}}, results
+
+
+TESTS = [
+    test_database_created_lazily,
+    test_paging_covers_every_job_once,
+    test_paging_with_equal_timestamps,
+    test_exact_page_boundary,
+    test_status_filter_and_count,
+    test_limit_is_capped,
+    test_results_only_on_request,
+]
+
+
+def main():
+    print("=" * 70)
+    print("JOB STORE TEST")
+    print("=" * 70)
+
+    failures = 0
+    for test in TESTS:
+        try:
+            test()
+            print(f"  ✓ {test.__name__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"  ✗ {test.__name__}: {e}")
+
+    if failures:
+        print(f"\n✗ {failures}/{len(TESTS)} test(s) failed")
+        sys.exit(1)
+    print(f"\n✓ All {len(TESTS)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Test script for incremental JSON array parsing
+Checks fences and preambles, truncated tails, tricky strings and malformed objects
+
+Run directly (python test_json_stream.py) or under pytest.
+"""
+import os
+import sys
+
+# utils is imported from the repository root
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.json_stream import JSONArrayStreamParser, parse_json_array
+
+
+def test_fence_and_preamble_skipped():
+    """Text and a ```json fence before the array are ignored"""
+    text = 'Here are the use cases:\n```json\n[{"a": 1}, {"a": 2}]\n```\nDone [see above]'
+
+    assert parse_json_array(text) == [{"a": 1}, {"a": 2}]
+
+
+def test_bracketed_prose_and_empty_list_in_preamble():
+    """An empty [] or [bracketed prose] before the array does not end parsing"""
+    assert parse_json_array('Options: [] then [{"a":1}]') == [{"a": 1}]
+    assert parse_json_array('[Note] see below [ ] and [{"a":1}]') == [{"a": 1}]
+
+
+def test_truncated_tail_keeps_completed_objects():
+    """A response cut off mid-object still yields every finished object"""
+    assert parse_json_array('[{"a": 1}, {"a": 2}, {"a": ') == [{"a": 1}, {"a": 2}]
+
+
+def test_braces_and_escaped_quotes_in_strings():
+    """Brackets and escaped quotes inside strings do not change nesting"""
+    text = r'[{"s": "a } ] { [ b"}, {"s": "say \"hi}\" \\"}, {"n": {"x": [1, {"y": 2}]}}]'
+
+    assert parse_json_array(text) == [{"s": "a } ] { [ b"}, {"s": 'say "hi}" \\'}, {"n": {"x": [1, {"y": 2}]}}]
+
+
+def test_malformed_objects_counted_and_skipped():
+    """An object that fails to decode is skipped and the rest are kept"""
+    parser = JSONArrayStreamParser()
+    objects = parser.feed('[{"a": 1}, {"a": 2,}, {"a": 3}]')
+
+    assert objects == [{"a": 1}, {"a": 3}], objects
+    assert parser.errors == 1 and parser.emitted == 2
+
+
+def test_chunk_boundaries():
+    """Objects are emitted as their closing brace arrives, however the text is split"""
+    text = 'x [] ```json\n[{"s": "}\\"{"}, {"a": [1, 2]}]'
+    parser = JSONArrayStreamParser()
+    objects = [obj for ch in text for obj in parser.feed(ch)]
+
+    assert objects == [{"s": '}"{'}, {"a": [1, 2]}], objects
+    assert parser.done
+
+
+def test_text_after_array_ignored():
+    """Nothing after the closing bracket is parsed"""
+    assert parse_json_array('[{"a": 1}] and also [{"b": 2}]') == [{"a": 1}]
+
+
+TESTS = [
+    test_fence_and_preamble_skipped,
+    test_bracketed_prose_and_empty_list_in_preamble,
+    test_truncated_tail_keeps_completed_objects,
+    test_braces_and_escaped_quotes_in_strings,
+    test_malformed_objects_counted_and_skipped,
+    test_chunk_boundaries,
+    test_text_after_array_ignored,
+]
+
+
+def main():
+    print("=" * 70)
+    print("JSON STREAM TEST")
+    print("=" * 70)
+
+    failures = 0
+    for test in TESTS:
+        try:
+            test()
+            print(f"  ✓ {test.__name__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"  ✗ {test.__name__}: {e}")
+
+    if failures:
+        print(f"\n✗ {failures}/{len(TESTS)} test(s) failed")
+        sys.exit(1)
+    print(f"\n✓ All {len(TESTS)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
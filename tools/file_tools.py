@@ -9,6 +9,7 @@ import pandas as pd
 import docx  
 from typing import List, Dict
 import os
+from utils.workbook_cache import get_workbook, top_activities, ACTIVITY_COLUMNS
   
 def detect_sub_functions_tool(file3_path: str) -> List[str]:  
     """  
@@ -21,8 +22,8 @@ def detect_sub_functions_tool(file3_path: str) -> List[str]:
         List of sub-function names (sheet names, excluding 'Summary')  
     """  
     try:  
-        excel_file = pd.ExcelFile(file3_path)  
-        all_sheets = excel_file.sheet_names
+        # Parsed once per run; extract_activities_tool reuses the same parse
+        all_sheets = get_workbook(file3_path, ACTIVITY_COLUMNS).sheet_names
           
         # Exclude Summary sheet (case-insensitive)  
         sub_functions = [s for s in all_sheets if s.lower() != "summary"]
@@ -48,24 +49,10 @@ def extract_activities_tool(file3_path: str, sheet_name: str) -> List[Dict]:
         List of activity dictionaries with activity, time_spent_pct, current_tools  
     """  
     try:  
-        df = pd.read_excel(file3_path, sheet_name=sheet_name)
+        df = get_workbook(file3_path, ACTIVITY_COLUMNS).sheet(sheet_name)
           
-        activities = []  
-        for idx, row in df.iterrows():  
-            activity = row.get("Activity", "")  
-            time_spent = row.get("Estimated % of Time Spent", 0)  
-            tools = row.get("Functional AI Tools (Applicable)", "")
-              
-            # Filter out invalid rows  
-            if pd.notna(activity) and activity.strip() and activity.lower() not in ["total", "note", ""]:  
-                activities.append({  
-                    "activity": str(activity).strip(),  
-                    "time_spent_pct": float(time_spent) if pd.notna(time_spent) else 0,  
-                    "current_tools": str(tools) if pd.notna(tools) else "None"  
-                })
-          
-        # Sort by time spent (descending), get top 8  
-        activities = sorted(activities, key=lambda x: x['time_spent_pct'], reverse=True)[:8]
+        # Filter invalid rows, then top 8 by time spent (descending)  
+        activities = top_activities(df, n=8)
           
         print(f"✅ Extracted {len(activities)} activities from '{sheet_name}':")  
         for i, a in enumerate(activities, 1):  
@@ -0,0 +1,357 @@
+# utils/dedup.py
+"""
+Near-Duplicate Detection
+Finds generated use cases that repeat each other or an existing enriched use
+case: a MinHash/LSH lexical pass plus a blocked cosine-similarity pass over
+sentence embeddings (when sentence-transformers is installed)
+"""
+
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Field names (generated use cases, then Stage 2 enriched output columns)
+TITLE_FIELDS = ("use_case_title", "Enriched Use Case Name", "Original Use Case Name")
+DESCRIPTION_FIELDS = ("detailed_description", "Detailed Enriched Use Case Description", "Original Use Case Description")
+
+MAX_TEXT_CHARS = 1000  # Title + start of the description is enough to compare
+NUM_PERM = 128
+LSH_BANDS = 16  # 16 bands x 8 rows: candidates from Jaccard ~0.7 up
+SHINGLE_SIZE = 3
+LSH_MAX_BUCKET = 50  # Larger buckets pair each member with the first one only
+MINHASH_PRIME = 4294967311  # Smallest prime above 2**32
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def use_case_text(use_case: Dict) -> str:
+    """
+    Text compared for a use case: title plus the start of its description
+
+    Args:
+        use_case: Generated or existing use case dictionary
+
+    Returns:
+        Comparison text (empty if neither field is present)
+    """
+    def first(fields) -> str:
+        for field in fields:
+            value = use_case.get(field)
+            if isinstance(value, str) and value.strip():
+                return value.strip()
+        return ""
+
+    return f"{first(TITLE_FIELDS)}. {first(DESCRIPTION_FIELDS)}"[:MAX_TEXT_CHARS]
+
+
+# ---------- Lexical pass: MinHash + LSH ----------
+
+def _shingle_hashes(text: str) -> np.ndarray:
+    """CRC32 hashes of the word n-gram shingles of a text"""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    return np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+
+def minhash_signatures(texts: List[str], num_perm: int = NUM_PERM, seed: int = 1) -> np.ndarray:
+    """
+    MinHash signatures (one row per text)
+
+    Args:
+        texts: Texts to sign
+        num_perm: Hash permutations per signature
+        seed: Permutation seed (signatures are only comparable with the same seed)
+
+    Returns:
+        uint64 array of shape (len(texts), num_perm)
+    """
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, 2 ** 31, size=num_perm).astype(np.uint64)
+    b = rng.randint(0, 2 ** 31, size=num_perm).astype(np.uint64)
+
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint64)
+    for i, text in enumerate(texts):
+        hashes = _shingle_hashes(text)
+        # (shingles x permutations) in one vectorized step
+        signatures[i] = ((hashes[:, None] * a + b) % MINHASH_PRIME).min(axis=0)
+    return signatures
+
+
+def lsh_candidate_pairs(signatures: np.ndarray, bands: int = LSH_BANDS) -> np.ndarray:
+    """
+    Candidate pairs that share at least one LSH band bucket
+
+    Args:
+        signatures: MinHash signatures
+        bands: Number of bands (must divide the signature length)
+
+    Returns:
+        int array of shape (k, 2) with i < j
+    """
+    n, num_perm = signatures.shape
+    rows = num_perm // bands
+    pairs = set()
+    for band in range(bands):
+        buckets = defaultdict(list)
+        block = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        for i in range(n):
+            buckets[block[i].tobytes()].append(i)
+        for members in buckets.values():
+            if len(members) > LSH_MAX_BUCKET:
+                # Mass collision (templated text): star pairs keep this linear
+                pairs.update((members[0], member) for member in members[1:])
+            elif len(members) > 1:
+                for x in range(len(members)):
+                    for y in range(x + 1, len(members)):
+                        pairs.add((members[x], members[y]))
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    return np.array(sorted(pairs), dtype=np.int64)
+
+
+def minhash_pairs(texts: List[str], threshold: float) -> Iterator[Tuple[int, int, float]]:
+    """
+    Lexical near-duplicate pairs (estimated Jaccard similarity >= threshold)
+
+    Args:
+        texts: Texts to compare
+        threshold: Minimum estimated Jaccard similarity
+
+    Yields:
+        (i, j, similarity) with i < j
+    """
+    if len(texts) < 2:
+        return
+    signatures = minhash_signatures(texts)
+    candidates = lsh_candidate_pairs(signatures)
+    if not len(candidates):
+        return
+    # Verify all candidates at once: share of agreeing signature slots
+    similarity = (signatures[candidates[:, 0]] == signatures[candidates[:, 1]]).mean(axis=1)
+    for (i, j), sim in zip(candidates[similarity >= threshold], similarity[similarity >= threshold]):
+        yield int(i), int(j), float(sim)
+
+
+# ---------- Semantic pass: embeddings + blocked cosine similarity ----------
+
+_embedding_models: Dict[str, object] = {}
+
+
+def get_embedding_model(model_name: str):
+    """
+    Get or load a sentence-transformers model (None if the package is missing)
+
+    sentence-transformers (and torch) are imported here, on first use, not
+    when this module is imported.
+
+    Args:
+        model_name: sentence-transformers model name
+
+    Returns:
+        Loaded model or None
+    """
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:  # Optional: lexical pass only
+        return None
+    if model_name not in _embedding_models:
+        _embedding_models[model_name] = SentenceTransformer(model_name)
+        print(f"✅ Loaded embedding model: {model_name}")
+    return _embedding_models[model_name]
+
+
+def embed_texts(texts: List[str], model, batch_size: int = 64) -> np.ndarray:
+    """
+    Embed all texts in one batched call, L2-normalized
+
+    Args:
+        texts: Texts to embed
+        model: sentence-transformers model
+        batch_size: Encoder batch size
+
+    Returns:
+        float32 array of shape (len(texts), dim) with unit rows
+    """
+    embeddings = model.encode(texts, batch_size=batch_size, show_progress_bar=False, convert_to_numpy=True)
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.maximum(norms, 1e-12)
+
+
+def cosine_pairs(
+    embeddings: np.ndarray,
+    threshold: float,
+    first_row: int = 0,
+    block_size: int = 1024
+) -> Iterator[Tuple[int, int, float]]:
+    """
+    Pairs with cosine similarity >= threshold, computed block by block
+
+    Each block of rows is multiplied against all earlier rows in one matrix
+    product, so memory stays at block_size x n and no Python loop runs per
+    pair.
+
+    Args:
+        embeddings: Unit-normalized embeddings
+        threshold: Minimum cosine similarity
+        first_row: Only rows from here on are compared (earlier rows are
+            partners only, e.g. existing use cases)
+        block_size: Rows per block
+
+    Yields:
+        (i, j, similarity) with i < j and j >= first_row
+    """
+    for start in range(first_row, len(embeddings), block_size):
+        end = min(start + block_size, len(embeddings))
+        sims = embeddings[start:end] @ embeddings[:end].T
+        rows = np.arange(start, end)[:, None]
+        sims[np.arange(end)[None, :] >= rows] = -1.0  # Earlier partners only (i < j)
+        r, c = np.nonzero(sims >= threshold)
+        for j, i, sim in zip(r + start, c, sims[r, c]):
+            yield int(i), int(j), float(sim)
+
+
+# ---------- Detection ----------
+
+def find_near_duplicates(
+    generated: List[Dict],
+    existing: Optional[List[Dict]] = None,
+    semantic_threshold: float = 0.9,
+    lexical_threshold: float = 0.8,
+    model_name: Optional[str] = "all-MiniLM-L6-v2"
+) -> List[Dict]:
+    """
+    Find generated use cases that duplicate an existing or an earlier generated one
+
+    Args:
+        generated: Generated use cases (in output order)
+        existing: Existing enriched use cases
+        semantic_threshold: Minimum cosine similarity of embeddings
+        lexical_threshold: Minimum estimated Jaccard similarity of shingles
+        model_name: Embedding model (None = lexical pass only)
+
+    Returns:
+        List of pairs {"index", "use_case_id", "duplicate_of", "duplicate_kind",
+        "duplicate_index", "similarity", "method"}, one per generated use case
+        and partner; index and duplicate_index are positions in generated
+        (duplicate_index is None for existing partners)
+    """
+    existing = existing or []
+    offset = len(existing)
+    texts = [use_case_text(uc) for uc in existing] + [use_case_text(uc) for uc in generated]
+    # Use cases without title or description are never compared
+    blank = {i for i, text in enumerate(texts) if not _WORD_RE.search(text)}
+
+    # Best score per (generated index, partner index) across both passes
+    best: Dict[Tuple[int, int], Tuple[float, str]] = {}
+
+    def record(i: int, j: int, sim: float, method: str):
+        if j < offset or i in blank or j in blank:
+            return  # Existing vs existing is not our concern
+        if sim > best.get((j, i), (-1.0, ""))[0]:
+            best[(j, i)] = (sim, method)
+
+    for i, j, sim in minhash_pairs(texts, lexical_threshold):
+        record(i, j, sim, "minhash")
+
+    if model_name and len(texts) > 1:
+        # A model that cannot be loaded or run must not discard the lexical pairs
+        try:
+            model = get_embedding_model(model_name)
+            embeddings = embed_texts(texts, model) if model is not None else None
+        except Exception as e:
+            print(f"⚠️  Embedding pass skipped ({e}); using lexical matches only")
+            embeddings = None
+        if embeddings is not None:
+            for i, j, sim in cosine_pairs(embeddings, semantic_threshold, first_row=offset):
+                record(i, j, sim, "embedding")
+
+    pairs = []
+    for (j, i), (sim, method) in sorted(best.items()):
+        use_case = generated[j - offset]
+        if i < offset:
+            partner = existing[i]
+            duplicate_of = next(
+                (str(partner[f]) for f in TITLE_FIELDS if isinstance(partner.get(f), str) and partner[f].strip()),
+                f"existing #{i + 1}"
+            )
+            kind = "existing"
+            duplicate_index = None
+        else:
+            duplicate_index = i - offset
+            duplicate_of = generated[duplicate_index].get('use_case_id', f"generated #{duplicate_index + 1}")
+            kind = "generated"
+        pairs.append({
+            "index": j - offset,
+            "use_case_id": use_case.get('use_case_id'),
+            "duplicate_of": duplicate_of,
+            "duplicate_kind": kind,
+            "duplicate_index": duplicate_index,
+            "similarity": round(sim, 3),
+            "method": method
+        })
+    return pairs
+
+
+def apply_duplicates(generated: List[Dict], pairs: List[Dict], action: str = "flag") -> List[Dict]:
+    """
+    Flag or drop near-duplicates
+
+    The first occurrence is kept: a use case is a duplicate if it matches an
+    existing use case or an earlier generated one that is itself kept.
+    Dropping renumbers the kept use cases so their UC IDs have no gaps.
+
+    Args:
+        generated: Generated use cases (in output order)
+        pairs: Pairs from find_near_duplicates()
+        action: "flag" (annotate duplicate_of/duplicate_similarity) or "drop"
+
+    Returns:
+        Use cases to keep (all of them when flagging)
+    """
+    partners = defaultdict(list)
+    for pair in pairs:
+        partners[pair["index"]].append(pair)
+
+    duplicate = [False] * len(generated)
+    for j in range(len(generated)):
+        for pair in partners.get(j, ()):
+            if pair["duplicate_index"] is None or not duplicate[pair["duplicate_index"]]:
+                duplicate[j] = True
+                if action == "flag":
+                    generated[j]['duplicate_of'] = pair["duplicate_of"]
+                    generated[j]['duplicate_similarity'] = pair["similarity"]
+                break
+
+    if action == "drop":
+        kept = [uc for uc, is_duplicate in zip(generated, duplicate) if not is_duplicate]
+        renumber_use_case_ids(kept)
+        return kept
+    return generated
+
+
+def renumber_use_case_ids(use_cases: List[Dict], uc_counter: int = 0) -> int:
+    """
+    Number UC IDs consecutively, keeping each ID's sub-function prefix
+
+    "UC-DG-001, UC-DG-003, UC-PM-004" becomes "UC-DG-001, UC-DG-002, UC-PM-003".
+
+    Args:
+        use_cases: Use cases in output order (updated in place)
+        uc_counter: Running counter before the first use case
+
+    Returns:
+        Updated running counter
+    """
+    for use_case in use_cases:
+        uc_counter += 1
+        uc_id = use_case.get('use_case_id')
+        if isinstance(uc_id, str) and uc_id.count("-") >= 2:
+            use_case['use_case_id'] = f"{uc_id.rsplit('-', 1)[0]}-{uc_counter:03d}"
+    return uc_counter
@@ -0,0 +1,11 @@
+"""Streaming Excel export
+The writer lives in Stage 2's utils/excel_export.py (shared with Agent 5) and
+is imported by package path, as config_tr_auth does for the response cache
+"""
+from Automation.Business_Units.Marketing.Stage2.utils.excel_export import (
+    EXCEL_MAX_CELL_CHARS,
+    ExcelStreamWriter,
+    export_rows,
+)
+
+__all__ = ["ExcelStreamWriter", "export_rows", "EXCEL_MAX_CELL_CHARS"]
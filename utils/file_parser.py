@@ -3,7 +3,7 @@ import pandas as pd
 import docx  
 from typing import Dict, List, Optional, Tuple  
 from loguru import logger  
-import openpyxl
+from utils.workbook_cache import get_workbook, ROLE_ACTIVITY_COLUMNS
   
 class FileParser:  
     """Handles parsing of all input files for the agentic system"""
@@ -75,9 +75,9 @@ class FileParser:
         logger.info(f"Parsing Role Activity Mapping Excel: {file_path}")
           
         try:  
-            # Load Excel file and get all sheet names  
-            excel_file = pd.ExcelFile(file_path)  
-            all_sheets = excel_file.sheet_names
+            # Parse all sheets in one pass (read-only, needed columns only)  
+            workbook = get_workbook(file_path, ROLE_ACTIVITY_COLUMNS)  
+            all_sheets = workbook.sheet_names
               
             # Exclude Summary sheet  
             sub_function_sheets = [s for s in all_sheets if s.lower() != "summary"]
@@ -87,7 +87,7 @@ class FileParser:
             # Parse each sub-function sheet  
             sub_functions = {}  
             for sheet_name in sub_function_sheets:  
-                df = pd.read_excel(file_path, sheet_name=sheet_name)  
+                df = workbook.sheet(sheet_name)  
                 sub_functions[sheet_name] = df  
                 logger.info(f"  - Parsed '{sheet_name}': {len(df)} rows, {len(df.columns)} columns")
               
@@ -0,0 +1,103 @@
+# utils/json_stream.py
+"""
+Incremental JSON Array Parsing
+Extracts each complete object from a top-level JSON array as text streams in
+"""
+
+import json
+from typing import Any, List
+
+
+class JSONArrayStreamParser:
+    """
+    Incremental parser for a streamed JSON array of objects
+
+    Text before the array (e.g. a ```json fence or a preamble, including any
+    bracketed prose or empty list in it) is skipped.
+    Each top-level object is decoded as soon as its closing brace arrives,
+    so a response cut off mid-array still yields every completed object.
+    Objects that fail to decode are counted in `errors` and skipped.
+    """
+
+    def __init__(self):
+        self.in_array = False
+        self.done = False
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.buffer: List[str] = []
+        self.emitted = 0
+        self.errors = 0
+
+    def feed(self, text: str) -> List[Any]:
+        """
+        Consume the next chunk of streamed text
+
+        Args:
+            text: Next chunk of the response
+
+        Returns:
+            List of objects completed by this chunk
+        """
+        objects = []
+
+        for ch in text:
+            if self.done:
+                break
+
+            if not self.in_array:
+                if ch == "[":
+                    self.in_array = True
+                continue
+
+            if self.depth == 0:
+                # Between array elements
+                if ch == "{":
+                    self.depth = 1
+                    self.buffer = [ch]
+                elif ch == "]" or not (ch.isspace() or ch == ","):
+                    if self.emitted == 0 and not self.errors:
+                        self.in_array = False  # The "[" was prose or an empty list, not the array
+                    elif ch == "]":
+                        self.done = True
+                continue
+
+            self.buffer.append(ch)
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                continue
+
+            if ch == '"':
+                self.in_string = True
+            elif ch in "{[":
+                self.depth += 1
+            elif ch in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    try:
+                        objects.append(json.loads("".join(self.buffer)))
+                        self.emitted += 1
+                    except json.JSONDecodeError:
+                        self.errors += 1
+                    self.buffer = []
+
+        return objects
+
+
+def parse_json_array(text: str) -> List[Any]:
+    """
+    Parse every complete object from a (possibly truncated) JSON array
+
+    Args:
+        text: Full response text
+
+    Returns:
+        List of decoded objects
+    """
+    return JSONArrayStreamParser().feed(text)
@@ -0,0 +1,65 @@
+# utils/use_case_schema.py
+"""
+Use Case Output Schema
+27-column use case definition as a forced tool call, so generations return
+structured input instead of free text that needs parsing heuristics
+"""
+
+from typing import Dict, List
+
+# Output columns, in spreadsheet order
+USE_CASE_FIELDS = [
+    "use_case_id", "use_case_title", "functional_non_functional", "company", "status",
+    "detailed_description", "ai_technology", "business_impact", "business_impact_category",
+    "solution_complexity", "implementation_complexity", "implementation_priority",
+    "target_process_area", "current_tools", "impacted_roles", "impacted_activities",
+    "current_tool_adaptation", "adaptation_to_marketing", "implementation_insights",
+    "risks_mitigations", "industry_alignment", "success_metrics", "source_publication",
+    "source_url", "source_date", "information_gaps", "sub_function",
+]
+
+# Near-duplicate annotations (utils/dedup.py, DEDUP_ACTION = "flag")
+DUPLICATE_FIELDS = ["duplicate_of", "duplicate_similarity"]
+
+USE_CASE_TOOL_NAME = "record_use_cases"
+
+USE_CASE_TOOL = {
+    "name": USE_CASE_TOOL_NAME,
+    "description": "Record the generated AI/ML use cases, one object per requested UC ID.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "use_cases": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {field: {"type": "string"} for field in USE_CASE_FIELDS},
+                    "required": USE_CASE_FIELDS,
+                },
+            },
+        },
+        "required": ["use_cases"],
+    },
+}
+
+# Forces the model to answer with the tool call
+USE_CASE_TOOL_CHOICE = {"type": "tool", "name": USE_CASE_TOOL_NAME}
+
+TOOL_OUTPUT_INSTRUCTION = f"Record the use cases by calling the {USE_CASE_TOOL_NAME} tool (the UC IDs above are pre-assigned; use them exactly)."
+
+
+def extract_tool_use_cases(response) -> List[Dict]:
+    """
+    Get the use cases from a forced record_use_cases tool call
+
+    Args:
+        response: Message returned by messages.create()
+
+    Returns:
+        List of use case dictionaries (empty if the tool was not called)
+    """
+    for block in response.content:
+        if getattr(block, "type", None) == "tool_use" and block.name == USE_CASE_TOOL_NAME:
+            use_cases = block.input.get("use_cases", [])
+            return [uc for uc in use_cases if isinstance(uc, dict)]
+    return []
@@ -0,0 +1,179 @@
+# utils/workbook_cache.py
+"""
+Workbook Cache
+Parses each Excel workbook once per process (openpyxl read-only, needed
+columns only) and hands out per-sheet DataFrames
+"""
+
+import os
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, List, Optional, Sequence
+
+import openpyxl
+import pandas as pd
+
+# Role Activity Mapping columns
+ACTIVITY_COLUMN = "Activity"
+TIME_SPENT_COLUMN = "Estimated % of Time Spent"
+TOOLS_COLUMN = "Functional AI Tools (Applicable)"
+
+# Columns needed for top-activity selection
+ACTIVITY_COLUMNS = (ACTIVITY_COLUMN, TIME_SPENT_COLUMN, TOOLS_COLUMN)
+
+# Columns needed for full sub-function metadata
+ROLE_ACTIVITY_COLUMNS = ACTIVITY_COLUMNS + (
+    "FTE",
+    "Generic AI Assistants (Applicable)",
+    "% usage of existing AI tools for activity",
+    "Existing AI Use Cases\n(List out the activities the existing AI tools are being used for here)",
+    "Proposed Use Cases\n(AI use cases identified but not deployed, wishlist)",
+)
+
+MAX_CACHED_WORKBOOKS = 8
+
+# Cell strings read as missing (same defaults as pandas.read_excel)
+NA_STRINGS = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+})
+
+
+class Workbook:
+    """Parsed workbook: sheet names plus one DataFrame per sheet"""
+
+    def __init__(self, path: str, sheets: Dict[str, pd.DataFrame]):
+        self.path = path
+        self.sheets = sheets
+
+    @property
+    def sheet_names(self) -> List[str]:
+        """Sheet names in workbook order"""
+        return list(self.sheets)
+
+    def sheet(self, sheet_name: str) -> pd.DataFrame:
+        """
+        Get one sheet as a DataFrame (first row is the header)
+
+        Args:
+            sheet_name: Sheet name
+
+        Returns:
+            DataFrame for the sheet (shared; copy before modifying)
+        """
+        if sheet_name not in self.sheets:
+            raise KeyError(f"Worksheet named '{sheet_name}' not found")
+        return self.sheets[sheet_name]
+
+
+def _read_sheet(worksheet, columns: Optional[Sequence[str]]) -> pd.DataFrame:
+    """Read a read-only worksheet into a DataFrame, keeping only the requested columns"""
+    worksheet.reset_dimensions()  # Some writers store a wrong dimension; read every row
+    rows = worksheet.iter_rows(values_only=True)
+
+    header = next(rows, None)
+    if header is None:
+        return pd.DataFrame(columns=list(columns or []))
+
+    names = [str(h) if h is not None else f"Unnamed: {i}" for i, h in enumerate(header)]
+    positions: Dict[str, int] = {}
+    for i, name in enumerate(names):
+        positions.setdefault(name, i)  # First occurrence wins for duplicate headers
+
+    wanted = [name for name in (columns or names) if name in positions]
+    indices = [positions[name] for name in wanted]
+
+    records = []
+    for row in rows:
+        if not any(value is not None for value in row):
+            continue
+        values = [row[i] if i < len(row) else None for i in indices]
+        records.append([None if isinstance(v, str) and v in NA_STRINGS else v for v in values])
+
+    return pd.DataFrame(records, columns=wanted)
+
+
+def _parse_workbook(path: str, columns: Optional[Sequence[str]]) -> Workbook:
+    """Parse every sheet of a workbook in a single pass"""
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheets = {ws.title: _read_sheet(ws, columns) for ws in workbook.worksheets}
+    finally:
+        workbook.close()
+
+    print(f"✅ Parsed workbook once: {len(sheets)} sheets from {path}")
+    return Workbook(path, sheets)
+
+
+_cache: "OrderedDict[tuple, Workbook]" = OrderedDict()  # (path, mtime_ns, size, columns) -> Workbook
+_cache_lock = Lock()
+
+
+def get_workbook(path: str, columns: Optional[Sequence[str]] = None) -> Workbook:
+    """
+    Get a parsed workbook, parsing it on first use
+
+    Entries are keyed by path, modification time, size and column set, so
+    a replaced file is re-parsed.
+
+    Args:
+        path: Excel file path
+        columns: Columns to keep per sheet (None = all columns)
+
+    Returns:
+        Workbook with per-sheet DataFrames
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size, tuple(columns) if columns else None)
+
+    with _cache_lock:
+        workbook = _cache.get(key)
+        if workbook is None:
+            workbook = _parse_workbook(path, columns)
+            _cache[key] = workbook
+            while len(_cache) > MAX_CACHED_WORKBOOKS:
+                _cache.popitem(last=False)
+        else:
+            _cache.move_to_end(key)
+
+    return workbook
+
+
+def clear_workbook_cache():
+    """Drop all parsed workbooks"""
+    with _cache_lock:
+        _cache.clear()
+
+
+def top_activities(df: pd.DataFrame, n: int = 8) -> List[Dict]:
+    """
+    Select the top activities by Time Spent %
+
+    Args:
+        df: Sub-function sheet
+        n: Number of activities to keep
+
+    Returns:
+        List of activity dictionaries with activity, time_spent_pct, current_tools
+    """
+    def column(name: str) -> pd.Series:
+        if name in df.columns:
+            return df[name]
+        return pd.Series([None] * len(df), index=df.index, dtype=object)
+
+    activity = column(ACTIVITY_COLUMN)
+    names = activity.astype(str)
+    valid = (
+        activity.notna()
+        & (names.str.strip() != "")
+        & ~names.str.lower().isin(["total", "note", ""])
+    )
+
+    tools = column(TOOLS_COLUMN)
+    frame = pd.DataFrame({
+        "activity": names.str.strip(),
+        "time_spent_pct": pd.to_numeric(column(TIME_SPENT_COLUMN), errors="coerce").fillna(0).astype(float),
+        "current_tools": tools.where(tools.notna(), "None").astype(str),
+    })[valid]
+
+    return frame.nlargest(n, "time_spent_pct").to_dict("records")